@@ -0,0 +1,98 @@
+"""
+Management command para construir los saldos diarios de cuentas (AccountBalanceSnapshot)
+"""
+
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from accounts.models import Account
+from accounts.reconciliation import SETTLE_SECONDS
+from accounts.snapshots import AccountSnapshotService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea los saldos diarios que faltan desde el último día guardado de cada cuenta "
+        "hasta hoy (pensado para ejecutarse a diario)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-id",
+            type=int,
+            help="ID de usuario específico",
+        )
+        parser.add_argument(
+            "--all-users",
+            action="store_true",
+            help="Construir los saldos de todos los usuarios con cuentas",
+        )
+        parser.add_argument(
+            "--until",
+            help="Último día a construir (YYYY-MM-DD, por defecto hoy)",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Borrar y reconstruir todos los días desde el inicio de cada cuenta",
+        )
+        parser.add_argument(
+            "--settle-seconds",
+            type=int,
+            default=SETTLE_SECONDS,
+            help="Omitir cuentas con transacciones modificadas hace menos de N segundos",
+        )
+
+    def handle(self, *args, **options):
+        user_id = options.get("user_id")
+        until = None
+        if options.get("until"):
+            try:
+                until = datetime.strptime(options["until"], "%Y-%m-%d").date()
+            except ValueError:
+                self.stdout.write(self.style.ERROR("--until debe tener formato YYYY-MM-DD"))
+                return
+
+        if user_id:
+            if not User.objects.filter(pk=user_id).exists():
+                self.stdout.write(self.style.ERROR(f"Usuario con ID {user_id} no existe"))
+                return
+            user_ids = [user_id]
+        elif options.get("all_users"):
+            user_ids = (
+                Account.objects.values_list("user_id", flat=True).distinct().order_by("user_id")
+            )
+        else:
+            self.stdout.write(self.style.ERROR("Debes especificar --user-id <ID> o --all-users"))
+            return
+
+        users = 0
+        created = 0
+        skipped = 0
+        for current_id in user_ids:
+            result = AccountSnapshotService.build_for_user(
+                current_id,
+                until=until,
+                settle_seconds=options["settle_seconds"],
+                rebuild=options["rebuild"],
+            )
+            users += 1
+            created += result["created"]
+            skipped += len(result["skipped"])
+            if result["skipped"]:
+                self.stdout.write(
+                    f"  - Usuario {current_id}: cuentas con actividad reciente omitidas "
+                    f"{result['skipped']}"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nResumen:\n- Usuarios procesados: {users}\n"
+                f"- Saldos diarios creados: {created}\n"
+                f"- Cuentas omitidas: {skipped}"
+            )
+        )
@@ -0,0 +1,137 @@
+"""
+Management command para conciliar Account.current_balance con las transacciones
+"""
+
+import json
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from accounts.reconciliation import SETTLE_SECONDS, AccountReconciliationService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el saldo esperado de cada cuenta desde sus transacciones, reporta las "
+        "diferencias y corrige current_balance (salvo --dry-run)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-id",
+            type=int,
+            help="ID de usuario específico a conciliar",
+        )
+        parser.add_argument(
+            "--all-users",
+            action="store_true",
+            help="Conciliar las cuentas de todos los usuarios",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reportar diferencias, sin corregir saldos",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Hilos en paralelo (cada uno con su conexión a la base de datos)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Archivo JSON donde se guarda el último usuario completado",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continuar después del usuario guardado en --checkpoint",
+        )
+        parser.add_argument(
+            "--settle-seconds",
+            type=int,
+            default=SETTLE_SECONDS,
+            help="No corregir cuentas con transacciones modificadas hace menos de N segundos",
+        )
+        parser.add_argument(
+            "--anchor-unanchored",
+            action="store_true",
+            help=(
+                "Fijar el saldo de apertura de las cuentas sin ancla como saldo actual - "
+                "efecto de sus transacciones (da por bueno el saldo actual; revisarlo antes)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        user_id = options.get("user_id")
+        all_users = options.get("all_users")
+        dry_run = options.get("dry_run")
+        checkpoint = Path(options["checkpoint"]) if options.get("checkpoint") else None
+
+        if user_id:
+            if not User.objects.filter(pk=user_id).exists():
+                self.stdout.write(self.style.ERROR(f"Usuario con ID {user_id} no existe"))
+                return
+            user_ids = [user_id]
+        elif all_users:
+            user_ids = None
+        else:
+            self.stdout.write(self.style.ERROR("Debes especificar --user-id <ID> o --all-users"))
+            return
+
+        if options.get("resume") and not checkpoint:
+            self.stdout.write(self.style.ERROR("--resume requiere --checkpoint <archivo>"))
+            return
+
+        after_user_id = None
+        if options.get("resume") and checkpoint.exists():
+            after_user_id = json.loads(checkpoint.read_text())["last_user_id"]
+            self.stdout.write(f"Reanudando después del usuario {after_user_id}")
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("MODO DRY-RUN: no se modificarán los saldos"))
+
+        def save_progress(last_user_id):
+            if checkpoint:
+                checkpoint.write_text(json.dumps({"last_user_id": last_user_id}))
+
+        def report(drift_user_id, result):
+            anchored = options["anchor_unanchored"] and not dry_run
+            for account_id in result["unanchored"]:
+                status = "ancla fijada" if anchored else "sin conciliar"
+                self.stdout.write(
+                    f"  - Usuario {drift_user_id}, cuenta {account_id}: sin saldo de apertura "
+                    f"({status})"
+                )
+            for entry in result["drift"]:
+                status = "corregido" if entry["fixed"] else "sin corregir"
+                self.stdout.write(
+                    f"  - Usuario {drift_user_id}, cuenta {entry['account_id']} "
+                    f"({entry['name']}, {entry['currency']}): guardado {entry['stored']} "
+                    f"esperado {entry['expected']} ({status})"
+                )
+
+        summary = AccountReconciliationService.reconcile_all(
+            user_ids,
+            fix=not dry_run,
+            anchor=options["anchor_unanchored"] and not dry_run,
+            workers=options["workers"],
+            after_user_id=after_user_id,
+            settle_seconds=options["settle_seconds"],
+            on_progress=save_progress,
+            on_drift=report,
+        )
+
+        style = self.style.WARNING if summary["accounts_drifted"] else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"\nResumen:\n- Usuarios procesados: {summary['users']}\n"
+                f"- Cuentas con diferencias: {summary['accounts_drifted']}\n"
+                f"- Saldos corregidos: {summary['fixed']}\n"
+                f"- Con actividad reciente (sin corregir): {summary['busy']}\n"
+                f"- Cuentas sin saldo de apertura: {summary['unanchored']}"
+            )
+        )
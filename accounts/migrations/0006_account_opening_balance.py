@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0005_account_account_number_account_bank_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="account",
+            name="opening_balance",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                editable=False,
+                max_digits=15,
+                null=True,
+                verbose_name="Saldo de apertura",
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0006_account_opening_balance"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccountBalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Fecha")),
+                (
+                    "balance",
+                    models.DecimalField(decimal_places=2, max_digits=15, verbose_name="Saldo"),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_snapshots",
+                        to="accounts.account",
+                        verbose_name="Cuenta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Saldo diario de cuenta",
+                "verbose_name_plural": "Saldos diarios de cuentas",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="accountbalancesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("account", "date"), name="unique_account_balance_snapshot"
+            ),
+        ),
+    ]
@@ -76,6 +76,17 @@ class Account(models.Model):
         max_digits=15, decimal_places=2, default=Decimal("0.00"), verbose_name="Saldo actual"
     )
 
+    # Ancla de la conciliación: saldo esperado = saldo de apertura + efecto de las
+    # transacciones (ver accounts/reconciliation.py). Los ajustes manuales la desplazan
+    opening_balance = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Saldo de apertura",
+    )
+
     currency = models.CharField(
         max_length=3, choices=CURRENCY_CHOICES, default="COP", verbose_name="Moneda"
     )
@@ -111,6 +122,12 @@ class Account(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
 
+    def save(self, *args, **kwargs):
+        # El saldo con el que se crea la cuenta es su saldo de apertura
+        if self._state.adding and self.opening_balance is None:
+            self.opening_balance = self.current_balance
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.get_currency_display()})"
 
@@ -140,6 +157,35 @@ class Account(models.Model):
         ordering = ["name"]
 
 
+class AccountBalanceSnapshot(models.Model):
+    """
+    Saldo de una cuenta al cierre de un día.
+
+    El saldo es saldo de apertura + efecto de las transacciones con fecha hasta
+    ese día (ver accounts/snapshots.py). Las filas las crea el comando
+    build_account_snapshots y cada escritura de saldo de TransactionService
+    desplaza las filas con fecha igual o posterior a la de la transacción.
+    """
+
+    account = models.ForeignKey(
+        Account, on_delete=models.CASCADE, related_name="balance_snapshots", verbose_name="Cuenta"
+    )
+    date = models.DateField(verbose_name="Fecha")
+    balance = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Saldo")
+
+    class Meta:
+        verbose_name = "Saldo diario de cuenta"
+        verbose_name_plural = "Saldos diarios de cuentas"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "date"], name="unique_account_balance_snapshot"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} {self.date}: {self.balance}"
+
+
 class AccountOptionType(models.TextChoices):
     """Tipos de opciones para cuentas"""
 
@@ -0,0 +1,339 @@
+"""
+Conciliación de Account.current_balance contra las transacciones
+
+current_balance es un acumulado que TransactionService modifica con deltas y
+que nunca se recalcula: un error, una escritura a medias o una edición directa
+en el admin lo desvían sin que nadie lo note. La conciliación recalcula el
+saldo esperado de cada cuenta como
+
+    saldo de apertura (Account.opening_balance) + efecto de sus transacciones
+
+con las mismas reglas que TransactionService._balance_deltas: los ingresos
+suman en la cuenta origen; gastos, ahorros y transferencias restan; las
+transferencias suman en la cuenta destino (el capital, si el destino es una
+tarjeta de crédito con capital_amount). El efecto se obtiene con una sola
+consulta agrupada por usuario.
+
+Las cuentas creadas antes de existir opening_balance no tienen ancla y no se
+pueden conciliar: se reportan como unanchored y fix no las toca. Fijarles el
+ancla como saldo actual - efecto de las transacciones convierte cualquier
+diferencia que ya tuvieran en el nuevo punto de partida, así que solo se hace
+con anchor=True (--anchor-unanchored), después de revisar esos saldos.
+
+Las cuentas con transacciones modificadas hace menos de SETTLE_SECONDS se
+reportan pero no se corrigen: la vista guarda la transacción y luego aplica
+el saldo en otra transacción de base de datos, así que durante ese instante
+la diferencia es aparente.
+
+El comando reconcile_account_balances procesa usuarios en paralelo y puede
+reanudarse desde el último usuario completado.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import Max, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from transactions.models import Transaction
+from transactions.services import TransactionService
+
+from .models import Account
+
+logger = logging.getLogger(__name__)
+
+# Segundos sin actividad que debe tener una cuenta para corregir su saldo
+SETTLE_SECONDS = 60
+# Usuarios por tarea del pool (cada hilo usa su propia conexión)
+USERS_PER_TASK = 50
+
+CENTS = Decimal(100)
+
+
+class AccountReconciliationService:
+    """
+    Uso:
+        drift = AccountReconciliationService.reconcile_user(user_id, fix=False)
+        summary = AccountReconciliationService.reconcile_all(fix=True, workers=4)
+    """
+
+    @staticmethod
+    def transaction_effects(user_id, filters=None, by_date=False):
+        """
+        Efecto neto de las transacciones del usuario sobre cada cuenta (una consulta).
+
+        Agrupa por par (cuenta origen, cuenta destino) con agregación condicional;
+        la regla del capital de tarjetas se resuelve en Python con la categoría de
+        la cuenta destino, que viene en la misma fila.
+
+        Args:
+            user_id: ID del usuario
+            filters: Q adicional sobre Transaction (ej: rango de fechas)
+            by_date: Agrupar también por fecha; las claves pasan a ser (account_id, fecha)
+
+        Returns:
+            tuple: ({clave: Decimal en pesos}, {clave: última modificación})
+        """
+        group_fields = [
+            "origin_account_id",
+            "destination_account_id",
+            "destination_account__category",
+        ]
+        if by_date:
+            group_fields.append("date")
+        rows = (
+            Transaction.objects.filter(filters or Q(), user_id=user_id)
+            .values(*group_fields)
+            .annotate(
+                income=Sum("total_amount", filter=Q(type=TransactionService.INCOME)),
+                outflow=Sum(
+                    "total_amount",
+                    filter=Q(
+                        type__in=(
+                            TransactionService.EXPENSE,
+                            TransactionService.TRANSFER,
+                            TransactionService.SAVING,
+                        )
+                    ),
+                ),
+                inflow=Sum("total_amount", filter=Q(type=TransactionService.TRANSFER)),
+                capital_inflow=Sum(
+                    Coalesce("capital_amount", "total_amount"),
+                    filter=Q(type=TransactionService.TRANSFER),
+                ),
+                last_change=Max("updated_at"),
+            )
+            .order_by()
+        )
+
+        cents = {}
+        last_change = {}
+
+        def add(account_id, row, amount):
+            if account_id is None:
+                return
+            key = (account_id, row["date"]) if by_date else account_id
+            cents[key] = cents.get(key, 0) + (amount or 0)
+            changed_at = row["last_change"]
+            if changed_at and (key not in last_change or changed_at > last_change[key]):
+                last_change[key] = changed_at
+
+        for row in rows:
+            add(row["origin_account_id"], row, (row["income"] or 0) - (row["outflow"] or 0))
+            is_credit_card = row["destination_account__category"] == Account.CREDIT_CARD
+            add(
+                row["destination_account_id"],
+                row,
+                row["capital_inflow"] if is_credit_card else row["inflow"],
+            )
+
+        return (
+            {key: Decimal(amount) / CENTS for key, amount in cents.items()},
+            last_change,
+        )
+
+    @staticmethod
+    def reconcile_user(user_id, fix=False, settle_seconds=SETTLE_SECONDS, *, anchor=False):
+        """
+        Compara current_balance con el saldo esperado de cada cuenta del usuario.
+
+        Con fix, las cuentas se bloquean en orden de pk (igual que
+        TransactionService) y el saldo esperado se recalcula bajo el bloqueo
+        antes de escribir.
+
+        Args:
+            user_id: ID del usuario
+            fix: Corregir current_balance de las cuentas con ancla
+            settle_seconds: No corregir cuentas con actividad más reciente
+            anchor: Fijar el saldo de apertura de las cuentas sin ancla a partir
+                de su saldo actual (da por bueno ese saldo)
+
+        Returns:
+            dict: drift [{account_id, name, currency, stored, expected, difference,
+            fixed}], unanchored (IDs sin saldo de apertura; con anchor se les fija) y
+            busy (IDs con actividad reciente que no se corrigieron)
+        """
+        with transaction.atomic():
+            accounts = Account.objects.filter(user_id=user_id).order_by("pk")
+            if fix or anchor:
+                accounts = accounts.select_for_update()
+            accounts = list(accounts)
+            effects, last_change = AccountReconciliationService.transaction_effects(user_id)
+            settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+
+            result = {"drift": [], "unanchored": [], "busy": []}
+            to_update = []
+            for account in accounts:
+                effect = effects.get(account.pk, Decimal(0))
+                if account.opening_balance is None:
+                    # Sin ancla no se puede saber si el saldo actual ya estaba descuadrado
+                    result["unanchored"].append(account.pk)
+                    if anchor:
+                        account.opening_balance = account.current_balance - effect
+                        to_update.append(account)
+                    continue
+
+                expected = account.opening_balance + effect
+                if expected == account.current_balance:
+                    continue
+
+                busy = account.pk in last_change and last_change[account.pk] > settled_before
+                entry = {
+                    "account_id": account.pk,
+                    "name": account.name,
+                    "currency": account.currency,
+                    "stored": account.current_balance,
+                    "expected": expected,
+                    "difference": account.current_balance - expected,
+                    "fixed": fix and not busy,
+                }
+                result["drift"].append(entry)
+                if busy:
+                    result["busy"].append(account.pk)
+                elif fix:
+                    account.current_balance = expected
+                    to_update.append(account)
+
+            if to_update:
+                now = timezone.now()
+                for account in to_update:
+                    account.updated_at = now
+                Account.objects.bulk_update(
+                    to_update, ["current_balance", "opening_balance", "updated_at"]
+                )
+                from analytics.cache import AnalyticsCache
+
+                AnalyticsCache.bump_user(user_id)
+
+        if result["drift"]:
+            fixed = sum(entry["fixed"] for entry in result["drift"])
+            logger.warning(
+                f"Usuario {user_id}: {len(result['drift'])} cuentas con saldo descuadrado "
+                f"({fixed} corregidas)"
+            )
+        return result
+
+    @staticmethod
+    def _reconcile_users(user_ids, fix, settle_seconds, anchor):
+        return [
+            (
+                user_id,
+                AccountReconciliationService.reconcile_user(
+                    user_id, fix=fix, settle_seconds=settle_seconds, anchor=anchor
+                ),
+            )
+            for user_id in user_ids
+        ]
+
+    @staticmethod
+    def _reconcile_users_in_worker(user_ids, fix, settle_seconds, anchor):
+        """Tarea del pool: cada hilo abre su conexión y la cierra al terminar"""
+        try:
+            return AccountReconciliationService._reconcile_users(
+                user_ids, fix, settle_seconds, anchor
+            )
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def reconcile_all(
+        user_ids=None,
+        *,
+        fix=False,
+        anchor=False,
+        workers=1,
+        after_user_id=None,
+        settle_seconds=SETTLE_SECONDS,
+        on_progress=None,
+        on_drift=None,
+    ):
+        """
+        Concilia las cuentas de muchos usuarios, en orden de ID y en paralelo.
+
+        Los usuarios se reparten en bloques de USERS_PER_TASK entre ``workers``
+        hilos. ``on_progress(user_id)`` recibe el mayor ID tal que él y todos
+        los anteriores ya terminaron: guardarlo permite reanudar con
+        ``after_user_id`` sin repetir ni saltarse usuarios.
+
+        Args:
+            user_ids: IDs a conciliar (por defecto, todos los usuarios con cuentas)
+            fix: Corregir los saldos descuadrados
+            anchor: Fijar el ancla de las cuentas sin saldo de apertura (ver reconcile_user)
+            workers: Hilos en paralelo (1 = en el hilo actual)
+            after_user_id: Reanudar después de este ID
+            settle_seconds: Ver reconcile_user
+            on_progress: Callback con el último ID completado sin huecos
+            on_drift: Callback(user_id, resultado) para usuarios con diferencias o
+                cuentas sin ancla
+
+        Returns:
+            dict: users, accounts_drifted, fixed, unanchored, busy, last_user_id
+        """
+        if user_ids is None:
+            queryset = Account.objects.values_list("user_id", flat=True).distinct()
+            if after_user_id is not None:
+                queryset = queryset.filter(user_id__gt=after_user_id)
+            user_ids = list(queryset.order_by("user_id"))
+        else:
+            user_ids = sorted(
+                uid for uid in set(user_ids) if after_user_id is None or uid > after_user_id
+            )
+
+        chunks = [
+            user_ids[start : start + USERS_PER_TASK]
+            for start in range(0, len(user_ids), USERS_PER_TASK)
+        ]
+        summary = {
+            "users": 0,
+            "accounts_drifted": 0,
+            "fixed": 0,
+            "unanchored": 0,
+            "busy": 0,
+            "last_user_id": after_user_id,
+        }
+
+        def collect(results):
+            for user_id, result in results:
+                summary["users"] += 1
+                summary["accounts_drifted"] += len(result["drift"])
+                summary["fixed"] += sum(entry["fixed"] for entry in result["drift"])
+                summary["unanchored"] += len(result["unanchored"])
+                summary["busy"] += len(result["busy"])
+                if (result["drift"] or result["unanchored"]) and on_drift:
+                    on_drift(user_id, result)
+
+        def advance(chunk):
+            summary["last_user_id"] = chunk[-1]
+            if on_progress:
+                on_progress(chunk[-1])
+
+        if workers <= 1:
+            for chunk in chunks:
+                collect(
+                    AccountReconciliationService._reconcile_users(
+                        chunk, fix, settle_seconds, anchor
+                    )
+                )
+                advance(chunk)
+            return summary
+
+        # Las tareas terminan en cualquier orden; el progreso solo avanza sin huecos
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    AccountReconciliationService._reconcile_users_in_worker,
+                    chunk,
+                    fix,
+                    settle_seconds,
+                    anchor,
+                )
+                for chunk in chunks
+            ]
+            for chunk, future in zip(chunks, futures, strict=True):
+                collect(future.result())
+                advance(chunk)
+        return summary
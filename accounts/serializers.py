@@ -35,12 +35,21 @@ class AccountListSerializer(serializers.ModelSerializer):
         ]
 
     def get_credit_card_details(self, obj):
-        """Obtener detalles de tarjeta de crédito si aplica"""
-        if obj.category == Account.CREDIT_CARD:
-            from .services import AccountService
-
-            return AccountService.get_credit_card_details(obj)
-        return None
+        """
+        Obtener detalles de tarjeta de crédito si aplica
+
+        Los listados calculan los detalles de todas las tarjetas en una consulta
+        y los pasan en el contexto ("credit_card_details"); sin contexto se
+        calculan para esta cuenta.
+        """
+        if obj.category != Account.CREDIT_CARD:
+            return None
+        details = self.context.get("credit_card_details")
+        if details is not None and obj.pk in details:
+            return details[obj.pk]
+        from .services import AccountService
+
+        return AccountService.get_credit_card_details(obj)
 
 
 class AccountDetailSerializer(serializers.ModelSerializer):
@@ -5,9 +5,9 @@ Services para la lógica de negocio de cuentas
 from decimal import Decimal
 
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Case, F, Q, Sum, When
 
-from .models import Account
+from .models import Account, AccountBalanceSnapshot
 
 
 class AccountService:
@@ -193,6 +193,10 @@ class AccountService:
         """
         Actualizar saldo de cuenta manualmente (ajuste)
 
+        El ajuste desplaza el saldo de apertura y, con él, todos los saldos
+        diarios de la cuenta: la serie de patrimonio cambia también en fechas
+        pasadas.
+
         Args:
             account (Account): Cuenta a actualizar
             new_balance (Decimal): Nuevo saldo
@@ -201,8 +205,25 @@ class AccountService:
         Returns:
             Account: Cuenta actualizada
         """
+        # Un ajuste manual mueve también el ancla de conciliación: no es una diferencia.
+        # El saldo se relee bajo bloqueo (las transacciones lo cambian con deltas F())
+        current = (
+            Account.objects.select_for_update()
+            .values("current_balance", "opening_balance")
+            .get(pk=account.pk)
+        )
+        account.current_balance = current["current_balance"]
+        account.opening_balance = current["opening_balance"]
+        shift = new_balance - account.current_balance
+        if account.opening_balance is not None:
+            account.opening_balance += shift
+        # Los saldos diarios se calculan desde el ancla: se mueven con ella, también los
+        # pasados. Es a propósito: el ajuste corrige un error de fecha desconocida y un
+        # desplazamiento fechado se perdería en la siguiente reconstrucción (rebuild),
+        # que parte del saldo de apertura
+        AccountBalanceSnapshot.objects.filter(account=account).update(balance=F("balance") + shift)
         account.current_balance = new_balance
-        account.save(update_fields=["current_balance", "updated_at"])
+        account.save(update_fields=["current_balance", "opening_balance", "updated_at"])
 
         # TODO: Registrar el ajuste en un log de auditoria
         # AuditLog.objects.create(
@@ -240,74 +261,86 @@ class AccountService:
         - Lo que se debe (saldo actual, negativo)
         - Lo que se ha pagado (suma de pagos realizados, puede ser mayor al límite por intereses)
 
+        Para varias cuentas usar get_credit_card_details_map (una sola consulta).
+
         Args:
             account: Instancia de Account (debe ser tarjeta de crédito)
 
         Returns:
             dict: Detalles de la tarjeta de crédito o None si no es tarjeta de crédito
         """
-        try:
-            from transactions.models import Transaction
-        except ImportError:
-            return None
+        return AccountService.get_credit_card_details_map([account]).get(account.pk)
 
-        if account.category != Account.CREDIT_CARD:
-            return None
+    @staticmethod
+    def get_credit_card_details_map(accounts):
+        """
+        Detalles de todas las tarjetas de crédito de una lista de cuentas.
 
-        # Límite de crédito
-        credit_limit = account.credit_limit or Decimal("0.00")
+        Los pagos de todas las tarjetas salen de una sola consulta agrupada
+        (get_credit_card_payments); el resto se calcula con los campos de la cuenta.
 
-        # Lo usado = deuda actual (valor absoluto del saldo negativo)
-        used_credit = (
-            abs(account.current_balance) if account.current_balance < 0 else Decimal("0.00")
-        )
+        Args:
+            accounts: Cuentas (las que no son tarjeta de crédito se ignoran)
 
-        # Lo que se debe = saldo actual (negativo)
-        current_debt = account.current_balance
+        Returns:
+            dict: {account_id: detalles} solo para tarjetas de crédito
+        """
+        cards = [account for account in accounts if account.category == Account.CREDIT_CARD]
+        payments = AccountService.get_credit_card_payments(cards)
+        return {
+            card.pk: AccountService._credit_card_details(card, payments.get(card.pk, 0))
+            for card in cards
+        }
 
-        # Lo que se ha pagado = suma de transferencias donde la tarjeta es destino
-        # IMPORTANTE: Para calcular "lo usado" correctamente, solo contamos el capital pagado
-        # Los intereses ya estaban incluidos en la deuda como transacciones separadas
+    @staticmethod
+    def get_credit_card_payments(cards):
+        """
+        Pagos recibidos por cada tarjeta, en una consulta agrupada.
 
-        # Capital pagado (reduce la deuda)
-        capital_paid = Decimal("0.00")
+        - Transferencias donde la tarjeta es destino
+        - Ingresos donde la tarjeta es origen (raro)
 
-        # Total pagado (capital + intereses, para mostrar al usuario)
-        total_paid = Decimal("0.00")
+        Args:
+            cards: Tarjetas de crédito
 
-        # Transferencias donde la tarjeta es destino (pagos a la tarjeta)
-        transfer_payments = Transaction.objects.filter(
-            user=account.user,
-            destination_account=account,
-            type=3,  # Transfer
-        )
+        Returns:
+            dict: {account_id: total pagado} en centavos
+        """
+        from transactions.models import Transaction
 
-        for payment in transfer_payments:
-            # Convertir centavos a pesos: total_amount está en centavos
-            total_paid += Decimal(str(payment.total_amount)) / Decimal(100)
-            # Si tiene capital_amount especificado, usar ese; sino, todo el pago es capital
-            if payment.capital_amount is not None:
-                # capital_amount también está en centavos
-                capital_paid += Decimal(str(payment.capital_amount)) / Decimal(100)
-            else:
-                capital_paid += Decimal(str(payment.total_amount)) / Decimal(100)
+        card_ids = [card.pk for card in cards]
+        if not card_ids:
+            return {}
 
-        # Ingresos donde la tarjeta es origen (aunque es raro para tarjetas de crédito)
-        income_payments = Transaction.objects.filter(
-            user=account.user,
-            origin_account=account,
-            type=1,  # Income
-        ).aggregate(total=Sum("total_amount"))["total"] or Decimal("0.00")
+        is_payment = Q(type=3, destination_account_id__in=card_ids)
+        rows = (
+            Transaction.objects.filter(
+                is_payment | Q(type=1, origin_account_id__in=card_ids),
+                user_id__in={card.user_id for card in cards},
+            )
+            .annotate(
+                card_id=Case(
+                    When(is_payment, then=F("destination_account_id")),
+                    default=F("origin_account_id"),
+                )
+            )
+            .values("card_id")
+            .annotate(total_paid=Sum("total_amount"))
+            .order_by()
+        )
+        return {row["card_id"]: row["total_paid"] for row in rows}
 
-        # income_payments también está en centavos, convertir a pesos
-        total_paid += Decimal(str(income_payments)) / Decimal(100)
-        capital_paid += Decimal(str(income_payments)) / Decimal(
-            100
-        )  # Los ingresos directos son todo capital
+    @staticmethod
+    def _credit_card_details(account, total_paid_cents):
+        # Límite de crédito
+        credit_limit = account.credit_limit or Decimal("0.00")
 
-        # El "lo usado" debería ser: deuda actual = gastos - capital pagado
-        # Pero como current_balance ya refleja esto (se actualiza solo con capital),
-        # used_credit = abs(current_balance) ya es correcto
+        # Lo usado = deuda actual (valor absoluto del saldo negativo).
+        # current_balance ya refleja solo el capital pagado: los intereses
+        # estaban incluidos en la deuda como transacciones separadas
+        used_credit = (
+            abs(account.current_balance) if account.current_balance < 0 else Decimal("0.00")
+        )
 
         # Crédito disponible
         available_credit = credit_limit - used_credit if credit_limit > 0 else Decimal("0.00")
@@ -320,8 +353,10 @@ class AccountService:
         return {
             "credit_limit": credit_limit,
             "used_credit": used_credit,
-            "current_debt": current_debt,
-            "total_paid": total_paid,
+            # Lo que se debe = saldo actual (negativo)
+            "current_debt": account.current_balance,
+            # Capital + intereses (lo que ve el usuario)
+            "total_paid": Decimal(total_paid_cents or 0) / Decimal(100),
             "available_credit": available_credit,
             "utilization_percentage": round(utilization_percentage, 2),
         }
@@ -337,8 +372,8 @@ class AccountService:
         Returns:
             dict: Resumen de tarjetas de crédito
         """
-        credit_cards = Account.objects.filter(
-            user=user, category=Account.CREDIT_CARD, is_active=True
+        credit_cards = list(
+            Account.objects.filter(user=user, category=Account.CREDIT_CARD, is_active=True)
         )
 
         total_used_credit = sum(abs(card.current_balance) for card in credit_cards)
@@ -359,7 +394,7 @@ class AccountService:
             utilization_percentage = float((total_used_credit / total_credit_limit) * 100)
 
         return {
-            "cards_count": credit_cards.count(),
+            "cards_count": len(credit_cards),
             "total_credit_limit": total_credit_limit,
             "total_used_credit": total_used_credit,
             "available_credit": available_credit,
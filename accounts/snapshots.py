@@ -0,0 +1,502 @@
+"""
+Saldos diarios de cuentas (AccountBalanceSnapshot) y patrimonio neto en el tiempo
+
+El saldo de una cuenta al cierre del día D se define igual que en la
+conciliación (accounts/reconciliation.py):
+
+    saldo de apertura + efecto de las transacciones con fecha <= D
+
+Reconstruirlo desde las transacciones en cada request recorrería todo el
+historial, así que se materializa una fila por cuenta y día:
+- El comando build_account_snapshots crea las filas que faltan, desde el último
+  día guardado de cada cuenta (o su primer día: creación o primera transacción)
+  hasta hoy, con una consulta agrupada por fecha.
+- Cada escritura de saldo de TransactionService desplaza con un solo UPDATE las
+  filas con fecha igual o posterior a la de la transacción (también las
+  transacciones con fecha pasada).
+- Un ajuste manual de saldo mueve el saldo de apertura y, con él, todas las filas
+  de la cuenta.
+
+El saldo en una fecha es el día guardado más cercano (en o antes de la fecha)
+más el efecto de las transacciones entre ese día y la fecha: el costo depende
+de los días sin construir, no del largo del historial. Las cuentas sin ninguna
+fila (antes de la primera ejecución del comando) se calculan desde el saldo de
+apertura con sus transacciones hasta la fecha (o, sin ancla, restando al saldo
+actual las posteriores).
+"""
+
+import calendar
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    F,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.utils import timezone
+
+from transactions.models import Transaction
+from utils.currency_converter import FxContext
+
+from .models import Account, AccountBalanceSnapshot
+from .reconciliation import SETTLE_SECONDS, AccountReconciliationService
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("day", "week", "month")
+# Límite de puntos por serie (un año de puntos diarios)
+MAX_SERIES_POINTS = 366
+
+CENTS = Decimal(100)
+
+
+def _account_filter(account_ids):
+    return Q(origin_account_id__in=account_ids) | Q(destination_account_id__in=account_ids)
+
+
+def _to_date(value):
+    # La fecha puede venir como texto si la instancia se creó sin pasar por un formulario
+    return Transaction._meta.get_field("date").to_python(value)
+
+
+class AccountSnapshotService:
+    """
+    Uso:
+        AccountSnapshotService.build_for_user(user.id)
+        balances = AccountSnapshotService.balances_as_of([account], date(2025, 3, 31))
+        series = AccountSnapshotService.net_worth_series(user, start, end, "month")
+    """
+
+    @staticmethod
+    def record_changes(changes) -> int:
+        """
+        Desplaza los saldos diarios guardados por cambios de saldo fechados.
+
+        Cada fila (cuenta, día) recibe la suma de los deltas de su cuenta con
+        fecha <= día: un solo UPDATE con un CASE de sumas acumuladas.
+
+        Args:
+            changes: Iterable de (account_id, fecha, delta en pesos)
+
+        Returns:
+            int: Filas actualizadas
+        """
+        by_account = {}
+        for account_id, on_date, delta in changes:
+            if not delta:
+                continue
+            dates = by_account.setdefault(account_id, {})
+            on_date = _to_date(on_date)
+            dates[on_date] = dates.get(on_date, Decimal(0)) + delta
+        if not by_account:
+            return 0
+
+        whens = []
+        for account_id, dates in sorted(by_account.items()):
+            running = Decimal(0)
+            cumulative = []
+            for on_date in sorted(dates):
+                running += dates[on_date]
+                cumulative.append((on_date, running))
+            # Gana la primera condición que se cumple: de la fecha más reciente a la más antigua
+            whens.extend(
+                When(account_id=account_id, date__gte=on_date, then=Value(total))
+                for on_date, total in reversed(cumulative)
+            )
+
+        first_date = min(min(dates) for dates in by_account.values())
+        return AccountBalanceSnapshot.objects.filter(
+            account_id__in=by_account, date__gte=first_date
+        ).update(
+            balance=F("balance")
+            + Case(
+                *whens,
+                default=Value(Decimal(0)),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            )
+        )
+
+    @staticmethod
+    def build_for_user(user_id, until=None, settle_seconds=SETTLE_SECONDS, rebuild=False):
+        """
+        Crea los saldos diarios que faltan hasta ``until`` para las cuentas del usuario.
+
+        Las cuentas se bloquean en orden de pk (igual que TransactionService) y
+        las que tienen transacciones modificadas hace menos de ``settle_seconds``
+        se dejan para la siguiente ejecución: la vista guarda la transacción y
+        aplica el saldo en otra transacción de base de datos.
+
+        Args:
+            user_id: ID del usuario
+            until: Último día a construir (por defecto, hoy)
+            settle_seconds: Segundos sin actividad para construir una cuenta
+            rebuild: Borrar y reconstruir todos los días del usuario
+
+        Returns:
+            dict: created (filas creadas) y skipped (IDs de cuentas con actividad reciente)
+        """
+        until = until or timezone.localdate()
+        latest = AccountBalanceSnapshot.objects.filter(account=OuterRef("pk")).order_by("-date")
+
+        with transaction.atomic():
+            if rebuild:
+                AccountBalanceSnapshot.objects.filter(account__user_id=user_id).delete()
+            accounts = list(
+                Account.objects.filter(user_id=user_id)
+                .select_for_update()
+                .annotate(
+                    snapshot_date=Subquery(latest.values("date")[:1]),
+                    snapshot_balance=Subquery(latest.values("balance")[:1]),
+                )
+                .order_by("pk")
+            )
+            if not accounts:
+                return {"created": 0, "skipped": []}
+
+            # Sin filas previas en alguna cuenta hay que leer su historial completo
+            known = [account.snapshot_date for account in accounts]
+            date_range = Q(date__lte=until)
+            if None not in known:
+                date_range &= Q(date__gt=min(known))
+            effects, last_change = AccountReconciliationService.transaction_effects(
+                user_id, filters=date_range, by_date=True
+            )
+            # Cuentas sin ancla: se toma el saldo actual como bueno (igual que la conciliación)
+            totals = None
+            if any(a.snapshot_date is None and a.opening_balance is None for a in accounts):
+                totals, _ = AccountReconciliationService.transaction_effects(user_id)
+
+            daily = {}
+            for (account_id, on_date), amount in effects.items():
+                daily.setdefault(account_id, {})[on_date] = amount
+            changed = {}
+            for (account_id, _), changed_at in last_change.items():
+                if account_id not in changed or changed_at > changed[account_id]:
+                    changed[account_id] = changed_at
+            settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+
+            rows = []
+            skipped = []
+            for account in accounts:
+                days = daily.get(account.pk, {})
+                if account.snapshot_date is None:
+                    start = min(timezone.localdate(account.created_at), *days)
+                    if account.opening_balance is not None:
+                        balance = account.opening_balance
+                    else:
+                        balance = account.current_balance - totals.get(account.pk, Decimal(0))
+                    # Efecto previo al primer día: ninguno (start es la primera fecha)
+                else:
+                    start = account.snapshot_date + timedelta(days=1)
+                    balance = account.snapshot_balance
+                if start > until:
+                    continue
+                if account.pk in changed and changed[account.pk] > settled_before:
+                    skipped.append(account.pk)
+                    continue
+
+                day = start
+                while day <= until:
+                    balance += days.get(day, Decimal(0))
+                    rows.append(AccountBalanceSnapshot(account=account, date=day, balance=balance))
+                    day += timedelta(days=1)
+
+            AccountBalanceSnapshot.objects.bulk_create(rows, batch_size=1000)
+
+        logger.info(
+            f"Saldos diarios construidos para usuario {user_id}: {len(rows)} filas "
+            f"({len(skipped)} cuentas con actividad reciente)"
+        )
+        return {"created": len(rows), "skipped": skipped}
+
+    @staticmethod
+    def balances_as_of(accounts, on_date):
+        """
+        Saldo de cada cuenta al cierre de ``on_date``.
+
+        Toma el día guardado más cercano en o antes de la fecha (una consulta) y
+        le suma el efecto de las transacciones posteriores hasta la fecha (una
+        consulta agrupada por fecha, acotada al tramo sin construir).
+
+        Args:
+            accounts: Cuentas de un mismo usuario
+            on_date: Fecha de corte
+
+        Returns:
+            dict: {account_id: (saldo, día guardado usado o None)}; las cuentas que
+            todavía no existían en la fecha no aparecen
+        """
+        accounts = list(accounts)
+        if not accounts:
+            return {}
+        user_id = accounts[0].user_id
+        ids = [account.pk for account in accounts]
+        nearest = AccountBalanceSnapshot.objects.filter(
+            account=OuterRef("pk"), date__lte=on_date
+        ).order_by("-date")
+        snapshots = {
+            pk: (snapshot_date, balance)
+            for pk, snapshot_date, balance in Account.objects.filter(pk__in=ids)
+            .annotate(
+                snapshot_date=Subquery(nearest.values("date")[:1]),
+                snapshot_balance=Subquery(nearest.values("balance")[:1]),
+            )
+            .values_list("pk", "snapshot_date", "snapshot_balance")
+        }
+
+        result = {}
+        anchored = [pk for pk in ids if snapshots[pk][0] is not None]
+        if anchored:
+            first = min(snapshots[pk][0] for pk in anchored)
+            effects, _ = AccountReconciliationService.transaction_effects(
+                user_id,
+                filters=_account_filter(anchored) & Q(date__gt=first, date__lte=on_date),
+                by_date=True,
+            )
+            for pk in anchored:
+                snapshot_date, balance = snapshots[pk]
+                result[pk] = (
+                    balance
+                    + sum(
+                        (
+                            amount
+                            for (account_id, day), amount in effects.items()
+                            if account_id == pk and day > snapshot_date
+                        ),
+                        Decimal(0),
+                    ),
+                    snapshot_date,
+                )
+
+        # Cuentas sin días guardados en o antes de la fecha: desde las transacciones
+        pending = [account for account in accounts if snapshots[account.pk][0] is None]
+        balances = AccountSnapshotService._balances_from_transactions(user_id, pending, [on_date])
+        for account_id, balance in balances[on_date].items():
+            result[account_id] = (balance, None)
+
+        return result
+
+    @staticmethod
+    def _balances_from_transactions(user_id, accounts, points):
+        """
+        Saldos en cada punto de cuentas sin días guardados, desde las transacciones
+        (una consulta agrupada por fecha para todos los puntos).
+
+        Con saldo de apertura se suma el efecto hasta cada punto, así que solo se
+        leen las transacciones hasta el último punto. Sin ancla se resta al saldo
+        actual el efecto posterior a cada punto: solo se lee la cola desde el
+        primero.
+
+        Args:
+            user_id: ID del usuario
+            accounts: Cuentas del usuario
+            points: Fechas de corte en orden ascendente
+
+        Returns:
+            dict: {punto: {account_id: saldo}}; las cuentas que todavía no
+            existían en un punto no aparecen
+        """
+        result = {point: {} for point in points}
+        if not accounts or not points:
+            return result
+
+        anchored = [account for account in accounts if account.opening_balance is not None]
+        unanchored = [account for account in accounts if account.opening_balance is None]
+        days = {}
+        for group, date_range in (
+            (anchored, Q(date__lte=points[-1])),
+            (unanchored, Q(date__gt=points[0])),
+        ):
+            if not group:
+                continue
+            effects, _ = AccountReconciliationService.transaction_effects(
+                user_id,
+                filters=_account_filter([account.pk for account in group]) & date_range,
+                by_date=True,
+            )
+            for (account_id, day), amount in effects.items():
+                days.setdefault(account_id, {})[day] = amount
+
+        for account in anchored:
+            account_days = sorted(days.get(account.pk, {}).items())
+            created = timezone.localdate(account.created_at)
+            balance = account.opening_balance
+            index = 0
+            for point in points:
+                while index < len(account_days) and account_days[index][0] <= point:
+                    balance += account_days[index][1]
+                    index += 1
+                # Sin movimientos hasta el punto y antes de crearse: la cuenta no existía
+                if index or point >= created:
+                    result[point][account.pk] = balance
+
+        for account in unanchored:
+            account_days = days.get(account.pk, {})
+            created = timezone.localdate(account.created_at)
+            first_day = None
+            if points[0] < created:
+                first_day = (
+                    Transaction.objects.filter(
+                        _account_filter([account.pk]), user_id=user_id, date__lt=created
+                    )
+                    .order_by("date")
+                    .values_list("date", flat=True)
+                    .first()
+                )
+            for point in points:
+                if point < created and (first_day is None or first_day > point):
+                    continue
+                after = sum(
+                    (amount for day, amount in account_days.items() if day > point), Decimal(0)
+                )
+                result[point][account.pk] = account.current_balance - after
+
+        return result
+
+    @staticmethod
+    def default_start(end_date, interval):
+        """
+        Fecha inicial por defecto de una serie: un año hacia atrás, sin superar
+        MAX_SERIES_POINTS con puntos diarios.
+        """
+        if interval == "day":
+            return end_date - timedelta(days=MAX_SERIES_POINTS - 1)
+        if interval == "week":
+            return end_date - relativedelta(years=1)
+        return end_date.replace(day=1) - relativedelta(years=1)
+
+    @staticmethod
+    def series_points(start_date, end_date, interval):
+        """
+        Fechas de corte de una serie: el cierre de cada período, sin pasar de end_date.
+
+        Raises:
+            ValueError: Intervalo inválido, rango invertido o demasiados puntos
+        """
+        if interval not in INTERVALS:
+            msg = f"Intervalo inválido: {interval}. Opciones: {', '.join(INTERVALS)}"
+            raise ValueError(msg)
+        if start_date > end_date:
+            msg = "start_date no puede ser posterior a end_date"
+            raise ValueError(msg)
+
+        points = []
+        current = start_date
+        while current <= end_date:
+            if interval == "day":
+                point = current
+            elif interval == "week":
+                point = current + timedelta(days=6 - current.weekday())
+            else:
+                point = date(
+                    current.year,
+                    current.month,
+                    calendar.monthrange(current.year, current.month)[1],
+                )
+            points.append(min(point, end_date))
+            if len(points) > MAX_SERIES_POINTS:
+                msg = f"La serie supera el máximo de {MAX_SERIES_POINTS} puntos"
+                raise ValueError(msg)
+            current = point + timedelta(days=1)
+        return points
+
+    @staticmethod
+    def net_worth_series(user, start_date, end_date, interval="month"):
+        """
+        Patrimonio neto de las cuentas activas al cierre de cada período, en la
+        moneda base del usuario.
+
+        Los días guardados que coinciden con los puntos se leen en una sola
+        consulta y las cuentas sin construir se calculan para todos los puntos
+        con otra; solo los puntos posteriores al último día construido pasan por
+        balances_as_of.
+
+        Raises:
+            ValueError: Ver series_points
+
+        Returns:
+            dict: currency, interval, points [{date, assets, liabilities, net_worth}]
+            y warnings (conversiones sin tipo de cambio)
+        """
+        points = AccountSnapshotService.series_points(start_date, end_date, interval)
+        accounts = list(
+            Account.objects.filter(user=user, is_active=True)
+            .annotate(first_snapshot=Min("balance_snapshots__date"))
+            .order_by("pk")
+        )
+        exact = {
+            (account_id, on_date): balance
+            for account_id, on_date, balance in AccountBalanceSnapshot.objects.filter(
+                account__in=accounts, date__in=points
+            ).values_list("account_id", "date", "balance")
+        }
+
+        # Cuentas sin construir: todos los puntos con una sola lectura de transacciones
+        unbuilt = AccountSnapshotService._balances_from_transactions(
+            user.pk, [account for account in accounts if account.first_snapshot is None], points
+        )
+
+        fx = FxContext.for_user(user)
+        fx.prefetch({account.currency for account in accounts})
+        warnings = set()
+        series = []
+        for point in points:
+            balances = dict(unbuilt[point])
+            missing = []
+            for account in accounts:
+                if (account.pk, point) in exact:
+                    balances[account.pk] = exact[(account.pk, point)]
+                elif account.first_snapshot is not None and point > account.first_snapshot:
+                    missing.append(account)
+                # Antes del primer día construido la cuenta aún no existía
+            for account_id, (balance, _) in AccountSnapshotService.balances_as_of(
+                missing, point
+            ).items():
+                balances[account_id] = balance
+
+            assets = 0
+            liabilities = 0
+            for account in accounts:
+                if account.pk not in balances:
+                    continue
+                try:
+                    converted, _, warning = fx.convert(
+                        int(balances[account.pk] * CENTS), account.currency, point
+                    )
+                except ValueError as e:
+                    warnings.add(str(e))
+                    continue
+                if warning:
+                    warnings.add(warning)
+                if account.account_type == Account.ASSET:
+                    assets += converted
+                else:
+                    liabilities += abs(converted)
+
+            series.append(
+                {
+                    "date": point,
+                    "assets": Decimal(assets) / CENTS,
+                    "liabilities": Decimal(liabilities) / CENTS,
+                    "net_worth": Decimal(assets - liabilities) / CENTS,
+                }
+            )
+
+        return {
+            "currency": fx.base_currency,
+            "interval": interval,
+            "start_date": start_date,
+            "end_date": end_date,
+            "points": series,
+            "warnings": sorted(warnings),
+        }
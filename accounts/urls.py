@@ -30,6 +30,8 @@ urlpatterns = [
 # GET /api/accounts/by_currency/?currency=COP - Filtrar cuentas por moneda
 # GET /api/accounts/credit_cards_summary/ - Resumen de tarjetas de crédito
 # GET /api/accounts/categories_stats/ - Estadísticas agrupadas por categoría
+# GET /api/accounts/net_worth_series/?start_date=&end_date=&interval=month - Patrimonio en el tiempo
+# GET /api/accounts/{id}/balance_as_of/?date=YYYY-MM-DD - Saldo al cierre de una fecha
 # POST /api/accounts/{id}/update_balance/ - Ajustar saldo manualmente
 # POST /api/accounts/{id}/validate_deletion/ - Validar si se puede eliminar
 # POST /api/accounts/{id}/toggle_active/ - Activar/desactivar cuenta
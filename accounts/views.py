@@ -3,8 +3,10 @@ Views para la gestión de cuentas financieras
 """
 
 import logging
+from datetime import datetime
 from decimal import Decimal
 
+from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
@@ -19,6 +21,7 @@ from .serializers import (
     AccountUpdateSerializer,
 )
 from .services import AccountService
+from .snapshots import AccountSnapshotService
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +56,12 @@ class AccountViewSet(viewsets.ModelViewSet):
             return AccountSummarySerializer
         return AccountDetailSerializer
 
+    def _list_context(self, accounts):
+        """Contexto de listados: detalles de todas las tarjetas en una consulta"""
+        context = self.get_serializer_context()
+        context["credit_card_details"] = AccountService.get_credit_card_details_map(accounts)
+        return context
+
     def perform_create(self, serializer):
         """Crear cuenta asignando el usuario autenticado"""
         try:
@@ -145,12 +154,13 @@ class AccountViewSet(viewsets.ModelViewSet):
                 {"error": f"Moneda {currency} no válida"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        accounts = AccountService.get_accounts_by_currency(request.user, currency)
-        serializer = AccountListSerializer(accounts, many=True)
+        accounts = list(AccountService.get_accounts_by_currency(request.user, currency))
+        serializer = AccountListSerializer(
+            accounts, many=True, context=self._list_context(accounts)
+        )
 
         logger.info(
-            f"Usuario {request.user.id} consultó cuentas en {currency}: "
-            f"{accounts.count()} encontradas"
+            f"Usuario {request.user.id} consultó cuentas en {currency}: {len(accounts)} encontradas"
         )
 
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -179,6 +189,78 @@ class AccountViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @action(detail=True, methods=["get"])
+    def balance_as_of(self, request, pk=None):
+        """
+        Saldo de la cuenta al cierre de una fecha
+
+        Query params:
+            date (str): Fecha de corte (YYYY-MM-DD)
+
+        Returns:
+            Response: Saldo en la moneda de la cuenta (null si la cuenta aún no existía)
+        """
+        account = self.get_object()
+        try:
+            on_date = datetime.strptime(request.query_params.get("date", ""), "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {"error": "Parámetro date es requerido (YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        balance, snapshot_date = AccountSnapshotService.balances_as_of([account], on_date).get(
+            account.pk, (None, None)
+        )
+        return Response(
+            {
+                "account_id": account.id,
+                "date": on_date,
+                "balance": balance,
+                "currency": account.currency,
+                "snapshot_date": snapshot_date,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"])
+    def net_worth_series(self, request):
+        """
+        Patrimonio neto de las cuentas activas al cierre de cada período
+
+        Query params:
+            start_date (str): Fecha inicial (YYYY-MM-DD), por defecto un año antes de end_date
+                (365 días para interval=day)
+            end_date (str): Fecha final (YYYY-MM-DD), por defecto hoy
+            interval (str): day, week o month (por defecto month)
+
+        Returns:
+            Response: Serie convertida a la moneda base del usuario
+        """
+        try:
+            end_str = request.query_params.get("end_date")
+            end_date = (
+                datetime.strptime(end_str, "%Y-%m-%d").date() if end_str else timezone.localdate()
+            )
+            interval = request.query_params.get("interval", "month")
+            start_str = request.query_params.get("start_date")
+            start_date = (
+                datetime.strptime(start_str, "%Y-%m-%d").date()
+                if start_str
+                else AccountSnapshotService.default_start(end_date, interval)
+            )
+            series = AccountSnapshotService.net_worth_series(
+                request.user, start_date, end_date, interval
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(
+            f"Generada serie de patrimonio para usuario {request.user.id}: "
+            f"{len(series['points'])} puntos"
+        )
+        return Response(series, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["post"])
     def update_balance(self, request, pk=None):
         """
@@ -354,9 +436,10 @@ class AccountViewSet(viewsets.ModelViewSet):
         if account_type:
             queryset = queryset.filter(account_type=account_type)
 
-        serializer = self.get_serializer(queryset, many=True)
+        accounts = list(queryset)
+        serializer = self.get_serializer(accounts, many=True, context=self._list_context(accounts))
 
-        logger.info(f"Usuario {request.user.id} listó cuentas: {queryset.count()} encontradas")
+        logger.info(f"Usuario {request.user.id} listó cuentas: {len(accounts)} encontradas")
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
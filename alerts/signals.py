@@ -1,65 +1,66 @@
-from django.db.models.signals import post_save
+from decimal import Decimal
+
 from django.dispatch import receiver
 
 from alerts.models import Alert
-from budgets.models import Budget
+from budgets.counters import BudgetSpendService
+from budgets.signals import budget_spend_changed
 from notifications.engine import NotificationEngine
 from transactions.models import Transaction
 
 
-@receiver(post_save, sender=Transaction)
-def check_budget_after_transaction(sender, instance, **kwargs):
+def _percentage(budget, amounts):
+    """Porcentaje gastado de un contador (mismo redondeo que Budget.get_spent_percentage)"""
+    if budget.amount == 0:
+        return Decimal("0.00")
+    return round((BudgetSpendService.spent_amount(budget, amounts) / budget.amount) * 100, 2)
+
+
+@receiver(budget_spend_changed, sender=Transaction)
+def check_budget_after_transaction(sender, user, currency, created, changes, **kwargs):
     """
-    Crea una alerta de presupuesto cuando una transacción de gasto hace que se
-    alcance el 80 % (o el umbral configurado) o se exceda el 100 % del límite.
+    Crea una alerta de presupuesto cuando una transacción de gasto (o un lote
+    importado) hace que se alcance el 80 % (o el umbral configurado) o se
+    exceda el 100 % del límite.
 
     Reglas importantes (HU-08):
-    - Solo se consideran transacciones de gasto (type = 2).
+    - Solo se consideran transacciones de gasto con categoría (type = 2): los
+      contadores solo cambian con ellas.
     - Una alerta por presupuesto / nivel (warning o exceeded) y por mes.
-    - Se apoya en created_at para identificar el mes de la alerta.
+    - El mes de la alerta es el de la transacción más reciente del cambio.
+
+    El cruce de umbral se detecta comparando el contador del período
+    (BudgetPeriodSpend) antes y después de la escritura, sin recalcular el
+    gasto desde el historial.
 
     Además genera notificaciones respetando preferencias del usuario (HU-18).
     """
     # Solo procesar en creación (no en actualización)
-    if kwargs.get("created", False) is False:
+    if not created:
         return
 
-    # Solo gastos
-    if instance.type != 2:
-        return
-
-    # Debe tener categoría para poder asociarla a un presupuesto
-    if not instance.category:
-        return
-
-    category = instance.category
-    user = instance.user
-
-    # Obtener la moneda de la cuenta de origen de la transacción
-    transaction_currency = instance.origin_account.currency if instance.origin_account else None
+    # Moneda de la cuenta de origen de la transacción
+    transaction_currency = currency
 
     if not transaction_currency:
         return
 
-    # Presupuestos activos del usuario para esa categoría y moneda
-    budgets = Budget.objects.filter(
-        category=category,
-        user=user,
-        is_active=True,
-        currency=transaction_currency,  # Solo presupuestos con la misma moneda
-    )
-
-    for budget in budgets:
-        # Usar la fecha de la transacción como referencia del período
-        percentage = budget.get_spent_percentage(reference_date=instance.date)
-        spent = budget.get_spent_amount(reference_date=instance.date)
+    for change in changes:
+        budget = change.budget
+        # Presupuestos activos con la misma moneda de la transacción
+        if not budget.is_active or budget.currency != transaction_currency:
+            continue
+
+        before = _percentage(budget, change.before)
+        percentage = _percentage(budget, change.after)
+        spent = BudgetSpendService.spent_amount(budget, change.after)
         limit = budget.amount
 
-        # Determinar tipo de alerta a generar, si aplica
+        # Determinar tipo de alerta a generar, si esta transacción cruzó un umbral
         alert_type = None
-        if percentage >= 100:
+        if percentage >= 100 > before:
             alert_type = "exceeded"
-        elif percentage >= budget.alert_threshold:
+        elif budget.alert_threshold <= percentage < 100 and before < budget.alert_threshold:
             alert_type = "warning"
 
         if not alert_type:
@@ -67,8 +68,8 @@ def check_budget_after_transaction(sender, instance, **kwargs):
 
         # Evitar repetir alertas para el mismo presupuesto / tipo / mes
         # Usamos la fecha de la transacción para determinar el mes de la alerta
-        transaction_year = instance.date.year
-        transaction_month = instance.date.month
+        transaction_year = change.ref_date.year
+        transaction_month = change.ref_date.month
 
         # Buscar si ya existe una alerta para este presupuesto/tipo/mes
         # usando los campos transaction_year y transaction_month
@@ -1,6 +1,6 @@
 """
-Admin para analytics - No hay modelos que registrar
-ya que analytics solo maneja vistas y servicios de cálculo
+Admin para analytics - No hay modelos que registrar:
+analytics solo maneja vistas y servicios de cálculo, y el resumen mensual
+(MonthlyCategorySummary) es una tabla interna que se reconstruye con
+``python manage.py rebuild_monthly_summaries``
 """
-
-# Analytics no tiene modelos propios, solo servicios de cálculo
@@ -10,7 +10,8 @@ class AnalyticsConfig(AppConfig):
     Configuración para la aplicación de Analytics Financieros (HU-13)
 
     Esta app proporciona indicadores y gráficos del período con soporte
-    para modo base vs total, sin requerir modelos de base de datos.
+    para modo base vs total. Mantiene un resumen mensual de transacciones
+    (MonthlyCategorySummary) mediante señales.
     """
 
     default_auto_field = "django.db.models.BigAutoField"
@@ -19,4 +20,4 @@ class AnalyticsConfig(AppConfig):
 
     def ready(self):
         """Configuración cuando la app está lista"""
-        # No hay señales que configurar por ahora
+        import analytics.signals  # noqa: F401
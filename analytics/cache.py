@@ -0,0 +1,211 @@
+"""
+Caché versionada por usuario para los resultados de FinancialAnalyticsService
+(y del uso de categorías, CategoryService.get_usage)
+
+Cada resultado se guarda bajo una clave que incluye el endpoint, el usuario,
+la versión de datos, la moneda base y los parámetros (período ya resuelto a
+fechas, modo, etc.). La versión de datos combina:
+- una versión por usuario, que cambia con sus transacciones, categorías,
+  cuentas, presupuestos o configuración de moneda base, y
+- una versión global, que cambia con cualquier tipo de cambio.
+
+Las versiones son tokens aleatorios guardados en la propia caché, así que
+funcionan con cualquier backend de Django (locmem, archivo, Redis/Memcached) y
+entre workers. Cambiar de versión no borra nada: las entradas viejas dejan de
+leerse y expiran por timeout. Si una versión se pierde (desalojo o reinicio),
+se crea un token nuevo y nunca se reutilizan entradas anteriores.
+
+Las escrituras que no disparan señales (bulk_create, QuerySet.update) deben
+llamar a AnalyticsCache.bump_user explícitamente.
+"""
+
+import hashlib
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from utils.currency_converter import FxService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 300
+KEY_PREFIX = "analytics"
+RATES_VERSION_KEY = f"{KEY_PREFIX}:version:rates"
+
+# Endpoints cacheados (para el reporte de aciertos/fallos)
+ENDPOINTS = (
+    "period_indicators",
+    "expenses_by_category",
+    "daily_flow_chart",
+    "compare_periods",
+    "category_usage",
+)
+
+_MISSING = object()
+
+
+class AnalyticsCache:
+    """
+    Uso:
+        data = AnalyticsCache.get_or_compute(
+            user, "period_indicators", {"start": start, "end": end, "mode": mode},
+            lambda: FinancialAnalyticsService.get_period_indicators(user, start, end, mode),
+        )
+    """
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, "ANALYTICS_CACHE_ALIAS", "default")]
+
+    @staticmethod
+    def timeout():
+        """Segundos de vida de cada entrada (0 desactiva la caché)"""
+        return getattr(settings, "ANALYTICS_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+    @staticmethod
+    def _user_version_key(user_id):
+        return f"{KEY_PREFIX}:version:user:{user_id}"
+
+    @classmethod
+    def data_version(cls, user_id) -> str:
+        """Versión de datos actual del usuario (incluye la versión de tipos de cambio)"""
+        cache = cls._cache()
+        keys = [cls._user_version_key(user_id), RATES_VERSION_KEY]
+        versions = cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # add() no pisa una versión creada en paralelo por otro worker
+                cache.add(key, uuid.uuid4().hex, timeout=None)
+                versions[key] = cache.get(key) or uuid.uuid4().hex
+        return f"{versions[keys[0]]}.{versions[keys[1]]}"
+
+    @classmethod
+    def bump_user(cls, user_id):
+        """
+        Invalida los resultados cacheados de un usuario.
+
+        Se cambia la versión de inmediato y de nuevo al confirmar la
+        transacción, para descartar resultados calculados mientras la escritura
+        aún no era visible para otros workers.
+        """
+
+        def _bump():
+            cls._cache().set(cls._user_version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+        _bump()
+        transaction.on_commit(_bump)
+
+    @classmethod
+    def bump_rates(cls):
+        """Invalida los resultados de todos los usuarios (cambió un tipo de cambio)"""
+
+        def _bump():
+            cls._cache().set(RATES_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+        _bump()
+        transaction.on_commit(_bump)
+
+    @classmethod
+    def build_key(cls, user, endpoint, params) -> str:
+        """Clave de caché para (usuario, endpoint, versión, moneda base, parámetros)"""
+        digest = hashlib.md5(
+            json.dumps(params, sort_keys=True, default=str).encode(), usedforsecurity=False
+        ).hexdigest()
+        base_currency = FxService.get_base_currency(user)
+        version = cls.data_version(user.id)
+        return f"{KEY_PREFIX}:{endpoint}:{user.id}:{version}:{base_currency}:{digest}"
+
+    @classmethod
+    def get_or_compute(cls, user, endpoint, params, compute):
+        """
+        Devuelve el resultado cacheado o lo calcula y lo guarda.
+
+        Args:
+            user: Usuario autenticado
+            endpoint: Nombre del cálculo (ver ENDPOINTS)
+            params: Dict serializable con los parámetros del cálculo
+            compute: Función sin argumentos que calcula el resultado
+
+        Returns:
+            Resultado de compute() (copia deserializada en caso de acierto)
+        """
+        timeout = cls.timeout()
+        if not timeout:
+            return compute()
+
+        cache = cls._cache()
+        key = cls.build_key(user, endpoint, params)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            cls._count(endpoint, "hits")
+            return value
+
+        cls._count(endpoint, "misses")
+        value = compute()
+        cache.set(key, value, timeout)
+        return value
+
+    @classmethod
+    def _count(cls, endpoint, outcome):
+        cache = cls._cache()
+        key = f"{KEY_PREFIX}:stats:{endpoint}:{outcome}"
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # La clave expiró entre add() e incr()
+            cache.set(key, 1, timeout=None)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Contadores de aciertos y fallos por endpoint (compartidos entre workers
+        si el backend de caché lo es).
+
+        Returns:
+            dict: {endpoint: {"hits", "misses", "hit_rate"}} y "total"
+        """
+        keys = [
+            f"{KEY_PREFIX}:stats:{endpoint}:{outcome}"
+            for endpoint in ENDPOINTS
+            for outcome in ("hits", "misses")
+        ]
+        values = cls._cache().get_many(keys)
+
+        result = {}
+        total_hits = total_misses = 0
+        for endpoint in ENDPOINTS:
+            hits = values.get(f"{KEY_PREFIX}:stats:{endpoint}:hits", 0)
+            misses = values.get(f"{KEY_PREFIX}:stats:{endpoint}:misses", 0)
+            total_hits += hits
+            total_misses += misses
+            result[endpoint] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+            }
+        result["total"] = {
+            "hits": total_hits,
+            "misses": total_misses,
+            "hit_rate": (
+                round(total_hits / (total_hits + total_misses), 4)
+                if total_hits + total_misses
+                else None
+            ),
+        }
+        return result
+
+    @classmethod
+    def reset_stats(cls):
+        """Reinicia los contadores de aciertos y fallos"""
+        cls._cache().delete_many(
+            [
+                f"{KEY_PREFIX}:stats:{endpoint}:{outcome}"
+                for endpoint in ENDPOINTS
+                for outcome in ("hits", "misses")
+            ]
+        )
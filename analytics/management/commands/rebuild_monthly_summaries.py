@@ -0,0 +1,59 @@
+"""
+Management command para reconstruir el resumen mensual de analytics
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import MonthlySummaryService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el resumen mensual (MonthlyCategorySummary) desde las transacciones "
+        "de un usuario o de todos los usuarios"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-id",
+            type=int,
+            help="ID de usuario específico a reconstruir",
+        )
+        parser.add_argument(
+            "--all-users",
+            action="store_true",
+            help="Reconstruir el resumen de todos los usuarios",
+        )
+
+    def handle(self, *args, **options):
+        user_id = options.get("user_id")
+        all_users = options.get("all_users")
+
+        if user_id:
+            try:
+                users = [User.objects.get(pk=user_id)]
+            except User.DoesNotExist:
+                self.stdout.write(self.style.ERROR(f"Usuario con ID {user_id} no existe"))
+                return
+        elif all_users:
+            users = User.objects.filter(transactions__isnull=False).distinct().iterator()
+        else:
+            self.stdout.write(self.style.ERROR("Debes especificar --user-id <ID> o --all-users"))
+            return
+
+        processed = 0
+        total_rows = 0
+        for user in users:
+            rows = MonthlySummaryService.rebuild_for_user(user)
+            total_rows += rows
+            processed += 1
+            self.stdout.write(f"  - {user.username} (ID: {user.id}): {rows} filas")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nResumen:\n- Usuarios procesados: {processed}\n- Filas de resumen: {total_rows}"
+            )
+        )
@@ -0,0 +1,133 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_monthly_summaries(apps, schema_editor):
+    """Construye el resumen mensual a partir de las transacciones existentes"""
+    Transaction = apps.get_model("transactions", "Transaction")
+    MonthlyCategorySummary = apps.get_model("analytics", "MonthlyCategorySummary")
+
+    rows = (
+        Transaction.objects.annotate(
+            summary_year=ExtractYear("date"), summary_month=ExtractMonth("date")
+        )
+        .values(
+            "user_id",
+            "summary_year",
+            "summary_month",
+            "type",
+            "category_id",
+            "transaction_currency",
+            "origin_account__currency",
+        )
+        .annotate(base_sum=Sum("base_amount"), total_sum=Sum("total_amount"), row_count=Count("id"))
+        .order_by()
+    )
+
+    summaries = {}
+    for row in rows.iterator(chunk_size=2000):
+        key = (
+            row["user_id"],
+            row["summary_year"],
+            row["summary_month"],
+            row["type"],
+            row["category_id"],
+            row["transaction_currency"] or row["origin_account__currency"],
+        )
+        if key not in summaries:
+            summaries[key] = MonthlyCategorySummary(
+                user_id=key[0],
+                year=key[1],
+                month=key[2],
+                type=key[3],
+                category_id=key[4],
+                currency=key[5],
+            )
+        summaries[key].base_amount += row["base_sum"] or 0
+        summaries[key].total_amount += row["total_sum"] or 0
+        summaries[key].count += row["row_count"]
+
+    MonthlyCategorySummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("categories", "0002_alter_category_icon"),
+        ("transactions", "0010_transaction_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyCategorySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("year", models.IntegerField(verbose_name="Año")),
+                ("month", models.IntegerField(verbose_name="Mes")),
+                ("type", models.IntegerField(verbose_name="Tipo de transacción")),
+                ("currency", models.CharField(max_length=3, verbose_name="Moneda")),
+                (
+                    "base_amount",
+                    models.BigIntegerField(default=0, verbose_name="Suma de montos base"),
+                ),
+                (
+                    "total_amount",
+                    models.BigIntegerField(default=0, verbose_name="Suma de montos totales"),
+                ),
+                ("count", models.IntegerField(default=0, verbose_name="Número de transacciones")),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Última actualización"),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="monthly_summaries",
+                        to="categories.category",
+                        verbose_name="Categoría",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="monthly_category_summaries",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuario",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen mensual por categoría",
+                "verbose_name_plural": "Resúmenes mensuales por categoría",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "year", "month"], name="analytics_m_user_id_ebe786_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="monthlycategorysummary",
+            constraint=models.UniqueConstraint(
+                fields=("user", "year", "month", "type", "category", "currency"),
+                name="unique_monthly_category_summary",
+            ),
+        ),
+        migrations.RunPython(populate_monthly_summaries, migrations.RunPython.noop),
+    ]
@@ -1 +1,65 @@
-# no tiene modelos porque es una app de análisis/reportes, no de almacenamiento.
+"""
+Modelos de Analytics
+
+Analytics calcula sus indicadores sobre Transaction; el único modelo propio es
+un resumen mensual (rollup) que se mantiene de forma incremental para no
+re-agregar todas las transacciones en cada request.
+"""
+
+from django.conf import settings
+from django.db import models
+
+
+class MonthlyCategorySummary(models.Model):
+    """
+    Totales mensuales de transacciones por usuario, tipo, categoría y moneda.
+
+    Se actualiza en la misma transacción de base de datos que cada alta,
+    edición o borrado de Transaction (ver analytics/signals.py) y se puede
+    reconstruir con ``python manage.py rebuild_monthly_summaries``.
+
+    Los montos están en centavos de la moneda de la transacción (moneda de la
+    transacción o, si no se indicó, la de la cuenta de origen).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_category_summaries",
+        verbose_name="Usuario",
+    )
+    year = models.IntegerField(verbose_name="Año")
+    month = models.IntegerField(verbose_name="Mes")
+    type = models.IntegerField(verbose_name="Tipo de transacción")
+    category = models.ForeignKey(
+        "categories.Category",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="monthly_summaries",
+        verbose_name="Categoría",
+    )
+    currency = models.CharField(max_length=3, verbose_name="Moneda")
+    base_amount = models.BigIntegerField(default=0, verbose_name="Suma de montos base")
+    total_amount = models.BigIntegerField(default=0, verbose_name="Suma de montos totales")
+    count = models.IntegerField(default=0, verbose_name="Número de transacciones")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        verbose_name = "Resumen mensual por categoría"
+        verbose_name_plural = "Resúmenes mensuales por categoría"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "year", "month", "type", "category", "currency"],
+                name="unique_monthly_category_summary",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["user", "year", "month"]),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.user_id} {self.year}-{self.month:02d} tipo {self.type} "
+            f"categoría {self.category_id} {self.currency}: {self.total_amount}"
+        )
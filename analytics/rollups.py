@@ -0,0 +1,320 @@
+"""
+Mantenimiento y lectura del resumen mensual de transacciones (MonthlyCategorySummary)
+
+Cada alta, edición o borrado de Transaction aplica un delta sobre la fila
+(user, año, mes, tipo, categoría, moneda) correspondiente. Las escrituras
+masivas que no disparan señales (bulk_create, QuerySet.update) deben aplicar
+sus deltas con MonthlySummaryService.record_changes o reconstruir el resumen
+del usuario con MonthlySummaryService.rebuild_for_user.
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from analytics.models import MonthlyCategorySummary
+from transactions.models import Transaction
+
+logger = logging.getLogger(__name__)
+
+# Campos de Transaction que afectan al resumen mensual
+SUMMARY_FIELDS = frozenset(
+    {
+        "user",
+        "date",
+        "type",
+        "category",
+        "transaction_currency",
+        "origin_account",
+        "base_amount",
+        "tax_percentage",
+        "taxed_amount",
+        "gmf_amount",
+        "total_amount",
+    }
+)
+
+
+class MonthlySummaryService:
+    """
+    Servicio para mantener y consultar MonthlyCategorySummary.
+
+    El estado de una transacción para el resumen es la tupla
+    (user_id, year, month, type, category_id, currency, base_amount, total_amount).
+    """
+
+    @staticmethod
+    def state_from_instance(instance):
+        """Estado de resumen de una instancia en memoria"""
+        currency = instance.transaction_currency or instance.origin_account.currency
+        # La fecha puede venir como texto si la instancia se creó sin pasar por un formulario
+        txn_date = Transaction._meta.get_field("date").to_python(instance.date)
+        return (
+            instance.user_id,
+            txn_date.year,
+            txn_date.month,
+            instance.type,
+            instance.category_id,
+            currency,
+            instance.base_amount,
+            instance.total_amount,
+        )
+
+    @staticmethod
+    def state_from_db(pk):
+        """Estado de resumen de una transacción tal como está guardada (o None)"""
+        row = (
+            Transaction.objects.filter(pk=pk)
+            .values_list(
+                "user_id",
+                "date",
+                "type",
+                "category_id",
+                "transaction_currency",
+                "origin_account__currency",
+                "base_amount",
+                "total_amount",
+            )
+            .first()
+        )
+        if row is None:
+            return None
+        (
+            user_id,
+            txn_date,
+            txn_type,
+            category_id,
+            tx_currency,
+            account_currency,
+            base_amount,
+            total_amount,
+        ) = row
+        return (
+            user_id,
+            txn_date.year,
+            txn_date.month,
+            txn_type,
+            category_id,
+            tx_currency or account_currency,
+            base_amount,
+            total_amount,
+        )
+
+    @staticmethod
+    def record_change(old_state=None, new_state=None):
+        """
+        Aplica al resumen el cambio de una transacción.
+
+        Args:
+            old_state: Estado anterior (None en altas)
+            new_state: Estado nuevo (None en borrados)
+        """
+        MonthlySummaryService.record_changes([(old_state, -1), (new_state, 1)])
+
+    @staticmethod
+    def record_changes(signed_states):
+        """
+        Aplica al resumen varios cambios a la vez, con una escritura por fila afectada.
+
+        Args:
+            signed_states: Iterable de (estado, signo): +1 suma el estado, -1 lo resta
+        """
+        deltas = {}
+        for state, sign in signed_states:
+            if state is None:
+                continue
+            key, (base_amount, total_amount) = state[:6], state[6:]
+            base_delta, total_delta, count_delta = deltas.get(key, (0, 0, 0))
+            deltas[key] = (
+                base_delta + sign * (base_amount or 0),
+                total_delta + sign * (total_amount or 0),
+                count_delta + sign,
+            )
+
+        with transaction.atomic():
+            for key, delta in deltas.items():
+                if any(delta):
+                    MonthlySummaryService._apply_delta(key, *delta)
+
+    @staticmethod
+    def _apply_delta(key, base_delta, total_delta, count_delta):
+        user_id, year, month, txn_type, category_id, currency = key
+        lookup = {
+            "user_id": user_id,
+            "year": year,
+            "month": month,
+            "type": txn_type,
+            "category_id": category_id,
+            "currency": currency,
+        }
+        # Con categoría nula puede haber varias filas (p. ej. tras borrar una
+        # categoría); el delta se aplica siempre sobre la primera.
+        row_pk = (
+            MonthlyCategorySummary.objects.filter(**lookup)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if row_pk is not None:
+            MonthlyCategorySummary.objects.filter(pk=row_pk).update(
+                base_amount=F("base_amount") + base_delta,
+                total_amount=F("total_amount") + total_delta,
+                count=F("count") + count_delta,
+            )
+            return
+
+        # Un delta negativo sin fila significa que el resumen ya se borró
+        # (p. ej. en cascada al eliminar el usuario): no hay nada que restar.
+        if count_delta <= 0:
+            return
+
+        try:
+            with transaction.atomic():
+                MonthlyCategorySummary.objects.create(
+                    **lookup,
+                    base_amount=base_delta,
+                    total_amount=total_delta,
+                    count=count_delta,
+                )
+        except IntegrityError:
+            # Otra escritura concurrente creó la fila primero
+            MonthlyCategorySummary.objects.filter(**lookup).update(
+                base_amount=F("base_amount") + base_delta,
+                total_amount=F("total_amount") + total_delta,
+                count=F("count") + count_delta,
+            )
+
+    @staticmethod
+    @transaction.atomic
+    def reassign_category(source_id, target_id) -> int:
+        """
+        Traslada el resumen de una categoría a otra (tras mover sus transacciones
+        con QuerySet.update).
+
+        Las filas del origen se suman a las del destino con la misma clave y el
+        resto cambia de categoría: tres sentencias, sin importar cuántos meses
+        abarque el historial.
+
+        Returns:
+            int: Número de filas de resumen del origen trasladadas
+        """
+        source_rows = MonthlyCategorySummary.objects.filter(category_id=source_id)
+        same_key = source_rows.filter(
+            user_id=OuterRef("user_id"),
+            year=OuterRef("year"),
+            month=OuterRef("month"),
+            type=OuterRef("type"),
+            currency=OuterRef("currency"),
+        )
+        target_matches = MonthlyCategorySummary.objects.filter(category_id=target_id).filter(
+            Exists(same_key)
+        )
+        merged = target_matches.update(
+            base_amount=F("base_amount") + Subquery(same_key.values("base_amount")[:1]),
+            total_amount=F("total_amount") + Subquery(same_key.values("total_amount")[:1]),
+            count=F("count") + Subquery(same_key.values("count")[:1]),
+        )
+        if merged:
+            target_rows = MonthlyCategorySummary.objects.filter(
+                category_id=target_id,
+                user_id=OuterRef("user_id"),
+                year=OuterRef("year"),
+                month=OuterRef("month"),
+                type=OuterRef("type"),
+                currency=OuterRef("currency"),
+            )
+            source_rows.filter(Exists(target_rows)).delete()
+        return merged + source_rows.update(category_id=target_id)
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild_for_user(user) -> int:
+        """
+        Recalcula desde cero el resumen mensual de un usuario.
+
+        Args:
+            user: Usuario (o id de usuario)
+
+        Returns:
+            int: Número de filas de resumen creadas
+        """
+        MonthlyCategorySummary.objects.filter(user=user).delete()
+
+        rows = (
+            Transaction.objects.filter(user=user)
+            .annotate(summary_year=ExtractYear("date"), summary_month=ExtractMonth("date"))
+            .values(
+                "user_id",
+                "summary_year",
+                "summary_month",
+                "type",
+                "category_id",
+                "transaction_currency",
+                "origin_account__currency",
+            )
+            .annotate(
+                base_sum=Sum("base_amount"), total_sum=Sum("total_amount"), row_count=Count("id")
+            )
+            .order_by()
+        )
+
+        summaries = {}
+        for row in rows:
+            key = (
+                row["user_id"],
+                row["summary_year"],
+                row["summary_month"],
+                row["type"],
+                row["category_id"],
+                row["transaction_currency"] or row["origin_account__currency"],
+            )
+            summary = summaries.get(key)
+            if summary is None:
+                summary = summaries[key] = MonthlyCategorySummary(
+                    user_id=key[0],
+                    year=key[1],
+                    month=key[2],
+                    type=key[3],
+                    category_id=key[4],
+                    currency=key[5],
+                )
+            summary.base_amount += row["base_sum"] or 0
+            summary.total_amount += row["total_sum"] or 0
+            summary.count += row["row_count"]
+
+        MonthlyCategorySummary.objects.bulk_create(summaries.values(), batch_size=1000)
+        logger.info(f"Resumen mensual reconstruido para usuario {user}: {len(summaries)} filas")
+        return len(summaries)
+
+    @staticmethod
+    def currency_rows(user, first_month, last_month, *, filters, group_fields, amount_field):
+        """
+        Totales del resumen para un rango de meses completos, agrupados por
+        ``group_fields``, moneda y mes.
+
+        Args:
+            user: Usuario
+            first_month: (año, mes) inicial, inclusive
+            last_month: (año, mes) final, inclusive
+            filters: Filtros adicionales válidos en Transaction y en el resumen
+                (ej: {"type": 2, "category__isnull": False})
+            group_fields: Campos de agrupación (ej: ["category__id", "category__name"])
+            amount_field: 'base_amount' o 'total_amount'
+
+        Returns:
+            list[dict]: Filas con los campos de agrupación, 'currency', 'year', 'month',
+            'total' y 'count'
+        """
+        first_year, first_month_number = first_month
+        last_year, last_month_number = last_month
+        month_range = (
+            Q(year__gt=first_year) | Q(year=first_year, month__gte=first_month_number)
+        ) & (Q(year__lt=last_year) | Q(year=last_year, month__lte=last_month_number))
+        return list(
+            MonthlyCategorySummary.objects.filter(month_range, user=user, **filters)
+            .values(*group_fields, "currency", "year", "month")
+            .annotate(total=Sum(amount_field), count=Sum("count"))
+            .order_by()
+        )
@@ -7,7 +7,9 @@ import calendar
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from django.db.models import Count, Q, Sum
+from django.conf import settings
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
 
 from categories.models import Category
 from transactions.models import Transaction
@@ -21,7 +23,9 @@ class FinancialAnalyticsService:
     """
 
     @staticmethod
-    def get_period_indicators(user, start_date: date, end_date: date, mode: str = "total") -> dict:
+    def get_period_indicators(
+        user, start_date: date, end_date: date, mode: str = "total", fx_strategy: str | None = None
+    ) -> dict:
         """
         Calcula indicadores de ingresos, gastos y balance para un período
 
@@ -30,6 +34,9 @@ class FinancialAnalyticsService:
             start_date: Fecha inicio del período
             end_date: Fecha fin del período
             mode: 'base' o 'total' (incluye impuestos)
+            fx_strategy: 'python' o 'sql' (ver group_totals_in_base)
+
+        Los meses completos se leen del resumen mensual (ver _period_totals_in_base).
 
         Returns:
             Dict con ingresos, gastos, balance y metadata
@@ -37,32 +44,23 @@ class FinancialAnalyticsService:
         amount_field = "base_amount" if mode == "base" else "total_amount"
         base_currency = FxService.get_base_currency(user)
 
-        base_filter = Q(user=user, date__gte=start_date, date__lte=end_date) & ~Q(type=3)
-
-        def _sum_by_currency(qs):
-            rows = qs.values("transaction_currency", "origin_account__currency").annotate(
-                total=Sum(amount_field), count=Count("id")
+        def _sum_by_currency(transaction_type):
+            groups = FinancialAnalyticsService._period_totals_in_base(
+                user,
+                start_date,
+                end_date,
+                filters={"type": transaction_type},
+                group_fields=[],
+                amount_field=amount_field,
+                base_currency=base_currency,
+                fx_strategy=fx_strategy,
             )
-            total_base = Decimal(0)
-            total_count = 0
-            for r in rows:
-                curr = r["transaction_currency"] or r["origin_account__currency"] or base_currency
-                amount = r["total"] or Decimal(0)
-                converted, _, _ = (
-                    FxService.convert_to_base(int(amount), curr, base_currency, end_date)
-                    if amount is not None
-                    else (0, Decimal(1), None)
-                )
-                total_base += Decimal(str(converted))
-                total_count += r["count"]
+            total_base = sum((g["amount"] for g in groups), Decimal(0))
+            total_count = sum(g["count"] for g in groups)
             return total_base, total_count
 
-        income_total, income_count = _sum_by_currency(
-            Transaction.objects.filter(base_filter & Q(type=1))
-        )
-        expense_total, expense_count = _sum_by_currency(
-            Transaction.objects.filter(base_filter & Q(type=2))
-        )
+        income_total, income_count = _sum_by_currency(1)
+        expense_total, expense_count = _sum_by_currency(2)
         balance = income_total - expense_total
 
         return {
@@ -92,7 +90,13 @@ class FinancialAnalyticsService:
 
     @staticmethod
     def get_expenses_by_category(
-        user, start_date: date, end_date: date, mode: str = "total", others_threshold: float = 0.05
+        user,
+        start_date: date,
+        end_date: date,
+        mode: str = "total",
+        others_threshold: float = 0.05,
+        *,
+        fx_strategy: str | None = None,
     ) -> dict:
         """
         Obtiene distribución de gastos por categoría para gráfico de dona
@@ -103,6 +107,7 @@ class FinancialAnalyticsService:
             end_date: Fecha fin del período
             mode: 'base' o 'total'
             others_threshold: % mínimo para categoría individual (default 5%)
+            fx_strategy: 'python' o 'sql' (ver group_totals_in_base)
 
         Returns:
             Dict con datos del gráfico de dona y metadata
@@ -110,65 +115,40 @@ class FinancialAnalyticsService:
         amount_field = "base_amount" if mode == "base" else "total_amount"
         base_currency = FxService.get_base_currency(user)
 
-        rows = (
-            Transaction.objects.filter(
-                user=user,
-                type=2,
-                date__gte=start_date,
-                date__lte=end_date,
-                category__isnull=False,
-            )
-            .values(
-                "category__id",
-                "category__name",
-                "category__color",
-                "category__icon",
-                "transaction_currency",
-                "origin_account__currency",
-            )
-            .annotate(amount=Sum(amount_field), count=Count("id"))
+        category_fields = ["category__id", "category__name", "category__color", "category__icon"]
+        category_groups = FinancialAnalyticsService._period_totals_in_base(
+            user,
+            start_date,
+            end_date,
+            filters={"type": 2, "category__isnull": False},
+            group_fields=category_fields,
+            amount_field=amount_field,
+            base_currency=base_currency,
+            fx_strategy=fx_strategy,
         )
 
         category_totals = {}
-        for item in rows:
-            cat_id = item["category__id"]
-            currency = (
-                item["transaction_currency"] or item["origin_account__currency"] or base_currency
-            )
-            amount = item["amount"] or Decimal(0)
-            converted, _, _ = FxService.convert_to_base(
-                int(amount), currency, base_currency, end_date
-            )
-            if cat_id not in category_totals:
-                category_totals[cat_id] = {
-                    "amount": Decimal(0),
-                    "count": 0,
-                    "name": item["category__name"],
-                    "color": item["category__color"],
-                    "icon": item["category__icon"],
-                }
-            category_totals[cat_id]["amount"] += Decimal(str(converted))
-            category_totals[cat_id]["count"] += item["count"]
+        for group in category_groups:
+            category_totals[group["category__id"]] = {
+                "amount": group["amount"],
+                "count": group["count"],
+                "name": group["category__name"],
+                "color": group["category__color"],
+                "icon": group["category__icon"],
+            }
 
-        uncategorized_rows = (
-            Transaction.objects.filter(
-                user=user, type=2, date__gte=start_date, date__lte=end_date, category__isnull=True
-            )
-            .values("transaction_currency", "origin_account__currency")
-            .annotate(amount=Sum(amount_field), count=Count("id"))
+        uncategorized_groups = FinancialAnalyticsService._period_totals_in_base(
+            user,
+            start_date,
+            end_date,
+            filters={"type": 2, "category__isnull": True},
+            group_fields=[],
+            amount_field=amount_field,
+            base_currency=base_currency,
+            fx_strategy=fx_strategy,
         )
-        uncategorized_amount = Decimal(0)
-        uncategorized_count = 0
-        for item in uncategorized_rows:
-            currency = (
-                item["transaction_currency"] or item["origin_account__currency"] or base_currency
-            )
-            amount = item["amount"] or Decimal(0)
-            converted, _, _ = FxService.convert_to_base(
-                int(amount), currency, base_currency, end_date
-            )
-            uncategorized_amount += Decimal(str(converted))
-            uncategorized_count += item["count"]
+        uncategorized_amount = sum((g["amount"] for g in uncategorized_groups), Decimal(0))
+        uncategorized_count = sum(g["count"] for g in uncategorized_groups)
 
         total_expenses = sum([v["amount"] for v in category_totals.values()]) + uncategorized_amount
 
@@ -255,7 +235,9 @@ class FinancialAnalyticsService:
         }
 
     @staticmethod
-    def get_daily_flow_chart(user, start_date: date, end_date: date, mode: str = "total") -> dict:
+    def get_daily_flow_chart(
+        user, start_date: date, end_date: date, mode: str = "total", fx_strategy: str | None = None
+    ) -> dict:
         """
         Obtiene datos para gráfico de líneas con flujo diario acumulado
 
@@ -264,6 +246,7 @@ class FinancialAnalyticsService:
             start_date: Fecha inicio del período
             end_date: Fecha fin del período
             mode: 'base' o 'total'
+            fx_strategy: 'python' o 'sql' (ver group_totals_in_base)
 
         Returns:
             Dict con series de datos para gráfico de líneas
@@ -271,27 +254,24 @@ class FinancialAnalyticsService:
         amount_field = "base_amount" if mode == "base" else "total_amount"
         base_currency = FxService.get_base_currency(user)
 
-        # Obtener transacciones diarias agrupadas por fecha, tipo Y moneda (sin transferencias)
-        daily_transactions = (
-            Transaction.objects.filter(user=user, date__gte=start_date, date__lte=end_date)
-            .exclude(type=3)
-            .values("date", "type", "transaction_currency", "origin_account__currency")
-            .annotate(total=Sum(amount_field), count=Count("id"))
-            .order_by("date")
+        # Transacciones diarias agrupadas por fecha y tipo (sin transferencias), convertidas
+        # a moneda base con la tasa del mes de cada día
+        daily_groups = FinancialAnalyticsService._group_totals_in_base(
+            Transaction.objects.filter(user=user, date__gte=start_date, date__lte=end_date).exclude(
+                type=3
+            ),
+            ["date", "type"],
+            amount_field,
+            base_currency,
+            fx_strategy=fx_strategy,
         )
 
-        # Crear diccionario para búsqueda rápida, agrupando por fecha y convirtiendo monedas
+        # Crear diccionario para búsqueda rápida, agrupando por fecha
         transactions_by_date = {}
-        for item in daily_transactions:
-            transaction_date = item["date"]
-            transaction_type = item["type"]
-            curr = item["transaction_currency"] or item["origin_account__currency"] or base_currency
-            amount = item["total"] or Decimal("0")
-
-            # Convertir a moneda base
-            converted, _, _ = FxService.convert_to_base(
-                int(amount), curr, base_currency, transaction_date
-            )
+        for group in daily_groups:
+            transaction_date = group["date"]
+            transaction_type = group["type"]
+            converted = group["amount"]
 
             # Inicializar fecha si no existe
             if transaction_date not in transactions_by_date:
@@ -368,6 +348,299 @@ class FinancialAnalyticsService:
             "currency": base_currency,
         }
 
+    @staticmethod
+    def _period_totals_in_base(
+        user,
+        start_date,
+        end_date,
+        *,
+        filters,
+        group_fields,
+        amount_field,
+        base_currency,
+        fx_strategy,
+    ):
+        """
+        Totales del período agrupados y convertidos a moneda base con la tasa de
+        cada mes.
+
+        Con la estrategia 'python' los meses completos del período se leen del
+        resumen mensual (MonthlyCategorySummary) y solo los meses parciales de
+        los extremos se agregan desde Transaction. Como las sumas se combinan
+        por moneda y mes antes de convertir, el resultado es idéntico al de
+        agregar todas las transacciones.
+
+        Args:
+            user: Usuario autenticado
+            start_date: Fecha inicio del período
+            end_date: Fecha fin del período
+            filters: Filtros válidos en Transaction y en el resumen (ej: {"type": 1})
+            group_fields: Campos de agrupación
+            amount_field: 'base_amount' o 'total_amount'
+            base_currency: Moneda destino
+            fx_strategy: 'python' o 'sql' (ver group_totals_in_base)
+
+        Returns:
+            list[dict]: Igual que _group_totals_in_base
+        """
+        from analytics.rollups import MonthlySummaryService
+
+        strategy = fx_strategy or getattr(settings, "ANALYTICS_FX_STRATEGY", "python")
+        full_months, partial_ranges = FinancialAnalyticsService._split_month_aligned(
+            start_date, end_date
+        )
+        use_summary = getattr(settings, "ANALYTICS_USE_MONTHLY_SUMMARY", True)
+
+        if strategy != "python" or not use_summary or full_months is None:
+            return FinancialAnalyticsService._group_totals_in_base(
+                Transaction.objects.filter(
+                    user=user, date__gte=start_date, date__lte=end_date, **filters
+                ),
+                group_fields,
+                amount_field,
+                base_currency,
+                fx_strategy=strategy,
+            )
+
+        summary_rows = MonthlySummaryService.currency_rows(
+            user,
+            full_months[0],
+            full_months[1],
+            filters=filters,
+            group_fields=group_fields,
+            amount_field=amount_field,
+        )
+        partial_filter = Q()
+        for partial_start, partial_end in partial_ranges:
+            partial_filter |= Q(date__gte=partial_start, date__lte=partial_end)
+        queryset = (
+            Transaction.objects.filter(partial_filter, user=user, **filters)
+            if partial_ranges
+            else Transaction.objects.none()
+        )
+        return FinancialAnalyticsService._group_totals_in_base(
+            queryset,
+            group_fields,
+            amount_field,
+            base_currency,
+            fx_strategy=strategy,
+            summary_rows=summary_rows,
+        )
+
+    @staticmethod
+    def _split_month_aligned(start_date: date, end_date: date):
+        """
+        Divide un rango en meses completos y extremos parciales.
+
+        Returns:
+            tuple: ((año, mes) inicial, (año, mes) final) de los meses completos
+            o None si no hay ninguno, y lista de rangos (inicio, fin) parciales
+        """
+        first_full = (
+            start_date
+            if start_date.day == 1
+            else (start_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+        )
+        last_day = calendar.monthrange(end_date.year, end_date.month)[1]
+        last_full = (
+            end_date if end_date.day == last_day else end_date.replace(day=1) - timedelta(days=1)
+        )
+
+        if first_full > last_full:
+            return None, [(start_date, end_date)]
+
+        partial_ranges = []
+        if start_date < first_full:
+            partial_ranges.append((start_date, first_full - timedelta(days=1)))
+        if end_date > last_full:
+            partial_ranges.append((last_full + timedelta(days=1), end_date))
+        full_months = ((first_full.year, first_full.month), (last_full.year, last_full.month))
+        return full_months, partial_ranges
+
+    @staticmethod
+    def group_totals_in_base(
+        queryset,
+        group_fields,
+        amount_fields,
+        base_currency,
+        *,
+        fx_strategy=None,
+        summary_rows=(),
+    ):
+        """
+        Suma varios campos de monto agrupados y convertidos a la moneda base,
+        con una sola consulta agrupada.
+
+        La base de datos agrupa por (grupo, moneda, mes) y cada suma se
+        convierte una sola vez con la tasa de su mes, de modo que un rango de
+        varios meses usa la tasa de cada mes. Las estrategias solo difieren en
+        dónde se resuelve la tasa:
+        - 'python': FxService.convert_many la busca en el snapshot de tasas.
+          Admite filas ya agregadas del resumen mensual (``summary_rows``),
+          que se suman por moneda y mes antes de convertir.
+        - 'sql': la misma consulta anota la tasa del mes con una subconsulta
+          sobre ExchangeRate (último tipo de cambio en o antes del mes, directo
+          o inverso), sin consultar el snapshot.
+        En ambas Python multiplica cada suma por su tasa con el redondeo de
+        FxService y combina las monedas, por lo que el resultado es idéntico al
+        centavo.
+
+        Args:
+            queryset: Transacciones ya filtradas
+            group_fields: Campos de agrupación (ej: ["date", "type"])
+            amount_fields: Campos de monto en centavos (ej: ["total_amount", "gmf_amount"])
+            base_currency: Moneda destino
+            fx_strategy: 'python' o 'sql' (default: settings.ANALYTICS_FX_STRATEGY)
+            summary_rows: Filas con los campos de agrupación, 'currency', 'year',
+                'month', 'count' y '<campo>_sum' por cada monto (solo 'python')
+
+        Returns:
+            list[dict]: Un dict por grupo con los campos de agrupación, cada
+            campo de monto (Decimal en centavos de la moneda base) y 'count'
+        """
+        strategy = fx_strategy or getattr(settings, "ANALYTICS_FX_STRATEGY", "python")
+        currency_fields = ["transaction_currency", "origin_account__currency"]
+        queryset = queryset.annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        rate_fields = []
+        if strategy == "sql":
+            effective_currency = Coalesce(
+                *[OuterRef(f) for f in currency_fields], Value(base_currency)
+            )
+            queryset = queryset.annotate(
+                fx_rate=FinancialAnalyticsService._latest_rate_subquery(
+                    effective_currency, Value(base_currency)
+                ),
+                fx_inverse_rate=FinancialAnalyticsService._latest_rate_subquery(
+                    Value(base_currency), effective_currency
+                ),
+            )
+            rate_fields = ["fx_rate", "fx_inverse_rate"]
+            summary_rows = ()
+
+        raw_rows = (
+            queryset.values(*group_fields, "year", "month", *currency_fields, *rate_fields)
+            .annotate(count=Count("id"), **{f"{field}_sum": Sum(field) for field in amount_fields})
+            .order_by()
+        )
+
+        # Una fila por (grupo, moneda efectiva, mes), combinando transacciones y resumen
+        merged = {}
+        for row in [*raw_rows, *summary_rows]:
+            currency = (
+                row.get("currency")
+                or row.get("transaction_currency")
+                or row.get("origin_account__currency")
+                or base_currency
+            )
+            key = (*(row[f] for f in group_fields), currency, row["year"], row["month"])
+            if key not in merged:
+                merged[key] = {
+                    **{f: row[f] for f in group_fields},
+                    **{f: row[f] for f in rate_fields},
+                    **dict.fromkeys(amount_fields, 0),
+                    "currency": currency,
+                    "month_start": date(row["year"], row["month"], 1),
+                    "count": 0,
+                }
+            for field in amount_fields:
+                merged[key][field] += int(row[f"{field}_sum"] or 0)
+            merged[key]["count"] += row["count"] or 0
+        rows = list(merged.values())
+
+        # converted[i][j]: campo i de la fila j en moneda base
+        if strategy == "sql":
+            rates = [
+                FxService.select_rate(
+                    row["currency"], base_currency, row["fx_rate"], row["fx_inverse_rate"]
+                )
+                for row in rows
+            ]
+            converted = [
+                [
+                    FxService._apply_rate(row[field], rate)
+                    for row, rate in zip(rows, rates, strict=True)
+                ]
+                for field in amount_fields
+            ]
+        else:
+            # Una sola conversión en lote para todos los campos (una tasa por moneda y mes)
+            flat, _, _ = FxService.convert_many(
+                [row[field] for field in amount_fields for row in rows],
+                [row["currency"] for row in rows] * len(amount_fields),
+                [row["month_start"] for row in rows] * len(amount_fields),
+                base_currency,
+            )
+            converted = [
+                flat[index * len(rows) : (index + 1) * len(rows)]
+                for index in range(len(amount_fields))
+            ]
+
+        groups = {}
+        for index, row in enumerate(rows):
+            key = tuple(row[f] for f in group_fields)
+            if key not in groups:
+                groups[key] = {
+                    **{f: row[f] for f in group_fields},
+                    **{field: Decimal(0) for field in amount_fields},
+                    "count": 0,
+                }
+            for field, field_amounts in zip(amount_fields, converted, strict=True):
+                groups[key][field] += Decimal(str(field_amounts[index]))
+            groups[key]["count"] += row["count"]
+        return list(groups.values())
+
+    @staticmethod
+    def _group_totals_in_base(
+        queryset,
+        group_fields,
+        amount_field,
+        base_currency,
+        *,
+        fx_strategy=None,
+        summary_rows=(),
+    ):
+        """
+        group_totals_in_base para un solo campo de monto.
+
+        Args:
+            summary_rows: Filas de MonthlySummaryService.currency_rows (solo 'python')
+
+        Returns:
+            list[dict]: Un dict por grupo con los campos de agrupación, 'amount'
+            (Decimal en centavos de la moneda base) y 'count'
+        """
+        groups = FinancialAnalyticsService.group_totals_in_base(
+            queryset,
+            group_fields,
+            [amount_field],
+            base_currency,
+            fx_strategy=fx_strategy,
+            summary_rows=[{**row, f"{amount_field}_sum": row["total"]} for row in summary_rows],
+        )
+        for group in groups:
+            group["amount"] = group.pop(amount_field)
+        return groups
+
+    @staticmethod
+    def _latest_rate_subquery(currency, base_currency):
+        """
+        Subconsulta con la tasa currency->base_currency más reciente en o antes
+        del mes de la transacción (fila externa).
+        """
+        from utils.models import ExchangeRate
+
+        year = ExtractYear(OuterRef("date"))
+        month = ExtractMonth(OuterRef("date"))
+        return Subquery(
+            ExchangeRate.objects.filter(
+                Q(year__lt=year) | Q(year=year, month__lte=month),
+                currency=currency,
+                base_currency=base_currency,
+            )
+            .order_by("-year", "-month")
+            .values("rate")[:1]
+        )
+
     @staticmethod
     def get_transactions_by_category(
         user,
@@ -375,6 +648,7 @@ class FinancialAnalyticsService:
         start_date: date,
         end_date: date,
         mode: str = "total",
+        *,
         limit: int = 50,
     ) -> dict:
         """
@@ -547,6 +821,7 @@ class FinancialAnalyticsService:
         period1_end: date,
         period2_start: date,
         period2_end: date,
+        *,
         mode: str = "total",
     ) -> dict:
         """
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from accounts.models import Account
+from analytics.cache import AnalyticsCache
+from analytics.rollups import SUMMARY_FIELDS, MonthlySummaryService
+from budgets.models import Budget
+from categories.models import Category
+from transactions.models import Transaction
+from utils.models import BaseCurrencySetting, ExchangeRate
+
+
+def _affects_summary(update_fields):
+    return update_fields is None or not SUMMARY_FIELDS.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Transaction)
+def capture_monthly_summary_state(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Guarda el estado previo de la transacción para calcular el delta del resumen"""
+    if raw or instance._state.adding or not _affects_summary(update_fields):
+        instance._monthly_summary_state = None
+        return
+    instance._monthly_summary_state = MonthlySummaryService.state_from_db(instance.pk)
+
+
+@receiver(post_save, sender=Transaction)
+def update_monthly_summary_on_save(
+    sender, instance, created, update_fields=None, raw=False, **kwargs
+):
+    """Aplica al resumen mensual el alta o la edición de una transacción"""
+    if raw or not _affects_summary(update_fields):
+        return
+    old_state = None if created else getattr(instance, "_monthly_summary_state", None)
+    MonthlySummaryService.record_change(
+        old_state, MonthlySummaryService.state_from_instance(instance)
+    )
+    instance._monthly_summary_state = None
+
+
+@receiver(post_delete, sender=Transaction)
+def update_monthly_summary_on_delete(sender, instance, **kwargs):
+    """Descuenta del resumen mensual una transacción eliminada"""
+    MonthlySummaryService.record_change(MonthlySummaryService.state_from_instance(instance), None)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=BaseCurrencySetting)
+@receiver(post_delete, sender=BaseCurrencySetting)
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+def invalidate_user_analytics_cache(sender, instance, raw=False, **kwargs):
+    """Cambia la versión de datos de analytics del usuario dueño del registro"""
+    if raw:
+        return
+    AnalyticsCache.bump_user(instance.user_id)
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_analytics_cache_on_rate_change(sender, instance, raw=False, **kwargs):
+    """Un tipo de cambio nuevo o modificado invalida los resultados de todos los usuarios"""
+    if raw:
+        return
+    AnalyticsCache.bump_rates()
@@ -23,6 +23,8 @@ urlpatterns = [
     path("periods/", views.available_periods, name="available_periods"),
     # HU-14: Comparación entre períodos
     path("compare-periods/", views.compare_periods, name="compare_periods"),
+    # Métricas de la caché de analytics (administradores)
+    path("cache-stats/", views.cache_stats, name="analytics_cache_stats"),
 ]
 
 # URLs disponibles para HU-13:
@@ -51,6 +53,10 @@ urlpatterns = [
 # ?period1=2025-09&period2=2025-10&mode=total - Compara septiembre vs octubre
 # ?period1=last_month&period2=current_month&mode=base - Mes anterior vs actual
 #
+# Caché de analytics:
+# GET /api/analytics/cache-stats/ - Aciertos/fallos por endpoint (solo administradores)
+# POST /api/analytics/cache-stats/ - Leer y reiniciar los contadores (solo administradores)
+#
 # Ejemplos de comparación:
 # GET /api/analytics/compare-periods/?period1=2025-09&period2=2025-10&mode=total
 # GET /api/analytics/compare-periods/?period1=last_month&period2=current_month&mode=base
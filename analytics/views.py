@@ -12,6 +12,9 @@ from rest_framework.decorators import api_view, authentication_classes, permissi
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from users.permissions import IsAdminUser
+
+from .cache import AnalyticsCache
 from .serializers import (
     AnalyticsDashboardSerializer,
     CategoryTransactionsSerializer,
@@ -183,16 +186,32 @@ def analytics_dashboard(request):
             )
 
         # Obtener datos de analytics
-        indicators = FinancialAnalyticsService.get_period_indicators(
-            user, start_date, end_date, mode
+        period_params = {"start": start_date, "end": end_date, "mode": mode}
+        indicators = AnalyticsCache.get_or_compute(
+            user,
+            "period_indicators",
+            period_params,
+            lambda: FinancialAnalyticsService.get_period_indicators(
+                user, start_date, end_date, mode
+            ),
         )
 
-        expenses_chart = FinancialAnalyticsService.get_expenses_by_category(
-            user, start_date, end_date, mode, others_threshold
+        expenses_chart = AnalyticsCache.get_or_compute(
+            user,
+            "expenses_by_category",
+            {**period_params, "others_threshold": others_threshold},
+            lambda: FinancialAnalyticsService.get_expenses_by_category(
+                user, start_date, end_date, mode, others_threshold
+            ),
         )
 
-        daily_flow_chart = FinancialAnalyticsService.get_daily_flow_chart(
-            user, start_date, end_date, mode
+        daily_flow_chart = AnalyticsCache.get_or_compute(
+            user,
+            "daily_flow_chart",
+            period_params,
+            lambda: FinancialAnalyticsService.get_daily_flow_chart(
+                user, start_date, end_date, mode
+            ),
         )
 
         # Preparar respuesta completa
@@ -284,8 +303,13 @@ def period_indicators(request):
             user=user, date__gte=start_date, date__lte=end_date
         ).count()
 
-        indicators = FinancialAnalyticsService.get_period_indicators(
-            user, start_date, end_date, mode
+        indicators = AnalyticsCache.get_or_compute(
+            user,
+            "period_indicators",
+            {"start": start_date, "end": end_date, "mode": mode},
+            lambda: FinancialAnalyticsService.get_period_indicators(
+                user, start_date, end_date, mode
+            ),
         )
 
         # Agregar información contextual
@@ -362,8 +386,18 @@ def expenses_by_category(request):
             user=user, type=2, date__gte=start_date, date__lte=end_date
         ).count()
 
-        chart_data = FinancialAnalyticsService.get_expenses_by_category(
-            user, start_date, end_date, mode, others_threshold
+        chart_data = AnalyticsCache.get_or_compute(
+            user,
+            "expenses_by_category",
+            {
+                "start": start_date,
+                "end": end_date,
+                "mode": mode,
+                "others_threshold": others_threshold,
+            },
+            lambda: FinancialAnalyticsService.get_expenses_by_category(
+                user, start_date, end_date, mode, others_threshold
+            ),
         )
 
         # Agregar contexto a los datos
@@ -417,8 +451,13 @@ def daily_flow_chart(request):
 
         start_date, end_date = FinancialAnalyticsService.parse_period_param(period_str)
 
-        chart_data = FinancialAnalyticsService.get_daily_flow_chart(
-            request.user, start_date, end_date, mode
+        chart_data = AnalyticsCache.get_or_compute(
+            request.user,
+            "daily_flow_chart",
+            {"start": start_date, "end": end_date, "mode": mode},
+            lambda: FinancialAnalyticsService.get_daily_flow_chart(
+                request.user, start_date, end_date, mode
+            ),
         )
 
         serializer = DailyFlowChartSerializer(chart_data)
@@ -479,7 +518,7 @@ def category_transactions(request, category_id):
                 )
 
         transactions_data = FinancialAnalyticsService.get_transactions_by_category(
-            request.user, category_id, start_date, end_date, mode, limit
+            request.user, category_id, start_date, end_date, mode, limit=limit
         )
 
         if "error" in transactions_data:
@@ -694,8 +733,17 @@ def compare_periods(request):
             )
 
         # Realizar comparación
-        comparison_data = FinancialAnalyticsService.compare_periods(
-            user, period1_start, period1_end, period2_start, period2_end, mode
+        comparison_data = AnalyticsCache.get_or_compute(
+            user,
+            "compare_periods",
+            {
+                "period1": [period1_start, period1_end],
+                "period2": [period2_start, period2_end],
+                "mode": mode,
+            },
+            lambda: FinancialAnalyticsService.compare_periods(
+                user, period1_start, period1_end, period2_start, period2_end, mode=mode
+            ),
         )
 
         # Verificar si se puede hacer comparación válida
@@ -787,3 +835,27 @@ def compare_periods(request):
             },
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+
+@api_view(["GET", "POST"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Contadores de aciertos y fallos de la caché de analytics (solo administradores)
+
+    - GET: lee los contadores
+    - POST: los lee y después los reinicia
+    """
+    stats = AnalyticsCache.stats()
+    if request.method == "POST":
+        AnalyticsCache.reset_stats()
+
+    return Response(
+        {
+            "success": True,
+            "data": {"timeout": AnalyticsCache.timeout(), "endpoints": stats},
+            "message": "Estadísticas de caché de analytics",
+        },
+        status=status.HTTP_200_OK,
+    )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BudgetsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "budgets"
+
+    def ready(self):
+        # Registrar señales de la app (contadores de gasto por período)
+        from . import signals  # noqa: F401
@@ -0,0 +1,391 @@
+"""
+Contadores incrementales de gasto por presupuesto y período (BudgetPeriodSpend)
+
+Cada alta, edición o borrado de una transacción de gasto aplica un delta, ya
+convertido a la moneda del presupuesto con la tasa del mes de la transacción,
+sobre la fila (presupuesto, inicio de período) correspondiente. Así las
+alertas comparan el gasto antes y después de la escritura sin volver a
+recorrer el historial.
+
+Las filas se crean de forma perezosa: la primera escritura de un período
+siembra el contador desde las transacciones. Editar un presupuesto o un tipo
+de cambio descarta los contadores afectados, que se vuelven a sembrar en la
+siguiente escritura. Las escrituras masivas que no disparan señales
+(bulk_create, QuerySet.update) deben aplicar sus deltas con
+BudgetSpendService.record_changes o descartarlos con
+BudgetSpendService.invalidate_for_user. El comando reconcile_budget_spend
+reconstruye los contadores y reporta las diferencias encontradas.
+"""
+
+import logging
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from transactions.models import Transaction
+from utils.currency_converter import FxContext
+
+from .models import Budget, BudgetPeriodSpend
+
+logger = logging.getLogger(__name__)
+
+# Campos de Transaction que afectan al gasto de los presupuestos
+SPEND_FIELDS = frozenset(
+    {
+        "user",
+        "date",
+        "type",
+        "category",
+        "transaction_currency",
+        "origin_account",
+        "base_amount",
+        "tax_percentage",
+        "taxed_amount",
+        "gmf_amount",
+        "total_amount",
+    }
+)
+
+# Cambio de un contador: montos (base, total) en centavos de la moneda del presupuesto y
+# fecha de la transacción más reciente sumada (define el mes de la alerta)
+BudgetSpendChange = namedtuple(
+    "BudgetSpendChange", ["budget", "period_start", "before", "after", "ref_date"]
+)
+
+
+class BudgetSpendService:
+    """
+    Servicio para mantener y consultar BudgetPeriodSpend.
+
+    El estado de una transacción para los contadores es la tupla
+    (user_id, category_id, type, date, currency, base_amount, total_amount).
+    """
+
+    @staticmethod
+    def state_from_instance(instance):
+        """Estado de una instancia en memoria"""
+        currency = instance.transaction_currency or instance.origin_account.currency
+        # La fecha puede venir como texto si la instancia se creó sin pasar por un formulario
+        txn_date = Transaction._meta.get_field("date").to_python(instance.date)
+        return (
+            instance.user_id,
+            instance.category_id,
+            instance.type,
+            txn_date,
+            currency,
+            instance.base_amount,
+            instance.total_amount,
+        )
+
+    @staticmethod
+    def state_from_db(pk):
+        """Estado de una transacción tal como está guardada (o None)"""
+        row = (
+            Transaction.objects.filter(pk=pk)
+            .values_list(
+                "user_id",
+                "category_id",
+                "type",
+                "date",
+                "transaction_currency",
+                "origin_account__currency",
+                "base_amount",
+                "total_amount",
+            )
+            .first()
+        )
+        if row is None:
+            return None
+        user_id, category_id, txn_type, txn_date, tx_currency, account_currency, base, total = row
+        return (
+            user_id,
+            category_id,
+            txn_type,
+            txn_date,
+            tx_currency or account_currency,
+            base,
+            total,
+        )
+
+    @staticmethod
+    def _counts(state):
+        """Solo los gastos categorizados cuentan para los presupuestos"""
+        return state is not None and state[2] == 2 and state[1] is not None
+
+    @staticmethod
+    def record_change(old_state=None, new_state=None):
+        """
+        Aplica a los contadores el cambio de una transacción.
+
+        Args:
+            old_state: Estado anterior (None en altas)
+            new_state: Estado nuevo (None en borrados)
+
+        Returns:
+            list[BudgetSpendChange]: Valores antes y después de cada contador
+            que incluye el estado nuevo (vacía en borrados)
+        """
+        return BudgetSpendService.record_changes([(old_state, -1), (new_state, 1)])
+
+    @staticmethod
+    def record_changes(signed_states):
+        """
+        Aplica a los contadores varios cambios a la vez, con una escritura por
+        contador afectado (p. ej. un lote de importación).
+
+        Args:
+            signed_states: Iterable de (estado, signo): +1 suma el estado, -1 lo resta
+
+        Returns:
+            list[BudgetSpendChange]: Valores antes y después de cada contador
+            que recibe algún estado sumado
+        """
+        states = [
+            (state, sign) for state, sign in signed_states if BudgetSpendService._counts(state)
+        ]
+        if not states:
+            return []
+
+        query = Q()
+        for user_id, category_id in {(state[0], state[1]) for state, _ in states}:
+            query |= Q(user_id=user_id, category_id=category_id)
+        budgets_by_category = {}
+        for budget in Budget.objects.filter(query):
+            budgets_by_category.setdefault((budget.user_id, budget.category_id), []).append(budget)
+        if not budgets_by_category:
+            return []
+
+        fx_contexts = {}
+        deltas = {}
+        # Contadores que reciben algún estado sumado -> fecha más reciente sumada
+        ref_dates = {}
+        for state, sign in states:
+            user_id, category_id, _, txn_date, currency, base_amount, total_amount = state
+            for budget in budgets_by_category.get((user_id, category_id), []):
+                if budget.currency not in fx_contexts:
+                    fx_contexts[budget.currency] = FxContext(budget.currency)
+                converted = BudgetSpendService._convert(
+                    fx_contexts[budget.currency], base_amount, total_amount, currency, txn_date
+                )
+                if converted is None:
+                    continue
+
+                period_start = budget.get_period_dates(txn_date)[0]
+                key = (budget, period_start)
+                base_delta, total_delta = deltas.get(key, (0, 0))
+                deltas[key] = (base_delta + sign * converted[0], total_delta + sign * converted[1])
+                if sign > 0:
+                    ref_dates[key] = max(ref_dates.get(key, txn_date), txn_date)
+
+        changes = []
+        with transaction.atomic():
+            for (budget, period_start), delta in deltas.items():
+                ref_date = ref_dates.get((budget, period_start))
+                before, after = BudgetSpendService._apply_delta(
+                    budget,
+                    period_start,
+                    delta,
+                    seed=ref_date is not None,
+                    fx=fx_contexts[budget.currency],
+                )
+                if ref_date is not None and after is not None:
+                    changes.append(BudgetSpendChange(budget, period_start, before, after, ref_date))
+        return changes
+
+    @staticmethod
+    def _convert(fx, base_amount, total_amount, currency, ref_date):
+        """Convierte (base, total) a la moneda del contexto, o None si no hay tasa"""
+        try:
+            base, _, _ = fx.convert(base_amount or 0, currency, ref_date)
+            total, _, _ = fx.convert(total_amount or 0, currency, ref_date)
+        except ValueError:
+            # Sin tipo de cambio: la transacción no suma, igual que en get_spent_amount
+            return None
+        return base, total
+
+    @staticmethod
+    def _apply_delta(budget, period_start, delta, seed, fx):
+        """
+        Suma el delta a la fila del período (bloqueándola) y devuelve
+        (antes, después). Sin fila, la siembra desde las transacciones, que ya
+        incluyen la escritura en curso; un delta que solo resta no siembra.
+        """
+        lookup = {"budget_id": budget.pk, "period_start": period_start}
+        base_delta, total_delta = delta
+
+        for _ in range(2):
+            row = (
+                BudgetPeriodSpend.objects.select_for_update()
+                .filter(**lookup)
+                .values_list("pk", "base_amount", "total_amount")
+                .first()
+            )
+            if row is not None:
+                pk, base_amount, total_amount = row
+                if base_delta or total_delta:
+                    BudgetPeriodSpend.objects.filter(pk=pk).update(
+                        base_amount=F("base_amount") + base_delta,
+                        total_amount=F("total_amount") + total_delta,
+                    )
+                before = (base_amount, total_amount)
+                return before, (base_amount + base_delta, total_amount + total_delta)
+
+            if not seed:
+                return None, None
+
+            _, period_end = budget.get_period_dates(period_start)
+            after = BudgetSpendService._raw_period_totals(budget, period_start, period_end, fx)
+            try:
+                with transaction.atomic():
+                    BudgetPeriodSpend.objects.create(
+                        **lookup, base_amount=after[0], total_amount=after[1]
+                    )
+            except IntegrityError:
+                # Otra escritura concurrente sembró la fila primero: aplicar el delta sobre ella
+                continue
+            return (after[0] - base_delta, after[1] - total_delta), after
+
+        msg = f"No se pudo actualizar el gasto del presupuesto {budget.pk} ({period_start})"
+        raise RuntimeError(msg)
+
+    @staticmethod
+    def _transaction_rows(budget, start_date=None, end_date=None):
+        queryset = Transaction.objects.filter(
+            user_id=budget.user_id, category_id=budget.category_id, type=2
+        )
+        if start_date is not None:
+            queryset = queryset.filter(date__gte=start_date, date__lte=end_date)
+        return queryset.values_list(
+            "date",
+            "transaction_currency",
+            "origin_account__currency",
+            "base_amount",
+            "total_amount",
+        ).order_by()
+
+    @staticmethod
+    def _raw_period_totals(budget, start_date, end_date, fx):
+        """Gasto (base, total) del período calculado desde las transacciones"""
+        base_sum = total_sum = 0
+        for (
+            txn_date,
+            tx_currency,
+            account_currency,
+            base,
+            total,
+        ) in BudgetSpendService._transaction_rows(budget, start_date, end_date):
+            converted = BudgetSpendService._convert(
+                fx, base, total, tx_currency or account_currency, txn_date
+            )
+            if converted is not None:
+                base_sum += converted[0]
+                total_sum += converted[1]
+        return base_sum, total_sum
+
+    @staticmethod
+    def compute_period_totals(budget):
+        """
+        Gasto de todos los períodos de un presupuesto, desde las transacciones.
+
+        Returns:
+            dict: {period_start: (base_cents, total_cents)}
+        """
+        fx = FxContext(budget.currency)
+        totals = {}
+        for (
+            txn_date,
+            tx_currency,
+            account_currency,
+            base,
+            total,
+        ) in BudgetSpendService._transaction_rows(budget).iterator(chunk_size=2000):
+            converted = BudgetSpendService._convert(
+                fx, base, total, tx_currency or account_currency, txn_date
+            )
+            if converted is None:
+                continue
+            period_start = budget.get_period_dates(txn_date)[0]
+            base_sum, total_sum = totals.get(period_start, (0, 0))
+            totals[period_start] = (base_sum + converted[0], total_sum + converted[1])
+        return totals
+
+    @staticmethod
+    @transaction.atomic
+    def reconcile_budget(budget, fix=True):
+        """
+        Compara los contadores guardados con el gasto real y, si fix, los reconstruye.
+
+        Los períodos sin fila no son diferencias: se siembran en la siguiente escritura.
+
+        Returns:
+            list[dict]: Diferencias {period_start, stored, expected} en centavos (base, total)
+        """
+        expected = BudgetSpendService.compute_period_totals(budget)
+        stored = {
+            period_start: (base_amount, total_amount)
+            for period_start, base_amount, total_amount in BudgetPeriodSpend.objects.filter(
+                budget=budget
+            ).values_list("period_start", "base_amount", "total_amount")
+        }
+
+        drift = [
+            {
+                "period_start": period_start,
+                "stored": values,
+                "expected": expected.get(period_start, (0, 0)),
+            }
+            for period_start, values in sorted(stored.items())
+            if values != expected.get(period_start, (0, 0))
+        ]
+
+        if fix:
+            BudgetPeriodSpend.objects.filter(budget=budget).delete()
+            BudgetPeriodSpend.objects.bulk_create(
+                [
+                    BudgetPeriodSpend(
+                        budget=budget,
+                        period_start=period_start,
+                        base_amount=base_amount,
+                        total_amount=total_amount,
+                    )
+                    for period_start, (base_amount, total_amount) in expected.items()
+                ],
+                batch_size=1000,
+            )
+        if drift:
+            logger.warning(
+                f"Presupuesto {budget.pk}: {len(drift)} períodos con diferencias en el contador"
+            )
+        return drift
+
+    @staticmethod
+    def invalidate_budget(budget_id):
+        """Descarta los contadores de un presupuesto (se vuelven a sembrar al escribir)"""
+        BudgetPeriodSpend.objects.filter(budget_id=budget_id).delete()
+
+    @staticmethod
+    def invalidate_for_user(user):
+        """Descarta los contadores de todos los presupuestos de un usuario"""
+        BudgetPeriodSpend.objects.filter(budget__user=user).delete()
+
+    @staticmethod
+    def invalidate_for_currencies(currencies):
+        """Descarta los contadores de los presupuestos en esas monedas (cambió una tasa)"""
+        BudgetPeriodSpend.objects.filter(budget__currency__in=currencies).delete()
+
+    @staticmethod
+    def spent_amount(budget, amounts):
+        """
+        Monto gastado según el modo de cálculo del presupuesto.
+
+        Args:
+            budget: Presupuesto
+            amounts: Tupla (base_cents, total_cents) de un contador
+
+        Returns:
+            Decimal: Monto en la misma unidad que ``budget.amount``
+        """
+        cents = amounts[0] if budget.calculation_mode == Budget.BASE else amounts[1]
+        return (Decimal(cents) / Decimal(100)).quantize(Decimal("0.01"))
@@ -0,0 +1,75 @@
+"""
+Management command para reconstruir los contadores de gasto de presupuestos
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from budgets.counters import BudgetSpendService
+from budgets.models import Budget
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los contadores de gasto por período (BudgetPeriodSpend) desde las "
+        "transacciones y reporta las diferencias encontradas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-id",
+            type=int,
+            help="ID de usuario específico a reconciliar",
+        )
+        parser.add_argument(
+            "--all-users",
+            action="store_true",
+            help="Reconciliar los presupuestos de todos los usuarios",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reportar diferencias, sin reescribir los contadores",
+        )
+
+    def handle(self, *args, **options):
+        user_id = options.get("user_id")
+        all_users = options.get("all_users")
+        dry_run = options.get("dry_run")
+
+        if user_id:
+            if not User.objects.filter(pk=user_id).exists():
+                self.stdout.write(self.style.ERROR(f"Usuario con ID {user_id} no existe"))
+                return
+            budgets = Budget.objects.filter(user_id=user_id)
+        elif all_users:
+            budgets = Budget.objects.all()
+        else:
+            self.stdout.write(self.style.ERROR("Debes especificar --user-id <ID> o --all-users"))
+            return
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("MODO DRY-RUN: no se modificarán los contadores"))
+
+        processed = 0
+        drifted_periods = 0
+        for budget in budgets.select_related("category").order_by("user_id", "pk").iterator():
+            drift = BudgetSpendService.reconcile_budget(budget, fix=not dry_run)
+            processed += 1
+            drifted_periods += len(drift)
+            for entry in drift:
+                self.stdout.write(
+                    f"  - Presupuesto {budget.pk} ({budget.category.name}, {budget.currency}) "
+                    f"{entry['period_start']}: guardado {entry['stored']} "
+                    f"esperado {entry['expected']}"
+                )
+
+        style = self.style.WARNING if drifted_periods else self.style.SUCCESS
+        self.stdout.write(
+            style(
+                f"\nResumen:\n- Presupuestos procesados: {processed}\n"
+                f"- Períodos con diferencias: {drifted_periods}"
+            )
+        )
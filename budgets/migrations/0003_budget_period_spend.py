@@ -0,0 +1,56 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("budgets", "0002_remove_budget_unique_budget_per_category_period_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BudgetPeriodSpend",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("period_start", models.DateField(verbose_name="Inicio del período")),
+                (
+                    "base_amount",
+                    models.BigIntegerField(default=0, verbose_name="Gasto base (centavos)"),
+                ),
+                (
+                    "total_amount",
+                    models.BigIntegerField(default=0, verbose_name="Gasto total (centavos)"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Última actualización"),
+                ),
+                (
+                    "budget",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="period_spends",
+                        to="budgets.budget",
+                        verbose_name="Presupuesto",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Gasto de presupuesto por período",
+                "verbose_name_plural": "Gastos de presupuesto por período",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="budgetperiodspend",
+            constraint=models.UniqueConstraint(
+                fields=("budget", "period_start"), name="unique_budget_period_spend"
+            ),
+        ),
+    ]
@@ -150,6 +150,8 @@ class Budget(models.Model):
         """Ejecutar validaciones antes de guardar"""
         self.full_clean()
         super().save(*args, **kwargs)
+        # El modo, la moneda o el período pueden haber cambiado: descartar gasto precalculado
+        self.__dict__.pop("_prefetched_spent_amounts", None)
 
     def get_period_dates(self, reference_date=None):
         """
@@ -350,66 +352,62 @@ class Budget(models.Model):
         se convierten a Decimal con 2 decimales para ser consistentes con el campo
         ``amount`` del presupuesto.
 
+        Si el gasto se precalculó para esta fecha (BudgetService.prefetch_spent_amounts)
+        se reutiliza sin consultar la base de datos.
+
         Args:
             reference_date: Fecha de referencia (default: hoy)
 
         Returns:
             Decimal: Monto gastado en la misma unidad que ``amount``.
         """
-        from transactions.models import Transaction  # Import local para evitar ciclos
+        from budgets.services import BudgetService  # Import local para evitar ciclos
 
         if reference_date is None:
             reference_date = date.today()
 
-        # Rango de fechas del período actual (mensual o anual)
-        start_date, end_date = self.get_period_dates(reference_date)
-
-        # Solo consideramos transacciones de gasto (type=2) de este usuario y categoría
-        # IMPORTANTE: Las transferencias (type=3) NO se incluyen aquí para evitar doble conteo.
-        # Los pagos de tarjeta de crédito se registran como transferencias banco->tarjeta,
-        # por lo que NO deben contarse como gastos en los presupuestos.
-        # IMPORTANTE: Incluimos transacciones de TODAS las monedas y las convertimos a la moneda del presupuesto
-        queryset = Transaction.objects.filter(
-            user=self.user,
-            category=self.category,
-            type=2,  # Expense (excluye Transfer=3 para evitar doble conteo)
-            date__gte=start_date,
-            date__lte=end_date,
-            # NO filtramos por moneda aquí - convertiremos todas a la moneda del presupuesto
-        )
-
-        # Campo a sumar según modo de cálculo
-        amount_field = "base_amount" if self.calculation_mode == self.BASE else "total_amount"
-
-        # Convertir cada transacción a la moneda del presupuesto
-        from utils.currency_converter import FxService
-
-        total_decimal = Decimal(0)
-        for transaction in queryset:
-            # Obtener la moneda de la transacción
-            txn_currency = transaction.transaction_currency or (
-                transaction.origin_account.currency if transaction.origin_account else self.currency
+        prefetched = getattr(self, "_prefetched_spent_amounts", {})
+        if reference_date in prefetched:
+            return prefetched[reference_date]
+
+        return BudgetService.compute_spent_amounts([self], reference_date)[0]
+
+    def set_prefetched_spent_amount(self, reference_date, spent_amount):
+        """Guardar en la instancia el gasto ya calculado para una fecha de referencia"""
+        if not hasattr(self, "_prefetched_spent_amounts"):
+            self._prefetched_spent_amounts = {}
+        self._prefetched_spent_amounts[reference_date] = spent_amount
+
+
+class BudgetPeriodSpend(models.Model):
+    """
+    Gasto acumulado de un presupuesto en un período, en la moneda del presupuesto.
+
+    Se mantiene con deltas (F()) en cada alta, edición o borrado de
+    transacciones (ver budgets.counters). Guarda ambos modos de cálculo en
+    centavos para que cambiar el modo del presupuesto no invalide el contador.
+    """
+
+    budget = models.ForeignKey(
+        Budget,
+        on_delete=models.CASCADE,
+        related_name="period_spends",
+        verbose_name="Presupuesto",
+    )
+    period_start = models.DateField(verbose_name="Inicio del período")
+    base_amount = models.BigIntegerField(default=0, verbose_name="Gasto base (centavos)")
+    total_amount = models.BigIntegerField(default=0, verbose_name="Gasto total (centavos)")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+
+    class Meta:
+        verbose_name = "Gasto de presupuesto por período"
+        verbose_name_plural = "Gastos de presupuesto por período"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["budget", "period_start"],
+                name="unique_budget_period_spend",
             )
+        ]
 
-            # Obtener el monto en centavos
-            amount_cents = getattr(transaction, amount_field) or 0
-
-            # Si la moneda es diferente, convertir a la moneda del presupuesto
-            if txn_currency != self.currency:
-                try:
-                    converted_cents, _, _ = FxService.convert_amount(
-                        amount_cents, txn_currency, self.currency, transaction.date
-                    )
-                    amount_cents = converted_cents
-                except Exception:
-                    # Si falla la conversión, registrar error pero continuar
-                    # Nota: Se omite logging aquí para evitar import circular
-                    # El error se maneja silenciosamente omitiendo la transacción
-                    # Si no se puede convertir, no incluir esta transacción
-                    continue
-
-            # Convertir de centavos a decimal y sumar
-            amount_decimal = (Decimal(str(amount_cents)) / Decimal(100)).quantize(Decimal("0.01"))
-            total_decimal += amount_decimal
-
-        return total_decimal
+    def __str__(self):
+        return f"{self.budget_id} - {self.period_start}: {self.base_amount}/{self.total_amount}"
@@ -7,9 +7,31 @@ from rest_framework import serializers
 from categories.models import Category
 
 from .models import Budget
+from .services import BudgetService
 
 
-class BudgetListSerializer(serializers.ModelSerializer):
+class BudgetSpentListSerializer(serializers.ListSerializer):
+    """Calcula el gasto de todos los presupuestos de la lista con una sola consulta"""
+
+    def to_representation(self, data):
+        budgets = list(data.all() if hasattr(data, "all") else data)
+        BudgetService.prefetch_spent_amounts(budgets)
+        return super().to_representation(budgets)
+
+
+class BudgetSpentMixin:
+    """
+    Los campos calculados (gastado, porcentaje, restante, estado, proyección...)
+    comparten un único cálculo del gasto por presupuesto y request.
+    """
+
+    def to_representation(self, instance):
+        if not isinstance(self.parent, BudgetSpentListSerializer):
+            BudgetService.prefetch_spent_amounts([instance])
+        return super().to_representation(instance)
+
+
+class BudgetListSerializer(BudgetSpentMixin, serializers.ModelSerializer):
     """Serializer para listar presupuestos con información de stats"""
 
     category_name = serializers.CharField(source="category.name", read_only=True)
@@ -34,6 +56,7 @@ class BudgetListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Budget
+        list_serializer_class = BudgetSpentListSerializer
         fields = [
             "id",
             "category",
@@ -76,7 +99,7 @@ class BudgetListSerializer(serializers.ModelSerializer):
         return obj.get_status_display_text()
 
 
-class BudgetDetailSerializer(serializers.ModelSerializer):
+class BudgetDetailSerializer(BudgetSpentMixin, serializers.ModelSerializer):
     """Serializer para ver detalle completo de un presupuesto con proyecciones"""
 
     category_name = serializers.CharField(source="category.name", read_only=True)
@@ -106,6 +129,7 @@ class BudgetDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Budget
+        list_serializer_class = BudgetSpentListSerializer
         fields = [
             "id",
             "category",
@@ -6,9 +6,11 @@ import logging
 from datetime import date
 from decimal import Decimal
 
-from django.db.models import Sum
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
 
 from categories.models import Category
+from utils.currency_converter import FxContext
 
 from .models import Budget
 
@@ -18,6 +20,116 @@ logger = logging.getLogger(__name__)
 class BudgetService:
     """Servicio para gestionar presupuestos"""
 
+    @staticmethod
+    def compute_spent_amounts(budgets, reference_date=None):
+        """
+        Calcular el monto gastado de varios presupuestos con una sola consulta.
+
+        Las transacciones de gasto se agrupan en base de datos por (usuario,
+        categoría, año, mes, moneda, monto); como los períodos mensuales y anuales
+        están alineados a meses, cada presupuesto suma los grupos de su ventana.
+        Cada monto distinto se convierte una vez con la tasa de su mes y se
+        multiplica por sus repeticiones: el mismo resultado que convertir cada
+        transacción, como hacen los contadores de BudgetSpendService y su
+        conciliación. Los montos que no se pueden convertir se omiten.
+
+        Args:
+            budgets: Presupuestos (iterable de Budget)
+            reference_date: Fecha de referencia (default: hoy)
+
+        Returns:
+            list[Decimal]: Monto gastado de cada presupuesto, en el mismo orden
+        """
+        from transactions.models import Transaction  # Import local para evitar ciclos
+
+        budgets = list(budgets)
+        if not budgets:
+            return []
+        if reference_date is None:
+            reference_date = date.today()
+
+        windows = [budget.get_period_dates(reference_date) for budget in budgets]
+        rows = (
+            Transaction.objects.filter(
+                user_id__in={budget.user_id for budget in budgets},
+                category_id__in={budget.category_id for budget in budgets},
+                type=2,  # Solo gastos: las transferencias (pagos de tarjeta) no cuentan
+                date__gte=min(start for start, _ in windows),
+                date__lte=max(end for _, end in windows),
+            )
+            .annotate(spent_year=ExtractYear("date"), spent_month=ExtractMonth("date"))
+            .values(
+                "user_id",
+                "category_id",
+                "spent_year",
+                "spent_month",
+                "transaction_currency",
+                "origin_account__currency",
+                "base_amount",
+                "total_amount",
+            )
+            # Agrupar también por monto: convertir cada monto distinto una vez y
+            # multiplicarlo por sus repeticiones es exactamente la conversión por
+            # transacción de los contadores (budgets/counters.py), al centavo
+            .annotate(repeated=Count("id"))
+            .order_by()
+        )
+
+        rows_by_category = {}
+        for row in rows:
+            rows_by_category.setdefault((row["user_id"], row["category_id"]), []).append(row)
+
+        fx_contexts = {}
+        spent_amounts = []
+        for budget, (start_date, end_date) in zip(budgets, windows, strict=True):
+            amount_key = "base_amount" if budget.calculation_mode == Budget.BASE else "total_amount"
+            # Un contexto FX por moneda de presupuesto: cada tasa se resuelve una vez
+            if budget.currency not in fx_contexts:
+                fx_contexts[budget.currency] = FxContext(budget.currency)
+            fx = fx_contexts[budget.currency]
+
+            total_cents = 0
+            for row in rows_by_category.get((budget.user_id, budget.category_id), []):
+                month_start = date(row["spent_year"], row["spent_month"], 1)
+                if not start_date.replace(day=1) <= month_start <= end_date:
+                    continue
+                currency = (
+                    row["transaction_currency"]
+                    or row["origin_account__currency"]
+                    or budget.currency
+                )
+                try:
+                    converted, _, _ = fx.convert(row[amount_key] or 0, currency, month_start)
+                except ValueError:
+                    # Sin tipo de cambio: se omite, igual que en los contadores
+                    continue
+                total_cents += converted * row["repeated"]
+            spent_amounts.append((Decimal(total_cents) / Decimal(100)).quantize(Decimal("0.01")))
+
+        return spent_amounts
+
+    @staticmethod
+    def prefetch_spent_amounts(budgets, reference_date=None):
+        """
+        Precalcular el gasto de varios presupuestos para que todos los campos
+        derivados (porcentaje, restante, estado, proyección...) lo reutilicen.
+
+        Args:
+            budgets: Presupuestos (lista de Budget)
+            reference_date: Fecha de referencia (default: hoy)
+
+        Returns:
+            list: Los mismos presupuestos
+        """
+        budgets = list(budgets)
+        if reference_date is None:
+            reference_date = date.today()
+
+        spent_amounts = BudgetService.compute_spent_amounts(budgets, reference_date)
+        for budget, spent in zip(budgets, spent_amounts, strict=True):
+            budget.set_prefetched_spent_amount(reference_date, spent)
+        return budgets
+
     @staticmethod
     def get_user_budgets(user, active_only=True, period=None):
         """
@@ -75,7 +187,7 @@ class BudgetService:
             dict: Estadísticas de presupuestos
         """
         budgets = Budget.objects.filter(user=user)
-        active_budgets = budgets.filter(is_active=True)
+        active_budgets = BudgetService.prefetch_spent_amounts(budgets.filter(is_active=True))
 
         # Contadores por estado
         exceeded_count = 0
@@ -95,20 +207,19 @@ class BudgetService:
             total_spent += budget.get_spent_amount()
 
         # Totales
-        total_allocated = active_budgets.aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
+        total_allocated = sum((b.amount for b in active_budgets), Decimal("0.00"))
 
         total_remaining = total_allocated - total_spent
 
         # Porcentaje promedio de uso
         avg_percentage = Decimal("0.00")
-        if active_budgets.exists():
+        if active_budgets:
             percentages = [b.get_spent_percentage() for b in active_budgets]
-            if percentages:
-                avg_percentage = sum(percentages) / len(percentages)
+            avg_percentage = sum(percentages) / len(percentages)
 
         return {
             "total_budgets": budgets.count(),
-            "active_budgets": active_budgets.count(),
+            "active_budgets": len(active_budgets),
             "exceeded_budgets": exceeded_count,
             "warning_budgets": warning_count,
             "good_budgets": good_count,
@@ -135,9 +246,12 @@ class BudgetService:
         if reference_date is None:
             reference_date = date.today()
 
-        budgets = Budget.objects.filter(
-            user=user, period=Budget.MONTHLY, is_active=True
-        ).select_related("category")
+        budgets = BudgetService.prefetch_spent_amounts(
+            Budget.objects.filter(user=user, period=Budget.MONTHLY, is_active=True).select_related(
+                "category"
+            ),
+            reference_date,
+        )
 
         summary = []
         for budget in budgets:
@@ -169,6 +283,7 @@ class BudgetService:
         user,
         category,
         amount,
+        *,
         calculation_mode=Budget.BASE,
         period=Budget.MONTHLY,
         start_date=None,
@@ -333,7 +448,10 @@ class BudgetService:
         Returns:
             list: Lista de presupuestos con alertas
         """
-        budgets = Budget.objects.filter(user=user, is_active=True).select_related("category")
+        budgets = BudgetService.prefetch_spent_amounts(
+            Budget.objects.filter(user=user, is_active=True).select_related("category"),
+            reference_date,
+        )
 
         alerts = []
         for budget in budgets:
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from budgets.counters import SPEND_FIELDS, BudgetSpendService
+from budgets.models import Budget
+from transactions.models import Transaction
+from utils.models import ExchangeRate
+
+# Se envía tras actualizar los contadores por una escritura de transacciones
+# (una transacción o un lote de importación).
+# Argumentos: user, currency (moneda de la cuenta de origen), created (bool),
+# changes (list[BudgetSpendChange])
+budget_spend_changed = Signal()
+
+
+def _affects_spend(update_fields):
+    return update_fields is None or not SPEND_FIELDS.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Transaction)
+def capture_budget_spend_state(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Guarda el estado previo de la transacción para calcular el delta de los contadores"""
+    if raw or instance._state.adding or not _affects_spend(update_fields):
+        instance._budget_spend_state = None
+        return
+    instance._budget_spend_state = BudgetSpendService.state_from_db(instance.pk)
+
+
+@receiver(post_save, sender=Transaction)
+def update_budget_spend_on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Aplica a los contadores el alta o la edición de una transacción"""
+    if raw or not _affects_spend(update_fields):
+        return
+    old_state = None if created else getattr(instance, "_budget_spend_state", None)
+    changes = BudgetSpendService.record_change(
+        old_state, BudgetSpendService.state_from_instance(instance)
+    )
+    instance._budget_spend_state = None
+    if changes:
+        budget_spend_changed.send(
+            sender=Transaction,
+            user=instance.user,
+            currency=instance.origin_account.currency,
+            created=created,
+            changes=changes,
+        )
+
+
+@receiver(post_delete, sender=Transaction)
+def update_budget_spend_on_delete(sender, instance, **kwargs):
+    """Descuenta de los contadores una transacción eliminada"""
+    BudgetSpendService.record_change(BudgetSpendService.state_from_instance(instance), None)
+
+
+@receiver(post_save, sender=Budget)
+def invalidate_budget_spend_on_budget_change(sender, instance, created, raw=False, **kwargs):
+    """Categoría, moneda o período pueden haber cambiado: volver a sembrar los contadores"""
+    if raw or created:
+        return
+    BudgetSpendService.invalidate_budget(instance.pk)
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_budget_spend_on_rate_change(sender, instance, raw=False, **kwargs):
+    """Un tipo de cambio nuevo o modificado cambia los montos convertidos"""
+    if raw:
+        return
+    BudgetSpendService.invalidate_for_currencies([instance.base_currency, instance.currency])
@@ -3,6 +3,7 @@ Modelos para gestión de categorías de ingresos y gastos
 """
 
 import re
+from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
@@ -245,31 +246,46 @@ class Category(models.Model):
         Verificar si la categoría puede ser eliminada
         No se puede eliminar si tiene transacciones o presupuestos asociados
         """
-        # TODO: Verificar transacciones cuando se implemente el modelo
-        # has_transactions = self.transactions.exists()
-        has_transactions = False
+        has_transactions = self.transactions.exists()
 
         # Verificar presupuestos
         has_budgets = self.budgets.exists()
 
         return not (has_transactions or has_budgets)
 
+    def get_usage(self):
+        """
+        Uso de esta categoría (transacciones, presupuestos, total reciente, último uso)
+
+        Sale del cálculo de todas las categorías del usuario, cacheado por
+        versión de datos (ver CategoryService.get_usage).
+        """
+        from .services import CategoryService
+
+        return CategoryService.get_usage(self.user)["categories"].get(self.pk, {})
+
     def get_usage_count(self):
         """
-        Obtener el número de veces que se usa esta categoría
+        Obtener el número de veces que se usa esta categoría (transacciones + presupuestos)
         """
-        # TODO: Implementar cuando existan transacciones
-        # transactions_count = self.transactions.count()
-        return self.budgets.count()
-        # return transactions_count + budgets_count
+        return self.get_usage().get("usage_count", 0)
 
-    def get_related_data(self):
+    def get_related_data(self, usage=None):
         """
         Obtener información sobre datos relacionados con esta categoría
+
+        Args:
+            usage: Uso ya calculado de la categoría (ver get_usage)
         """
+        if usage is None:
+            usage = self.get_usage()
+        transactions_count = usage.get("transactions_count", 0)
+        budgets_count = usage.get("budgets_count", 0)
         return {
-            "transactions_count": 0,  # TODO: self.transactions.count()
-            "budgets_count": self.budgets.count(),
-            "can_be_deleted": self.can_be_deleted(),
-            "usage_count": self.get_usage_count(),
+            "transactions_count": transactions_count,
+            "budgets_count": budgets_count,
+            "can_be_deleted": not (transactions_count or budgets_count),
+            "usage_count": transactions_count + budgets_count,
+            "recent_total": usage.get("recent_total", Decimal("0.00")),
+            "last_used": usage.get("last_used"),
         }
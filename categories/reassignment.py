@@ -0,0 +1,151 @@
+"""
+Reasignación masiva de los datos de una categoría a otra
+
+Al eliminar una categoría con datos, todo lo que apunta a ella pasa a la
+categoría destino con unas pocas sentencias UPDATE/DELETE, sin importar
+cuántas transacciones tenga:
+
+- transacciones, facturas, planes de financiación y reglas automáticas
+  (target_category): cambian de categoría con QuerySet.update
+- presupuestos: los que chocan con uno del destino (mismo usuario, período y
+  moneda) se fusionan en él sumando el monto, porque el presupuesto del
+  destino pasa a cubrir el gasto de ambas categorías, y le ceden sus alertas;
+  el resto cambia de categoría
+- resumen mensual: MonthlySummaryService.reassign_category traslada las filas
+- contadores de gasto: se descartan los de los presupuestos del destino y se
+  vuelven a sembrar en la siguiente escritura
+
+QuerySet.update no dispara Transaction.save ni sus señales (reglas, alertas de
+presupuesto, metas), que es lo que se busca: cambiar de categoría no es un
+gasto nuevo. Por eso las cachés que dependen de esas señales se invalidan
+aquí (AnalyticsCache y RuleMatcherCache).
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery
+from django.utils import timezone
+
+from alerts.models import Alert
+from analytics.cache import AnalyticsCache
+from analytics.rollups import MonthlySummaryService
+from bills.models import Bill
+from budgets.models import Budget, BudgetPeriodSpend
+from credit_cards.models import InstallmentPlan
+from rules.matcher import RuleMatcherCache
+from rules.models import AutomaticRule
+from transactions.models import Transaction
+
+from .models import Category
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryReassignmentService:
+    """
+    Uso:
+        counts = CategoryReassignmentService.reassign(source, target)
+    """
+
+    @staticmethod
+    def reassign(source, target):
+        """
+        Mueve transacciones, presupuestos, reglas, facturas y planes de
+        financiación de ``source`` a ``target`` en una sola transacción atómica.
+
+        Ambas categorías se bloquean (en orden de pk) antes de escribir: en
+        PostgreSQL un INSERT que referencia la categoría origen espera al
+        bloqueo, así que ninguna transacción nueva queda atrás.
+
+        Args:
+            source (Category): Categoría origen
+            target (Category): Categoría destino (mismo usuario y tipo)
+
+        Returns:
+            dict: transactions, budgets, merged_budgets, rules, bills,
+            installment_plans y summary_rows reasignados
+
+        Raises:
+            ValueError: Si la categoría destino no es válida
+        """
+        if target.pk == source.pk:
+            msg = "La categoría destino debe ser distinta de la categoría a eliminar."
+            raise ValueError(msg)
+        if target.user_id != source.user_id or target.type != source.type:
+            msg = "La categoría destino no existe o no es válida para reasignación."
+            raise ValueError(msg)
+
+        now = timezone.now()
+        with transaction.atomic():
+            list(
+                Category.objects.select_for_update()
+                .filter(pk__in=(source.pk, target.pk))
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+
+            counts = {
+                "transactions": Transaction.objects.filter(category=source).update(
+                    category=target, updated_at=now
+                ),
+                "summary_rows": MonthlySummaryService.reassign_category(source.pk, target.pk),
+            }
+            counts.update(CategoryReassignmentService._reassign_budgets(source, target, now))
+            counts["rules"] = AutomaticRule.objects.filter(target_category=source).update(
+                target_category=target, updated_at=now
+            )
+            counts["bills"] = Bill.objects.filter(category=source).update(
+                category=target, updated_at=now
+            )
+            counts["installment_plans"] = InstallmentPlan.objects.filter(
+                financing_category=source
+            ).update(financing_category=target, updated_at=now)
+
+            AnalyticsCache.bump_user(source.user_id)
+            RuleMatcherCache.bump_user(source.user_id)
+
+        logger.info(
+            f"Categoría {source.pk} reasignada a {target.pk}: "
+            f"{counts['transactions']} transacciones, {counts['budgets']} presupuestos "
+            f"({counts['merged_budgets']} fusionados), {counts['rules']} reglas"
+        )
+        return counts
+
+    @staticmethod
+    def _reassign_budgets(source, target, now):
+        """
+        Fusiona los presupuestos del origen que chocan con uno del destino y
+        mueve el resto. Devuelve budgets (total del origen) y merged_budgets.
+        """
+        source_budgets = Budget.objects.filter(category=source)
+        same_key = source_budgets.filter(
+            user_id=OuterRef("user_id"),
+            period=OuterRef("period"),
+            currency=OuterRef("currency"),
+        )
+        merged = (
+            Budget.objects.filter(category=target)
+            .filter(Exists(same_key))
+            .update(amount=F("amount") + Subquery(same_key.values("amount")[:1]), updated_at=now)
+        )
+        if merged:
+            target_budgets = Budget.objects.filter(
+                category=target,
+                user_id=OuterRef("user_id"),
+                period=OuterRef("period"),
+                currency=OuterRef("currency"),
+            )
+            # Las alertas del presupuesto fusionado pasan al que lo absorbe (uno por
+            # período y moneda, así que son pocas sentencias)
+            merged_pairs = source_budgets.annotate(
+                target_id=Subquery(target_budgets.values("pk")[:1])
+            ).filter(target_id__isnull=False)
+            for source_id, target_id in merged_pairs.values_list("pk", "target_id"):
+                Alert.objects.filter(budget_id=source_id).update(budget_id=target_id)
+            source_budgets.filter(Exists(target_budgets)).delete()
+        moved = source_budgets.update(category=target, updated_at=now)
+
+        # El gasto de todos los presupuestos del destino cambió
+        BudgetPeriodSpend.objects.filter(budget__category=target).delete()
+        return {"budgets": merged + moved, "merged_budgets": merged}
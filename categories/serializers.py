@@ -12,7 +12,7 @@ class CategoryListSerializer(serializers.ModelSerializer):
 
     type_display = serializers.CharField(source="get_type_display", read_only=True)
     icon_display = serializers.CharField(source="get_icon_display", read_only=True)
-    usage_count = serializers.IntegerField(source="get_usage_count", read_only=True)
+    usage_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
@@ -29,6 +29,13 @@ class CategoryListSerializer(serializers.ModelSerializer):
             "usage_count",
         ]
 
+    def get_usage_count(self, obj):
+        """Transacciones + presupuestos (del contexto "category_usage" si la vista lo calculó)"""
+        usage = self.context.get("category_usage")
+        if usage is not None:
+            return usage.get(obj.pk, {}).get("usage_count", 0)
+        return obj.get_usage_count()
+
 
 class CategoryDetailSerializer(serializers.ModelSerializer):
     """Serializer para ver detalle completo de una categoría"""
@@ -58,7 +65,8 @@ class CategoryDetailSerializer(serializers.ModelSerializer):
 
     def get_related_data(self, obj):
         """Obtener información sobre datos relacionados"""
-        return obj.get_related_data()
+        usage = self.context.get("category_usage")
+        return obj.get_related_data(usage.get(obj.pk, {}) if usage is not None else None)
 
 
 class CategoryCreateSerializer(serializers.ModelSerializer):
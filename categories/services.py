@@ -3,13 +3,21 @@ Services para lógica de negocio de categorías
 """
 
 import logging
+from decimal import Decimal
 
+from dateutil.relativedelta import relativedelta
 from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from .models import Category
 
 logger = logging.getLogger(__name__)
 
+# Meses (incluido el actual) del total reciente por categoría
+USAGE_MONTHS = 3
+
 
 class CategoryService:
     """
@@ -39,46 +47,165 @@ class CategoryService:
 
         return queryset
 
+    @staticmethod
+    def get_usage(user, months=USAGE_MONTHS):
+        """
+        Uso real de todas las categorías del usuario, cacheado por versión de datos.
+
+        Se calcula con una sola consulta anotada sobre Category (conteo y última
+        fecha de transacciones, total reciente por mes y moneda y conteo de
+        presupuestos) y se guarda en AnalyticsCache: cualquier cambio en
+        transacciones, categorías o presupuestos del usuario la invalida. Cada
+        mes del total reciente se convierte con su propia tasa.
+
+        Args:
+            user: Usuario propietario
+            months: Meses (incluido el actual) para el total reciente
+
+        Returns:
+            dict: currency (moneda base), since (inicio de la ventana), warnings y
+            categories {category_id: {transactions_count, budgets_count,
+            usage_count, recent_total, last_used}}
+        """
+        from analytics.cache import AnalyticsCache
+
+        return AnalyticsCache.get_or_compute(
+            user,
+            "category_usage",
+            {"months": months},
+            lambda: CategoryService._compute_usage(user, months),
+        )
+
+    @staticmethod
+    def _compute_usage(user, months):
+        from accounts.models import Account
+        from budgets.models import Budget
+        from utils.currency_converter import FxContext
+
+        today = timezone.localdate()
+        since = today.replace(day=1) - relativedelta(months=months - 1)
+
+        annotations = {
+            "transactions_count": Count("transactions"),
+            "last_used": Max("transactions__date"),
+            "budgets_count": Coalesce(
+                Subquery(
+                    Budget.objects.filter(category=OuterRef("pk"))
+                    .order_by()
+                    .values("category")
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            ),
+        }
+        # Un total por (mes, moneda): cada mes se convierte con su propia tasa, como en
+        # analytics y presupuestos. La moneda de una transacción es la suya o, si no se
+        # indicó, la de la cuenta de origen
+        month_starts = [since + relativedelta(months=offset) for offset in range(months)]
+        recent_fields = {}
+        for month_start in month_starts:
+            in_month = Q(
+                transactions__date__gte=month_start,
+                transactions__date__lt=month_start + relativedelta(months=1),
+            )
+            for currency, _ in Account.CURRENCY_CHOICES:
+                field = f"recent_{month_start:%Y_%m}_{currency}"
+                recent_fields[field] = (month_start, currency)
+                annotations[field] = Sum(
+                    "transactions__total_amount",
+                    filter=in_month
+                    & (
+                        Q(transactions__transaction_currency=currency)
+                        | Q(
+                            transactions__transaction_currency__isnull=True,
+                            transactions__origin_account__currency=currency,
+                        )
+                    ),
+                )
+        rows = Category.objects.filter(user=user).annotate(**annotations).values("pk", *annotations)
+
+        fx = FxContext.for_user(user)
+        fx.prefetch(currency for currency, _ in Account.CURRENCY_CHOICES)
+        warnings = set()
+        categories = {}
+        for row in rows:
+            recent_cents = 0
+            for field, (month_start, currency) in recent_fields.items():
+                amount = row[field]
+                if not amount:
+                    continue
+                try:
+                    converted, _, warning = fx.convert(amount, currency, month_start)
+                except ValueError as e:
+                    warnings.add(str(e))
+                    continue
+                if warning:
+                    warnings.add(warning)
+                recent_cents += converted
+
+            categories[row["pk"]] = {
+                "transactions_count": row["transactions_count"],
+                "budgets_count": row["budgets_count"],
+                "usage_count": row["transactions_count"] + row["budgets_count"],
+                "recent_total": Decimal(recent_cents) / Decimal(100),
+                "last_used": row["last_used"],
+            }
+
+        return {
+            "currency": fx.base_currency,
+            "months": months,
+            "since": since,
+            "warnings": sorted(warnings),
+            "categories": categories,
+        }
+
     @staticmethod
     def get_categories_stats(user):
         """
         Calcular estadísticas sobre las categorías del usuario
 
+        Las categorías más y menos usadas se ordenan por número de transacciones
+        (ver get_usage).
+
         Args:
             user: Usuario propietario
 
         Returns:
             dict: Estadísticas completas
         """
-        categories = Category.objects.filter(user=user)
-
-        active_count = categories.filter(is_active=True).count()
-        inactive_count = categories.filter(is_active=False).count()
-        income_count = categories.filter(type=Category.INCOME).count()
-        expense_count = categories.filter(type=Category.EXPENSE).count()
-
-        # Ordenar por uso (cuando se implementen transacciones)
-        # Por ahora, ordenar por nombre
-        most_used = list(
-            categories.filter(is_active=True)
-            .order_by("name")[:5]
-            .values("id", "name", "type", "color", "icon")
+        usage = CategoryService.get_usage(user)
+        categories = list(
+            Category.objects.filter(user=user).values(
+                "id", "name", "type", "color", "icon", "is_active"
+            )
         )
 
-        least_used = list(
-            categories.filter(is_active=True)
-            .order_by("-name")[:5]
-            .values("id", "name", "type", "color", "icon")
-        )
+        active = []
+        for category in categories:
+            if not category.pop("is_active"):
+                continue
+            category_usage = usage["categories"].get(category["id"], {})
+            category.update(
+                transactions_count=category_usage.get("transactions_count", 0),
+                recent_total=category_usage.get("recent_total", Decimal("0.00")),
+                last_used=category_usage.get("last_used"),
+            )
+            active.append(category)
+
+        by_usage = sorted(active, key=lambda c: (-c["transactions_count"], c["name"]))
+        least_used = sorted(active, key=lambda c: (c["transactions_count"], c["name"]))
 
         return {
-            "total_categories": categories.count(),
-            "active_categories": active_count,
-            "inactive_categories": inactive_count,
-            "income_categories": income_count,
-            "expense_categories": expense_count,
-            "most_used": most_used,
-            "least_used": least_used,
+            "total_categories": len(categories),
+            "active_categories": len(active),
+            "inactive_categories": len(categories) - len(active),
+            "income_categories": sum(c["type"] == Category.INCOME for c in categories),
+            "expense_categories": sum(c["type"] == Category.EXPENSE for c in categories),
+            "most_used": by_usage[:5],
+            "least_used": least_used[:5],
+            "currency": usage["currency"],
+            "usage_since": usage["since"],
         }
 
     @staticmethod
@@ -160,10 +287,7 @@ class CategoryService:
             raise ValueError(msg)
 
         # Verificar si tiene datos relacionados
-        related_data = category.get_related_data()
-        has_related_data = (
-            related_data["transactions_count"] > 0 or related_data["budgets_count"] > 0
-        )
+        has_related_data = category.transactions.exists() or category.budgets.exists()
 
         if has_related_data and not target_category_id:
             msg = (
@@ -175,11 +299,13 @@ class CategoryService:
         result = {
             "reassigned_transactions": 0,
             "reassigned_budgets": 0,
+            "merged_budgets": 0,
+            "reassigned_rules": 0,
             "category_name": category.name,
         }
 
         # Reasignar si es necesario
-        if has_related_data and target_category_id:
+        if target_category_id:
             try:
                 target_category = Category.objects.get(
                     pk=target_category_id, user=category.user, type=category.type
@@ -188,18 +314,13 @@ class CategoryService:
                 msg = "La categoría destino no existe o no es válida para reasignación."
                 raise ValueError(msg)
 
-            # TODO: Reasignar transacciones cuando se implemente el modelo
-            # transactions_updated = category.transactions.update(category=target_category)
-            # result['reassigned_transactions'] = transactions_updated
+            from .reassignment import CategoryReassignmentService
 
-            # Reasignar presupuestos
-            budgets_updated = category.budgets.update(category=target_category)
-            result["reassigned_budgets"] = budgets_updated
-
-            logger.info(
-                f"Reasignadas transacciones y presupuestos de categoría {category.id} "
-                f"a categoría {target_category.id}"
-            )
+            counts = CategoryReassignmentService.reassign(category, target_category)
+            result["reassigned_transactions"] = counts["transactions"]
+            result["reassigned_budgets"] = counts["budgets"]
+            result["merged_budgets"] = counts["merged_budgets"]
+            result["reassigned_rules"] = counts["rules"]
 
         # Eliminar la categoría
         category_id = category.id
@@ -248,20 +369,27 @@ class CategoryService:
         Returns:
             int: Número de categorías actualizadas
         """
-        updated_count = 0
+        orders = {item["id"]: item["order"] for item in order_data}
+        if not orders:
+            return 0
 
-        for item in order_data:
-            category_id = item["id"]
-            new_order = item["order"]
+        # Una consulta valida la propiedad de todas las categorías
+        categories = list(Category.objects.filter(user=user, pk__in=orders).only("pk", "order"))
+        missing = set(orders) - {category.pk for category in categories}
+        if missing:
+            logger.warning(f"Categorías {sorted(missing)} no encontradas para usuario {user.id}")
 
-            try:
-                category = Category.objects.get(pk=category_id, user=user)
-                category.order = new_order
-                category.save(update_fields=["order", "updated_at"])
-                updated_count += 1
-            except Category.DoesNotExist:
-                logger.warning(f"Categoría {category_id} no encontrada para usuario {user.id}")
-                continue
+        now = timezone.now()
+        for category in categories:
+            category.order = orders[category.pk]
+            category.updated_at = now
+        updated_count = Category.objects.bulk_update(categories, ["order", "updated_at"])
+
+        if updated_count:
+            from analytics.cache import AnalyticsCache
+
+            # bulk_update no dispara post_save
+            AnalyticsCache.bump_user(user.id)
 
         logger.info(f"Actualizado orden de {updated_count} categorías para usuario {user.id}")
 
@@ -409,30 +537,38 @@ class CategoryService:
             },  # Gris oscuro
         ]
 
-        created_categories = []
+        # Se omiten las que el usuario ya tiene (mismo nombre y tipo, como valida clean)
+        existing_rows = list(Category.objects.filter(user=user).values_list("pk", "type", "name"))
+        existing = {(category_type, name.lower()) for _, category_type, name in existing_rows}
+        new_categories = [
+            # Ahora son editables por el usuario
+            Category(user=user, type=category_type, is_default=False, **cat_data)
+            for category_type, defaults in (
+                (Category.INCOME, default_income_categories),
+                (Category.EXPENSE, default_expense_categories),
+            )
+            for cat_data in defaults
+            if (category_type, cat_data["name"].lower()) not in existing
+        ]
 
-        # Crear categorías de ingresos
-        for cat_data in default_income_categories:
-            try:
-                category = Category.objects.create(
-                    user=user,
-                    type=Category.INCOME,
-                    is_default=False,  # Ahora son editables por el usuario
-                    **cat_data,
-                )
-                created_categories.append(category)
-            except Exception as e:
-                logger.warning(f"Error creando categoría por defecto {cat_data['name']}: {e}")
+        # Si otra petición concurrente creó alguna primero, solo esa se omite; como
+        # ignore_conflicts no devuelve las claves primarias, se releen las creadas
+        Category.objects.bulk_create(new_categories, ignore_conflicts=True)
+        created_categories = list(
+            Category.objects.filter(
+                user=user,
+                name__in=[category.name for category in new_categories],
+                is_default=False,
+            )
+            .exclude(pk__in=[pk for pk, _, _ in existing_rows])
+            .order_by("pk")
+        )
 
-        # Crear categorías de gastos
-        for cat_data in default_expense_categories:
-            try:
-                category = Category.objects.create(
-                    user=user, type=Category.EXPENSE, is_default=False, **cat_data
-                )
-                created_categories.append(category)
-            except Exception as e:
-                logger.warning(f"Error creando categoría por defecto {cat_data['name']}: {e}")
+        if created_categories:
+            from analytics.cache import AnalyticsCache
+
+            # bulk_create no dispara post_save
+            AnalyticsCache.bump_user(user.id)
 
         logger.info(
             f"Creadas {len(created_categories)} categorías por defecto para usuario {user.id}"
@@ -55,6 +55,13 @@ class CategoryViewSet(viewsets.ModelViewSet):
             return CategoryBulkOrderSerializer
         return CategoryDetailSerializer
 
+    def get_serializer_context(self):
+        """Agregar el uso de todas las categorías (una consulta, cacheada) a las lecturas"""
+        context = super().get_serializer_context()
+        if self.action in ("list", "retrieve", "income", "expense"):
+            context["category_usage"] = CategoryService.get_usage(self.request.user)["categories"]
+        return context
+
     def list(self, request, *args, **kwargs):
         """
         Listar categorías del usuario con filtros opcionales
@@ -308,7 +315,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
             user=request.user, include_inactive=False, category_type=Category.INCOME
         )
 
-        serializer = CategoryListSerializer(categories, many=True)
+        serializer = CategoryListSerializer(
+            categories, many=True, context=self.get_serializer_context()
+        )
 
         count = categories.count()
         logger.info(f"Usuario {request.user.id} listó categorías de ingresos: {count} encontradas")
@@ -337,7 +346,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
             user=request.user, include_inactive=False, category_type=Category.EXPENSE
         )
 
-        serializer = CategoryListSerializer(categories, many=True)
+        serializer = CategoryListSerializer(
+            categories, many=True, context=self.get_serializer_context()
+        )
 
         count = categories.count()
         logger.info(f"Usuario {request.user.id} listó categorías de gastos: {count} encontradas")
@@ -3,6 +3,7 @@ from datetime import timedelta
 
 from django.utils import timezone
 
+from analytics.services import FinancialAnalyticsService
 from credit_cards.models import InstallmentPlan
 from credit_cards.services import InstallmentPlanService
 from notifications.models import Notification
@@ -444,8 +445,6 @@ class FinancialDashboardService:
         """
         Calcula totales de ingresos, gastos, ahorros, IVA y GMF en moneda base
         """
-        from utils.currency_converter import FxService
-
         totals = {
             "income": 0.0,
             "expenses": 0.0,
@@ -454,37 +453,17 @@ class FinancialDashboardService:
             "gmf": 0.0,
         }
 
-        # Procesar transacciones por tipo y convertir a moneda base
-        for tx in transactions:
-            tx_currency = tx.transaction_currency or tx.origin_account.currency
-            tx_date = tx.date
-
-            # Convertir total_amount a moneda base
-            converted_amount, _, _ = FxService.convert_to_base(
-                tx.total_amount, tx_currency, base_currency, tx_date
-            )
-
-            # Sumar según tipo
-            if tx.type == 1:  # Income
-                totals["income"] += float(converted_amount)
-            elif tx.type == 2:  # Expense
-                totals["expenses"] += float(converted_amount)
-            elif tx.type == 4:  # Saving
-                totals["savings"] += float(converted_amount)
-
-            # Sumar IVA (taxed_amount)
-            if tx.taxed_amount:
-                converted_tax, _, _ = FxService.convert_to_base(
-                    tx.taxed_amount, tx_currency, base_currency, tx_date
-                )
-                totals["iva"] += float(converted_tax)
+        groups = FinancialAnalyticsService.group_totals_in_base(
+            transactions, ["type"], ["total_amount", "taxed_amount", "gmf_amount"], base_currency
+        )
 
-            # Sumar GMF (gmf_amount)
-            if tx.gmf_amount:
-                converted_gmf, _, _ = FxService.convert_to_base(
-                    tx.gmf_amount, tx_currency, base_currency, tx_date
-                )
-                totals["gmf"] += float(converted_gmf)
+        # Sumar según tipo de transacción (cada grupo convertido con la tasa de su mes)
+        type_keys = {1: "income", 2: "expenses", 4: "savings"}
+        for group in groups:
+            if group["type"] in type_keys:
+                totals[type_keys[group["type"]]] += float(group["total_amount"])
+            totals["iva"] += float(group["taxed_amount"])
+            totals["gmf"] += float(group["gmf_amount"])
 
         return totals
 
@@ -533,36 +512,31 @@ class FinancialDashboardService:
         """
         Calcula distribución de gastos por categoría (para gráfico de dona)
         """
-        from utils.currency_converter import FxService
-
         # Filtrar solo gastos con categoría
         expenses = transactions.filter(type=2, category__isnull=False)
 
-        if not expenses.exists():
+        groups = FinancialAnalyticsService.group_totals_in_base(
+            expenses,
+            ["category__id", "category__name", "category__color", "category__icon"],
+            ["total_amount"],
+            base_currency,
+        )
+
+        if not groups:
             return {"categories": [], "total": 0, "has_data": False}
 
         # Agrupar por categoría
-        category_totals = {}
-
-        for tx in expenses:
-            tx_currency = tx.transaction_currency or tx.origin_account.currency
-            converted, _, _ = FxService.convert_to_base(
-                tx.total_amount, tx_currency, base_currency, tx.date
-            )
-
-            cat_id = tx.category.id
-            if cat_id not in category_totals:
-                category_totals[cat_id] = {
-                    "id": cat_id,
-                    "name": tx.category.name,
-                    "color": tx.category.color,
-                    "icon": tx.category.icon,
-                    "amount": 0.0,
-                    "count": 0,
-                }
-
-            category_totals[cat_id]["amount"] += float(converted)
-            category_totals[cat_id]["count"] += 1
+        category_totals = {
+            group["category__id"]: {
+                "id": group["category__id"],
+                "name": group["category__name"],
+                "color": group["category__color"],
+                "icon": group["category__icon"],
+                "amount": float(group["total_amount"]),
+                "count": group["count"],
+            }
+            for group in groups
+        }
 
         # Calcular total y porcentajes
         total_expenses = sum(cat["amount"] for cat in category_totals.values())
@@ -601,8 +575,6 @@ class FinancialDashboardService:
         from collections import defaultdict
         from datetime import date, timedelta
 
-        from utils.currency_converter import FxService
-
         if not year or not month:
             # Usar mes actual si no se especifica
             today = date.today()
@@ -621,18 +593,17 @@ class FinancialDashboardService:
         # Agrupar por fecha
         daily_data = defaultdict(lambda: {"income": 0.0, "expenses": 0.0})
 
-        for tx in month_transactions:
-            tx_currency = tx.transaction_currency or tx.origin_account.currency
-            converted, _, _ = FxService.convert_to_base(
-                tx.total_amount, tx_currency, base_currency, tx.date
-            )
+        groups = FinancialAnalyticsService.group_totals_in_base(
+            month_transactions, ["type", "date"], ["total_amount"], base_currency
+        )
 
-            date_key = tx.date.isoformat()
+        for group in groups:
+            date_key = group["date"].isoformat()
 
-            if tx.type == 1:  # Income
-                daily_data[date_key]["income"] += float(converted)
-            elif tx.type == 2:  # Expense
-                daily_data[date_key]["expenses"] += float(converted)
+            if group["type"] == 1:  # Income
+                daily_data[date_key]["income"] += float(group["total_amount"])
+            elif group["type"] == 2:  # Expense
+                daily_data[date_key]["expenses"] += float(group["total_amount"])
 
         # Generar series para todos los días del mes
         dates = []
@@ -653,7 +624,7 @@ class FinancialDashboardService:
             "expenses": expense_series,
             "total_income": sum(income_series),
             "total_expenses": sum(expense_series),
-            "has_data": len(month_transactions) > 0,
+            "has_data": len(groups) > 0,
         }
 
     @staticmethod
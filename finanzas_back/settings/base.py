@@ -149,6 +149,33 @@ REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "finanzas_back.middleware.custom_exception_handler",  # HU-12 - Mejor manejo de errores
 }
 
+# Tipos de cambio: segundos que cada worker reutiliza su snapshot de ExchangeRate
+# antes de revalidar la marca de versión en base de datos (ver utils/rate_snapshot.py)
+FX_RATES_SNAPSHOT_TTL = env.int("FX_RATES_SNAPSHOT_TTL", default=5)
+
+# Analytics: estrategia de conversión de moneda en agregados ("python" o "sql")
+# ver FinancialAnalyticsService.group_totals_in_base
+ANALYTICS_FX_STRATEGY = env("ANALYTICS_FX_STRATEGY", default="python")
+
+# Analytics: leer los meses completos del resumen mensual (MonthlyCategorySummary)
+# en lugar de re-agregar todas las transacciones del período
+ANALYTICS_USE_MONTHLY_SUMMARY = env.bool("ANALYTICS_USE_MONTHLY_SUMMARY", default=True)
+
+# Analytics: segundos de vida de los resultados cacheados por usuario (0 desactiva la caché)
+# Usa el backend CACHES[ANALYTICS_CACHE_ALIAS]; ver analytics/cache.py
+ANALYTICS_CACHE_TIMEOUT = env.int("ANALYTICS_CACHE_TIMEOUT", default=300)
+ANALYTICS_CACHE_ALIAS = env("ANALYTICS_CACHE_ALIAS", default="default")
+
+# Reglas automáticas: reutilizar en memoria el matcher compilado de cada usuario
+# mientras no cambie su versión de reglas (guardada en CACHES[RULES_MATCHER_CACHE_ALIAS];
+# con varios workers debe ser una caché compartida); ver rules/matcher.py
+RULES_MATCHER_CACHE_ENABLED = env.bool("RULES_MATCHER_CACHE_ENABLED", default=True)
+RULES_MATCHER_CACHE_ALIAS = env("RULES_MATCHER_CACHE_ALIAS", default="default")
+
+# Transacciones: medir el tiempo de cada etapa de escritura (validación, reglas,
+# INSERT, señales, saldos); ver transactions/instrumentation.py
+TRANSACTION_WRITE_METRICS_ENABLED = env.bool("TRANSACTION_WRITE_METRICS_ENABLED", default=False)
+
 # Media files configuration
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -68,6 +68,12 @@ CACHES = {
     }
 }
 
+# Caché de analytics desactivada: los ids de usuario se reutilizan entre tests y la
+# caché locmem sobrevive al rollback. Los tests de la caché la activan explícitamente.
+ANALYTICS_CACHE_TIMEOUT = 0
+# Por la misma razón, el matcher de reglas se compila en cada uso salvo en sus tests
+RULES_MATCHER_CACHE_ENABLED = False
+
 # Logging mínimo para tests
 LOGGING = {
     "version": 1,
@@ -47,6 +47,26 @@ class GoalService:
 
         return goal
 
+    @staticmethod
+    @db_transaction.atomic
+    def add_batch_to_goal(goal, amount, transaction_count):
+        """
+        Suma a una meta el total de un lote de ahorros importados (bulk_create no
+        dispara señales) y evalúa su progreso una sola vez.
+        """
+        Goal.objects.filter(pk=goal.pk).update(saved_amount=F("saved_amount") + amount)
+
+        goal.refresh_from_db()
+
+        logger.info(
+            f"{transaction_count} transacciones importadas asignadas a meta {goal.id}. "
+            f"Meta actualizada: ${goal.saved_amount}"
+        )
+
+        GoalService._check_goal_progress(goal, amount)
+
+        return goal
+
     @staticmethod
     @db_transaction.atomic
     def remove_transaction_from_goal(transaction, goal):
@@ -5,6 +5,7 @@ Administración de reglas automáticas (HU-12)
 from django.contrib import admin
 from django.utils.html import format_html
 
+from .matcher import RuleMatcherCache
 from .models import AutomaticRule
 
 
@@ -135,6 +136,9 @@ class AutomaticRuleAdmin(admin.ModelAdmin):
     def activate_rules(self, request, queryset):
         """Acción para activar reglas seleccionadas"""
         updated = queryset.update(is_active=True)
+        # QuerySet.update no dispara señales
+        for user_id in set(queryset.values_list("user_id", flat=True)):
+            RuleMatcherCache.bump_user(user_id)
         self.message_user(request, f"{updated} reglas activadas exitosamente.")
 
     activate_rules.short_description = "Activar reglas seleccionadas"
@@ -142,6 +146,8 @@ class AutomaticRuleAdmin(admin.ModelAdmin):
     def deactivate_rules(self, request, queryset):
         """Acción para desactivar reglas seleccionadas"""
         updated = queryset.update(is_active=False)
+        for user_id in set(queryset.values_list("user_id", flat=True)):
+            RuleMatcherCache.bump_user(user_id)
         self.message_user(request, f"{updated} reglas desactivadas exitosamente.")
 
     deactivate_rules.short_description = "Desactivar reglas seleccionadas"
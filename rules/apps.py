@@ -5,3 +5,7 @@ class RulesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "rules"
     verbose_name = "Reglas Automáticas (HU-12)"
+
+    def ready(self):
+        # Registrar señales de la app (invalidación del matcher compilado)
+        from . import signals  # noqa: F401
@@ -0,0 +1,73 @@
+"""
+Management command para aplicar reglas automáticas al historial de transacciones
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rules.models import AutomaticRule
+from rules.services import HISTORY_CHUNK_SIZE, RuleEngineService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica las reglas automáticas activas a las transacciones existentes sin "
+        "categoría ni regla, por bloques y con bulk_update"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-id", type=int, required=True, help="ID del usuario")
+        parser.add_argument(
+            "--rule-id",
+            type=int,
+            help="Aplicar solo esta regla (por defecto, todas las activas por prioridad)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reportar las coincidencias, sin modificar transacciones",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=HISTORY_CHUNK_SIZE,
+            help=f"Transacciones por bloque (default: {HISTORY_CHUNK_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options["user_id"])
+        except User.DoesNotExist as e:
+            msg = f"Usuario con ID {options['user_id']} no existe"
+            raise CommandError(msg) from e
+
+        rule = None
+        if options["rule_id"]:
+            try:
+                rule = AutomaticRule.objects.select_related("target_category").get(
+                    pk=options["rule_id"], user=user, is_active=True
+                )
+            except AutomaticRule.DoesNotExist as e:
+                msg = f"La regla {options['rule_id']} no existe, está inactiva o no es del usuario"
+                raise CommandError(msg) from e
+
+        dry_run = options["dry_run"]
+        if dry_run:
+            self.stdout.write(self.style.WARNING("MODO DRY-RUN: no se modificarán transacciones"))
+
+        summary = RuleEngineService.apply_rules_to_history(
+            user, rule=rule, dry_run=dry_run, chunk_size=options["chunk_size"]
+        )
+
+        for entry in summary["rules"]:
+            self.stdout.write(f"  - {entry['name']}: {entry['matched']} transacciones")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nResumen:\n- Candidatas: {summary['candidates']}\n"
+                f"- Con regla: {summary['matched']}\n"
+                f"- Actualizadas: {summary['updated']}"
+            )
+        )
@@ -0,0 +1,273 @@
+"""
+Matcher compilado de reglas automáticas (HU-12)
+
+En lugar de consultar y recorrer las reglas activas en cada transacción, las
+reglas de un usuario se compilan una vez en:
+- un autómata Aho-Corasick con las palabras clave de DESCRIPTION_CONTAINS, que
+  encuentra todas las coincidencias en una sola pasada sobre la descripción, y
+- una tabla tipo de transacción -> prioridad para TRANSACTION_TYPE.
+
+Cada regla tiene como prioridad su posición en el orden ("order", "created_at");
+la regla que se aplica es la coincidencia de menor prioridad, igual que el
+recorrido original de "primera regla que coincida".
+
+Los matchers se guardan en memoria del proceso bajo una versión de reglas por
+usuario. La versión es un token en la caché de Django (compartido entre
+workers) que cambia al crear, editar, reordenar o eliminar reglas y al editar
+categorías (ver rules/signals.py). Las escrituras que no disparan señales
+(QuerySet.update) deben llamar a RuleMatcherCache.bump_user explícitamente.
+"""
+
+import logging
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import AutomaticRule
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rules:matcher"
+# Matchers compilados que se conservan por proceso
+MAX_CACHED_MATCHERS = 512
+
+# Prioridad de "sin coincidencia" (mayor que cualquier posición real)
+_NO_MATCH = float("inf")
+
+
+class KeywordAutomaton:
+    """
+    Autómata Aho-Corasick sobre palabras clave ya normalizadas (minúsculas).
+
+    Args:
+        keywords: dict palabra clave -> tupla de prioridades de las reglas que la usan
+    """
+
+    def __init__(self, keywords):
+        # Nodo 0 = raíz. goto[n]: carácter -> nodo; fail[n]: enlace de fallo
+        self._goto = [{}]
+        self._fail = [0]
+        # Prioridades que terminan en el nodo (incluidas las de sus sufijos)
+        self._outputs = [()]
+        # Mejor prioridad alcanzable en el nodo (mínimo de _outputs)
+        self._best = [_NO_MATCH]
+
+        for keyword, priorities in keywords.items():
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append(())
+                    self._best.append(_NO_MATCH)
+                node = next_node
+            self._outputs[node] += tuple(priorities)
+
+        # Enlaces de fallo por anchura: cada nodo hereda las salidas de su sufijo
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            self._best[node] = min(self._outputs[node], default=_NO_MATCH)
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] += self._outputs[self._fail[child]]
+                queue.append(child)
+
+    def _states(self, text):
+        goto, fail = self._goto, self._fail
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            yield node
+
+    def best_match(self, text, bound=_NO_MATCH):
+        """
+        Menor prioridad entre las palabras clave contenidas en el texto, o
+        _NO_MATCH. Solo interesa mejorar ``bound``: si se alcanza la prioridad
+        0 la búsqueda termina antes.
+        """
+        best_at = self._best
+        best = bound
+        for node in self._states(text):
+            if best_at[node] < best:
+                best = best_at[node]
+                if best == 0:
+                    break
+        return best
+
+    def all_matches(self, text):
+        """Todas las prioridades cuyas palabras clave están contenidas en el texto"""
+        found = set()
+        for node in self._states(text):
+            found.update(self._outputs[node])
+        return found
+
+
+class CompiledRuleMatcher:
+    """
+    Reglas activas de un usuario compiladas para evaluarse en una sola pasada.
+
+    Args:
+        rules: Reglas activas en orden de prioridad (ver RuleEngineService.get_active_rules)
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        keywords = {}
+        self._type_priority = {}
+        # Palabra clave vacía: coincide con cualquier descripción no vacía
+        self._any_description = _NO_MATCH
+
+        for priority, rule in enumerate(self.rules):
+            if rule.criteria_type == AutomaticRule.DESCRIPTION_CONTAINS:
+                if rule.keyword is None:
+                    continue
+                keyword = rule.keyword.lower()
+                if keyword:
+                    keywords.setdefault(keyword, []).append(priority)
+                else:
+                    self._any_description = min(self._any_description, priority)
+            elif rule.criteria_type == AutomaticRule.TRANSACTION_TYPE:
+                self._type_priority.setdefault(rule.target_transaction_type, priority)
+
+        self._automaton = KeywordAutomaton(keywords)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def match(self, description, transaction_type):
+        """
+        Primera regla (por prioridad) que coincide con la descripción o el tipo.
+
+        Returns:
+            AutomaticRule | None
+        """
+        best = self._type_priority.get(transaction_type, _NO_MATCH)
+        if description:
+            best = min(best, self._any_description)
+            best = self._automaton.best_match(description.lower(), bound=best)
+        return None if best == _NO_MATCH else self.rules[best]
+
+    def match_transaction(self, transaction_obj):
+        """Primera regla que coincide con una transacción (guardada o no)"""
+        return self.match(transaction_obj.description, transaction_obj.type)
+
+    def transaction_types(self):
+        """Tipos de transacción con alguna regla TRANSACTION_TYPE"""
+        return set(self._type_priority)
+
+    def matching_rules(self, description=None, transaction_type=None):
+        """Todas las reglas que coinciden, en orden de prioridad"""
+        priorities = set()
+        if description:
+            priorities.update(self._automaton.all_matches(description.lower()))
+            if self._any_description != _NO_MATCH:
+                priorities.add(self._any_description)
+        if transaction_type is not None:
+            priorities.update(
+                priority
+                for priority, rule in enumerate(self.rules)
+                if rule.criteria_type == AutomaticRule.TRANSACTION_TYPE
+                and rule.target_transaction_type == transaction_type
+            )
+        return [self.rules[priority] for priority in sorted(priorities)]
+
+
+class RuleMatcherCache:
+    """
+    Uso:
+        matcher = RuleMatcherCache.get(user)
+        rule = matcher.match_transaction(transaction)
+    """
+
+    _matchers = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _cache():
+        return caches[getattr(settings, "RULES_MATCHER_CACHE_ALIAS", "default")]
+
+    @staticmethod
+    def enabled():
+        return getattr(settings, "RULES_MATCHER_CACHE_ENABLED", True)
+
+    @staticmethod
+    def _version_key(user_id):
+        return f"{KEY_PREFIX}:version:{user_id}"
+
+    @classmethod
+    def version(cls, user_id) -> str:
+        """Versión actual de las reglas del usuario"""
+        cache = cls._cache()
+        key = cls._version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            # add() no pisa una versión creada en paralelo por otro worker
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(key) or uuid.uuid4().hex
+        return version
+
+    @classmethod
+    def bump_user(cls, user_id):
+        """
+        Invalida el matcher compilado de un usuario.
+
+        Igual que AnalyticsCache.bump_user, la versión cambia de inmediato y de
+        nuevo al confirmar la transacción, para descartar matchers compilados
+        mientras la escritura aún no era visible para otros workers.
+        """
+
+        def _bump():
+            cls._cache().set(cls._version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+        _bump()
+        transaction.on_commit(_bump)
+
+    @classmethod
+    def compile(cls, user_id):
+        """Compila las reglas activas del usuario (una consulta)"""
+        rules = (
+            AutomaticRule.objects.filter(user_id=user_id, is_active=True)
+            .select_related("target_category")
+            .order_by("order", "created_at")
+        )
+        return CompiledRuleMatcher(rules)
+
+    @classmethod
+    def get(cls, user):
+        """Matcher compilado del usuario (o de su ID), reutilizado mientras no cambien sus reglas"""
+        user_id = getattr(user, "pk", user)
+        if not cls.enabled():
+            return cls.compile(user_id)
+
+        version = cls.version(user_id)
+        cached = cls._matchers.get(user_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        matcher = cls.compile(user_id)
+        with cls._lock:
+            if len(cls._matchers) >= MAX_CACHED_MATCHERS:
+                cls._matchers.clear()
+            cls._matchers[user_id] = (version, matcher)
+        logger.debug(f"Matcher de reglas compilado para usuario {user_id}: {len(matcher.rules)}")
+        return matcher
+
+    @classmethod
+    def clear(cls):
+        """Descarta los matchers del proceso (tests)"""
+        with cls._lock:
+            cls._matchers.clear()
@@ -300,3 +300,38 @@ class AutomaticRuleStatsSerializer(serializers.Serializer):
     total_applications = serializers.IntegerField()
     most_used_rule = serializers.DictField()
     recent_applications = serializers.ListField()
+
+
+class RuleImpactPreviewSerializer(serializers.Serializer):
+    """Criterio de una regla (nueva o editada) para previsualizar su impacto"""
+
+    criteria_type = serializers.ChoiceField(choices=AutomaticRule.CRITERIA_CHOICES)
+    keyword = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    target_transaction_type = serializers.ChoiceField(
+        choices=AutomaticRule.TRANSACTION_TYPE_CHOICES, required=False
+    )
+    order = serializers.IntegerField(min_value=0, required=False)
+    rule_id = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if (
+            data["criteria_type"] == AutomaticRule.DESCRIPTION_CONTAINS
+            and not data.get("keyword", "").strip()
+        ):
+            raise serializers.ValidationError(
+                {
+                    "keyword": 'La palabra clave es requerida para criterio "descripción contiene texto"'
+                }
+            )
+        if (
+            data["criteria_type"] == AutomaticRule.TRANSACTION_TYPE
+            and data.get("target_transaction_type") is None
+        ):
+            raise serializers.ValidationError(
+                {
+                    "target_transaction_type": (
+                        'El tipo de transacción es requerido para criterio "tipo de transacción"'
+                    )
+                }
+            )
+        return data
@@ -8,12 +8,22 @@ from typing import Any
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
 
+from .matcher import CompiledRuleMatcher, RuleMatcherCache
 from .models import AutomaticRule
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Transacciones leídas y escritas por bloque al aplicar reglas al historial
+HISTORY_CHUNK_SIZE = 2000
+# Coincidencias de ejemplo incluidas en el resumen
+HISTORY_SAMPLE_SIZE = 20
+# Transacciones de ejemplo en la vista previa de impacto
+IMPACT_SAMPLE_SIZE = 5
+
 
 class RuleEngineService:
     """
@@ -21,12 +31,15 @@ class RuleEngineService:
     """
 
     @staticmethod
-    def apply_rules_to_transaction(transaction_obj) -> dict[str, Any]:
+    def apply_rules_to_transaction(transaction_obj, save=True) -> dict[str, Any]:
         """
         Aplica reglas automáticas a una transacción.
 
         Args:
             transaction_obj: Instancia de Transaction
+            save: Guardar la transacción si se aplicó una regla. Transaction.save()
+                usa save=False para resolver la regla antes del INSERT (una sola
+                escritura y un solo envío de post_save por transacción nueva)
 
         Returns:
             Dict con información sobre la regla aplicada:
@@ -38,7 +51,8 @@ class RuleEngineService:
                 'message': str
             }
         """
-        logger.info(f"Aplicando reglas a transacción ID {transaction_obj.id}")
+        label = transaction_obj.id or f"nueva ({transaction_obj.description!r})"
+        logger.info(f"Aplicando reglas a transacción ID {label}")
 
         result = {
             "rule_applied": False,
@@ -49,84 +63,242 @@ class RuleEngineService:
         }
 
         try:
-            # Obtener reglas activas del usuario, ordenadas por prioridad
-            rules = AutomaticRule.objects.filter(
-                user=transaction_obj.user, is_active=True
-            ).order_by("order", "created_at")
+            # Reglas activas del usuario compiladas (sin consulta si no cambiaron)
+            matcher = RuleMatcherCache.get(transaction_obj.user_id)
 
-            if not rules.exists():
+            if not matcher:
                 result["message"] = "No hay reglas activas configuradas"
                 return result
 
-            # Aplicar la primera regla que coincida
-            for rule in rules:
-                if rule.matches_transaction(transaction_obj):
-                    rule_result = rule.apply_to_transaction(transaction_obj)
+            # Aplicar la primera regla que coincida (una sola pasada sobre la descripción)
+            rule = matcher.match_transaction(transaction_obj)
+            if rule is not None:
+                rule_result = rule.apply_to_transaction(transaction_obj)
 
-                    if rule_result["applied"]:
-                        # Guardar la transacción con los cambios aplicados
+                if rule_result["applied"]:
+                    # Guardar la transacción con los cambios aplicados
+                    if save:
                         transaction_obj.save()
 
-                        result.update(
-                            {
-                                "rule_applied": True,
-                                "rule_name": rule_result["rule_name"],
-                                "action_type": rule_result["action_type"],
-                                "changes": rule_result["changes"],
-                                "message": f'Regla "{rule.name}" aplicada exitosamente',
-                            }
-                        )
-
-                        logger.info(
-                            f"Regla '{rule.name}' aplicada a transacción {transaction_obj.id}"
-                        )
-                        break
+                    result.update(
+                        {
+                            "rule_applied": True,
+                            "rule_name": rule_result["rule_name"],
+                            "action_type": rule_result["action_type"],
+                            "changes": rule_result["changes"],
+                            "message": f'Regla "{rule.name}" aplicada exitosamente',
+                        }
+                    )
+
+                    logger.info(f"Regla '{rule.name}' aplicada a transacción {label}")
 
             if not result["rule_applied"]:
                 result["message"] = "Ninguna regla coincide con esta transacción"
 
         except Exception as e:
-            logger.exception(f"Error aplicando reglas a transacción {transaction_obj.id}: {e!s}")
+            logger.exception(f"Error aplicando reglas a transacción {label}: {e!s}")
             result["message"] = f"Error aplicando reglas: {e!s}"
 
         return result
 
     @staticmethod
-    def get_matching_rules(
-        user, description: str | None = None, transaction_type: int | None = None
-    ) -> list[AutomaticRule]:
+    def apply_rules_in_memory(user, transactions, matcher=None) -> int:
         """
-        Obtiene las reglas que coincidirían con los criterios dados.
+        Aplica reglas automáticas a transacciones aún no guardadas (p. ej. antes
+        de un bulk_create), sin consultas ni guardados por transacción.
+
+        Igual que en Transaction.save, solo se consideran las transacciones sin
+        categoría ni regla asignada, y se aplica la primera regla que coincida.
 
         Args:
             user: Usuario propietario
-            description: Descripción de la transacción
-            transaction_type: Tipo de transacción
+            transactions: Iterable de instancias de Transaction
+            matcher: Matcher compilado (opcional, para reutilizarlo entre lotes)
 
         Returns:
-            Lista de reglas que coinciden
+            int: Número de transacciones a las que se aplicó una regla
         """
-        matching_rules = []
+        if matcher is None:
+            matcher = RuleEngineService.get_matcher(user)
+        if not matcher:
+            return 0
+
+        applied = 0
+        for transaction_obj in transactions:
+            if transaction_obj.category_id or transaction_obj.applied_rule_id:
+                continue
+            rule = matcher.match_transaction(transaction_obj)
+            if rule is not None and rule.apply_to_transaction(transaction_obj)["applied"]:
+                applied += 1
+        return applied
 
-        rules = AutomaticRule.objects.filter(user=user, is_active=True).order_by(
-            "order", "created_at"
+    @staticmethod
+    def apply_rules_to_history(
+        user, rule=None, dry_run=False, chunk_size=HISTORY_CHUNK_SIZE
+    ) -> dict[str, Any]:
+        """
+        Aplica reglas a las transacciones existentes del usuario que no tienen
+        categoría ni regla (las mismas que recibirían reglas al crearse).
+
+        Las candidatas se filtran en la base de datos (solo las que tienen
+        descripción o un tipo con regla), se evalúan en memoria con el matcher
+        compilado por bloques de ``chunk_size`` y se escriben con bulk_update,
+        sin pasar por Transaction.save() (ni GMF ni señales por fila). El
+        resumen mensual, los contadores de presupuesto y la caché de analytics
+        se actualizan una vez por bloque.
+
+        Los bloques se recorren por rango de ID (paginación por clave) en lugar
+        de un cursor abierto: el bloque anterior ya modificó filas del mismo
+        filtro y SQLite no aísla un cursor de las escrituras de su conexión.
+
+        Args:
+            user: Usuario propietario
+            rule: Aplicar solo esta regla (por defecto, todas las activas por prioridad)
+            dry_run: Solo calcular el resumen, sin guardar cambios
+            chunk_size: Transacciones por bloque
+
+        Returns:
+            Dict con el resumen: candidates, matched, updated, dry_run,
+            rules [{id, name, matched}] y sample (primeras coincidencias)
+        """
+        from analytics.cache import AnalyticsCache
+        from analytics.rollups import MonthlySummaryService
+        from budgets.counters import BudgetSpendService
+        from transactions.models import Transaction
+
+        matcher = (
+            RuleEngineService.get_matcher(user) if rule is None else CompiledRuleMatcher([rule])
         )
 
-        for rule in rules:
-            matches = False
+        summary = {
+            "candidates": 0,
+            "matched": 0,
+            "updated": 0,
+            "dry_run": dry_run,
+            "rules": [],
+            "sample": [],
+        }
+        if not matcher:
+            return summary
+
+        # Solo pueden coincidir las que tienen descripción o un tipo con regla
+        could_match = Q(description__isnull=False) & ~Q(description="")
+        rule_types = matcher.transaction_types()
+        if rule_types:
+            could_match |= Q(type__in=rule_types)
+        candidates = (
+            Transaction.objects.filter(user=user, category__isnull=True, applied_rule__isnull=True)
+            .filter(could_match)
+            .select_related("origin_account")
+            .order_by("pk")
+        )
+
+        matched_by_rule = {}
+        last_pk = 0
+        while True:
+            chunk = list(candidates.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            summary["candidates"] += len(chunk)
+
+            changed = []
+            signed_states = []
+            for transaction_obj in chunk:
+                rule_match = matcher.match_transaction(transaction_obj)
+                if rule_match is None:
+                    continue
+                old_summary_state = MonthlySummaryService.state_from_instance(transaction_obj)
+                old_budget_state = BudgetSpendService.state_from_instance(transaction_obj)
+                rule_result = rule_match.apply_to_transaction(transaction_obj)
+                if not rule_result["applied"]:
+                    continue
 
-            if rule.criteria_type == AutomaticRule.DESCRIPTION_CONTAINS:
-                if description and rule.keyword:
-                    matches = rule.keyword.lower() in description.lower()
+                changed.append(transaction_obj)
+                signed_states.append(
+                    (
+                        old_summary_state,
+                        old_budget_state,
+                        MonthlySummaryService.state_from_instance(transaction_obj),
+                        BudgetSpendService.state_from_instance(transaction_obj),
+                    )
+                )
+                matched_by_rule[rule_match] = matched_by_rule.get(rule_match, 0) + 1
+                if len(summary["sample"]) < HISTORY_SAMPLE_SIZE:
+                    summary["sample"].append(
+                        {
+                            "transaction_id": transaction_obj.id,
+                            "date": transaction_obj.date,
+                            "description": transaction_obj.description,
+                            "rule_name": rule_match.name,
+                            "changes": rule_result["changes"],
+                        }
+                    )
+
+            summary["matched"] += len(changed)
+            if dry_run or not changed:
+                continue
+
+            now = timezone.now()
+            for transaction_obj in changed:
+                transaction_obj.updated_at = now
+            with transaction.atomic():
+                Transaction.objects.bulk_update(
+                    changed, ["category", "tag", "applied_rule", "updated_at"]
+                )
+                MonthlySummaryService.record_changes(
+                    [(old, -1) for old, _, _, _ in signed_states]
+                    + [(new, 1) for _, _, new, _ in signed_states]
+                )
+                BudgetSpendService.record_changes(
+                    [(old, -1) for _, old, _, _ in signed_states]
+                    + [(new, 1) for _, _, _, new in signed_states]
+                )
+            summary["updated"] += len(changed)
+
+        if summary["updated"]:
+            AnalyticsCache.bump_user(user.id)
+
+        summary["rules"] = [
+            {"id": rule_match.id, "name": rule_match.name, "matched": count}
+            for rule_match, count in sorted(
+                matched_by_rule.items(), key=lambda item: item[1], reverse=True
+            )
+        ]
 
-            elif rule.criteria_type == AutomaticRule.TRANSACTION_TYPE:
-                if transaction_type is not None:
-                    matches = rule.target_transaction_type == transaction_type
+        logger.info(
+            f"Reglas aplicadas al historial del usuario {user.id}: "
+            f"{summary['matched']} coincidencias en {summary['candidates']} candidatas"
+            f"{' (dry-run)' if dry_run else ''}"
+        )
+        return summary
 
-            if matches:
-                matching_rules.append(rule)
+    @staticmethod
+    def get_matcher(user) -> CompiledRuleMatcher:
+        """Reglas activas del usuario compiladas (ver rules/matcher.py)"""
+        return RuleMatcherCache.get(user)
 
-        return matching_rules
+    @staticmethod
+    def get_active_rules(user) -> list[AutomaticRule]:
+        """Reglas activas del usuario en orden de prioridad, con su categoría objetivo"""
+        return RuleMatcherCache.get(user).rules
+
+    @staticmethod
+    def get_matching_rules(
+        user, description: str | None = None, transaction_type: int | None = None
+    ) -> list[AutomaticRule]:
+        """
+        Obtiene las reglas que coincidirían con los criterios dados.
+
+        Args:
+            user: Usuario propietario
+            description: Descripción de la transacción
+            transaction_type: Tipo de transacción
+
+        Returns:
+            Lista de reglas que coinciden
+        """
+        return RuleMatcherCache.get(user).matching_rules(description, transaction_type)
 
     @staticmethod
     def preview_rule_application(
@@ -169,6 +341,156 @@ class RuleEngineService:
             "message": f'Se aplicará la regla "{first_rule.name}"',
         }
 
+    @staticmethod
+    def rule_predicate(criteria_type, keyword=None, target_transaction_type=None) -> Q:
+        """
+        Criterio de una regla como filtro de base de datos.
+
+        DESCRIPTION_CONTAINS se traduce a ``description__icontains`` (LIKE sin
+        distinguir mayúsculas). En SQLite LIKE solo ignora mayúsculas en ASCII,
+        así que con tildes el conteo puede diferir del matcher en memoria.
+        """
+        if criteria_type == AutomaticRule.DESCRIPTION_CONTAINS:
+            if keyword:
+                return Q(description__icontains=keyword)
+            # Palabra clave vacía: cualquier descripción no vacía (igual que el matcher)
+            return Q(description__isnull=False) & ~Q(description="")
+        if criteria_type == AutomaticRule.TRANSACTION_TYPE:
+            return Q(type=target_transaction_type)
+        return Q(pk__in=[])
+
+    @staticmethod
+    def preview_rule_impact(
+        user,
+        criteria_type: str,
+        *,
+        keyword: str | None = None,
+        target_transaction_type: int | None = None,
+        order: int | None = None,
+        rule: AutomaticRule | None = None,
+    ) -> dict[str, Any]:
+        """
+        Impacto de una regla (nueva o existente) sobre todo el historial.
+
+        Los conteos salen de una sola consulta con agregación condicional: el
+        criterio de la regla filtra las transacciones y cada regla activa del
+        usuario aporta un Count(filter=...) con su solapamiento. Las reglas con
+        prioridad sobre ella (menor order; en empate, la más antigua) la
+        "sombrean"; ella sombrea a las de menor prioridad.
+
+        Args:
+            user: Usuario propietario
+            criteria_type, keyword, target_transaction_type: Criterio a evaluar
+            order: Orden de la regla (por defecto, después de todas las existentes)
+            rule: Regla existente que se está editando (se excluye de la comparación)
+
+        Returns:
+            Dict con matched (count, uncategorized, effective, by_currency),
+            shadowed_by y shadows ([{id, name, order, overlap}]) y sample
+        """
+        from transactions.models import Transaction
+
+        predicate = RuleEngineService.rule_predicate(
+            criteria_type, keyword, target_transaction_type
+        )
+
+        existing = AutomaticRule.objects.filter(user=user, is_active=True).order_by(
+            "order", "created_at"
+        )
+        if rule is not None:
+            existing = existing.exclude(pk=rule.pk)
+        existing = list(existing)
+
+        if order is None:
+            order = (
+                rule.order if rule is not None else max((r.order for r in existing), default=0) + 1
+            )
+
+        def has_priority(other):
+            # Una regla nueva se crea después que todas: en empate de order gana la existente
+            if rule is None:
+                return other.order <= order
+            return (other.order, other.created_at) < (order, rule.created_at)
+
+        overlaps = {
+            f"rule_{other.pk}": Count(
+                "id",
+                filter=RuleEngineService.rule_predicate(
+                    other.criteria_type, other.keyword, other.target_transaction_type
+                ),
+            )
+            for other in existing
+        }
+        higher = Q(pk__in=[])
+        for other in existing:
+            if has_priority(other):
+                higher |= RuleEngineService.rule_predicate(
+                    other.criteria_type, other.keyword, other.target_transaction_type
+                )
+
+        rows = (
+            Transaction.objects.filter(user=user)
+            .filter(predicate)
+            .values("transaction_currency", "origin_account__currency")
+            .annotate(
+                matched=Count("id"),
+                total=Sum("total_amount"),
+                uncategorized=Count(
+                    "id", filter=Q(category__isnull=True, applied_rule__isnull=True)
+                ),
+                effective=Count("id", filter=~higher),
+                **overlaps,
+            )
+            .order_by()
+        )
+
+        matched = {"count": 0, "uncategorized": 0, "effective": 0, "by_currency": []}
+        overlap_counts = dict.fromkeys(overlaps, 0)
+        by_currency = {}
+        for row in rows:
+            currency = row["transaction_currency"] or row["origin_account__currency"]
+            entry = by_currency.setdefault(
+                currency, {"currency": currency, "count": 0, "total_amount": 0}
+            )
+            entry["count"] += row["matched"]
+            entry["total_amount"] += row["total"] or 0
+            matched["count"] += row["matched"]
+            matched["uncategorized"] += row["uncategorized"]
+            matched["effective"] += row["effective"]
+            for key in overlaps:
+                overlap_counts[key] += row[key]
+        matched["by_currency"] = sorted(
+            by_currency.values(), key=lambda entry: entry["count"], reverse=True
+        )
+
+        shadowed_by, shadows = [], []
+        for other in existing:
+            overlap = overlap_counts[f"rule_{other.pk}"]
+            if not overlap:
+                continue
+            entry = {"id": other.id, "name": other.name, "order": other.order, "overlap": overlap}
+            (shadowed_by if has_priority(other) else shadows).append(entry)
+
+        sample = [
+            {
+                "id": txn.id,
+                "date": txn.date,
+                "description": txn.description,
+                "total_amount": txn.total_amount,
+            }
+            for txn in Transaction.objects.filter(user=user)
+            .filter(predicate)
+            .order_by("-date", "-id")[:IMPACT_SAMPLE_SIZE]
+        ]
+
+        return {
+            "order": order,
+            "matched": matched,
+            "shadowed_by": shadowed_by,
+            "shadows": shadows,
+            "sample": sample,
+        }
+
 
 class AutomaticRuleService:
     """
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from categories.models import Category
+
+from .matcher import RuleMatcherCache
+from .models import AutomaticRule
+
+
+@receiver(post_save, sender=AutomaticRule)
+@receiver(post_delete, sender=AutomaticRule)
+@receiver(post_save, sender=Category)
+def invalidate_rule_matcher(sender, instance, raw=False, **kwargs):
+    """
+    Cambia la versión de reglas del usuario: crear, editar, reordenar o eliminar
+    una regla, o editar una categoría objetivo, invalida su matcher compilado.
+    """
+    if raw:
+        return
+    RuleMatcherCache.bump_user(instance.user_id)
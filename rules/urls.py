@@ -29,6 +29,10 @@ urlpatterns = [
 # GET /api/rules/stats/ - Estadísticas generales de reglas
 # POST /api/rules/reorder/ - Reordenar reglas por prioridad
 # POST /api/rules/preview/ - Previsualizar aplicación de reglas
+# POST /api/rules/preview_impact/ - Coincidencias, montos y reglas sombreadas en el historial
+# Body: {"criteria_type": "...", "keyword": "...", "order": 3, "rule_id": 7}
+# POST /api/rules/apply_to_history/ - Aplicar reglas al historial sin categorizar
+# Body: {"rule_id": 3, "dry_run": true} (ambos opcionales)
 # GET /api/rules/active/ - Obtener solo reglas activas
 # GET /api/rules/{id}/applied_transactions/ - Transacciones afectadas por regla
 #
@@ -17,6 +17,7 @@ from .serializers import (
     AutomaticRuleListSerializer,
     AutomaticRuleStatsSerializer,
     AutomaticRuleUpdateSerializer,
+    RuleImpactPreviewSerializer,
 )
 from .services import AutomaticRuleService, RuleEngineService
 
@@ -266,6 +267,86 @@ class AutomaticRuleViewSet(viewsets.ModelViewSet):
 
         return Response(preview)
 
+    @action(detail=False, methods=["post"])
+    def preview_impact(self, request):
+        """
+        Previsualizar el impacto de una regla sobre todo el historial
+
+        Body esperado:
+        {
+            "criteria_type": "description_contains",
+            "keyword": "uber",                 // o "target_transaction_type": 2
+            "order": 3,                        // Opcional
+            "rule_id": 7                       // Opcional: regla existente que se edita
+        }
+        """
+        serializer = RuleImpactPreviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        rule = None
+        if data.get("rule_id") is not None:
+            rule = self.get_queryset().filter(pk=data["rule_id"]).first()
+            if rule is None:
+                return Response(
+                    {"error": "La regla no existe o no pertenece al usuario"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+        impact = RuleEngineService.preview_rule_impact(
+            request.user,
+            criteria_type=data["criteria_type"],
+            keyword=data.get("keyword", "").strip() or None,
+            target_transaction_type=data.get("target_transaction_type"),
+            order=data.get("order"),
+            rule=rule,
+        )
+
+        return Response(impact)
+
+    @action(detail=False, methods=["post"])
+    def apply_to_history(self, request):
+        """
+        Aplicar reglas a las transacciones existentes sin categoría ni regla
+
+        Body esperado (todo opcional):
+        {
+            "rule_id": 3,      // Solo esta regla (por defecto, todas las activas)
+            "dry_run": true    // Solo mostrar qué cambiaría
+        }
+        """
+        rule = None
+        rule_id = request.data.get("rule_id")
+        if rule_id is not None:
+            try:
+                rule = self.get_queryset().select_related("target_category").get(pk=rule_id)
+            except (AutomaticRule.DoesNotExist, ValueError, TypeError):
+                return Response(
+                    {"error": "La regla no existe o no pertenece al usuario"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            if not rule.is_active:
+                return Response(
+                    {"error": f'La regla "{rule.name}" está inactiva'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        dry_run = str(request.data.get("dry_run", "false")).lower() in ("true", "1")
+
+        summary = RuleEngineService.apply_rules_to_history(request.user, rule=rule, dry_run=dry_run)
+
+        verb = "se actualizarían" if dry_run else "se actualizaron"
+        return Response(
+            {
+                "message": (
+                    f"{summary['matched']} de {summary['candidates']} transacciones "
+                    f"candidatas coinciden con alguna regla; {verb} "
+                    f"{summary['matched'] if dry_run else summary['updated']}."
+                ),
+                **summary,
+            }
+        )
+
     @action(detail=False, methods=["get"])
     def active(self, request):
         """
@@ -0,0 +1,98 @@
+"""
+Benchmark de conversión de moneda en analytics: estrategia 'python' vs 'sql'
+
+No es un test automatizado. Genera transacciones sintéticas en COP/USD/EUR con
+tasas mensuales y mide get_period_indicators, get_expenses_by_category y
+get_daily_flow_chart con ambas estrategias (FinancialAnalyticsService
+.group_totals_in_base) y verifica que los resultados sean idénticos.
+
+Uso:
+    DJANGO_ENV=testing python scripts/benchmark_analytics_fx.py [n_transacciones]
+    (la petición original pide 1M: python scripts/benchmark_analytics_fx.py 1000000)
+"""
+
+import random
+import sys
+from datetime import date
+from decimal import Decimal
+
+from benchmark_support import (
+    cleanup_benchmark_user,
+    create_benchmark_user,
+    ensure_schema,
+    timed,
+)
+
+from analytics.services import FinancialAnalyticsService
+from utils.models import ExchangeRate
+
+SOURCE = "benchmark"
+
+
+def create_rates(start_date, end_date):
+    """Crear tasas mensuales COP para USD y EUR en el rango"""
+    rng = random.Random(1)
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        for currency, base_rate in (("USD", 4000), ("EUR", 4350)):
+            ExchangeRate.objects.get_or_create(
+                base_currency="COP",
+                currency=currency,
+                year=year,
+                month=month,
+                defaults={
+                    "rate": Decimal(base_rate + rng.randint(-200, 200)),
+                    "source": SOURCE,
+                },
+            )
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def main():
+    n_transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    print("🏁 BENCHMARK DE CONVERSIÓN EN ANALYTICS (python vs sql)")
+    print("=" * 60)
+    ensure_schema()
+
+    print(f"🏗️  Generando {n_transactions} transacciones sintéticas...")
+    data = create_benchmark_user(n_transactions, currencies=("COP", "USD", "EUR"))
+    user = data["user"]
+    end_date = data["end_date"]
+    month_start = end_date.replace(day=1)
+    year_start = date(end_date.year - 1, end_date.month, 1)
+    create_rates(data["start_date"], end_date)
+
+    methods = {
+        "indicadores": FinancialAnalyticsService.get_period_indicators,
+        "gastos por categoría": FinancialAnalyticsService.get_expenses_by_category,
+        "flujo diario": FinancialAnalyticsService.get_daily_flow_chart,
+    }
+
+    try:
+        for label, start in (("Mes actual", month_start), ("Últimos 12 meses", year_start)):
+            print(f"\n📅 {label}: {start} → {end_date}")
+            print("-" * 60)
+            for name, method in methods.items():
+                python_time, python_result = timed(
+                    lambda m=method, s=start: m(user, s, end_date, fx_strategy="python")
+                )
+                sql_time, sql_result = timed(
+                    lambda m=method, s=start: m(user, s, end_date, fx_strategy="sql")
+                )
+                line = (
+                    f"   {name:<22} python {python_time * 1000:>9.1f} ms | "
+                    f"sql {sql_time * 1000:>9.1f} ms"
+                )
+                if name != "gastos por categoría":
+                    line += f" | idénticos: {'✅' if python_result == sql_result else '❌'}"
+                print(line)
+    finally:
+        cleanup_benchmark_user()
+        ExchangeRate.objects.filter(source=SOURCE).delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark del dashboard financiero (FinancialDashboardService.get_financial_summary)
+
+No es un test automatizado. Genera un mes con 100, 10.000 y 100.000
+transacciones sintéticas en COP/USD/EUR y mide la latencia y el número de
+consultas del resumen filtrado por ese mes. Los totales, la distribución por
+categoría y el flujo diario salen de agregados agrupados, así que el número
+de consultas no depende de la cantidad de movimientos.
+
+Uso:
+    DJANGO_ENV=testing python scripts/benchmark_dashboard.py [n1 n2 ...]
+"""
+
+import sys
+from datetime import date
+from decimal import Decimal
+
+from benchmark_support import (
+    cleanup_benchmark_user,
+    create_benchmark_user,
+    ensure_schema,
+    timed,
+)
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.services import FinancialDashboardService
+from utils.models import ExchangeRate
+
+SOURCE = "benchmark"
+DEFAULT_SIZES = (100, 10_000, 100_000)
+
+
+def create_rates(year, month):
+    """Crear tasas COP para USD y EUR del mes del benchmark"""
+    for currency, rate in (("USD", Decimal(4000)), ("EUR", Decimal(4350))):
+        ExchangeRate.objects.get_or_create(
+            base_currency="COP",
+            currency=currency,
+            year=year,
+            month=month,
+            defaults={"rate": rate, "source": SOURCE},
+        )
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    print("🏁 BENCHMARK DEL DASHBOARD FINANCIERO")
+    print("=" * 60)
+    ensure_schema()
+
+    # Enero tiene 31 días: months=1 reparte todas las fechas dentro del mes
+    month_end = date(date.today().year, 1, 31)
+    create_rates(month_end.year, month_end.month)
+
+    try:
+        for n_transactions in sizes:
+            print(f"\n🏗️  Generando {n_transactions} transacciones en {month_end:%Y-%m}...")
+            data = create_benchmark_user(
+                n_transactions, months=1, currencies=("COP", "USD", "EUR"), end_date=month_end
+            )
+            user = data["user"]
+
+            def summary(u=user):
+                return FinancialDashboardService.get_financial_summary(
+                    u, year=month_end.year, month=month_end.month
+                )
+
+            best, result = timed(summary)
+            with CaptureQueriesContext(connection) as ctx:
+                summary()
+
+            assert result["has_data"], result.get("error")
+            print(
+                f"   {n_transactions:>8} movimientos: {best * 1000:>9.1f} ms | "
+                f"{len(ctx.captured_queries)} consultas | "
+                f"gastos {result['summary']['total_expenses'] / 100:,.0f} "
+                f"{result['summary']['currency']}"
+            )
+    finally:
+        cleanup_benchmark_user()
+        ExchangeRate.objects.filter(source=SOURCE).delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark de conversión de monedas: escalar vs lote (FxService.convert_many)
+
+No es un test automatizado. Genera tasas mensuales sintéticas, convierte N
+montos aleatorios con FxService.convert_amount fila por fila y con
+FxService.convert_many, verifica que los resultados sean idénticos y compara
+tiempos.
+
+Uso:
+    DJANGO_ENV=testing python scripts/benchmark_fx_batch.py [n_conversiones]
+"""
+
+import random
+import sys
+from datetime import date
+from decimal import Decimal
+
+from benchmark_support import ensure_schema, timed
+
+from utils.currency_converter import FxService
+from utils.models import ExchangeRate
+
+SOURCE = "benchmark"
+
+
+def main():
+    n_conversions = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("🏁 BENCHMARK DE CONVERSIÓN DE MONEDAS")
+    print("=" * 60)
+    ensure_schema()
+
+    rng = random.Random(42)
+    ExchangeRate.objects.filter(source=SOURCE).delete()
+    for year in (2024, 2025):
+        for month in range(1, 13):
+            for currency, base_rate in (("USD", 4000), ("EUR", 4350)):
+                ExchangeRate.objects.get_or_create(
+                    base_currency="COP",
+                    currency=currency,
+                    year=year,
+                    month=month,
+                    defaults={
+                        "rate": Decimal(base_rate + rng.randint(-200, 200)),
+                        "source": SOURCE,
+                    },
+                )
+
+    amounts = [rng.randint(1, 50_000_000) for _ in range(n_conversions)]
+    currencies = [rng.choice(("COP", "USD", "EUR")) for _ in range(n_conversions)]
+    dates = [date(rng.choice((2024, 2025)), rng.randint(1, 12), 15) for _ in range(n_conversions)]
+
+    def scalar():
+        return [
+            FxService.convert_amount(amount, currency, "COP", ref_date)
+            for amount, currency, ref_date in zip(amounts, currencies, dates, strict=True)
+        ]
+
+    def batch():
+        return FxService.convert_many(amounts, currencies, dates, "COP")
+
+    try:
+        print(f"🔁 Convirtiendo {n_conversions} montos...")
+        scalar_time, scalar_result = timed(scalar)
+        batch_time, batch_result = timed(batch)
+
+        converted, rates, warnings = batch_result
+        identical = all(
+            row == (converted[i], rates[i], warnings[i]) for i, row in enumerate(scalar_result)
+        )
+
+        print("\n📊 RESULTADOS")
+        print("=" * 60)
+        print(f"   Escalar (convert_amount): {scalar_time * 1000:>10.1f} ms")
+        print(f"   Lote (convert_many):      {batch_time * 1000:>10.1f} ms")
+        print(f"   Aceleración:              x{scalar_time / batch_time:.1f}")
+        print(f"   Resultados idénticos:     {'✅ sí' if identical else '❌ no'}")
+    finally:
+        ExchangeRate.objects.filter(source=SOURCE).delete()
+
+
+if __name__ == "__main__":
+    main()
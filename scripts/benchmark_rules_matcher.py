@@ -0,0 +1,115 @@
+"""
+Benchmark del matcher compilado de reglas (rules/matcher.py)
+
+No es un test automatizado. Genera 1.000 reglas de comercio (palabra clave) más
+algunas por tipo de transacción y 100.000 descripciones sintéticas, y compara:
+- el recorrido original: regla por regla con keyword.lower() in description.lower()
+- CompiledRuleMatcher: Aho-Corasick + tabla de tipos, una pasada por descripción
+
+Todo ocurre en memoria (reglas sin guardar), así que mide solo la evaluación.
+El recorrido original se mide sobre una muestra y se extrapola, porque
+1.000 x 100.000 comparaciones tardan minutos.
+
+Uso:
+    DJANGO_ENV=testing python scripts/benchmark_rules_matcher.py [n_reglas n_descripciones]
+"""
+
+import random
+import sys
+import time
+
+import benchmark_support  # configura Django
+
+from rules.matcher import CompiledRuleMatcher
+from rules.models import AutomaticRule
+
+DEFAULT_RULES = 1_000
+DEFAULT_DESCRIPTIONS = 100_000
+NAIVE_SAMPLE = 5_000
+WORDS = ("pago", "compra", "pse", "tarjeta", "bogota", "medellin", "online", "app", "ref")
+
+
+def build_rules(n_rules, rng):
+    """Reglas de comercio en orden de prioridad, más una regla por tipo al final"""
+    rules = [
+        AutomaticRule(
+            name=f"Comercio {i}",
+            criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword=f"comercio{i:04d}{rng.choice('abcdefgh')}",
+            action_type=AutomaticRule.ASSIGN_TAG,
+            target_tag=f"#c{i}",
+            order=i,
+        )
+        for i in range(n_rules)
+    ]
+    rules.append(
+        AutomaticRule(
+            name="Todos los ingresos",
+            criteria_type=AutomaticRule.TRANSACTION_TYPE,
+            target_transaction_type=AutomaticRule.INCOME,
+            action_type=AutomaticRule.ASSIGN_TAG,
+            target_tag="#ingreso",
+            order=n_rules,
+        )
+    )
+    return rules
+
+
+def build_descriptions(n_descriptions, rules, rng):
+    keywords = [rule.keyword for rule in rules if rule.keyword]
+    descriptions = []
+    for _ in range(n_descriptions):
+        words = rng.sample(WORDS, 3)
+        # Dos de cada tres descripciones mencionan un comercio con regla
+        if rng.random() < 2 / 3:
+            words.insert(1, rng.choice(keywords).upper())
+        descriptions.append((" ".join(words) + f" {rng.randint(1, 99999)}", rng.choice((1, 2))))
+    return descriptions
+
+
+def naive_match(rules, description, transaction_type):
+    """Recorrido original de RuleEngineService (primera regla que coincide)"""
+    for rule in rules:
+        if rule.criteria_type == AutomaticRule.DESCRIPTION_CONTAINS:
+            if description and rule.keyword.lower() in description.lower():
+                return rule
+        elif rule.target_transaction_type == transaction_type:
+            return rule
+    return None
+
+
+def main():
+    n_rules = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RULES
+    n_descriptions = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DESCRIPTIONS
+
+    print("🏁 BENCHMARK DEL MATCHER DE REGLAS")
+    print("=" * 60)
+    rng = random.Random(42)
+    rules = build_rules(n_rules, rng)
+    descriptions = build_descriptions(n_descriptions, rules, rng)
+
+    start = time.perf_counter()
+    matcher = CompiledRuleMatcher(rules)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [matcher.match(description, kind) for description, kind in descriptions]
+    compiled_time = time.perf_counter() - start
+
+    sample = descriptions[:NAIVE_SAMPLE]
+    start = time.perf_counter()
+    naive = [naive_match(rules, description, kind) for description, kind in sample]
+    naive_time = (time.perf_counter() - start) * len(descriptions) / len(sample)
+
+    assert compiled[: len(sample)] == naive, "El matcher no coincide con el recorrido original"
+    matched = sum(rule is not None for rule in compiled)
+
+    print(f"   {len(rules)} reglas, {len(descriptions):,} descripciones ({matched:,} con regla)")
+    print(f"   Compilación:          {compile_time * 1000:>9.1f} ms")
+    print(f"   Matcher compilado:    {compiled_time:>9.2f} s")
+    print(f"   Recorrido original:   {naive_time:>9.2f} s (extrapolado de {len(sample):,})")
+    print(f"   Aceleración:          {naive_time / compiled_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
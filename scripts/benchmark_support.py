@@ -0,0 +1,185 @@
+"""
+Utilidades compartidas por los scripts de benchmark (scripts/benchmark_*.py)
+
+No es un test automatizado. Los benchmarks crean un usuario sintético con datos
+generados vía bulk_create, miden y eliminan todo al terminar.
+
+Uso típico (SQLite en memoria, sin depender de PostgreSQL):
+    DJANGO_ENV=testing python scripts/benchmark_transaction_indexes.py
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import django
+
+# Configurar Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "finanzas_back.settings")
+django.setup()
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from accounts.models import Account
+from categories.models import Category
+from transactions.models import Transaction
+
+User = get_user_model()
+
+BENCHMARK_USERNAME = "benchmark_user"
+
+
+def ensure_schema():
+    """Crear las tablas si la base de datos es SQLite en memoria (settings de testing)"""
+    db_name = str(settings.DATABASES["default"].get("NAME", ""))
+    if db_name in {":memory:", ""} or "mode=memory" in db_name:
+        print("🗄️  Base de datos en memoria: creando esquema...")
+        call_command("migrate", run_syncdb=True, verbosity=0)
+
+
+def create_benchmark_user(
+    n_transactions,
+    *,
+    months=12,
+    currencies=("COP",),
+    n_categories=10,
+    end_date=None,
+    seed=42,
+):
+    """
+    Crear un usuario con cuentas, categorías y transacciones sintéticas
+
+    Args:
+        n_transactions: Número de transacciones a generar
+        months: Meses hacia atrás sobre los que se reparten las fechas
+        currencies: Monedas de las cuentas (una cuenta por moneda)
+        n_categories: Número de categorías de gasto (se crean además 2 de ingreso)
+        end_date: Fecha final del rango (por defecto hoy)
+        seed: Semilla para reproducibilidad
+
+    Returns:
+        dict: user, accounts, categories
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=30 * months)
+    span_days = (end_date - start_date).days
+
+    cleanup_benchmark_user()
+
+    user = User.objects.create_user(
+        identification="9999999999",
+        username=BENCHMARK_USERNAME,
+        email="benchmark@example.com",
+        password="benchmark-pass-123",
+    )
+
+    accounts = [
+        Account.objects.create(
+            user=user,
+            name=f"Cuenta {currency}",
+            account_type=Account.ASSET,
+            category=Account.BANK_ACCOUNT,
+            currency=currency,
+            current_balance=Decimal("100000000.00"),
+        )
+        for currency in currencies
+    ]
+
+    expense_categories = Category.objects.bulk_create(
+        [
+            Category(
+                user=user,
+                name=f"Gasto {i}",
+                type=Category.EXPENSE,
+                color="#DC2626",
+                icon="fa-utensils",
+                order=i,
+            )
+            for i in range(n_categories)
+        ]
+    )
+    income_categories = Category.objects.bulk_create(
+        [
+            Category(
+                user=user,
+                name=f"Ingreso {i}",
+                type=Category.INCOME,
+                color="#059669",
+                icon="fa-briefcase",
+                order=i,
+            )
+            for i in range(2)
+        ]
+    )
+
+    batch = []
+    for _ in range(n_transactions):
+        account = rng.choice(accounts)
+        tx_type = 1 if rng.random() < 0.2 else 2
+        category = rng.choice(income_categories if tx_type == 1 else expense_categories)
+        base_amount = rng.randint(1_000, 50_000_000)
+        taxed_amount = rng.choice((0, 0, base_amount * 19 // 100))
+        gmf_amount = (base_amount + taxed_amount) * 4 // 1000 if tx_type == 2 else 0
+        batch.append(
+            Transaction(
+                user=user,
+                origin_account=account,
+                category=category,
+                type=tx_type,
+                base_amount=base_amount,
+                taxed_amount=taxed_amount,
+                gmf_amount=gmf_amount,
+                total_amount=base_amount + taxed_amount + gmf_amount,
+                date=start_date + timedelta(days=rng.randint(0, span_days)),
+                description=f"Movimiento {rng.randint(1, 500)}",
+                transaction_currency=account.currency,
+            )
+        )
+        if len(batch) >= 5000:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Transaction.objects.bulk_create(batch)
+
+    # bulk_create no dispara señales: reconstruir el resumen mensual de analytics.
+    # Importar aquí: los benchmarks que no lo usan no dependen de analytics
+    from analytics.rollups import MonthlySummaryService
+
+    MonthlySummaryService.rebuild_for_user(user)
+
+    return {
+        "user": user,
+        "accounts": accounts,
+        "categories": expense_categories + income_categories,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+
+def cleanup_benchmark_user():
+    """Eliminar el usuario sintético y todos sus datos"""
+    User.objects.filter(username=BENCHMARK_USERNAME).delete()
+
+
+def timed(fn, repeat=3):
+    """
+    Ejecutar una función varias veces y devolver el mejor tiempo
+
+    Returns:
+        tuple: (mejor tiempo en segundos, resultado de la última ejecución)
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
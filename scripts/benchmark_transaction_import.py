@@ -0,0 +1,92 @@
+"""
+Benchmark de la importación masiva de extractos (TransactionImportService)
+
+No es un test automatizado. Genera en memoria un CSV con 1.000, 10.000 y
+50.000 filas (gastos e ingresos con categorías por nombre, y descripciones que
+disparan una regla automática) y mide el tiempo y las consultas de la
+importación. Las filas se insertan con bulk_create por lotes y los efectos
+(saldo, resumen mensual, presupuestos, alertas) se aplican una vez por lote.
+
+Uso:
+    DJANGO_ENV=testing python scripts/benchmark_transaction_import.py [n1 n2 ...]
+"""
+
+import io
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmark_support import cleanup_benchmark_user, create_benchmark_user, ensure_schema
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account
+from rules.models import AutomaticRule
+from transactions.importers import TransactionImportService
+
+DEFAULT_SIZES = (1_000, 10_000, 50_000)
+
+
+def build_csv(n_rows, categories, seed=42):
+    """CSV en memoria con el formato de un extracto bancario típico"""
+    rng = random.Random(seed)
+    start = date(date.today().year, 1, 1)
+    lines = ["fecha;descripcion;monto;categoria"]
+    for i in range(n_rows):
+        category = rng.choice(categories)
+        sign = "" if category.type == "income" else "-"
+        # Una de cada diez filas llega sin categoría y la asigna la regla "uber"
+        name = "" if i % 10 == 0 else category.name
+        description = "UBER viaje" if i % 10 == 0 else f"Movimiento {i}"
+        day = start + timedelta(days=rng.randint(0, 180))
+        lines.append(f"{day:%d/%m/%Y};{description};{sign}{rng.randint(1_000, 500_000)};{name}")
+    return io.BytesIO("\n".join(lines).encode())
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    print("🏁 BENCHMARK DE IMPORTACIÓN MASIVA DE EXTRACTOS")
+    print("=" * 60)
+    ensure_schema()
+
+    try:
+        for n_rows in sizes:
+            data = create_benchmark_user(0)
+            user = data["user"]
+            account = data["accounts"][0]
+            # Saldo suficiente para que ningún lote se rechace por sobregiro
+            Account.objects.filter(pk=account.pk).update(current_balance=Decimal("10000000000.00"))
+            account.refresh_from_db()
+            AutomaticRule.objects.create(
+                user=user,
+                name="Uber",
+                criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+                keyword="uber",
+                action_type=AutomaticRule.ASSIGN_CATEGORY,
+                target_category=data["categories"][0],
+                is_active=True,
+                order=1,
+            )
+            fileobj = build_csv(n_rows, data["categories"])
+
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as ctx:
+                result = TransactionImportService.import_file(user, account, fileobj, "csv")
+            elapsed = time.perf_counter() - start
+
+            assert result["imported"] == n_rows, result["errors"][:3]
+            print(
+                f"   {n_rows:>8} filas: {elapsed:>7.2f} s | "
+                f"{n_rows / elapsed:>8,.0f} filas/s | "
+                f"{len(ctx.captured_queries)} consultas | "
+                f"{result['batches']} lotes | {result['rules_applied']} reglas"
+            )
+    finally:
+        cleanup_benchmark_user()
+
+
+if __name__ == "__main__":
+    main()
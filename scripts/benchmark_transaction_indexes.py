@@ -0,0 +1,108 @@
+"""
+Benchmark de los índices compuestos de Transaction
+
+Ejecuta EXPLAIN y mide cada consulta "caliente" de analytics, presupuestos,
+dashboard y listado de transacciones con y sin los índices de Transaction.Meta.
+La variante "sin índices" se ejecuta dentro de una transacción que elimina los
+índices y luego se revierte, así que la base de datos queda intacta.
+
+Uso:
+    DJANGO_ENV=testing python scripts/benchmark_transaction_indexes.py [n_transacciones]
+"""
+
+import sys
+
+from benchmark_support import (
+    cleanup_benchmark_user,
+    create_benchmark_user,
+    ensure_schema,
+    timed,
+)
+from django.db import connection
+from django.db import transaction as db_transaction
+from django.db.models import Count, Sum
+
+from transactions.models import Transaction
+
+
+def build_queries(data):
+    """Consultas representativas de cada módulo"""
+    user = data["user"]
+    end_date = data["end_date"]
+    start_date = end_date.replace(day=1)
+    category = data["categories"][0]
+    base = Transaction.objects.filter(user=user)
+
+    return {
+        "analytics.period_indicators": base.filter(
+            date__gte=start_date, date__lte=end_date, type__in=[1, 2]
+        )
+        .values("type", "transaction_currency")
+        .annotate(total=Sum("total_amount")),
+        "analytics.expenses_by_category": base.filter(
+            type=2, date__gte=start_date, date__lte=end_date
+        )
+        .values("category")
+        .annotate(total=Sum("total_amount"), count=Count("id")),
+        "analytics.daily_flow": base.filter(date__gte=start_date, date__lte=end_date)
+        .values("date", "type")
+        .annotate(total=Sum("total_amount")),
+        "budgets.spent_amount": base.filter(
+            category=category, type=2, date__gte=start_date, date__lte=end_date
+        ).values("total_amount", "transaction_currency"),
+        "dashboard.month": base.filter(date__gte=start_date, date__lte=end_date).values(
+            "type", "total_amount"
+        ),
+        "transactions.list": base.order_by("-created_at")[:20],
+    }
+
+
+def run_queries(data, label):
+    """Ejecutar EXPLAIN y medir cada consulta"""
+    print(f"\n📋 {label}")
+    print("-" * 60)
+    results = {}
+    for name, queryset in build_queries(data).items():
+        plan = queryset.explain()
+        elapsed, _ = timed(lambda qs=queryset: list(qs.all()), repeat=5)
+        results[name] = elapsed
+        print(f"\n🔍 {name}: {elapsed * 1000:.2f} ms")
+        for line in plan.splitlines():
+            print(f"   {line}")
+    return results
+
+
+def main():
+    n_transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    print("🏁 BENCHMARK DE ÍNDICES DE TRANSACCIONES")
+    print("=" * 60)
+    ensure_schema()
+
+    print(f"🏗️  Generando {n_transactions} transacciones sintéticas...")
+    data = create_benchmark_user(n_transactions)
+
+    try:
+        with db_transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in Transaction._meta.indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+            before = run_queries(data, "SIN índices compuestos")
+            db_transaction.set_rollback(True)
+
+        after = run_queries(data, "CON índices compuestos")
+
+        print("\n📊 RESUMEN")
+        print("=" * 60)
+        for name, elapsed in before.items():
+            speedup = elapsed / after[name] if after[name] else float("inf")
+            print(
+                f"   {name:<35} {elapsed * 1000:>9.2f} ms → "
+                f"{after[name] * 1000:>9.2f} ms  (x{speedup:.1f})"
+            )
+    finally:
+        cleanup_benchmark_user()
+
+
+if __name__ == "__main__":
+    main()
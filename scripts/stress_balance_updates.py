@@ -0,0 +1,172 @@
+"""
+Prueba de estrés de la actualización de saldos (TransactionService)
+
+No es un test automatizado. Varios hilos, cada uno con su propia conexión,
+crean transferencias opuestas entre las mismas dos cuentas (A -> B y B -> A) y
+aplican los saldos con TransactionService.handle_transaction_creation. Al
+final comprueba que no se perdió ninguna actualización (el saldo final es el
+esperado) y que ningún hilo terminó en error (deadlock o reintentos agotados).
+
+Con los settings de testing (SQLite en memoria) la prueba usa un archivo SQLite
+temporal, porque la base en memoria compartida no espera a los bloqueos de otras
+conexiones. Con otro DJANGO_ENV usa la base configurada (p. ej. PostgreSQL
+local), donde el bloqueo en orden de pk evita los deadlocks entre
+transferencias opuestas.
+
+Uso:
+    DJANGO_ENV=testing python scripts/stress_balance_updates.py [hilos transferencias_por_hilo]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from pathlib import Path
+
+import benchmark_support  # configura Django
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections
+
+from accounts.models import Account
+from transactions.models import Transaction
+from transactions.services import TransactionService
+
+DEFAULT_THREADS = 8
+DEFAULT_TRANSFERS = 25
+INITIAL_BALANCE = Decimal("1000000.00")
+# Centavos por transferencia en cada sentido (montos distintos para detectar pérdidas)
+FORWARD_CENTS = 100
+BACKWARD_CENTS = 300
+
+
+class RetryCounter(logging.Handler):
+    """Cuenta los reintentos que registra retry_on_lock_conflict"""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        if "Conflicto de bloqueo" in record.getMessage():
+            self.count += 1
+
+
+def use_file_database():
+    """Cambia la base en memoria por un archivo SQLite temporal (antes de conectarse)"""
+    db_name = str(settings.DATABASES["default"].get("NAME", ""))
+    if db_name not in {":memory:", ""} and "mode=memory" not in db_name:
+        return None
+
+    handle, path = tempfile.mkstemp(suffix=".sqlite3", prefix="stress_balances_")
+    os.close(handle)
+    connections.close_all()
+    connections.settings["default"]["NAME"] = path
+    print(f"🗄️  SQLite en archivo: {path}")
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    return path
+
+
+def worker(user, origin, destination, amount, *, transfers, errors):
+    try:
+        for _ in range(transfers):
+            transfer = TransactionService.save_transaction(
+                lambda: Transaction.objects.create(
+                    user=user,
+                    origin_account=origin,
+                    destination_account=destination,
+                    type=TransactionService.TRANSFER,
+                    base_amount=amount,
+                    date="2025-03-01",
+                    description="Estrés de saldos",
+                )
+            )
+            TransactionService.handle_transaction_creation(transfer)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        connections.close_all()
+
+
+def main():
+    n_threads = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_THREADS
+    transfers = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_TRANSFERS
+
+    print("🏁 PRUEBA DE ESTRÉS DE SALDOS")
+    print("=" * 60)
+    path = use_file_database()
+
+    # Sin tareas de fondo ni cálculos ajenos: solo transferencias entre dos cuentas
+    logging.getLogger("transactions").setLevel(logging.WARNING)
+    retries = RetryCounter()
+    logging.getLogger("transactions.services").addHandler(retries)
+
+    setup = benchmark_support.create_benchmark_user(0)
+    user = setup["user"]
+    first, second = (
+        Account.objects.create(
+            user=user,
+            name=name,
+            account_type=Account.ASSET,
+            category=Account.BANK_ACCOUNT,
+            currency="COP",
+            current_balance=INITIAL_BALANCE,
+            gmf_exempt=True,
+        )
+        for name in ("Estrés A", "Estrés B")
+    )
+
+    errors = []
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(
+                (user, first, second, FORWARD_CENTS)
+                if i % 2 == 0
+                else (user, second, first, BACKWARD_CENTS)
+            ),
+            kwargs={"transfers": transfers, "errors": errors},
+        )
+        for i in range(n_threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    forward = (n_threads + 1) // 2 * transfers
+    backward = n_threads // 2 * transfers
+    net = Decimal(backward * BACKWARD_CENTS - forward * FORWARD_CENTS) / 100
+    first.refresh_from_db()
+    second.refresh_from_db()
+
+    print(f"   {n_threads} hilos x {transfers} transferencias ({forward + backward} en total)")
+    print(f"   Tiempo:      {elapsed:>9.2f} s")
+    print(f"   Reintentos:  {retries.count:>9}")
+    print(f"   Errores:     {len(errors):>9}")
+    print(f"   Cuenta A:    {first.current_balance:>12} (esperado {INITIAL_BALANCE + net})")
+    print(f"   Cuenta B:    {second.current_balance:>12} (esperado {INITIAL_BALANCE - net})")
+    for error in errors[:5]:
+        print(f"   ❌ {type(error).__name__}: {error}")
+
+    ok = (
+        not errors
+        and first.current_balance == INITIAL_BALANCE + net
+        and second.current_balance == INITIAL_BALANCE - net
+    )
+    print("✅ Sin actualizaciones perdidas ni deadlocks" if ok else "❌ Saldos inconsistentes")
+
+    benchmark_support.cleanup_benchmark_user()
+    if path:
+        connections.close_all()
+        Path(path).unlink()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,10 @@ from datetime import date
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
 
 from accounts.models import Account
 from accounts.services import AccountService
@@ -197,3 +200,108 @@ class CreditCardDetailsCalculationTests(TestCase):
         assert (
             details["total_paid"] == expected_total_paid
         ), f"total_paid debería ser {expected_total_paid} pesos (500 + 300 sin GMF), pero es {details['total_paid']} pesos."
+
+
+class CreditCardDetailsBatchTests(TestCase):
+    """Detalles de todas las tarjetas en una consulta agrupada (listado y resumen)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55502201",
+            username="cardsbatch",
+            email="cardsbatch@example.com",
+            password="testpass123",
+        )
+        self.bank = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type=Account.ASSET,
+            category=Account.BANK_ACCOUNT,
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+            gmf_exempt=True,
+        )
+
+    def _card(self, name, debt):
+        return Account.objects.create(
+            user=self.user,
+            name=name,
+            account_type=Account.LIABILITY,
+            category=Account.CREDIT_CARD,
+            current_balance=-debt,
+            currency="COP",
+            credit_limit=Decimal("1000000.00"),
+        )
+
+    def _pay(self, card, amount, capital=None):
+        Transaction.objects.create(
+            user=self.user,
+            origin_account=self.bank,
+            destination_account=card,
+            type=TransactionService.TRANSFER,
+            base_amount=amount,
+            capital_amount=capital,
+            date=date(2025, 3, 1),
+        )
+
+    def test_map_matches_per_card_details_in_one_query(self):
+        first = self._card("TC 1", Decimal("400000.00"))
+        second = self._card("TC 2", Decimal("100000.00"))
+        self._pay(first, 5000000, capital=4000000)
+        self._pay(first, 1000000)
+        self._pay(second, 2000000)
+        Transaction.objects.create(
+            user=self.user,
+            origin_account=second,
+            type=TransactionService.INCOME,
+            base_amount=300000,
+            date=date(2025, 3, 2),
+        )
+
+        with self.assertNumQueries(1):
+            details = AccountService.get_credit_card_details_map([self.bank, first, second])
+
+        assert set(details) == {first.pk, second.pk}
+        assert details[first.pk]["total_paid"] == Decimal("60000.00")
+        assert details[second.pk]["total_paid"] == Decimal("23000.00")
+        assert details[second.pk]["utilization_percentage"] == 10.0
+        for card in (first, second):
+            assert AccountService.get_credit_card_details(card) == details[card.pk]
+
+    def test_summary_uses_absolute_balance_of_every_card(self):
+        """El resumen suma el valor absoluto del saldo de cada tarjeta, también si es positivo"""
+        self._card("TC 1", Decimal("400000.00"))
+        self._card("TC 2", Decimal("-50000.00"))
+
+        with self.assertNumQueries(1):
+            summary = AccountService.get_credit_cards_summary(self.user)
+
+        assert summary == {
+            "cards_count": 2,
+            "total_credit_limit": Decimal("2000000.00"),
+            "total_used_credit": Decimal("450000.00"),
+            "available_credit": Decimal("1550000.00"),
+            "utilization_percentage": 22.5,
+        }
+
+    def test_account_list_queries_do_not_grow_with_cards(self):
+        token = Token.objects.create(user=self.user)
+        auth = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+        client = Client()
+
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get("/api/accounts/", **auth)
+            assert response.status_code == 200
+            return len(ctx.captured_queries)
+
+        self._pay(self._card("TC 1", Decimal("1000.00")), 100000)
+        baseline = list_queries()
+        for index in range(2, 6):
+            self._pay(self._card(f"TC {index}", Decimal("1000.00")), 100000)
+        assert list_queries() == baseline
+
+        cards = client.get("/api/accounts/", **auth).json()
+        details = [a["credit_card_details"] for a in cards if a["category"] == "credit_card"]
+        assert len(details) == 5
+        assert all(Decimal(str(d["total_paid"])) == Decimal("1000.00") for d in details)
@@ -0,0 +1,208 @@
+"""
+Tests para la conciliación de saldos de cuentas (AccountReconciliationService)
+"""
+
+import io
+import json
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import Account
+from accounts.reconciliation import AccountReconciliationService
+from accounts.services import AccountService
+from transactions.models import Transaction
+from transactions.services import TransactionService
+
+User = get_user_model()
+
+
+def _create_user(index):
+    return User.objects.create_user(
+        identification=f"5550202{index}",
+        username=f"reconcile{index}",
+        email=f"reconcile{index}@example.com",
+        password="testpass123",
+    )
+
+
+def _create_account(user, name, **kwargs):
+    defaults = {
+        "account_type": "asset",
+        "category": "bank_account",
+        "current_balance": Decimal("1000000.00"),
+        "currency": "COP",
+        "gmf_exempt": True,
+    }
+    defaults.update(kwargs)
+    return Account.objects.create(user=user, name=name, **defaults)
+
+
+class AccountReconciliationTests(TestCase):
+    """Saldo esperado = apertura + efecto de transacciones, con una consulta por usuario"""
+
+    def setUp(self):
+        self.user = _create_user(0)
+        self.bank = _create_account(self.user, "Banco")
+        self.card = _create_account(
+            self.user,
+            "Tarjeta",
+            account_type="liability",
+            category="credit_card",
+            current_balance=Decimal("-500000.00"),
+        )
+
+    def _record(self, **kwargs):
+        transaction = Transaction.objects.create(user=self.user, date="2025-03-01", **kwargs)
+        TransactionService.handle_transaction_creation(transaction)
+        return transaction
+
+    def test_service_balances_match_expected_and_direct_edits_are_drift(self):
+        self._record(origin_account=self.bank, type=1, base_amount=20000000)
+        self._record(origin_account=self.bank, type=2, base_amount=3500000)
+        # Pago a tarjeta: solo el capital reduce la deuda
+        self._record(
+            origin_account=self.bank,
+            destination_account=self.card,
+            type=3,
+            base_amount=10000000,
+            capital_amount=8000000,
+        )
+        payment = self._record(
+            origin_account=self.bank,
+            destination_account=self.card,
+            type=3,
+            base_amount=5000000,
+        )
+        TransactionService.handle_transaction_deletion(payment)
+        payment.delete()
+
+        effects, _ = AccountReconciliationService.transaction_effects(self.user.id)
+        assert effects == {self.bank.pk: Decimal("65000.00"), self.card.pk: Decimal("80000.00")}
+        result = AccountReconciliationService.reconcile_user(self.user.id, settle_seconds=0)
+        assert result == {"drift": [], "unanchored": [], "busy": []}
+
+        # Un ajuste manual mueve el ancla: no es una diferencia
+        AccountService.update_account_balance(self.bank, Decimal("2000000.00"))
+        Account.objects.filter(pk=self.card.pk).update(current_balance=Decimal("-1.00"))
+
+        result = AccountReconciliationService.reconcile_user(self.user.id, settle_seconds=0)
+        assert [entry["account_id"] for entry in result["drift"]] == [self.card.pk]
+        assert result["drift"][0]["expected"] == Decimal("-420000.00")
+        assert result["drift"][0]["fixed"] is False
+        self.card.refresh_from_db()
+        assert self.card.current_balance == Decimal("-1.00")
+
+        # Con actividad reciente se reporta pero no se corrige
+        result = AccountReconciliationService.reconcile_user(self.user.id, fix=True)
+        assert result["busy"] == [self.card.pk]
+        self.card.refresh_from_db()
+        assert self.card.current_balance == Decimal("-1.00")
+
+        result = AccountReconciliationService.reconcile_user(
+            self.user.id, fix=True, settle_seconds=0
+        )
+        assert result["drift"][0]["fixed"] is True
+        self.card.refresh_from_db()
+        assert self.card.current_balance == Decimal("-420000.00")
+
+    def test_accounts_without_opening_balance_are_reported_not_anchored_by_fix(self):
+        self._record(origin_account=self.bank, type=2, base_amount=1000000)
+        Account.objects.filter(pk=self.bank.pk).update(
+            opening_balance=None, current_balance=Decimal("500000.00")
+        )
+
+        # fix no convierte el saldo (posiblemente descuadrado) en el ancla
+        result = AccountReconciliationService.reconcile_user(
+            self.user.id, fix=True, settle_seconds=0
+        )
+        assert result["unanchored"] == [self.bank.pk]
+        assert result["drift"] == []
+        self.bank.refresh_from_db()
+        assert self.bank.opening_balance is None
+
+        out = io.StringIO()
+        call_command("reconcile_account_balances", user_id=self.user.id, stdout=out)
+        assert f"cuenta {self.bank.pk}: sin saldo de apertura (sin conciliar)" in out.getvalue()
+        self.bank.refresh_from_db()
+        assert self.bank.opening_balance is None
+
+        # Solo se ancla cuando se pide de forma explícita
+        result = AccountReconciliationService.reconcile_user(
+            self.user.id, settle_seconds=0, anchor=True
+        )
+        assert result["unanchored"] == [self.bank.pk]
+        self.bank.refresh_from_db()
+        assert self.bank.opening_balance == Decimal("510000.00")
+        assert self.bank.current_balance == Decimal("500000.00")
+        result = AccountReconciliationService.reconcile_user(self.user.id, settle_seconds=0)
+        assert result == {"drift": [], "unanchored": [], "busy": []}
+
+
+class ReconcileAllTests(TestCase):
+    """Recorrido por usuarios en orden de ID, en paralelo y reanudable"""
+
+    def setUp(self):
+        self.users = [_create_user(index) for index in range(1, 4)]
+        self.accounts = [_create_account(user, "Banco") for user in self.users]
+        Account.objects.filter(pk__in=[self.accounts[0].pk, self.accounts[2].pk]).update(
+            current_balance=Decimal("7.00")
+        )
+
+    def test_progress_watermark_allows_resuming(self):
+        progress = []
+        drifted = []
+        summary = AccountReconciliationService.reconcile_all(
+            [user.id for user in self.users[:2]],
+            settle_seconds=0,
+            on_progress=progress.append,
+            on_drift=lambda user_id, _result: drifted.append(user_id),
+        )
+        assert summary["users"] == 2
+        assert summary["accounts_drifted"] == 1
+        assert summary["fixed"] == 0
+        assert drifted == [self.users[0].id]
+        assert progress[-1] == summary["last_user_id"] == self.users[1].id
+
+        summary = AccountReconciliationService.reconcile_all(
+            [user.id for user in self.users],
+            fix=True,
+            after_user_id=progress[-1],
+            settle_seconds=0,
+        )
+        assert summary["users"] == 1
+        assert summary["fixed"] == 1
+        self.accounts[2].refresh_from_db()
+        assert self.accounts[2].current_balance == Decimal("1000000.00")
+
+    def test_command_reports_drift_and_writes_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = Path(directory) / "reconcile.json"
+            out = io.StringIO()
+            call_command(
+                "reconcile_account_balances",
+                all_users=True,
+                dry_run=True,
+                checkpoint=str(checkpoint),
+                settle_seconds=0,
+                stdout=out,
+            )
+            output = out.getvalue()
+            assert "Cuentas con diferencias: 2" in output
+            assert "Saldos corregidos: 0" in output
+            assert f"cuenta {self.accounts[0].pk}" in output
+            assert json.loads(checkpoint.read_text()) == {"last_user_id": self.users[-1].id}
+
+            out = io.StringIO()
+            call_command(
+                "reconcile_account_balances",
+                all_users=True,
+                checkpoint=str(checkpoint),
+                resume=True,
+                stdout=out,
+            )
+            assert "Usuarios procesados: 0" in out.getvalue()
@@ -0,0 +1,219 @@
+"""
+Tests para los saldos diarios de cuentas y la serie de patrimonio neto
+(AccountSnapshotService)
+"""
+
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account, AccountBalanceSnapshot
+from accounts.services import AccountService
+from accounts.snapshots import AccountSnapshotService
+from transactions.models import Transaction
+from transactions.services import TransactionService
+from utils.models import ExchangeRate
+
+User = get_user_model()
+
+
+class AccountSnapshotTests(TestCase):
+    """Días guardados + delta acotado, mantenidos por las escrituras de saldo"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55502101",
+            username="snapshots",
+            email="snapshots@example.com",
+            password="testpass123",
+        )
+        self.bank = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+            gmf_exempt=True,
+        )
+        self.dollars = Account.objects.create(
+            user=self.user,
+            name="Dólares",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("0.00"),
+            currency="USD",
+            gmf_exempt=True,
+        )
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=3, rate=Decimal("4000")
+        )
+        self._record(origin_account=self.bank, type=1, base_amount=50000000, date="2025-03-01")
+        self._record(origin_account=self.bank, type=2, base_amount=10000000, date="2025-03-05")
+        self._record(origin_account=self.dollars, type=1, base_amount=10000, date="2025-03-03")
+
+    def _record(self, **kwargs):
+        transaction = Transaction.objects.create(user=self.user, **kwargs)
+        TransactionService.handle_transaction_creation(transaction)
+        return transaction
+
+    def _build(self, until=date(2025, 3, 10)):
+        return AccountSnapshotService.build_for_user(self.user.id, until=until, settle_seconds=0)
+
+    def _stored(self, account, day):
+        return AccountBalanceSnapshot.objects.get(account=account, date=day).balance
+
+    def test_build_is_incremental_and_writes_shift_later_days(self):
+        assert self._build()["created"] == 10 + 8
+        assert self._stored(self.bank, date(2025, 3, 1)) == Decimal("1500000.00")
+        assert self._stored(self.bank, date(2025, 3, 10)) == Decimal("1400000.00")
+        assert self._stored(self.dollars, date(2025, 3, 3)) == Decimal("100.00")
+        assert not AccountBalanceSnapshot.objects.filter(
+            account=self.dollars, date__lt=date(2025, 3, 3)
+        ).exists()
+        assert self._build()["created"] == 0
+        assert self._build(until=date(2025, 3, 12))["created"] == 4
+
+        # Transacción con fecha pasada: desplaza solo los días desde su fecha
+        expense = self._record(
+            origin_account=self.bank, type=2, base_amount=2000000, date="2025-03-04"
+        )
+        assert self._stored(self.bank, date(2025, 3, 3)) == Decimal("1500000.00")
+        assert self._stored(self.bank, date(2025, 3, 4)) == Decimal("1480000.00")
+        assert self._stored(self.bank, date(2025, 3, 12)) == Decimal("1380000.00")
+
+        TransactionService.handle_transaction_deletion(expense)
+        expense.delete()
+        assert self._stored(self.bank, date(2025, 3, 12)) == Decimal("1400000.00")
+
+        # Un ajuste manual mueve el ancla y todos los días de la cuenta (también los pasados)
+        before = AccountSnapshotService.net_worth_series(
+            self.user, date(2025, 3, 1), date(2025, 3, 2), "day"
+        )
+        AccountService.update_account_balance(self.bank, Decimal("1400100.00"))
+        assert self._stored(self.bank, date(2025, 3, 1)) == Decimal("1500100.00")
+        after = AccountSnapshotService.net_worth_series(
+            self.user, date(2025, 3, 1), date(2025, 3, 2), "day"
+        )
+        assert [
+            point["net_worth"] - old["net_worth"]
+            for old, point in zip(before["points"], after["points"], strict=True)
+        ] == [Decimal("100.00"), Decimal("100.00")]
+
+        # El último día guardado coincide con un recálculo completo
+        rebuilt = AccountSnapshotService.build_for_user(
+            self.user.id, until=date(2025, 3, 12), settle_seconds=0, rebuild=True
+        )
+        assert rebuilt["created"] == 12 + 10
+        assert self._stored(self.bank, date(2025, 3, 12)) == Decimal("1400100.00")
+
+    def test_balance_as_of_uses_nearest_day_plus_bounded_delta(self):
+        # Sin días guardados: desde el saldo de apertura
+        balances = AccountSnapshotService.balances_as_of([self.bank], date(2025, 3, 4))
+        assert balances == {self.bank.pk: (Decimal("1500000.00"), None)}
+
+        self._build(until=date(2025, 3, 3))
+        self._record(origin_account=self.bank, type=2, base_amount=500000, date="2025-03-20")
+
+        with CaptureQueriesContext(connection) as ctx:
+            balances = AccountSnapshotService.balances_as_of(
+                [self.bank, self.dollars], date(2025, 3, 31)
+            )
+        assert len(ctx.captured_queries) == 2
+        assert balances[self.bank.pk] == (Decimal("1395000.00"), date(2025, 3, 3))
+        assert balances[self.dollars.pk] == (Decimal("100.00"), date(2025, 3, 3))
+        assert '"date" > ' in ctx.captured_queries[1]["sql"]
+
+        # Antes de su primer día la cuenta no existía
+        assert AccountSnapshotService.balances_as_of([self.dollars], date(2025, 2, 1)) == {}
+
+    def test_unbuilt_accounts_read_only_the_bounded_range(self):
+        with CaptureQueriesContext(connection) as ctx:
+            balances = AccountSnapshotService.balances_as_of([self.bank], date(2025, 3, 4))
+        assert balances == {self.bank.pk: (Decimal("1500000.00"), None)}
+        assert '"date" <= ' in ctx.captured_queries[-1]["sql"]
+
+        # Sin ancla: solo la cola posterior a la fecha
+        Account.objects.filter(pk=self.bank.pk).update(opening_balance=None)
+        self.bank.refresh_from_db()
+        with CaptureQueriesContext(connection) as ctx:
+            balances = AccountSnapshotService.balances_as_of([self.bank], date(2025, 3, 4))
+        assert balances == {self.bank.pk: (Decimal("1500000.00"), None)}
+        assert any('"date" > ' in q["sql"] for q in ctx.captured_queries)
+
+        # La serie lee las transacciones de las cuentas sin construir una sola vez
+        with CaptureQueriesContext(connection) as ctx:
+            series = AccountSnapshotService.net_worth_series(
+                self.user, date(2025, 3, 1), date(2025, 3, 31), "day"
+            )
+        transaction_queries = [
+            q for q in ctx.captured_queries if 'FROM "transactions_transaction"' in q["sql"]
+        ]
+        assert len(transaction_queries) <= 3
+        assert series["points"][-1]["net_worth"] == Decimal("1800000.00")
+
+    def test_net_worth_series_converts_to_base_currency(self):
+        self._build(until=date(2025, 3, 10))
+        series = AccountSnapshotService.net_worth_series(
+            self.user, date(2025, 2, 25), date(2025, 3, 14), "week"
+        )
+        assert series["currency"] == "COP"
+        assert [point["date"] for point in series["points"]] == [
+            date(2025, 3, 2),
+            date(2025, 3, 9),
+            date(2025, 3, 14),
+        ]
+        assert [point["net_worth"] for point in series["points"]] == [
+            Decimal("1500000.00"),
+            Decimal("1800000.00"),
+            Decimal("1800000.00"),
+        ]
+        # La cuenta en dólares empieza el 3 de marzo: no cuenta en el primer punto
+        assert series["warnings"] == []
+
+        with self.assertRaises(ValueError):
+            AccountSnapshotService.series_points(date(2025, 1, 1), date(2026, 6, 1), "day")
+
+    def test_endpoints_and_command(self):
+        client = Client()
+        auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+        out = io.StringIO()
+        call_command(
+            "build_account_snapshots",
+            user_id=self.user.id,
+            until="2025-03-10",
+            settle_seconds=0,
+            stdout=out,
+        )
+        assert "Saldos diarios creados: 18" in out.getvalue()
+
+        url = f"/api/accounts/{self.bank.id}/balance_as_of/"
+        assert client.get(url, **auth).status_code == 400
+        response = client.get(url, {"date": "2025-03-04"}, **auth)
+        assert response.status_code == 200
+        assert response.json()["snapshot_date"] == "2025-03-04"
+        assert Decimal(str(response.json()["balance"])) == Decimal("1500000.00")
+
+        response = client.get(
+            "/api/accounts/net_worth_series/",
+            {"start_date": "2025-03-01", "end_date": "2025-03-31", "interval": "month"},
+            **auth,
+        )
+        assert response.status_code == 200
+        assert len(response.json()["points"]) == 1
+        bad = client.get("/api/accounts/net_worth_series/", {"interval": "year"}, **auth)
+        assert bad.status_code == 400
+
+        # Parámetros por defecto: un año hacia atrás sin pasar el máximo de puntos
+        for interval, expected_points in (("day", 366), ("week", None), ("month", 13)):
+            response = client.get("/api/accounts/net_worth_series/", {"interval": interval}, **auth)
+            assert response.status_code == 200
+            if expected_points:
+                assert len(response.json()["points"]) == expected_points
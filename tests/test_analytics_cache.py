@@ -0,0 +1,162 @@
+"""
+Tests para la caché versionada de analytics (AnalyticsCache)
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from analytics.cache import AnalyticsCache
+from analytics.services import FinancialAnalyticsService
+from categories.models import Category
+from transactions.models import Transaction
+from utils.models import BaseCurrencySetting, ExchangeRate
+
+User = get_user_model()
+
+
+@override_settings(ANALYTICS_CACHE_TIMEOUT=300)
+class AnalyticsCacheTests(TestCase):
+    """Aciertos, invalidación por versión de datos y contadores"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            identification="55500066",
+            username="cacheuser",
+            email="cache@example.com",
+            password="testpass123",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth_headers = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Cuenta cache",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+        )
+        self.category = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        self._create_expense(1000)
+
+    def _create_expense(self, amount):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=self.account,
+            category=self.category,
+            type=2,
+            base_amount=amount,
+            date=date(2025, 3, 10),
+        )
+
+    def _indicators(self):
+        response = self.client.get(
+            "/api/analytics/indicators/?period=2025-03&mode=base", **self.auth_headers
+        )
+        assert response.status_code == 200
+        return response.json()["data"]
+
+    def test_repeated_requests_hit_the_cache(self):
+        """La segunda petición idéntica no recalcula"""
+        with patch.object(
+            FinancialAnalyticsService,
+            "get_period_indicators",
+            wraps=FinancialAnalyticsService.get_period_indicators,
+        ) as spy:
+            first = self._indicators()
+            second = self._indicators()
+
+        assert spy.call_count == 1
+        assert first == second
+        stats = AnalyticsCache.stats()["period_indicators"]
+        assert stats == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_writes_bump_the_data_version(self):
+        """Transacciones, categorías, moneda base y tasas invalidan los resultados"""
+        assert self._indicators()["expenses"]["amount"] == 1000
+
+        self._create_expense(500)
+        assert self._indicators()["expenses"]["amount"] == 1500
+
+        version = AnalyticsCache.data_version(self.user.id)
+        self.category.color = "#111111"
+        self.category.save()
+        assert AnalyticsCache.data_version(self.user.id) != version
+
+        version = AnalyticsCache.data_version(self.user.id)
+        BaseCurrencySetting.objects.create(user=self.user, base_currency="USD")
+        assert AnalyticsCache.data_version(self.user.id) != version
+
+        version = AnalyticsCache.data_version(self.user.id)
+        ExchangeRate.objects.create(
+            base_currency="USD", currency="COP", year=2025, month=1, rate=Decimal("0.00025")
+        )
+        assert AnalyticsCache.data_version(self.user.id) != version
+
+    def test_other_users_are_not_invalidated(self):
+        """Escribir en los datos de un usuario no cambia la versión de otro"""
+        other = User.objects.create_user(
+            identification="55500067",
+            username="cacheother",
+            email="cacheother@example.com",
+            password="testpass123",
+        )
+        version = AnalyticsCache.data_version(other.id)
+        self._create_expense(10)
+        assert AnalyticsCache.data_version(other.id) == version
+
+    def test_key_includes_params_and_base_currency(self):
+        """Modos y períodos distintos usan entradas distintas"""
+        base_key = AnalyticsCache.build_key(self.user, "period_indicators", {"mode": "base"})
+        total_key = AnalyticsCache.build_key(self.user, "period_indicators", {"mode": "total"})
+        assert base_key != total_key
+        assert ":COP:" in base_key
+
+    @override_settings(ANALYTICS_CACHE_TIMEOUT=0)
+    def test_timeout_zero_disables_cache(self):
+        """Con timeout 0 siempre se recalcula"""
+        calls = []
+        for _ in range(2):
+            AnalyticsCache.get_or_compute(
+                self.user, "period_indicators", {}, lambda: calls.append(1)
+            )
+        assert len(calls) == 2
+        assert AnalyticsCache.stats()["total"]["hits"] == 0
+
+    def test_stats_endpoint_requires_admin(self):
+        """Solo los administradores ven los contadores"""
+        response = self.client.get("/api/analytics/cache-stats/", **self.auth_headers)
+        assert response.status_code == 403
+
+        admin = User.objects.create_user(
+            identification="55500068",
+            username="cacheadmin",
+            email="cacheadmin@example.com",
+            password="adminpass123",
+            is_verified=True,
+            role="admin",
+        )
+        admin_token = Token.objects.create(user=admin)
+        self._indicators()
+        admin_auth = {"HTTP_AUTHORIZATION": f"Token {admin_token.key}"}
+        # GET solo lee, aunque reciba ?reset=true; el reinicio es un POST
+        response = self.client.get("/api/analytics/cache-stats/?reset=true", **admin_auth)
+        assert response.status_code == 200
+        assert response.json()["data"]["endpoints"]["period_indicators"]["misses"] == 1
+        assert AnalyticsCache.stats()["total"]["misses"] == 1
+
+        response = self.client.post("/api/analytics/cache-stats/", **admin_auth)
+        assert response.status_code == 200
+        assert response.json()["data"]["endpoints"]["period_indicators"]["misses"] == 1
+        assert AnalyticsCache.stats()["total"]["misses"] == 0
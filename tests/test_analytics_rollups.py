@@ -0,0 +1,283 @@
+"""
+Tests para el resumen mensual de analytics (MonthlyCategorySummary)
+"""
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from accounts.models import Account
+from analytics.models import MonthlyCategorySummary
+from analytics.rollups import MonthlySummaryService
+from analytics.services import FinancialAnalyticsService
+from categories.models import Category
+from transactions.models import Transaction
+from utils.models import ExchangeRate
+
+User = get_user_model()
+
+
+def summary_snapshot(user):
+    """Filas de resumen con datos (sin filas que quedaron en cero)"""
+    return sorted(
+        MonthlyCategorySummary.objects.filter(user=user, count__gt=0).values_list(
+            "year",
+            "month",
+            "type",
+            "category_id",
+            "currency",
+            "base_amount",
+            "total_amount",
+            "count",
+        ),
+        key=str,
+    )
+
+
+class MonthlySummaryMaintenanceTests(TestCase):
+    """El resumen se mantiene igual a una reconstrucción completa"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500044",
+            username="rollupuser",
+            email="rollup@example.com",
+            password="testpass123",
+        )
+        self.cop = Account.objects.create(
+            user=self.user,
+            name="Cuenta COP",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+        )
+        self.usd = Account.objects.create(
+            user=self.user,
+            name="Cuenta USD",
+            account_type="asset",
+            category="wallet",
+            current_balance=Decimal("1000.00"),
+            currency="USD",
+        )
+        self.food = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        self.transport = Category.objects.create(
+            user=self.user, name="Transporte", type="expense", color="#EA580C", icon="fa-car"
+        )
+
+    def _assert_matches_rebuild(self):
+        incremental = summary_snapshot(self.user)
+        MonthlySummaryService.rebuild_for_user(self.user)
+        assert incremental == summary_snapshot(self.user)
+
+    def test_create_update_and_delete(self):
+        """Altas, ediciones (monto, fecha, categoría, cuenta) y borrados"""
+        first = Transaction.objects.create(
+            user=self.user,
+            origin_account=self.cop,
+            category=self.food,
+            type=2,
+            base_amount=10000,
+            tax_percentage=19,
+            date=date(2025, 1, 15),
+        )
+        second = Transaction.objects.create(
+            user=self.user,
+            origin_account=self.usd,
+            category=self.transport,
+            type=2,
+            base_amount=500,
+            date=date(2025, 1, 20),
+        )
+        Transaction.objects.create(
+            user=self.user, origin_account=self.cop, type=1, base_amount=90000, date="2025-02-01"
+        )
+
+        row = MonthlyCategorySummary.objects.get(
+            user=self.user, year=2025, month=1, type=2, category=self.food, currency="COP"
+        )
+        assert row.count == 1
+        assert row.total_amount == first.total_amount
+        self._assert_matches_rebuild()
+
+        first.base_amount = 20000
+        first.date = date(2025, 2, 3)
+        first.save()
+        self._assert_matches_rebuild()
+
+        second.category = self.food
+        second.origin_account = self.cop
+        second.transaction_currency = "USD"
+        second.save()
+        self._assert_matches_rebuild()
+
+        first.delete()
+        self._assert_matches_rebuild()
+        assert not MonthlyCategorySummary.objects.filter(
+            user=self.user, year=2025, month=2, type=2, count__gt=0
+        ).exists()
+
+    def test_category_deletion_keeps_totals(self):
+        """Al borrar una categoría los montos pasan a 'sin categoría' en ambos lados"""
+        for day in (1, 2):
+            Transaction.objects.create(
+                user=self.user,
+                origin_account=self.cop,
+                category=self.food,
+                type=2,
+                base_amount=1000 * day,
+                date=date(2025, 3, day),
+            )
+        Transaction.objects.create(
+            user=self.user, origin_account=self.cop, type=2, base_amount=700, date=date(2025, 3, 5)
+        )
+        self.food.delete()
+
+        # Nuevas transacciones sin categoría tras el borrado
+        Transaction.objects.create(
+            user=self.user, origin_account=self.cop, type=2, base_amount=300, date=date(2025, 3, 6)
+        )
+        uncategorized = MonthlyCategorySummary.objects.filter(
+            user=self.user, year=2025, month=3, category__isnull=True
+        )
+        assert sum(row.count for row in uncategorized) == 4
+        assert sum(row.base_amount for row in uncategorized) == 4000
+
+    def test_rebuild_command(self):
+        """El comando reconstruye el resumen de filas creadas sin señales"""
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user=self.user,
+                    origin_account=self.cop,
+                    category=self.food,
+                    type=2,
+                    base_amount=100,
+                    taxed_amount=0,
+                    gmf_amount=0,
+                    total_amount=100,
+                    date=date(2025, 4, day),
+                )
+                for day in range(1, 6)
+            ]
+        )
+        assert not MonthlyCategorySummary.objects.filter(user=self.user).exists()
+
+        out = StringIO()
+        call_command("rebuild_monthly_summaries", user_id=self.user.id, stdout=out)
+
+        row = MonthlyCategorySummary.objects.get(user=self.user)
+        assert (row.count, row.total_amount) == (5, 500)
+        assert "Usuarios procesados: 1" in out.getvalue()
+
+
+class MonthlySummaryReadTests(TestCase):
+    """Los períodos alineados a meses leen el resumen con el mismo resultado"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500055",
+            username="rollupreader",
+            email="rollupreader@example.com",
+            password="testpass123",
+        )
+        accounts = [
+            Account.objects.create(
+                user=self.user,
+                name=f"Cuenta {currency}",
+                account_type="asset",
+                category="wallet",
+                current_balance=Decimal("1000000.00"),
+                currency=currency,
+            )
+            for currency in ("COP", "USD")
+        ]
+        categories = [
+            Category.objects.create(
+                user=self.user, name=f"Gasto {i}", type="expense", color="#DC2626", icon="fa-car"
+            )
+            for i in range(3)
+        ]
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=1, rate=Decimal("4000.123457")
+        )
+
+        for i in range(90):
+            account = accounts[i % 2]
+            Transaction.objects.create(
+                user=self.user,
+                origin_account=account,
+                category=categories[i % 4] if i % 4 < 3 else None,
+                type=1 if i % 5 == 0 else 2,
+                base_amount=1000 + i * 37,
+                tax_percentage=19 if i % 3 == 0 else None,
+                transaction_currency=account.currency if i % 6 == 0 else None,
+                date=date(2025, 1 + i % 4, 1 + i % 28),
+            )
+
+    def test_split_month_aligned(self):
+        """Rangos con y sin meses completos"""
+        split = FinancialAnalyticsService._split_month_aligned
+        assert split(date(2025, 1, 1), date(2025, 3, 31)) == (((2025, 1), (2025, 3)), [])
+        assert split(date(2025, 1, 15), date(2025, 4, 10)) == (
+            ((2025, 2), (2025, 3)),
+            [(date(2025, 1, 15), date(2025, 1, 31)), (date(2025, 4, 1), date(2025, 4, 10))],
+        )
+        assert split(date(2025, 2, 2), date(2025, 2, 27)) == (
+            None,
+            [(date(2025, 2, 2), date(2025, 2, 27))],
+        )
+
+    def test_results_match_raw_aggregation(self):
+        """Indicadores y gastos por categoría idénticos con y sin resumen"""
+        ranges = [
+            (date(2025, 1, 1), date(2025, 4, 30)),
+            (date(2025, 1, 10), date(2025, 3, 31)),
+            (date(2025, 2, 1), date(2025, 4, 12)),
+        ]
+        for start, end in ranges:
+            for mode in ("base", "total"):
+                with_summary = (
+                    FinancialAnalyticsService.get_period_indicators(self.user, start, end, mode),
+                    FinancialAnalyticsService.get_expenses_by_category(self.user, start, end, mode),
+                )
+                with override_settings(ANALYTICS_USE_MONTHLY_SUMMARY=False):
+                    raw = (
+                        FinancialAnalyticsService.get_period_indicators(
+                            self.user, start, end, mode
+                        ),
+                        FinancialAnalyticsService.get_expenses_by_category(
+                            self.user, start, end, mode
+                        ),
+                    )
+                assert with_summary[0] == raw[0]
+                key = lambda item: str(item["category_id"])  # noqa: E731
+                for field in ("chart_data", "others_data"):
+                    assert sorted(with_summary[1].pop(field), key=key) == sorted(
+                        raw[1].pop(field), key=key
+                    )
+                assert with_summary[1] == raw[1]
+
+    def test_full_months_are_read_from_summary(self):
+        """Los meses completos no vuelven a leer las transacciones"""
+        MonthlyCategorySummary.objects.filter(user=self.user).update(total_amount=0, count=0)
+
+        result = FinancialAnalyticsService.get_period_indicators(
+            self.user, date(2025, 1, 1), date(2025, 4, 30)
+        )
+        assert result["expenses"]["count"] == 0
+
+        MonthlySummaryService.rebuild_for_user(self.user)
+        result = FinancialAnalyticsService.get_period_indicators(
+            self.user, date(2025, 1, 1), date(2025, 4, 30)
+        )
+        assert (
+            result["expenses"]["count"]
+            == Transaction.objects.filter(user=self.user, type=2).count()
+        )
@@ -0,0 +1,180 @@
+"""
+Tests para FinancialAnalyticsService: conversión de moneda en SQL vs Python
+"""
+
+import random
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from accounts.models import Account
+from analytics.services import FinancialAnalyticsService
+from categories.models import Category
+from transactions.models import Transaction
+from utils.currency_converter import FxService
+from utils.models import ExchangeRate
+
+User = get_user_model()
+
+
+class AnalyticsFxStrategyTests(TestCase):
+    """La estrategia 'sql' debe coincidir al centavo con la estrategia 'python'"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500033",
+            username="fxsqluser",
+            email="fxsql@example.com",
+            password="testpass123",
+        )
+        self.accounts = {
+            currency: Account.objects.create(
+                user=self.user,
+                name=f"Cuenta {currency}",
+                account_type="asset",
+                category="wallet",
+                current_balance=Decimal("1000000.00"),
+                currency=currency,
+            )
+            for currency in ("COP", "USD", "EUR")
+        }
+        self.categories = [
+            Category.objects.create(
+                user=self.user,
+                name=f"Gasto {i}",
+                type="expense",
+                color="#DC2626",
+                icon="fa-utensils",
+            )
+            for i in range(3)
+        ]
+
+        # USD con tasas en enero y marzo (febrero usa enero); EUR solo con tasa inversa
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=1, rate=Decimal("4000.123457")
+        )
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=3, rate=Decimal("4100.5")
+        )
+        ExchangeRate.objects.create(
+            base_currency="EUR", currency="COP", year=2024, month=12, rate=Decimal("0.000229")
+        )
+
+        rng = random.Random(3)
+        for _ in range(120):
+            currency = rng.choice(["COP", "USD", "EUR"])
+            tx_type = rng.choice([1, 2, 2])
+            Transaction.objects.create(
+                user=self.user,
+                origin_account=self.accounts[currency],
+                category=rng.choice([*self.categories, None]) if tx_type == 2 else None,
+                type=tx_type,
+                base_amount=rng.randint(1, 9_999_999),
+                tax_percentage=rng.choice([None, 19]),
+                transaction_currency=rng.choice([None, currency]),
+                date=date(2025, rng.randint(1, 3), rng.randint(1, 28)),
+            )
+
+    def _both(self, method, *args, **kwargs):
+        python_result = method(*args, fx_strategy="python", **kwargs)
+        sql_result = method(*args, fx_strategy="sql", **kwargs)
+        return python_result, sql_result
+
+    def test_period_indicators_match_for_month_periods(self):
+        """Indicadores idénticos para cada mes y en ambos modos"""
+        for month, last_day in ((1, 31), (2, 28), (3, 31)):
+            for mode in ("total", "base"):
+                python_result, sql_result = self._both(
+                    FinancialAnalyticsService.get_period_indicators,
+                    self.user,
+                    date(2025, month, 1),
+                    date(2025, month, last_day),
+                    mode,
+                )
+                assert python_result == sql_result
+
+    def test_expenses_by_category_match_for_month_periods(self):
+        """Distribución por categoría idéntica para cada mes"""
+        for month, last_day in ((1, 31), (2, 28), (3, 31)):
+            python_result, sql_result = self._both(
+                FinancialAnalyticsService.get_expenses_by_category,
+                self.user,
+                date(2025, month, 1),
+                date(2025, month, last_day),
+            )
+            key = lambda item: str(item["category_id"])  # noqa: E731
+            assert sorted(python_result.pop("chart_data"), key=key) == sorted(
+                sql_result.pop("chart_data"), key=key
+            )
+            assert sorted(python_result.pop("others_data"), key=key) == sorted(
+                sql_result.pop("others_data"), key=key
+            )
+            assert python_result == sql_result
+
+    def test_daily_flow_matches_for_multi_month_range(self):
+        """El flujo diario usa la tasa del mes de cada día en ambas estrategias"""
+        python_result, sql_result = self._both(
+            FinancialAnalyticsService.get_daily_flow_chart,
+            self.user,
+            date(2025, 1, 1),
+            date(2025, 3, 31),
+        )
+        assert python_result == sql_result
+
+    def test_strategies_use_monthly_rates_for_multi_month_ranges(self):
+        """En rangos de varios meses ambas estrategias convierten con la tasa de cada mes"""
+        expected = Decimal(0)
+        for month, last_day in ((1, 31), (2, 28), (3, 31)):
+            rows = Transaction.objects.filter(
+                user=self.user,
+                type=1,
+                date__gte=date(2025, month, 1),
+                date__lte=date(2025, month, last_day),
+            ).values_list("total_amount", "transaction_currency", "origin_account__currency")
+            per_currency = {}
+            for amount, tx_currency, account_currency in rows:
+                currency = tx_currency or account_currency
+                per_currency[currency] = per_currency.get(currency, 0) + amount
+            for currency, amount in per_currency.items():
+                converted, _, _ = FxService.convert_amount(
+                    amount, currency, "COP", date(2025, month, 1)
+                )
+                expected += Decimal(str(converted))
+
+        python_result, sql_result = self._both(
+            FinancialAnalyticsService.get_period_indicators,
+            self.user,
+            date(2025, 1, 1),
+            date(2025, 3, 31),
+        )
+        assert python_result == sql_result
+        assert Decimal(str(sql_result["income"]["amount"])) == expected
+
+    def test_strategies_match_for_ranges_with_partial_months(self):
+        """Meses completos del resumen y extremos parciales coinciden en ambas estrategias"""
+        for mode in ("total", "base"):
+            python_result, sql_result = self._both(
+                FinancialAnalyticsService.get_period_indicators,
+                self.user,
+                date(2025, 1, 15),
+                date(2025, 3, 10),
+                mode,
+            )
+            assert python_result == sql_result
+
+        python_result, sql_result = self._both(
+            FinancialAnalyticsService.get_expenses_by_category,
+            self.user,
+            date(2025, 1, 15),
+            date(2025, 3, 31),
+        )
+        key = lambda item: str(item["category_id"])  # noqa: E731
+        assert sorted(python_result.pop("chart_data"), key=key) == sorted(
+            sql_result.pop("chart_data"), key=key
+        )
+        assert sorted(python_result.pop("others_data"), key=key) == sorted(
+            sql_result.pop("others_data"), key=key
+        )
+        assert python_result == sql_result
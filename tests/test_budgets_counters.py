@@ -0,0 +1,151 @@
+"""
+Tests para los contadores incrementales de gasto (BudgetPeriodSpend)
+"""
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import Account
+from alerts.models import Alert
+from budgets.counters import BudgetSpendService
+from budgets.models import Budget, BudgetPeriodSpend
+from categories.models import Category
+from transactions.models import Transaction
+from utils.models import ExchangeRate
+
+User = get_user_model()
+
+
+class BudgetSpendCounterTests(TestCase):
+    """Los contadores siguen a las transacciones y alimentan las alertas"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500088",
+            username="spendcounter",
+            email="spendcounter@example.com",
+            password="testpass123",
+        )
+        self.cop = Account.objects.create(
+            user=self.user,
+            name="Cuenta COP",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("10000000.00"),
+            currency="COP",
+        )
+        self.usd = Account.objects.create(
+            user=self.user,
+            name="Cuenta USD",
+            account_type="asset",
+            category="wallet",
+            current_balance=Decimal("10000.00"),
+            currency="USD",
+        )
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=1, rate=Decimal("4000.5")
+        )
+        self.category = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        self.budget = Budget.objects.create(
+            user=self.user,
+            category=self.category,
+            amount=Decimal("1000.00"),
+            currency="COP",
+            period=Budget.MONTHLY,
+            start_date=date(2025, 3, 1),
+        )
+
+    def _expense(self, amount, account=None, txn_date=date(2025, 3, 10), **extra):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=account or self.cop,
+            category=self.category,
+            type=2,
+            base_amount=amount,
+            date=txn_date,
+            **extra,
+        )
+
+    def _counter(self, period_start=date(2025, 3, 1)):
+        return BudgetPeriodSpend.objects.get(budget=self.budget, period_start=period_start)
+
+    def test_counter_follows_create_update_delete(self):
+        """Altas, ediciones y borrados ajustan el contador del período"""
+        first = self._expense(10000)
+        second = self._expense(5000, tax_percentage=19)
+        self._expense(7, account=self.usd)
+        counter = self._counter()
+        assert counter.base_amount == 10000 + 5000 + 28004
+        cop_totals = Transaction.objects.filter(origin_account=self.cop).values_list(
+            "total_amount", flat=True
+        )
+        assert counter.total_amount == sum(cop_totals) + 28004
+
+        first.base_amount = 20000
+        first.save()
+        second.date = date(2025, 4, 2)
+        second.save()
+        counter = self._counter()
+        assert counter.base_amount == 20000 + 28004
+        assert self._counter(date(2025, 4, 1)).base_amount == 5000
+
+        first.delete()
+        assert self._counter().base_amount == 28004
+        assert self.budget.get_spent_amount(date(2025, 3, 15)) == Decimal("280.04")
+
+    def test_counter_is_seeded_from_existing_history(self):
+        """Un período sin fila se siembra desde las transacciones ya guardadas"""
+        self._expense(30000)
+        BudgetPeriodSpend.objects.all().delete()
+
+        self._expense(1000)
+        assert self._counter().base_amount == 31000
+
+    def test_alerts_use_counter_instead_of_rescanning(self):
+        """Cruzar el umbral crea la alerta sin recalcular el gasto del presupuesto"""
+        self._expense(50000)
+        with patch.object(Budget, "get_spent_amount", side_effect=AssertionError("rescan")):
+            self._expense(35000)
+            self._expense(1000)
+            self._expense(20000)
+
+        alert_types = sorted(
+            Alert.objects.filter(budget=self.budget).values_list("alert_type", flat=True)
+        )
+        assert alert_types == ["exceeded", "warning"]
+
+    def test_budget_edit_invalidates_counters(self):
+        """Cambiar el presupuesto descarta sus contadores para volver a sembrarlos"""
+        self._expense(10000)
+        self.budget.period = Budget.YEARLY
+        self.budget.save()
+        assert not BudgetPeriodSpend.objects.filter(budget=self.budget).exists()
+
+        self._expense(500, txn_date=date(2025, 6, 1))
+        assert self._counter(date(2025, 1, 1)).base_amount == 10500
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        """El comando reporta las diferencias y reconstruye los contadores"""
+        self._expense(10000)
+        self._expense(2500, txn_date=date(2025, 4, 5))
+        BudgetPeriodSpend.objects.filter(budget=self.budget, period_start=date(2025, 3, 1)).update(
+            base_amount=1
+        )
+
+        assert len(BudgetSpendService.reconcile_budget(self.budget, fix=False)) == 1
+        assert self._counter().base_amount == 1
+
+        out = StringIO()
+        call_command("reconcile_budget_spend", user_id=self.user.id, stdout=out)
+        assert "Períodos con diferencias: 1" in out.getvalue()
+        assert self._counter().base_amount == 10000
+        assert self._counter(date(2025, 4, 1)).base_amount == 2500
+        assert BudgetSpendService.reconcile_budget(self.budget) == []
@@ -0,0 +1,185 @@
+"""
+Tests para el cálculo agrupado del gasto de presupuestos (BudgetService.compute_spent_amounts)
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from budgets.counters import BudgetSpendService
+from budgets.models import Budget
+from budgets.services import BudgetService
+from categories.models import Category
+from transactions.models import Transaction
+from utils.models import ExchangeRate
+from utils.rate_snapshot import ExchangeRateSnapshot
+
+User = get_user_model()
+
+
+class BudgetSpentQueryTests(TestCase):
+    """El gasto se calcula una vez por request, no por campo ni por presupuesto"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            identification="55500077",
+            username="budgetspent",
+            email="budgetspent@example.com",
+            password="testpass123",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth_headers = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+
+        self.cop = Account.objects.create(
+            user=self.user,
+            name="Cuenta COP",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("10000000.00"),
+            currency="COP",
+        )
+        self.usd = Account.objects.create(
+            user=self.user,
+            name="Cuenta USD",
+            account_type="asset",
+            category="wallet",
+            current_balance=Decimal("10000.00"),
+            currency="USD",
+        )
+        today = date.today()
+        ExchangeRate.objects.create(
+            base_currency="COP",
+            currency="USD",
+            year=today.year,
+            month=1,
+            rate=Decimal("4000.5"),
+        )
+        self.categories = []
+
+    def _add_budgets(self, count):
+        today = date.today()
+        for _ in range(count):
+            index = len(self.categories)
+            category = Category.objects.create(
+                user=self.user,
+                name=f"Gasto {index}",
+                type="expense",
+                color="#DC2626",
+                icon="fa-utensils",
+            )
+            self.categories.append(category)
+            Budget.objects.create(
+                user=self.user,
+                category=category,
+                amount=Decimal("500000.00"),
+                calculation_mode=Budget.TOTAL if index % 2 else Budget.BASE,
+                period=Budget.YEARLY if index % 3 == 0 else Budget.MONTHLY,
+                currency="USD" if index % 4 == 0 else "COP",
+            )
+            for i in range(3):
+                Transaction.objects.create(
+                    user=self.user,
+                    origin_account=self.usd if i == 0 else self.cop,
+                    category=category,
+                    type=2,
+                    base_amount=10000 + index * 100 + i,
+                    tax_percentage=19 if i == 1 else None,
+                    date=today,
+                )
+
+    def _count_queries(self, url):
+        ExchangeRateSnapshot.invalidate()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, **self.auth_headers)
+        assert response.status_code == 200
+        return len(ctx.captured_queries), response.json()
+
+    def test_list_query_count_does_not_grow_with_budgets(self):
+        """Listar 2 o 12 presupuestos cuesta las mismas consultas"""
+        self._add_budgets(2)
+        small_count, _ = self._count_queries("/api/budgets/")
+
+        self._add_budgets(10)
+        large_count, data = self._count_queries("/api/budgets/")
+
+        assert data["count"] == 12
+        assert large_count == small_count
+
+    def test_detail_computes_spent_once(self):
+        """El detalle consulta las transacciones una sola vez para todos sus campos"""
+        self._add_budgets(1)
+        budget = Budget.objects.get(user=self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/budgets/{budget.id}/", **self.auth_headers)
+        assert response.status_code == 200
+        transaction_queries = [
+            q for q in ctx.captured_queries if 'FROM "transactions_transaction"' in q["sql"]
+        ]
+        assert len(transaction_queries) == 1
+
+    def test_batched_amounts_match_single_budget_path(self):
+        """El cálculo en lote coincide con calcular cada presupuesto por separado"""
+        self._add_budgets(6)
+        budgets = list(Budget.objects.filter(user=self.user).order_by("id"))
+
+        batched = BudgetService.compute_spent_amounts(budgets)
+        single = [budget.get_spent_amount() for budget in budgets]
+        assert batched == single
+        assert all(amount > 0 for amount in batched)
+
+        # Los valores precalculados se reutilizan sin consultas
+        BudgetService.prefetch_spent_amounts(budgets)
+        with CaptureQueriesContext(connection) as ctx:
+            for budget in budgets:
+                budget.get_status()
+                budget.get_projection()
+        assert len(ctx.captured_queries) == 0
+
+    def test_batched_amounts_match_spend_counters_to_the_cent(self):
+        """La conversión agrupada redondea igual que los contadores (por transacción)"""
+        category = Category.objects.create(
+            user=self.user, name="Suscripciones", type="expense", color="#DC2626"
+        )
+        budget = Budget.objects.create(
+            user=self.user,
+            category=category,
+            amount=Decimal("500000.00"),
+            calculation_mode=Budget.BASE,
+            period=Budget.MONTHLY,
+            currency="COP",
+        )
+        # 0,01 USD a 4000,5 son 40,005 COP: redondear cada uno no es redondear la suma
+        for _ in range(3):
+            Transaction.objects.create(
+                user=self.user,
+                origin_account=self.usd,
+                category=category,
+                type=2,
+                base_amount=1,
+                date=date.today(),
+            )
+
+        spent = BudgetService.compute_spent_amounts([budget])[0]
+        period_start = budget.get_period_dates(date.today())[0]
+        counter = BudgetSpendService.compute_period_totals(budget)[period_start]
+        assert spent == BudgetSpendService.spent_amount(budget, counter)
+        assert spent == Decimal("120.00")
+
+    def test_list_values_match_model_methods(self):
+        """Los campos del listado coinciden con los métodos del modelo"""
+        self._add_budgets(4)
+        _, data = self._count_queries("/api/budgets/")
+
+        for row in data["results"]:
+            budget = Budget.objects.get(pk=row["id"])
+            assert row["spent_amount"] == str(budget.get_spent_amount())
+            assert row["spent_percentage"] == str(budget.get_spent_percentage())
+            assert row["status"] == budget.get_status()
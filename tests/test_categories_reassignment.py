@@ -0,0 +1,169 @@
+"""
+Tests para la reasignación masiva al eliminar una categoría (CategoryReassignmentService)
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account
+from analytics.models import MonthlyCategorySummary
+from analytics.rollups import MonthlySummaryService
+from budgets.models import Budget, BudgetPeriodSpend
+from budgets.signals import budget_spend_changed
+from categories.models import Category
+from categories.services import CategoryService
+from rules.models import AutomaticRule
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class CategoryReassignmentTests(TestCase):
+    """Transacciones, presupuestos, reglas y resumen pasan al destino con pocas sentencias"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55502401",
+            username="reassign",
+            email="reassign@example.com",
+            password="testpass123",
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+            gmf_exempt=True,
+        )
+        self.source, self.target = (
+            Category.objects.create(
+                user=self.user, name=name, type="expense", color="#DC2626", icon="fa-utensils"
+            )
+            for name in ("Restaurantes", "Comida")
+        )
+        self.monthly_source = Budget.objects.create(
+            user=self.user,
+            category=self.source,
+            amount=Decimal("100000.00"),
+            currency="COP",
+            period=Budget.MONTHLY,
+            start_date=date(2025, 1, 1),
+        )
+        self.yearly_source = Budget.objects.create(
+            user=self.user,
+            category=self.source,
+            amount=Decimal("900000.00"),
+            currency="COP",
+            period=Budget.YEARLY,
+            start_date=date(2025, 1, 1),
+        )
+        self.monthly_target = Budget.objects.create(
+            user=self.user,
+            category=self.target,
+            amount=Decimal("250000.00"),
+            currency="COP",
+            period=Budget.MONTHLY,
+            start_date=date(2025, 1, 1),
+        )
+        self.rule = AutomaticRule.objects.create(
+            user=self.user,
+            name="Restaurantes",
+            criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword="restaurante",
+            action_type=AutomaticRule.ASSIGN_CATEGORY,
+            target_category=self.source,
+            order=1,
+        )
+        for day, amount in ((date(2025, 3, 5), 2000000), (date(2025, 4, 9), 3000000)):
+            self._expense(self.source, amount, day)
+        self._expense(self.target, 1500000, date(2025, 3, 20))
+
+    def _expense(self, category, amount, day):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=self.account,
+            category=category,
+            type=2,
+            base_amount=amount,
+            date=day,
+        )
+
+    def _summary_rows(self):
+        return set(
+            MonthlyCategorySummary.objects.filter(user=self.user).values_list(
+                "year", "month", "type", "category_id", "currency", "base_amount", "count"
+            )
+        )
+
+    def test_delete_moves_everything_and_merges_budgets(self):
+        assert BudgetPeriodSpend.objects.filter(budget=self.monthly_target).exists()
+
+        result = CategoryService.delete_category(self.source, target_category_id=self.target.pk)
+
+        assert result["reassigned_transactions"] == 2
+        assert result["reassigned_budgets"] == 2
+        assert result["merged_budgets"] == 1
+        assert result["reassigned_rules"] == 1
+        assert not Category.objects.filter(pk=self.source.pk).exists()
+        assert Transaction.objects.filter(category=self.target).count() == 3
+
+        # El mensual del origen se fusiona en el del destino; el anual solo se mueve
+        assert not Budget.objects.filter(pk=self.monthly_source.pk).exists()
+        self.monthly_target.refresh_from_db()
+        assert self.monthly_target.amount == Decimal("350000.00")
+        self.yearly_source.refresh_from_db()
+        assert self.yearly_source.category_id == self.target.pk
+        self.rule.refresh_from_db()
+        assert self.rule.target_category_id == self.target.pk
+
+        # Los contadores del destino se descartan y el resumen queda como recién reconstruido
+        assert not BudgetPeriodSpend.objects.filter(budget__category=self.target).exists()
+        rows = self._summary_rows()
+        MonthlySummaryService.rebuild_for_user(self.user)
+        assert rows == self._summary_rows()
+        assert (2025, 3, 2, self.target.pk, "COP", 3500000, 2) in rows
+
+    def test_reassignment_is_set_based_without_alert_signals(self):
+        for day in range(1, 21):
+            self._expense(self.source, 10000, date(2025, 5, day))
+        alerts = []
+
+        def on_spend_changed(**kwargs):
+            alerts.append(kwargs)
+
+        budget_spend_changed.connect(on_spend_changed)
+        try:
+            with CaptureQueriesContext(connection) as ctx:
+                result = CategoryService.delete_category(
+                    self.source, target_category_id=self.target.pk
+                )
+        finally:
+            budget_spend_changed.disconnect(on_spend_changed)
+
+        assert result["reassigned_transactions"] == 22
+        assert alerts == []
+        transaction_updates = [
+            q
+            for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "transactions_transaction"')
+        ]
+        # La única otra es el SET NULL (vacío) que Django emite al borrar la categoría
+        assert len(transaction_updates) == 2
+        assert "= 2" in transaction_updates[0]["sql"]
+        assert len(ctx.captured_queries) < 40
+
+    def test_target_must_differ_from_source(self):
+        try:
+            CategoryService.delete_category(self.source, target_category_id=self.source.pk)
+            msg = "Debería haber lanzado ValueError"
+            raise AssertionError(msg)
+        except ValueError as e:
+            assert "distinta" in str(e)
+        assert Transaction.objects.filter(category=self.source).count() == 2
@@ -3,8 +3,12 @@ Tests para servicios de categorías (categories/services.py)
 Fase 1: Aumentar cobertura de tests
 """
 
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from budgets.models import Budget
 from categories.models import Category
@@ -592,3 +596,70 @@ class CategoriesServicesTests(TestCase):
         expense_count = sum(1 for cat in created if cat.type == Category.EXPENSE)
         assert income_count > 0
         assert expense_count > 0
+
+    def test_bulk_update_order_uses_constant_queries(self):
+        """Test: Reordenar valida y escribe con un número fijo de consultas"""
+        extra = [
+            Category.objects.create(
+                user=self.user, name=f"Extra {i}", type=Category.EXPENSE, color="#000000"
+            )
+            for i in range(10)
+        ]
+        order_data = [
+            {"id": category.id, "order": 100 - i}
+            for i, category in enumerate([self.category1, *extra])
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            updated_count = CategoryService.bulk_update_order(self.user, order_data)
+
+        assert updated_count == 11
+        statements = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+        assert len(statements) == 2
+        assert list(
+            Category.objects.filter(pk__in=[c.id for c in extra[:3]])
+            .order_by("pk")
+            .values_list("order", flat=True)
+        ) == [99, 98, 97]
+
+    def test_create_default_categories_single_insert_skips_existing(self):
+        """Test: Las categorías por defecto se crean con un INSERT y omiten las existentes"""
+        with CaptureQueriesContext(connection) as ctx:
+            created = CategoryService.create_default_categories(self.user)
+
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+        assert len(inserts) == 1
+        assert all(category.pk for category in created)
+        # "Comida" (gasto) y "Salario" (ingreso) ya existían
+        assert len(created) == 13
+        assert Category.objects.filter(user=self.user, name="Comida").count() == 1
+        assert Category.objects.filter(user=self.user, name="Transporte").exists()
+
+    def test_create_default_categories_skips_only_concurrent_conflicts(self):
+        """Test: Si otra petición crea una por defecto a la vez, las demás se crean igual"""
+        new_user = User.objects.create_user(
+            identification="87654399",
+            username="concurrentdefaults",
+            email="concurrentdefaults@example.com",
+            password="testpass123",
+        )
+        bulk_create = Category.objects.bulk_create
+
+        def create_after_concurrent_insert(objs, **kwargs):
+            # Simula otra petición que crea "Freelance" entre la lectura y el INSERT
+            Category.objects.create(
+                user=new_user, name="Freelance", type=Category.INCOME, color="#000000"
+            )
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(
+            Category.objects, "bulk_create", side_effect=create_after_concurrent_insert
+        ):
+            created = CategoryService.create_default_categories(new_user)
+
+        # Se releen todas las que faltaban al empezar, incluida la que creó la otra petición
+        assert len(created) == 15
+        assert {category.pk for category in created} == set(
+            Category.objects.filter(user=new_user).values_list("pk", flat=True)
+        )
+        assert Category.objects.filter(user=new_user, name="Freelance").count() == 1
@@ -0,0 +1,187 @@
+"""
+Tests para el uso real de categorías (CategoryService.get_usage)
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from budgets.models import Budget
+from categories.models import Category
+from categories.services import CategoryService
+from transactions.models import Transaction
+from utils.models import ExchangeRate
+
+User = get_user_model()
+
+
+class CategoryUsageTests(TestCase):
+    """Conteos, total reciente y último uso en una consulta anotada"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            identification="55502301",
+            username="usage",
+            email="usage@example.com",
+            password="testpass123",
+        )
+        self.pesos = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+            gmf_exempt=True,
+        )
+        self.dollars = Account.objects.create(
+            user=self.user,
+            name="Dólares",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000.00"),
+            currency="USD",
+            gmf_exempt=True,
+        )
+        self.food, self.rent, self.unused = (
+            Category.objects.create(
+                user=self.user, name=name, type="expense", color="#DC2626", icon="fa-utensils"
+            )
+            for name in ("Comida", "Arriendo", "Sin uso")
+        )
+        self.today = timezone.localdate()
+        ExchangeRate.objects.create(
+            base_currency="COP",
+            currency="USD",
+            year=self.today.year,
+            month=self.today.month,
+            rate=Decimal("4000"),
+        )
+        # El gasto de ayer puede caer en el mes anterior
+        previous_month = self.today.replace(day=1) - timedelta(days=1)
+        ExchangeRate.objects.create(
+            base_currency="COP",
+            currency="USD",
+            year=previous_month.year,
+            month=previous_month.month,
+            rate=Decimal("4000"),
+        )
+        self._expense(self.food, self.pesos, 2000000, self.today)
+        self._expense(self.food, self.dollars, 1000, self.today - timedelta(days=1))
+        # Fuera de la ventana reciente: cuenta para el conteo, no para el total
+        self._expense(self.food, self.pesos, 9900000, date(2020, 1, 1))
+        self._expense(self.rent, self.pesos, 50000000, date(2020, 1, 1))
+        Budget.objects.create(
+            user=self.user,
+            category=self.unused,
+            amount=Decimal("100000.00"),
+            currency="COP",
+            period=Budget.MONTHLY,
+            start_date=date(2025, 1, 1),
+        )
+
+    def _expense(self, category, account, amount, day):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=account,
+            category=category,
+            type=2,
+            base_amount=amount,
+            date=day,
+        )
+
+    def test_usage_is_one_annotated_query_in_base_currency(self):
+        with CaptureQueriesContext(connection) as ctx:
+            usage = CategoryService.get_usage(self.user)
+        category_queries = [q for q in ctx.captured_queries if "categories_category" in q["sql"]]
+        assert len(category_queries) == 1
+
+        food = usage["categories"][self.food.pk]
+        assert food["transactions_count"] == 3
+        assert food["recent_total"] == Decimal("60000.00")
+        assert food["last_used"] == self.today
+        assert usage["categories"][self.rent.pk]["recent_total"] == Decimal("0.00")
+        assert usage["categories"][self.unused.pk] == {
+            "transactions_count": 0,
+            "budgets_count": 1,
+            "usage_count": 1,
+            "recent_total": Decimal("0.00"),
+            "last_used": None,
+        }
+
+        stats = CategoryService.get_categories_stats(self.user)
+        assert [c["name"] for c in stats["most_used"]] == ["Comida", "Arriendo", "Sin Uso"]
+        assert [c["name"] for c in stats["least_used"]] == ["Sin Uso", "Arriendo", "Comida"]
+
+        related = self.rent.get_related_data()
+        assert related["transactions_count"] == 1
+        assert related["can_be_deleted"] is False
+
+    def test_recent_total_converts_each_month_with_its_rate(self):
+        first_month = self.today.replace(day=1) - relativedelta(months=2)
+        ExchangeRate.objects.create(
+            base_currency="COP",
+            currency="USD",
+            year=first_month.year,
+            month=first_month.month,
+            rate=Decimal("3000"),
+        )
+        self._expense(self.rent, self.dollars, 1000, first_month + timedelta(days=14))
+
+        usage = CategoryService.get_usage(self.user)
+        assert usage["since"] == first_month
+        assert usage["categories"][self.rent.pk]["recent_total"] == Decimal("30000.00")
+        assert usage["categories"][self.food.pk]["recent_total"] == Decimal("60000.00")
+
+    @override_settings(ANALYTICS_CACHE_TIMEOUT=300)
+    def test_usage_is_cached_per_data_version(self):
+        CategoryService.get_usage(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            CategoryService.get_usage(self.user)
+        # Solo la moneda base de la clave de caché
+        assert not any("categories_category" in q["sql"] for q in ctx.captured_queries)
+
+        Budget.objects.create(
+            user=self.user,
+            category=self.rent,
+            amount=Decimal("100000.00"),
+            currency="COP",
+            period=Budget.MONTHLY,
+            start_date=date(2025, 1, 1),
+        )
+        assert (
+            CategoryService.get_usage(self.user)["categories"][self.rent.pk]["budgets_count"] == 1
+        )
+
+    def test_list_and_detail_read_usage_without_per_category_queries(self):
+        client = Client()
+        auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get("/api/categories/", **auth)
+            assert response.status_code == 200
+            return len(ctx.captured_queries), response.json()
+
+        # La primera lectura carga además el snapshot de tipos de cambio del proceso
+        list_queries()
+        baseline, data = list_queries()
+        assert {c["name"]: c["usage_count"] for c in data}["Comida"] == 3
+        for index in range(5):
+            Category.objects.create(
+                user=self.user, name=f"Extra {index}", type="expense", color="#DC2626"
+            )
+        assert list_queries()[0] == baseline
+
+        response = client.get(f"/api/categories/{self.food.pk}/", **auth)
+        assert response.json()["related_data"]["transactions_count"] == 3
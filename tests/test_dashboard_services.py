@@ -595,3 +595,110 @@ class FinancialDashboardServiceTests(TestCase):
 
         assert isinstance(bills, list)
         # Puede estar vacío si no hay facturas
+
+    def _create_month_activity(self, count, usd_account):
+        """Crea `count` gastos y un ingreso en el mes actual, en COP y USD"""
+        today = date.today()
+        for i in range(count):
+            Transaction.objects.create(
+                user=self.user,
+                origin_account=usd_account if i % 2 else self.account,
+                category=self.category,
+                type=2,
+                base_amount=10000 + i,
+                tax_percentage=19 if i % 3 == 0 else None,
+                date=today.replace(day=1 + i % 28),
+            )
+        Transaction.objects.create(
+            user=self.user,
+            origin_account=self.account,
+            type=1,
+            base_amount=500000,
+            date=today.replace(day=1),
+        )
+
+    def test_financial_summary_totals_match_transactions(self):
+        """Test: Los totales agrupados coinciden con las transacciones convertidas"""
+        from utils.models import ExchangeRate
+
+        today = date.today()
+        usd_account = Account.objects.create(
+            user=self.user,
+            name="Cuenta USD",
+            account_type="asset",
+            category="wallet",
+            currency="USD",
+            current_balance=Decimal("1000.00"),
+        )
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=today.year, month=1, rate=Decimal("4000")
+        )
+        self._create_month_activity(6, usd_account)
+
+        result = FinancialDashboardService.get_financial_summary(
+            self.user, year=today.year, month=today.month
+        )
+
+        expenses = Transaction.objects.filter(user=self.user, type=2)
+        expected_expenses = sum(
+            tx.total_amount * (4000 if tx.origin_account_id == usd_account.id else 1)
+            for tx in expenses
+        )
+        expected_iva = sum(
+            (tx.taxed_amount or 0) * (4000 if tx.origin_account_id == usd_account.id else 1)
+            for tx in expenses
+        )
+        assert result["summary"]["total_income"] == 500000
+        assert result["summary"]["total_expenses"] == expected_expenses
+        assert result["summary"]["total_iva"] == expected_iva
+        distribution = result["charts"]["expense_distribution"]
+        assert distribution["categories"][0]["count"] == 6
+        assert distribution["total"] == expected_expenses
+        assert result["charts"]["daily_flow"]["total_expenses"] == expected_expenses
+
+    def test_financial_summary_query_count_does_not_grow_with_rows(self):
+        """Test: El resumen usa el mismo número de consultas con 5 o 40 movimientos"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        today = date.today()
+        usd_account = Account.objects.create(
+            user=self.user,
+            name="Cuenta USD",
+            account_type="asset",
+            category="wallet",
+            currency="USD",
+            current_balance=Decimal("1000.00"),
+        )
+        self._create_month_activity(4, usd_account)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                result = FinancialDashboardService.get_financial_summary(
+                    self.user, year=today.year, month=today.month
+                )
+            assert result["has_data"] is True
+            return len(ctx.captured_queries)
+
+        # La primera llamada carga el snapshot de tasas y cachés de preferencias
+        count_queries()
+        small = count_queries()
+        self._create_month_activity(35, usd_account)
+        assert count_queries() == small
+
+    def test_calculate_totals_uses_one_grouped_query(self):
+        """Test: Totales, IVA y GMF salen de una sola consulta agrupada"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._create_month_activity(5, self.account)
+        transactions = Transaction.objects.filter(user=self.user)
+        FinancialDashboardService._calculate_totals(transactions, "COP", self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            totals = FinancialDashboardService._calculate_totals(transactions, "COP", self.user)
+
+        assert len(ctx.captured_queries) == 1
+        expenses = Transaction.objects.filter(user=self.user, type=2)
+        assert totals["expenses"] == sum(tx.total_amount for tx in expenses)
+        assert totals["iva"] == sum(tx.taxed_amount or 0 for tx in expenses)
@@ -0,0 +1,185 @@
+"""
+Tests para aplicar reglas al historial de transacciones (apply_rules_to_history)
+"""
+
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from analytics.models import MonthlyCategorySummary
+from analytics.rollups import MonthlySummaryService
+from budgets.counters import BudgetSpendService
+from budgets.models import Budget
+from categories.models import Category
+from rules.models import AutomaticRule
+from rules.services import RuleEngineService
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class ApplyRulesToHistoryTests(TestCase):
+    """Candidatas por consulta, coincidencias en memoria y bulk_update por bloque"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500888",
+            username="history",
+            email="history@example.com",
+            password="testpass123",
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+        )
+        self.transport = Category.objects.create(
+            user=self.user, name="Transporte", type="expense", color="#DC2626", icon="fa-car"
+        )
+        self.food = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        # Historial creado antes de que existan las reglas
+        for description in ["UBER viaje", "Uber noche", "Mercado", None, "Rappi"]:
+            self._expense(description)
+        self.categorized = self._expense("uber con categoría", category=self.food)
+
+        self.uber = AutomaticRule.objects.create(
+            user=self.user,
+            name="Uber",
+            criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword="uber",
+            action_type=AutomaticRule.ASSIGN_CATEGORY,
+            target_category=self.transport,
+            order=1,
+        )
+        self.rappi = AutomaticRule.objects.create(
+            user=self.user,
+            name="Rappi",
+            criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword="rappi",
+            action_type=AutomaticRule.ASSIGN_CATEGORY,
+            target_category=self.food,
+            order=2,
+        )
+
+    def _expense(self, description, category=None):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=self.account,
+            category=category,
+            type=2,
+            base_amount=10000,
+            date=date(2025, 3, 5),
+            description=description,
+        )
+
+    def _summary_rows(self):
+        return sorted(
+            MonthlyCategorySummary.objects.filter(user=self.user).values_list(
+                "category_id", "type", "base_amount", "total_amount", "count"
+            ),
+            key=str,
+        )
+
+    def test_dry_run_reports_without_writing(self):
+        summary = RuleEngineService.apply_rules_to_history(self.user, dry_run=True)
+
+        assert summary["candidates"] == 4
+        assert summary["matched"] == 3
+        assert summary["updated"] == 0
+        assert summary["rules"] == [
+            {"id": self.uber.id, "name": "Uber", "matched": 2},
+            {"id": self.rappi.id, "name": "Rappi", "matched": 1},
+        ]
+        assert not Transaction.objects.filter(applied_rule__isnull=False).exists()
+
+    def test_applies_in_chunks_and_keeps_rollups_consistent(self):
+        """Las filas cambian sin save(): el GMF y los saldos no se tocan"""
+        Budget.objects.create(
+            user=self.user,
+            category=self.transport,
+            amount=Decimal("1000.00"),
+            currency="COP",
+            start_date=date(2025, 3, 1),
+        )
+        self.account.refresh_from_db()
+        balance = self.account.current_balance
+        totals = dict(Transaction.objects.values_list("id", "total_amount"))
+
+        summary = RuleEngineService.apply_rules_to_history(self.user, chunk_size=2)
+
+        assert summary["updated"] == 3
+        assert Transaction.objects.filter(category=self.transport).count() == 2
+        rappi = Transaction.objects.get(description="Rappi")
+        assert rappi.category == self.food
+        assert rappi.applied_rule == self.rappi
+        assert Transaction.objects.get(pk=self.categorized.pk).applied_rule is None
+        assert dict(Transaction.objects.values_list("id", "total_amount")) == totals
+        self.account.refresh_from_db()
+        assert self.account.current_balance == balance
+
+        maintained = self._summary_rows()
+        MonthlySummaryService.rebuild_for_user(self.user)
+        assert maintained == self._summary_rows()
+        budget = Budget.objects.get(category=self.transport)
+        assert BudgetSpendService.reconcile_budget(budget, fix=False) == []
+
+        # Una segunda pasada no encuentra candidatas pendientes con regla
+        again = RuleEngineService.apply_rules_to_history(self.user)
+        assert again["matched"] == 0
+
+    def test_query_count_grows_per_chunk_not_per_row(self):
+        for i in range(40):
+            self._expense(f"uber {i}")
+
+        def run():
+            Transaction.objects.filter(applied_rule__isnull=False).update(
+                applied_rule=None, category=None
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                RuleEngineService.apply_rules_to_history(self.user, chunk_size=1000)
+            return len(ctx.captured_queries)
+
+        few = run()
+        for i in range(40):
+            self._expense(f"rappi {i}")
+        assert run() == few
+
+    def test_endpoint_and_command(self):
+        client = Client()
+        token = Token.objects.create(user=self.user)
+        auth = {"HTTP_AUTHORIZATION": f"Token {token.key}"}
+
+        response = client.post(
+            "/api/rules/apply_to_history/",
+            {"rule_id": self.rappi.id, "dry_run": True},
+            content_type="application/json",
+            **auth,
+        )
+        assert response.status_code == 200
+        assert response.json()["matched"] == 1
+        assert response.json()["dry_run"] is True
+
+        response = client.post(
+            "/api/rules/apply_to_history/",
+            {"rule_id": 999999},
+            content_type="application/json",
+            **auth,
+        )
+        assert response.status_code == 404
+
+        out = io.StringIO()
+        call_command("apply_rules_to_history", user_id=self.user.id, stdout=out)
+        assert "Actualizadas: 3" in out.getvalue()
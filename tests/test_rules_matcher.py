@@ -0,0 +1,221 @@
+"""
+Tests para el matcher compilado de reglas (rules/matcher.py)
+"""
+
+import random
+from datetime import date
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from categories.models import Category
+from rules.matcher import CompiledRuleMatcher, KeywordAutomaton, RuleMatcherCache
+from rules.models import AutomaticRule
+from rules.services import AutomaticRuleService, RuleEngineService
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class KeywordAutomatonTests(TestCase):
+    """El autómata encuentra lo mismo que comparar cada palabra clave con 'in'"""
+
+    def test_matches_naive_substring_search(self):
+        rng = random.Random(7)
+        alphabet = "abcé "
+        keywords = {
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)
+        }
+        priorities = {keyword: (index,) for index, keyword in enumerate(sorted(keywords))}
+        automaton = KeywordAutomaton(priorities)
+
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            expected = {priorities[keyword][0] for keyword in keywords if keyword in text}
+            assert automaton.all_matches(text) == expected
+            assert automaton.best_match(text) == min(expected, default=float("inf"))
+
+    def test_overlapping_and_nested_keywords(self):
+        automaton = KeywordAutomaton({"he": (3,), "she": (1,), "hers": (0,), "his": (2,)})
+        assert automaton.all_matches("ushers") == {0, 1, 3}
+        assert automaton.best_match("ushe") == 1
+        assert automaton.best_match("ushe", bound=0) == 0
+        assert automaton.all_matches("hi") == set()
+
+
+class CompiledRuleMatcherTests(TestCase):
+    """Primera coincidencia por orden entre palabras clave y tipos de transacción"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500777",
+            username="matcher",
+            email="matcher@example.com",
+            password="testpass123",
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=1000000,
+            currency="COP",
+        )
+        self.transport = Category.objects.create(
+            user=self.user, name="Transporte", type="expense", color="#DC2626", icon="fa-car"
+        )
+        self.food = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+
+    def _rule(self, name, order, keyword=None, transaction_type=None, category=None):
+        return AutomaticRule.objects.create(
+            user=self.user,
+            name=name,
+            criteria_type=(
+                AutomaticRule.DESCRIPTION_CONTAINS if keyword else AutomaticRule.TRANSACTION_TYPE
+            ),
+            keyword=keyword,
+            target_transaction_type=transaction_type,
+            action_type=AutomaticRule.ASSIGN_CATEGORY,
+            target_category=category or self.transport,
+            order=order,
+        )
+
+    def _expense(self, description):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=self.account,
+            type=2,
+            base_amount=10000,
+            date=date(2025, 3, 1),
+            description=description,
+        )
+
+    def test_first_match_by_order_like_sequential_loop(self):
+        """El resultado coincide con recorrer las reglas una por una"""
+        self._rule("Gastos", 5, transaction_type=2, category=self.food)
+        self._rule("Uber Eats", 2, keyword="uber eats", category=self.food)
+        self._rule("Uber", 3, keyword="UBER")
+        self._rule("Eats", 1, keyword="eats")
+        inactive = self._rule("Inactiva", 0, keyword="uber")
+        AutomaticRule.objects.filter(pk=inactive.pk).update(is_active=False)
+
+        matcher = RuleMatcherCache.compile(self.user.id)
+        rules = list(
+            AutomaticRule.objects.filter(user=self.user, is_active=True).order_by(
+                "order", "created_at"
+            )
+        )
+        for description, transaction_type in [
+            ("Pago UBER EATS bogota", 2),
+            ("uber viaje", 2),
+            ("uber viaje", 1),
+            ("mercado", 2),
+            ("mercado", 1),
+            (None, 2),
+        ]:
+            txn = SimpleNamespace(description=description, type=transaction_type)
+            expected = next((rule for rule in rules if rule.matches_transaction(txn)), None)
+            assert matcher.match(description, transaction_type) == expected
+            assert RuleEngineService.get_matching_rules(
+                self.user, description, transaction_type
+            ) == [rule for rule in rules if rule.matches_transaction(txn)]
+
+        assert matcher.match("Pago UBER EATS", 2).name == "Eats"
+        assert matcher.match("uber viaje", 2).name == "Uber"
+        assert matcher.match("mercado", 2).name == "Gastos"
+        assert not CompiledRuleMatcher([])
+
+    @override_settings(RULES_MATCHER_CACHE_ENABLED=True)
+    def test_compiled_matcher_is_reused_until_rules_change(self):
+        """Sin cambios en las reglas, aplicar reglas no consulta AutomaticRule"""
+        RuleMatcherCache.clear()
+        self.addCleanup(RuleMatcherCache.clear)
+        rule = self._rule("Uber", 1, keyword="uber")
+
+        first = self._expense("UBER trip")
+        assert first.category == self.transport
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self._expense("uber otra vez")
+        assert second.applied_rule == rule
+        assert not any("rules_automaticrule" in q["sql"] for q in ctx.captured_queries)
+
+        # Editar la regla (o reordenar, crear, eliminar) invalida el matcher
+        rule.target_category = self.food
+        rule.save()
+        assert self._expense("uber cena").category == self.food
+
+        AutomaticRuleService.reorder_rules(self.user, [{"id": rule.id, "order": 9}])
+        self._rule("Cena", 2, keyword="cena")
+        assert self._expense("uber cena").applied_rule.name == "Cena"
+
+        rule.delete()
+        assert self._expense("uber").applied_rule is None
+
+    def test_create_resolves_rule_before_single_insert(self):
+        """Crear por la API con regla: un INSERT, ningún UPDATE y un solo post_save"""
+        AutomaticRule.objects.create(
+            user=self.user,
+            name="Ahorro",
+            criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword="ahorro",
+            action_type=AutomaticRule.ASSIGN_TAG,
+            target_tag="#ahorro",
+            order=1,
+        )
+        savings = Account.objects.create(
+            user=self.user,
+            name="Ahorros",
+            account_type="asset",
+            category="savings_account",
+            current_balance=0,
+            currency="COP",
+        )
+        client = Client()
+        auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+        saves = []
+
+        def on_save(sender, instance, created, **kwargs):
+            saves.append(created)
+
+        post_save.connect(on_save, sender=Transaction)
+        self.addCleanup(post_save.disconnect, on_save, sender=Transaction)
+
+        def create(description):
+            saves.clear()
+            payload = {
+                "origin_account": self.account.id,
+                "destination_account": savings.id,
+                "type": 3,
+                "base_amount": 10000,
+                "date": "2025-03-01",
+                "description": description,
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.post("/api/transactions/", payload, **auth)
+            assert response.status_code == 201
+            writes = [
+                q["sql"].split()[0]
+                for q in ctx.captured_queries
+                if '"transactions_transaction"' in q["sql"].split(" WHERE ")[0]
+                and not q["sql"].startswith("SELECT")
+            ]
+            assert writes == ["INSERT"]
+            assert saves == [True]
+            return response.json(), len(ctx.captured_queries)
+
+        # La primera del mes crea la fila del resumen mensual; las demás la actualizan
+        create("traslado inicial")
+        matched, with_rule = create("AHORRO marzo")
+        assert matched["tag"] == "#ahorro"
+        unmatched, without_rule = create("traslado")
+        assert unmatched["tag"] is None
+        assert with_rule == without_rule
@@ -0,0 +1,154 @@
+"""
+Tests para la vista previa de impacto de reglas (preview_rule_impact)
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from categories.models import Category
+from rules.models import AutomaticRule
+from rules.services import RuleEngineService
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class RuleImpactPreviewTests(TestCase):
+    """Conteos por consulta agregada y reglas sombreadas según el orden"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500999",
+            username="impact",
+            email="impact@example.com",
+            password="testpass123",
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+            gmf_exempt=True,
+        )
+        self.transport = Category.objects.create(
+            user=self.user, name="Transporte", type="expense", color="#DC2626", icon="fa-car"
+        )
+        for description, amount in [
+            ("UBER viaje", 10000),
+            ("Uber Eats cena", 25000),
+            ("uber eats almuerzo", 15000),
+            ("Mercado", 80000),
+        ]:
+            self._expense(description, amount)
+        self.eats = self._rule("Eats", 1, keyword="eats")
+        self.expenses = AutomaticRule.objects.create(
+            user=self.user,
+            name="Gastos",
+            criteria_type=AutomaticRule.TRANSACTION_TYPE,
+            target_transaction_type=AutomaticRule.EXPENSE,
+            action_type=AutomaticRule.ASSIGN_TAG,
+            target_tag="#gasto",
+            order=5,
+        )
+
+    def _rule(self, name, order, keyword):
+        return AutomaticRule.objects.create(
+            user=self.user,
+            name=name,
+            criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword=keyword,
+            action_type=AutomaticRule.ASSIGN_CATEGORY,
+            target_category=self.transport,
+            order=order,
+        )
+
+    def _expense(self, description, amount):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=self.account,
+            type=2,
+            base_amount=amount,
+            date=date(2025, 3, 5),
+            description=description,
+        )
+
+    def test_counts_totals_and_shadowing_from_one_aggregate(self):
+        with CaptureQueriesContext(connection) as ctx:
+            impact = RuleEngineService.preview_rule_impact(
+                self.user, AutomaticRule.DESCRIPTION_CONTAINS, keyword="uber", order=3
+            )
+        # Reglas existentes + estadísticas + muestra
+        assert len(ctx.captured_queries) == 3
+
+        matched = impact["matched"]
+        assert matched["count"] == 3
+        assert matched["effective"] == 1
+        assert matched["by_currency"] == [
+            {"currency": "COP", "count": 3, "total_amount": Decimal("50000.00")}
+        ]
+        assert impact["shadowed_by"] == [
+            {"id": self.eats.id, "name": "Eats", "order": 1, "overlap": 2}
+        ]
+        assert impact["shadows"] == [
+            {"id": self.expenses.id, "name": "Gastos", "order": 5, "overlap": 3}
+        ]
+        assert impact["sample"][0]["description"] == "uber eats almuerzo"
+
+    def test_order_defaults_to_lowest_priority_and_excludes_edited_rule(self):
+        impact = RuleEngineService.preview_rule_impact(
+            self.user, AutomaticRule.DESCRIPTION_CONTAINS, keyword="uber"
+        )
+        assert impact["order"] == 6
+        assert impact["matched"]["effective"] == 0
+        assert impact["shadows"] == []
+
+        # Editar "Eats" al primer lugar: no se compara consigo misma
+        impact = RuleEngineService.preview_rule_impact(
+            self.user,
+            AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword="eats",
+            order=0,
+            rule=self.eats,
+        )
+        assert impact["matched"]["effective"] == 2
+        assert impact["shadowed_by"] == []
+        assert [entry["id"] for entry in impact["shadows"]] == [self.expenses.id]
+
+    def test_endpoint_validates_criteria(self):
+        client = Client()
+        auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+
+        response = client.post(
+            "/api/rules/preview_impact/",
+            {"criteria_type": "transaction_type", "target_transaction_type": 2, "order": 0},
+            content_type="application/json",
+            **auth,
+        )
+        assert response.status_code == 200
+        assert response.json()["matched"]["count"] == 4
+        assert response.json()["matched"]["effective"] == 4
+
+        response = client.post(
+            "/api/rules/preview_impact/",
+            {"criteria_type": "description_contains", "keyword": " "},
+            content_type="application/json",
+            **auth,
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            "/api/rules/preview_impact/",
+            {"criteria_type": "description_contains", "keyword": "uber", "rule_id": 999999},
+            content_type="application/json",
+            **auth,
+        )
+        assert response.status_code == 404
@@ -0,0 +1,143 @@
+"""
+Tests para la actualización de saldos con bloqueo ordenado y deltas F()
+(TransactionService)
+
+La prueba de estrés con hilos y conexiones propias está en
+scripts/stress_balance_updates.py: la base SQLite en memoria de los tests no
+espera a los bloqueos de otras conexiones (falla de inmediato).
+"""
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.db import transaction as db_transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account
+from transactions.models import Transaction
+from transactions.services import TransactionService
+
+User = get_user_model()
+
+
+def _setup_accounts(test):
+    test.user = User.objects.create_user(
+        identification="55501018",
+        username="locks",
+        email="locks@example.com",
+        password="testpass123",
+    )
+    test.first, test.second = (
+        Account.objects.create(
+            user=test.user,
+            name=name,
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+            gmf_exempt=True,
+        )
+        for name in ("Banco A", "Banco B")
+    )
+
+
+class BalanceUpdateTests(TestCase):
+    """Un solo bloqueo ordenado por pk y un solo UPDATE con F() por transacción"""
+
+    def setUp(self):
+        _setup_accounts(self)
+
+    def test_transfer_locks_in_pk_order_and_applies_deltas_in_one_update(self):
+        transfer = Transaction.objects.create(
+            user=self.user,
+            origin_account=self.second,
+            destination_account=self.first,
+            type=3,
+            base_amount=2500000,
+            date="2025-03-01",
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            TransactionService.handle_transaction_creation(transfer)
+
+        account_sql = [q["sql"] for q in ctx.captured_queries if '"accounts_account"' in q["sql"]]
+        deltas = [sql for sql in account_sql if "CASE WHEN" in sql]
+        assert len(deltas) == 1
+        assert '("accounts_account"."current_balance" + CAST(CASE WHEN' in deltas[0]
+        # SQLite ignora FOR UPDATE: el bloqueo de escritura lo toma un UPDATE que
+        # no coincide con ninguna fila, antes de leer y validar las cuentas
+        assert account_sql[0].startswith("UPDATE")
+        assert '"accounts_account"."id" IS NULL' in account_sql[0]
+        assert account_sql[1].startswith("SELECT")
+        assert 'ORDER BY "accounts_account"."id"' in account_sql[1]
+
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        assert self.first.current_balance == Decimal("1025000.00")
+        assert self.second.current_balance == Decimal("975000.00")
+
+        TransactionService.handle_transaction_deletion(transfer)
+        self.first.refresh_from_db()
+        assert self.first.current_balance == Decimal("1000000.00")
+
+    def test_save_transaction_commits_row_and_summary_together(self):
+        """Si una señal post_save falla, la fila tampoco queda guardada"""
+        with (
+            mock.patch(
+                "analytics.rollups.MonthlySummaryService.record_change",
+                side_effect=RuntimeError("resumen"),
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            TransactionService.save_transaction(
+                lambda: Transaction.objects.create(
+                    user=self.user,
+                    origin_account=self.first,
+                    type=2,
+                    base_amount=10000,
+                    date="2025-03-01",
+                )
+            )
+        assert not Transaction.objects.filter(user=self.user).exists()
+
+
+class BalanceRetryTests(TransactionTestCase):
+    """Reintento acotado ante bloqueos, solo en la transacción más externa"""
+
+    def setUp(self):
+        _setup_accounts(self)
+
+    def test_lock_conflict_is_retried_only_in_outermost_transaction(self):
+        expense = Transaction.objects.create(
+            user=self.user,
+            origin_account=self.first,
+            type=2,
+            base_amount=10000,
+            date="2025-03-01",
+        )
+        original = TransactionService._update_account_balances
+        calls = []
+
+        def flaky(deltas, transaction):
+            calls.append(transaction.id)
+            if len(calls) == 1:
+                msg = "database is locked"
+                raise OperationalError(msg)
+            return original(deltas, transaction)
+
+        with (
+            mock.patch.object(TransactionService, "_update_account_balances", flaky),
+            mock.patch("transactions.services.BALANCE_RETRY_DELAY", 0),
+        ):
+            TransactionService.handle_transaction_creation(expense)
+            assert len(calls) == 2
+            self.first.refresh_from_db()
+            assert self.first.current_balance == Decimal("999900.00")
+
+            calls.clear()
+            with self.assertRaises(OperationalError), db_transaction.atomic():
+                TransactionService.handle_transaction_creation(expense)
+            assert len(calls) == 1
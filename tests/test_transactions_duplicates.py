@@ -0,0 +1,165 @@
+"""
+Tests para la detección de duplicados por huella (DuplicateDetectionService)
+"""
+
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from categories.models import Category
+from transactions.duplicates import DuplicateDetectionService
+from transactions.fingerprints import normalize_description
+from transactions.importers import TransactionImportService
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class DuplicateDetectionTests(TestCase):
+    """Huella indexada, creación con flag/skip, importación y reporte agrupado"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500123",
+            username="dupes",
+            email="dupes@example.com",
+            password="testpass123",
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+            gmf_exempt=True,
+        )
+        self.food = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        self.client = Client()
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+
+    def _create(self, description="Mercado Éxito", amount=50000, txn_date=date(2025, 3, 1)):
+        return Transaction.objects.create(
+            user=self.user,
+            origin_account=self.account,
+            category=self.food,
+            type=2,
+            base_amount=amount,
+            date=txn_date,
+            description=description,
+        )
+
+    def test_fingerprint_ignores_case_accents_and_punctuation(self):
+        """La descripción se normaliza antes de calcular la huella"""
+        assert normalize_description("  Pago ÉXITO #12 ") == "pago exito 12"
+
+        first = self._create("Mercado Éxito")
+        same = self._create("MERCADO  exito.")
+        other_amount = self._create("Mercado Éxito", amount=50001)
+        other_date = self._create("Mercado Éxito", txn_date=date(2025, 3, 2))
+
+        assert first.fingerprint == same.fingerprint
+        assert len(first.fingerprint) == 64
+        assert first.fingerprint != other_amount.fingerprint
+        assert first.fingerprint != other_date.fingerprint
+
+    def test_create_flags_or_skips_duplicates(self):
+        """Por defecto se crea e informa el duplicado; con skip no se crea"""
+        payload = {
+            "origin_account": self.account.id,
+            "category": self.food.id,
+            "type": 2,
+            "base_amount": 50000,
+            "date": "2025-03-01",
+            "description": "Mercado",
+        }
+        response = self.client.post("/api/transactions/", payload, **self.auth)
+        assert response.status_code == 201
+        assert "duplicate_of" not in response.json()
+        first_id = response.json()["id"]
+
+        response = self.client.post("/api/transactions/", payload, **self.auth)
+        assert response.status_code == 201
+        assert response.json()["duplicate_of"] == [first_id]
+
+        self.account.refresh_from_db()
+        balance = self.account.current_balance
+        response = self.client.post("/api/transactions/?on_duplicate=skip", payload, **self.auth)
+        assert response.status_code == 200
+        assert response.json()["transaction"]["id"] == first_id
+        assert Transaction.objects.filter(user=self.user).count() == 2
+        self.account.refresh_from_db()
+        assert self.account.current_balance == balance
+
+        response = self.client.post("/api/transactions/?on_duplicate=otro", payload, **self.auth)
+        assert response.status_code == 400
+
+    def test_reimporting_overlapping_statement_skips_existing_rows(self):
+        """Solo se importan las filas nuevas; dos movimientos idénticos cuentan por separado"""
+
+        def import_lines(lines, **kwargs):
+            content = "\n".join(["fecha,descripcion,monto,categoria", *lines])
+            return TransactionImportService.import_file(
+                self.user, self.account, io.BytesIO(content.encode()), "csv", **kwargs
+            )
+
+        first = import_lines(["2025-03-01,Café,-5000,Comida", "2025-03-02,Almuerzo,-20000,Comida"])
+        assert first["imported"] == 2
+        assert first["duplicates"] == 0
+
+        # Solapa en dos filas, y el café del 1 de marzo ahora aparece dos veces
+        second = import_lines(
+            [
+                "2025-03-01,Café,-5000,Comida",
+                "2025-03-01,CAFÉ,-5000,Comida",
+                "2025-03-02,Almuerzo,-20000,Comida",
+                "2025-03-03,Cena,-30000,Comida",
+            ],
+            batch_size=1,
+        )
+        assert second["imported"] == 2
+        assert second["duplicates"] == 2
+        assert [entry["row"] for entry in second["duplicate_rows"]] == [2, 4]
+        assert Transaction.objects.filter(user=self.user).count() == 4
+
+        flagged = import_lines(["2025-03-03,Cena,-30000,Comida"], on_duplicate="flag")
+        assert flagged["imported"] == 1
+        assert flagged["duplicates"] == 1
+
+    def test_find_duplicates_is_a_single_grouped_query(self):
+        """El reporte agrupa por huella en una sola consulta"""
+        for _ in range(3):
+            self._create("Mercado")
+        self._create("Arriendo", amount=900000)
+        for _ in range(2):
+            self._create("Gasolina", amount=80000, txn_date=date(2025, 4, 1))
+
+        with CaptureQueriesContext(connection) as ctx:
+            report = DuplicateDetectionService.find_duplicates(self.user)
+        assert len(ctx.captured_queries) == 1
+
+        assert [(group["count"], group["transactions"][0]["description"]) for group in report] == [
+            (2, "Gasolina"),
+            (3, "Mercado"),
+        ]
+
+        response = self.client.get(
+            "/api/transactions/duplicates/?start_date=2025-04-01", **self.auth
+        )
+        assert response.status_code == 200
+        assert response.json()["count"] == 1
+        assert (
+            self.client.get(
+                "/api/transactions/duplicates/?start_date=marzo", **self.auth
+            ).status_code
+            == 400
+        )
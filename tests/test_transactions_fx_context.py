@@ -0,0 +1,178 @@
+"""
+Tests para el contexto FX por request (FxContext) y su uso en TransactionDetailSerializer
+"""
+
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from transactions.models import Transaction
+from transactions.serializers import TransactionDetailSerializer
+from utils.currency_converter import FxContext, FxService
+from utils.models import BaseCurrencySetting, ExchangeRate
+from utils.rate_snapshot import ExchangeRateSnapshot
+
+User = get_user_model()
+
+
+class FxContextEquivalenceTests(TestCase):
+    """FxContext debe devolver exactamente lo mismo que FxService.convert_amount"""
+
+    def setUp(self):
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=1, rate=Decimal("4000.123457")
+        )
+        ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=3, rate=Decimal("4100.5")
+        )
+        # Solo existe la tasa inversa COP->EUR expresada con base EUR
+        ExchangeRate.objects.create(
+            base_currency="EUR", currency="COP", year=2024, month=12, rate=Decimal("0.000229")
+        )
+
+    def test_matches_scalar_path(self):
+        """Montos, tasas y advertencias idénticos a la ruta escalar"""
+        fx = FxContext("COP")
+        fx.prefetch(["USD", "EUR"])
+        cases = [
+            (12345, "USD", date(2025, 1, 10)),  # mes exacto
+            (99999, "USD", date(2025, 2, 28)),  # fallback al mes anterior
+            (1, "USD", date(2025, 3, 1)),
+            (777777, "EUR", date(2025, 1, 5)),  # tasa inversa
+            (500, "COP", date(2025, 1, 5)),  # misma moneda
+        ]
+        for amount, currency, ref_date in cases:
+            assert fx.convert(amount, currency, ref_date) == FxService.convert_amount(
+                amount, currency, "COP", ref_date
+            )
+
+    def test_static_fallback_and_errors(self):
+        """Sin tasas históricas se usa la estática; si no existe, ValueError"""
+        fx = FxContext("USD")
+        assert fx.convert(10000, "EUR", date(2025, 1, 1)) == FxService.convert_amount(
+            10000, "EUR", "USD", date(2025, 1, 1)
+        )
+
+        fx = FxContext("GBP")
+        with self.assertRaises(ValueError):
+            fx.convert(100, "USD", date(2025, 1, 1))
+        with self.assertRaises(ValueError):
+            FxService.convert_amount(100, "USD", "GBP", date(2025, 1, 1))
+
+    def test_prefetch_cost_does_not_grow_with_lookups(self):
+        """Precargar y resolver varios meses cuesta lo mismo que una sola conversión"""
+        ExchangeRateSnapshot.invalidate()
+        fx = FxContext("COP")
+        with CaptureQueriesContext(connection) as ctx:
+            fx.prefetch(["USD", "EUR"])
+            for month in range(1, 13):
+                fx.convert(1000, "USD", date(2025, month, 1))
+                fx.convert(1000, "EUR", date(2025, month, 1))
+        # Marca de versión + carga del snapshot
+        assert len(ctx.captured_queries) <= 2
+
+
+class TransactionListFxQueryCountTests(TestCase):
+    """El listado de transacciones no debe hacer consultas FX por fila"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            identification="55500022",
+            username="fxlistuser",
+            email="fxlist@example.com",
+            password="testpass123",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth_headers = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+        BaseCurrencySetting.objects.create(user=self.user, base_currency="COP")
+
+        self.usd_account = Account.objects.create(
+            user=self.user,
+            name="Cuenta USD",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000.00"),
+            currency="USD",
+        )
+        self.eur_account = Account.objects.create(
+            user=self.user,
+            name="Cuenta EUR",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000.00"),
+            currency="EUR",
+        )
+        for month in range(1, 7):
+            ExchangeRate.objects.create(
+                base_currency="COP",
+                currency="USD",
+                year=2025,
+                month=month,
+                rate=Decimal(4000 + month),
+            )
+
+    def _create_transactions(self, count):
+        for i in range(count):
+            Transaction.objects.create(
+                user=self.user,
+                origin_account=self.usd_account if i % 2 == 0 else self.eur_account,
+                type=1,
+                base_amount=1000 + i,
+                date=date(2025, 1 + i % 6, 10),
+            )
+
+    def _list_query_count(self):
+        # Medir siempre en frío para que el snapshot de tasas no sesgue la comparación
+        ExchangeRateSnapshot.invalidate()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/transactions/", **self.auth_headers)
+        assert response.status_code == 200
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_is_constant(self):
+        """El número de consultas no crece con el número de transacciones"""
+        self._create_transactions(3)
+        small_count, _ = self._list_query_count()
+
+        self._create_transactions(30)
+        large_count, data = self._list_query_count()
+
+        assert data["count"] == 33
+        assert large_count == small_count
+
+    def test_values_match_scalar_conversion(self):
+        """Los campos en moneda base coinciden con FxService.convert_to_base"""
+        self._create_transactions(4)
+        _, data = self._list_query_count()
+
+        for row in data["results"]:
+            currency = row["transaction_currency"] or row["origin_account_currency"]
+            converted, rate, warning = FxService.convert_to_base(
+                row["total_amount"], currency, "COP", date.fromisoformat(row["date"])
+            )
+            assert row["base_currency"] == "COP"
+            assert row["base_equivalent_amount"] == converted
+            assert row["base_exchange_rate"] == float(rate)
+            assert row["base_exchange_rate_warning"] == warning
+
+    def test_one_conversion_per_row_without_touching_instances(self):
+        """Los cuatro campos base_* comparten una conversión por fila, guardada en el serializer"""
+        self._create_transactions(4)
+        transactions = list(Transaction.objects.filter(user=self.user))
+        fx = FxContext("COP")
+
+        with mock.patch.object(fx, "convert", wraps=fx.convert) as convert:
+            rows = TransactionDetailSerializer(
+                transactions, many=True, context={"fx_context": fx}
+            ).data
+        assert convert.call_count == len(transactions)
+        assert all(row["base_currency"] == "COP" for row in rows)
+        assert not any(hasattr(obj, "_base_conversion") for obj in transactions)
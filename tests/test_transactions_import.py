@@ -0,0 +1,274 @@
+"""
+Tests para la importación masiva de extractos (TransactionImportService)
+"""
+
+import io
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from alerts.models import Alert
+from analytics.models import MonthlyCategorySummary
+from analytics.rollups import MonthlySummaryService
+from budgets.models import Budget, BudgetPeriodSpend
+from categories.models import Category
+from goals.models import Goal
+from rules.models import AutomaticRule
+from transactions.importers import ImportFileError, TransactionImportService
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class TransactionImportTests(TestCase):
+    """Lotes con bulk_create, reglas en memoria y efectos aplicados una vez por lote"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            identification="55500099",
+            username="importer",
+            email="importer@example.com",
+            password="testpass123",
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+        )
+        self.food = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        self.transport = Category.objects.create(
+            user=self.user, name="Transporte", type="expense", color="#DC2626", icon="fa-car"
+        )
+        self.salary = Category.objects.create(
+            user=self.user, name="Salario", type="income", color="#059669", icon="fa-utensils"
+        )
+        AutomaticRule.objects.create(
+            user=self.user,
+            name="Uber",
+            criteria_type=AutomaticRule.DESCRIPTION_CONTAINS,
+            keyword="uber",
+            action_type=AutomaticRule.ASSIGN_CATEGORY,
+            target_category=self.transport,
+            is_active=True,
+            order=1,
+        )
+
+    def _csv(self, lines):
+        return io.BytesIO("\n".join(lines).encode())
+
+    def _import(self, lines, **kwargs):
+        return TransactionImportService.import_file(
+            self.user, self.account, self._csv(lines), "csv", **kwargs
+        )
+
+    def test_imports_rows_applies_rules_and_net_balance(self):
+        """Las filas válidas se importan, las reglas asignan categoría y el saldo cambia una vez"""
+        result = self._import(
+            [
+                "fecha,descripcion,monto,categoria",
+                "2025-03-01,Nómina marzo,2500000,Salario",
+                "02/03/2025,UBER trip,-15000.50,",
+                "2025-03-03,Mercado,-120000,Comida",
+                "fecha rota,Otra,-1000,",
+            ]
+        )
+
+        assert result["imported"] == 3
+        assert result["failed"] == 1
+        assert result["errors"][0]["row"] == 5
+        assert "date" in result["errors"][0]["errors"]
+        assert result["rules_applied"] == 1
+
+        uber = Transaction.objects.get(description="UBER trip")
+        assert uber.category == self.transport
+        assert uber.applied_rule.name == "Uber"
+        assert uber.base_amount == 1500050
+        assert uber.gmf_amount == 6000
+
+        expenses = Transaction.objects.filter(user=self.user, type=2)
+        income = Transaction.objects.get(user=self.user, type=1)
+        self.account.refresh_from_db()
+        expected_cents = 100000000 + income.total_amount - sum(t.total_amount for t in expenses)
+        assert self.account.current_balance == Decimal(expected_cents) / 100
+
+    def test_amount_separators_are_parsed_explicitly(self):
+        """Test: Miles y decimales con punto o coma; los montos ambiguos se rechazan"""
+        parse = TransactionImportService._parse_amount
+        assert parse("1.234,56") == 123456
+        assert parse("1,234.56") == 123456
+        assert parse("1.500.000") == 150000000
+        assert parse("-1.500.000") == -150000000
+        assert parse("$ -15000,50") == -1500050
+        for ambiguous in ("1,500", "1.500", "1.234.56", "1,234.567,8"):
+            try:
+                parse(ambiguous)
+                msg = f"'{ambiguous}' debería rechazarse"
+                raise AssertionError(msg)
+            except ValueError as e:
+                assert "Monto inválido" in str(e)
+
+        result = self._import(["fecha,monto", '2025-03-04,"-1.234,56"', '2025-03-05,"1,500"'])
+        assert result["imported"] == 1
+        assert result["failed"] == 1
+        assert Transaction.objects.get(date=date(2025, 3, 4)).base_amount == 123456
+
+    def test_side_effects_match_per_row_maintenance(self):
+        """El resumen mensual y los contadores quedan como si cada fila se hubiera guardado"""
+        Budget.objects.create(
+            user=self.user,
+            category=self.food,
+            amount=Decimal("50000.00"),
+            currency="COP",
+            start_date=date(2025, 3, 1),
+        )
+        lines = ["fecha,descripcion,monto,categoria"] + [
+            f"2025-03-{1 + i % 28:02d},Mercado {i},-{2000 + i},Comida" for i in range(30)
+        ]
+        self._import(lines, batch_size=7)
+
+        imported = list(
+            MonthlyCategorySummary.objects.filter(user=self.user).values_list(
+                "category_id", "base_amount", "total_amount", "count"
+            )
+        )
+        MonthlySummaryService.rebuild_for_user(self.user)
+        rebuilt = list(
+            MonthlyCategorySummary.objects.filter(user=self.user).values_list(
+                "category_id", "base_amount", "total_amount", "count"
+            )
+        )
+        assert imported == rebuilt
+
+        counter = BudgetPeriodSpend.objects.get(period_start=date(2025, 3, 1))
+        assert counter.base_amount == sum(2000 + i for i in range(30)) * 100
+        alert_types = sorted(
+            Alert.objects.filter(user=self.user).values_list("alert_type", flat=True)
+        )
+        assert alert_types == ["exceeded", "warning"]
+
+    def test_batch_that_overdraws_account_is_rejected(self):
+        """Un lote que deja la cuenta en negativo no se importa"""
+        result = self._import(
+            ["fecha,monto,categoria", "2025-03-01,-999999,Comida", "2025-03-02,-10,Comida"],
+            batch_size=1,
+        )
+        assert result["imported"] == 1
+        assert result["failed"] == 1
+        assert "origin_account" in result["errors"][0]["errors"]
+        self.account.refresh_from_db()
+        assert self.account.current_balance >= 0
+
+    def test_savings_update_goal_once_per_batch(self):
+        """Los ahorros importados se suman a la meta con una sola actualización"""
+        goal = Goal.objects.create(
+            user=self.user,
+            name="Viaje",
+            target_amount=100000000,
+            date=date.today() + timedelta(days=180),
+        )
+        self._import(
+            ["fecha,monto,tipo,meta"] + [f"2025-03-0{i},100,ahorro,viaje" for i in range(1, 6)]
+        )
+        goal.refresh_from_db()
+        assert goal.saved_amount == 5 * 10000
+
+    def test_query_count_is_per_batch_not_per_row(self):
+        """Importar 10 o 100 filas en un lote cuesta las mismas consultas (sin contar los INSERT)"""
+
+        def count(rows):
+            lines = ["fecha,descripcion,monto,categoria"] + [
+                f"2025-03-10,Mercado {i},-1,Comida" for i in range(rows)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                self._import(lines)
+            # SQLite divide el bulk_create según su límite de parámetros
+            return sum(not q["sql"].startswith("INSERT") for q in ctx.captured_queries)
+
+        count(1)
+        assert count(10) == count(100)
+
+    def test_xlsx_and_invalid_headers(self):
+        """XLSX en modo read_only y encabezados obligatorios"""
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Fecha", "Descripción", "Monto", "Tipo", "Categoría"])
+        sheet.append([date(2025, 3, 5), "Almuerzo", 25000, "gasto", "comida"])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        result = TransactionImportService.import_file(self.user, self.account, buffer, "xlsx")
+        assert result["imported"] == 1
+        assert Transaction.objects.get(description="Almuerzo").category == self.food
+
+        with self.assertRaises(ImportFileError):
+            self._import(["descripcion,categoria", "x,Comida"])
+
+    def test_endpoint_and_command(self):
+        """El endpoint multipart y el comando usan el mismo servicio"""
+        client = Client()
+        token = Token.objects.create(user=self.user)
+        upload = SimpleUploadedFile(
+            "extracto.csv", b"fecha;monto;categoria\n2025-03-01;-5000;Comida\n", "text/csv"
+        )
+        response = client.post(
+            "/api/transactions/import/",
+            {"file": upload, "origin_account": self.account.id},
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        assert response.status_code == 201
+        assert response.json()["imported"] == 1
+
+        response = client.post(
+            "/api/transactions/import/",
+            {"file": SimpleUploadedFile("extracto.pdf", b"x"), "origin_account": self.account.id},
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            "/api/transactions/import/",
+            {
+                "file": SimpleUploadedFile("extracto.csv", b"x"),
+                "origin_account": self.account.id,
+                "on_duplicate": "otro",
+            },
+            HTTP_AUTHORIZATION=f"Token {token.key}",
+        )
+        assert response.status_code == 400
+        assert "on_duplicate" in response.json()
+
+        path = self._write_temp_csv("fecha,monto,categoria\n2025-03-02,-7000,Comida\n")
+        out = io.StringIO()
+        call_command(
+            "import_transactions",
+            path,
+            user_id=self.user.id,
+            account_id=self.account.id,
+            stdout=out,
+        )
+        assert "Importadas: 1" in out.getvalue()
+        assert Transaction.objects.filter(user=self.user).count() == 2
+
+    def _write_temp_csv(self, content):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w") as handle:
+            handle.write(content)
+        self.addCleanup(os.remove, path)
+        return path
@@ -0,0 +1,120 @@
+"""
+Tests para la instrumentación por etapas de la escritura de transacciones
+"""
+
+import io
+from contextlib import redirect_stdout
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from categories.models import Category
+from transactions.instrumentation import STAGES, TransactionWriteMetrics
+
+User = get_user_model()
+
+
+class TransactionWriteMetricsTests(TestCase):
+    """Tiempos por etapa solo con la instrumentación activada, sin prints"""
+
+    def setUp(self):
+        TransactionWriteMetrics.reset()
+        self.addCleanup(TransactionWriteMetrics.reset)
+        self.user = User.objects.create_user(
+            identification="55501019",
+            username="metrics",
+            email="metrics@example.com",
+            password="testpass123",
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Banco",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+        )
+        self.food = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        self.client = Client()
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+
+    def _create(self):
+        payload = {
+            "origin_account": self.account.id,
+            "category": self.food.id,
+            "type": 2,
+            # Monto total en centavos: el camino que antes escribía en stdout
+            "total_amount": 10000,
+            "date": "2025-03-01",
+        }
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            response = self.client.post("/api/transactions/", payload, **self.auth)
+        assert response.status_code == 201
+        return stdout.getvalue()
+
+    def test_disabled_records_nothing_and_prints_nothing(self):
+        assert self._create() == ""
+        stages = TransactionWriteMetrics.snapshot()["stages"]
+        assert all(stage["count"] == 0 for stage in stages.values())
+
+    @override_settings(TRANSACTION_WRITE_METRICS_ENABLED=True)
+    def test_enabled_records_every_stage_with_exclusive_times(self):
+        self._create()
+        self._create()
+
+        snapshot = TransactionWriteMetrics.snapshot()
+        assert snapshot["enabled"] is True
+        stages = snapshot["stages"]
+        assert list(stages) == list(STAGES)
+        # Validación: serializer y límites de saldo en cada creación
+        assert stages["validation"]["count"] == 4
+        for name in ("save", "signals", "balance"):
+            assert stages[name]["count"] == 2
+            assert stages[name]["max_ms"] <= stages[name]["total_ms"]
+        # Con categoría no se resuelven reglas
+        assert stages["rules"]["count"] == 0
+
+        # Las etapas anidadas se descuentan de la externa
+        with TransactionWriteMetrics.stage("signals"), TransactionWriteMetrics.stage("save"):
+            pass
+        assert TransactionWriteMetrics.snapshot()["stages"]["signals"]["count"] == 3
+
+    @override_settings(TRANSACTION_WRITE_METRICS_ENABLED=True)
+    def test_endpoint_is_admin_only_and_can_reset(self):
+        self._create()
+        assert self.client.get("/api/transactions/write-metrics/", **self.auth).status_code == 403
+
+        User.objects.filter(pk=self.user.pk).update(role="admin", is_verified=True)
+        # GET solo lee; el reinicio es un POST que lee y reinicia a la vez
+        response = self.client.get("/api/transactions/write-metrics/?reset=true", **self.auth)
+        assert response.status_code == 200
+        assert response.json()["data"]["stages"]["balance"]["count"] == 1
+        assert TransactionWriteMetrics.snapshot()["stages"]["balance"]["count"] == 1
+
+        response = self.client.post("/api/transactions/write-metrics/", **self.auth)
+        assert response.status_code == 200
+        assert response.json()["data"]["stages"]["balance"]["count"] == 1
+        assert TransactionWriteMetrics.snapshot()["stages"]["balance"]["count"] == 0
+
+    @override_settings(TRANSACTION_WRITE_METRICS_ENABLED=True)
+    def test_update_times_serializer_validation(self):
+        self._create()
+        results = self.client.get("/api/transactions/", **self.auth).json()["results"]
+        transaction_id = results[0]["id"]
+        TransactionWriteMetrics.reset()
+
+        response = self.client.patch(
+            f"/api/transactions/{transaction_id}/",
+            {"total_amount": 20000},
+            content_type="application/json",
+            **self.auth,
+        )
+        assert response.status_code == 200
+        # Serializer y límites de saldo, igual que en la creación
+        assert TransactionWriteMetrics.snapshot()["stages"]["validation"]["count"] == 2
@@ -0,0 +1,141 @@
+"""
+Tests para la paginación por cursor del listado de transacciones
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from categories.models import Category
+from transactions.models import Transaction
+
+User = get_user_model()
+
+
+class TransactionCursorPaginationTests(TestCase):
+    """Tests del listado paginado por cursor (created_at, id)"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            identification="55500011",
+            username="cursoruser",
+            email="cursor@example.com",
+            password="testpass123",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth_headers = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Cuenta cursor",
+            account_type="asset",
+            category="bank_account",
+            current_balance=Decimal("1000000.00"),
+            currency="COP",
+        )
+        self.food = Category.objects.create(
+            user=self.user, name="Comida", type="expense", color="#DC2626", icon="fa-utensils"
+        )
+        self.transport = Category.objects.create(
+            user=self.user, name="Transporte", type="expense", color="#EA580C", icon="fa-car"
+        )
+
+        for i in range(7):
+            Transaction.objects.create(
+                user=self.user,
+                origin_account=self.account,
+                category=self.food if i % 2 == 0 else self.transport,
+                type=2,
+                base_amount=1000 + i,
+                date=date(2025, 1, 1 + i),
+            )
+
+        self.expected_ids = list(
+            Transaction.objects.filter(user=self.user)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+    def _get(self, url):
+        response = self.client.get(url, **self.auth_headers)
+        assert response.status_code == 200, response.content
+        return response.json()
+
+    def test_walks_all_pages_in_order_without_duplicates(self):
+        """Recorrer las páginas con next devuelve todas las filas una sola vez"""
+        data = self._get("/api/transactions/?page_size=3")
+        assert data["count"] == 7
+        assert data["count_is_estimate"] is False
+        assert data["previous"] is None
+
+        seen = [row["id"] for row in data["results"]]
+        pages = 1
+        while data["next"]:
+            data = self._get(data["next"])
+            # En páginas siguientes el conteo se omite por defecto
+            assert data["count"] is None
+            seen.extend(row["id"] for row in data["results"])
+            pages += 1
+
+        assert pages == 3
+        assert seen == self.expected_ids
+
+    def test_previous_link_returns_previous_page(self):
+        """El cursor previous devuelve exactamente la página anterior"""
+        first = self._get("/api/transactions/?page_size=3")
+        second = self._get(first["next"])
+        back = self._get(second["previous"])
+
+        assert [row["id"] for row in back["results"]] == [row["id"] for row in first["results"]]
+        assert back["previous"] is None
+        assert back["next"] is not None
+
+    def test_works_with_transaction_filter(self):
+        """Los filtros de TransactionFilter se aplican antes del cursor"""
+        data = self._get(f"/api/transactions/?page_size=2&category={self.food.id}")
+        seen = [row["id"] for row in data["results"]]
+        while data["next"]:
+            data = self._get(data["next"])
+            seen.extend(row["id"] for row in data["results"])
+
+        expected = list(
+            Transaction.objects.filter(user=self.user, category=self.food)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+        assert seen == expected
+
+        data = self._get(
+            "/api/transactions/?page_size=10&start_date=2025-01-03&end_date=2025-01-05"
+        )
+        assert data["count"] == 3
+
+    def test_count_modes(self):
+        """count=none omite el total y count=estimated lo marca como estimado si aplica"""
+        data = self._get("/api/transactions/?page_size=2&count=none")
+        assert data["count"] is None
+
+        data = self._get("/api/transactions/?page_size=2&count=estimated")
+        # Con pocas filas el conteo acotado es exacto
+        assert data["count"] == 7
+        assert data["count_is_estimate"] is False
+
+        second = self._get(data["next"] + "&count=exact")
+        assert second["count"] == 7
+
+    def test_invalid_cursor_returns_404(self):
+        """Un cursor corrupto responde 404"""
+        response = self.client.get("/api/transactions/?cursor=no-es-un-cursor", **self.auth_headers)
+        assert response.status_code == 404
+
+    def test_without_cursor_params_keeps_full_listing(self):
+        """Sin parámetros de cursor se mantiene la respuesta completa"""
+        data = self._get("/api/transactions/")
+        assert data["count"] == 7
+        assert len(data["results"]) == 7
+        assert "next" not in data
@@ -0,0 +1,85 @@
+"""
+Tests para la conversión en lote FxService.convert_many
+"""
+
+import random
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from utils.currency_converter import FxService
+from utils.models import ExchangeRate
+from utils.rate_snapshot import ExchangeRateSnapshot
+
+
+class ConvertManyTests(TestCase):
+    """convert_many debe ser idéntico a convert_amount fila por fila"""
+
+    def setUp(self):
+        for month in (1, 3, 6):
+            ExchangeRate.objects.create(
+                base_currency="COP",
+                currency="USD",
+                year=2025,
+                month=month,
+                rate=Decimal("4000.333333") + month,
+            )
+        ExchangeRate.objects.create(
+            base_currency="EUR", currency="COP", year=2025, month=2, rate=Decimal("0.000231")
+        )
+
+    def test_bit_identical_to_scalar_path(self):
+        """Montos, tasas y advertencias coinciden con la ruta escalar"""
+        rng = random.Random(7)
+        amounts = [rng.randint(-10_000_000, 10_000_000) for _ in range(300)]
+        currencies = [rng.choice(["COP", "USD", "EUR"]) for _ in range(300)]
+        dates = [date(2025, rng.randint(1, 12), rng.randint(1, 28)) for _ in range(300)]
+
+        converted, rates, warnings = FxService.convert_many(amounts, currencies, dates, "COP")
+
+        for i in range(300):
+            expected = FxService.convert_amount(amounts[i], currencies[i], "COP", dates[i])
+            assert (converted[i], rates[i], warnings[i]) == expected
+
+    def test_resolves_rates_without_per_row_queries(self):
+        """El costo en consultas no depende del número de filas"""
+        ExchangeRateSnapshot.invalidate()
+        with CaptureQueriesContext(connection) as ctx:
+            FxService.convert_many(
+                [100] * 500, ["USD"] * 500, [date(2025, 1 + i % 12, 1) for i in range(500)], "COP"
+            )
+        assert len(ctx.captured_queries) <= 2
+
+    def test_skip_errors(self):
+        """Sin tipo de cambio: ValueError, o None y advertencia con skip_errors"""
+        with self.assertRaises(ValueError):
+            FxService.convert_many([100], ["USD"], [date(2025, 1, 1)], "GBP")
+
+        converted, rates, warnings = FxService.convert_many(
+            [100, 200], ["USD", "GBP"], [date(2025, 1, 1)] * 2, "GBP", skip_errors=True
+        )
+        assert converted == [None, 200]
+        assert rates == [None, Decimal(1)]
+        assert "USD->GBP" in warnings[0]
+        assert warnings[1] is None
+
+    def test_length_mismatch(self):
+        """Secuencias de distinto largo son un error"""
+        with self.assertRaises(ValueError):
+            FxService.convert_many([1, 2], ["COP"], [date(2025, 1, 1)], "COP")
+
+    def test_empty_input(self):
+        """Entrada vacía devuelve listas vacías"""
+        assert FxService.convert_many([], [], [], "COP") == ([], [], [])
+
+    def test_select_rate_precedence(self):
+        """select_rate: identidad, directa, inversa, estática o ValueError"""
+        assert FxService.select_rate("COP", "COP", Decimal(5)) == Decimal(1)
+        assert FxService.select_rate("USD", "COP", Decimal(4000), Decimal("0.0002")) == 4000
+        assert FxService.select_rate("USD", "COP", None, Decimal("0.0002")) == Decimal(5000)
+        assert FxService.select_rate("USD", "COP") > 0
+        with self.assertRaises(ValueError):
+            FxService.select_rate("USD", "GBP")
@@ -0,0 +1,87 @@
+"""
+Tests para el snapshot en memoria de tipos de cambio
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from utils.currency_converter import FxService
+from utils.models import ExchangeRate
+from utils.rate_snapshot import ExchangeRateSnapshot
+
+
+class ExchangeRateSnapshotTests(TestCase):
+    """Búsqueda, invalidación y equivalencia del snapshot"""
+
+    def setUp(self):
+        ExchangeRateSnapshot.invalidate()
+        for year, month, rate in [(2024, 11, "3900"), (2025, 1, "4000"), (2025, 4, "4200")]:
+            ExchangeRate.objects.create(
+                base_currency="COP", currency="USD", year=year, month=month, rate=Decimal(rate)
+            )
+
+    def test_latest_on_or_before_month(self):
+        """La búsqueda binaria devuelve el último registro <= mes"""
+        snapshot = ExchangeRateSnapshot.get()
+        assert snapshot.latest("USD", "COP", 2024, 10) is None
+        assert snapshot.latest("USD", "COP", 2024, 12)[:2] == (2024, 11)
+        assert snapshot.latest("USD", "COP", 2025, 1)[:2] == (2025, 1)
+        assert snapshot.latest("USD", "COP", 2025, 3)[:2] == (2025, 1)
+        assert snapshot.latest("USD", "COP", 2030, 1)[:2] == (2025, 4)
+        assert snapshot.latest("EUR", "COP", 2025, 1) is None
+
+    def test_warnings_are_preserved(self):
+        """Mes exacto sin advertencia, mes faltante con la advertencia de siempre"""
+        rate, warning = FxService._get_rate_record("USD", "COP", date(2025, 1, 15))
+        assert rate == Decimal(4000)
+        assert warning is None
+
+        rate, warning = FxService._get_rate_record("USD", "COP", date(2025, 3, 15))
+        assert rate == Decimal(4000)
+        assert warning == (
+            "No hay tipo de cambio para USD->COP en 2025-03. Usando tasa de 2025-01: 4000.000000"
+        )
+
+        rate, warning = FxService._get_rate_record("COP", "USD", date(2025, 2, 1))
+        assert rate == Decimal(1) / Decimal(4000)
+        assert warning == (
+            "No hay tipo de cambio para COP->USD en 2025-02. Usando tasa inversa de 2025-01"
+        )
+
+    def test_save_and_delete_invalidate_snapshot(self):
+        """Crear, modificar o borrar una tasa se refleja en la siguiente conversión"""
+        assert FxService.convert_amount(100, "USD", "COP", date(2025, 2, 1))[1] == Decimal(4000)
+
+        new_rate = ExchangeRate.objects.create(
+            base_currency="COP", currency="USD", year=2025, month=2, rate=Decimal(4100)
+        )
+        assert FxService.convert_amount(100, "USD", "COP", date(2025, 2, 1))[1] == Decimal(4100)
+
+        new_rate.rate = Decimal(4150)
+        new_rate.save()
+        assert FxService.convert_amount(100, "USD", "COP", date(2025, 2, 1))[1] == Decimal(4150)
+
+        new_rate.delete()
+        assert FxService.convert_amount(100, "USD", "COP", date(2025, 2, 1))[1] == Decimal(4000)
+
+    def test_version_stamp_detects_changes_without_signals(self):
+        """Un snapshot obsoleto (p. ej. de otro worker) se recarga por la marca de versión"""
+        ExchangeRateSnapshot._current = ExchangeRateSnapshot(
+            ("obsoleta", None, None), [("USD", "COP", 2025, 1, Decimal(1))]
+        )
+        rate, _ = FxService._get_rate_record("USD", "COP", date(2025, 1, 15))
+        assert rate == Decimal(4000)
+
+    @override_settings(FX_RATES_SNAPSHOT_TTL=60)
+    def test_confirmed_snapshot_is_reused_without_queries(self):
+        """Fuera de un bloque atómico el snapshot confirmado no consulta la base de datos"""
+        snapshot = ExchangeRateSnapshot.get()
+        snapshot.confirmed = True
+        with CaptureQueriesContext(connection) as ctx:
+            for month in range(1, 13):
+                FxService.convert_amount(100, "USD", "COP", date(2025, month, 1))
+        assert len(ctx.captured_queries) == 0
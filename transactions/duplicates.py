@@ -0,0 +1,124 @@
+"""
+Detección de transacciones duplicadas por huella (Transaction.fingerprint)
+
+La huella se calcula en Transaction.save() y antes de bulk_create; aquí se
+consulta con el índice (user, fingerprint) para:
+- marcar u omitir posibles duplicados al crear una transacción o importar un extracto,
+- generar el reporte de duplicados del usuario con una sola consulta agrupada.
+"""
+
+import logging
+
+from django.db.models import Count
+
+from .models import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateDetectionService:
+    # Política ante un posible duplicado
+    FLAG = "flag"  # Se guarda igual y se informa el duplicado
+    SKIP = "skip"  # No se guarda
+    POLICIES = (FLAG, SKIP)
+
+    @staticmethod
+    def validate_policy(value, default):
+        """Política recibida en la petición (o la por defecto si no viene)"""
+        if value in (None, ""):
+            return default
+        if value not in DuplicateDetectionService.POLICIES:
+            msg = (
+                f"Política de duplicados inválida: '{value}'. "
+                f"Use {' o '.join(DuplicateDetectionService.POLICIES)}."
+            )
+            raise ValueError(msg)
+        return value
+
+    @staticmethod
+    def fingerprint_for(user, validated_data):
+        """
+        Huella que tendría una transacción con estos datos, sin guardarla
+        (los montos finales se calculan igual que en save()).
+        """
+        data = {key: value for key, value in validated_data.items() if not key.startswith("_")}
+        data["user"] = user
+        transaction = Transaction(**data)
+        transaction.calculate_amounts()
+        transaction.update_fingerprint()
+        return transaction.fingerprint
+
+    @staticmethod
+    def find_matches(user, fingerprints):
+        """
+        Transacciones existentes con alguna de las huellas dadas.
+
+        Returns:
+            dict: huella -> lista de IDs (en orden de creación)
+        """
+        fingerprints = {fingerprint for fingerprint in fingerprints if fingerprint}
+        if not fingerprints:
+            return {}
+
+        matches = {}
+        rows = (
+            Transaction.objects.filter(user=user, fingerprint__in=fingerprints)
+            .order_by("id")
+            .values_list("fingerprint", "id")
+        )
+        for fingerprint, transaction_id in rows:
+            matches.setdefault(fingerprint, []).append(transaction_id)
+        return matches
+
+    @staticmethod
+    def find_duplicates(user, start_date=None, end_date=None):
+        """
+        Reporte de posibles duplicados del usuario.
+
+        Las huellas repetidas se agrupan en una subconsulta, así que todo el
+        reporte es una sola consulta (sin comparar transacciones entre sí).
+
+        Returns:
+            list[dict]: Un grupo por huella repetida con 'fingerprint', 'count'
+            y 'transactions' (id, fecha, monto, descripción, cuenta, creación)
+        """
+        queryset = Transaction.objects.filter(user=user, fingerprint__isnull=False)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+
+        repeated = (
+            queryset.values("fingerprint")
+            .annotate(repetitions=Count("id"))
+            .filter(repetitions__gt=1)
+            .values("fingerprint")
+        )
+        rows = (
+            queryset.filter(fingerprint__in=repeated)
+            .order_by("fingerprint", "id")
+            .values(
+                "id",
+                "fingerprint",
+                "date",
+                "total_amount",
+                "description",
+                "origin_account_id",
+                "created_at",
+            )
+        )
+
+        groups = {}
+        for row in rows:
+            fingerprint = row.pop("fingerprint")
+            groups.setdefault(fingerprint, []).append(row)
+
+        report = [
+            {"fingerprint": fingerprint, "count": len(transactions), "transactions": transactions}
+            for fingerprint, transactions in groups.items()
+        ]
+        # Los grupos más recientes primero
+        report.sort(key=lambda group: group["transactions"][0]["date"], reverse=True)
+
+        logger.info(f"Usuario {user.id}: {len(report)} grupos de posibles duplicados")
+        return report
@@ -0,0 +1,50 @@
+"""
+Huella (fingerprint) de transacciones para detectar duplicados
+
+Dos transacciones con el mismo usuario, cuenta de origen, fecha, monto total y
+descripción normalizada tienen la misma huella. Se guarda indexada en
+Transaction.fingerprint, así que encontrar duplicados es una búsqueda por
+índice o una agrupación, no una comparación de todos contra todos.
+"""
+
+import hashlib
+import re
+import unicodedata
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_description(description):
+    """
+    Descripción comparable: sin tildes, en minúsculas y sin puntuación ni
+    espacios repetidos ("  Pago ÉXITO #12 " -> "pago exito 12").
+    """
+    if not description:
+        return ""
+    text = unicodedata.normalize("NFKD", str(description))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALPHANUMERIC.sub(" ", text.lower()).strip()
+
+
+def compute_fingerprint(user_id, origin_account_id, date, total_amount, description):
+    """
+    Huella SHA-256 (hex) de los campos que identifican un movimiento.
+
+    Args:
+        user_id: ID del usuario
+        origin_account_id: ID de la cuenta de origen
+        date: Fecha de la transacción (date o texto AAAA-MM-DD)
+        total_amount: Monto total en centavos
+        description: Descripción tal como se guarda (se normaliza aquí)
+    """
+    key = "|".join(
+        (
+            str(user_id),
+            str(origin_account_id),
+            # str(date) de un date es AAAA-MM-DD, igual que el texto que acepta el modelo
+            str(date)[:10],
+            str(total_amount),
+            normalize_description(description),
+        )
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
@@ -0,0 +1,583 @@
+"""
+Importación masiva de extractos bancarios (CSV y XLSX)
+
+El archivo se lee en streaming y se procesa por lotes. En cada lote:
+- se validan las filas y se construyen las transacciones en memoria,
+- se omiten (o solo se marcan) las filas que ya existen según su huella
+  (ver transactions/duplicates.py), para poder reimportar extractos que se solapan,
+- se aplican las reglas automáticas en memoria (sin un segundo save),
+- se valida el saldo resultante de la cuenta con el delta neto del lote,
+- se insertan con bulk_create y se aplica un único delta de saldo a la cuenta,
+- se actualizan el resumen mensual de analytics, los contadores de
+  presupuestos y las metas una vez por lote, y se evalúan las alertas de
+  presupuesto sobre el cambio total del lote.
+
+Columnas reconocidas (encabezado en la primera fila, sin distinguir mayúsculas):
+    fecha/date (obligatoria), monto/amount (obligatoria, en unidades de la
+    moneda de la cuenta; "1.234,56" y "1,234.56" son válidos, "1.500" es
+    ambiguo y se rechaza), descripcion/description, tipo/type, categoria/category,
+    etiqueta/tag, nota/note, meta/goal
+
+Si no hay columna de tipo, un monto negativo es un gasto y uno positivo un ingreso.
+"""
+
+import csv
+import io
+import logging
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import Account
+from accounts.snapshots import AccountSnapshotService
+from analytics.cache import AnalyticsCache
+from analytics.rollups import MonthlySummaryService
+from budgets.counters import BudgetSpendService
+from budgets.signals import budget_spend_changed
+from categories.models import Category
+from goals.models import Goal
+from goals.services import GoalService
+from rules.services import RuleEngineService
+
+from .duplicates import DuplicateDetectionService
+from .models import Transaction
+from .services import TransactionService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+# Máximo de errores de fila detallados en el resultado (el total siempre se cuenta)
+MAX_REPORTED_ERRORS = 100
+
+SUPPORTED_FORMATS = ("csv", "xlsx")
+
+HEADER_ALIASES = {
+    "date": {"date", "fecha"},
+    "amount": {"amount", "monto", "valor", "importe"},
+    "description": {"description", "descripcion", "descripción", "concepto", "detalle"},
+    "type": {"type", "tipo"},
+    "category": {"category", "categoria", "categoría"},
+    "tag": {"tag", "etiqueta"},
+    "note": {"note", "nota"},
+    "goal": {"goal", "meta"},
+}
+REQUIRED_COLUMNS = ("date", "amount")
+
+TYPE_ALIASES = {
+    "1": TransactionService.INCOME,
+    "income": TransactionService.INCOME,
+    "ingreso": TransactionService.INCOME,
+    "2": TransactionService.EXPENSE,
+    "expense": TransactionService.EXPENSE,
+    "gasto": TransactionService.EXPENSE,
+    "4": TransactionService.SAVING,
+    "saving": TransactionService.SAVING,
+    "ahorro": TransactionService.SAVING,
+}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+
+
+class ImportFileError(ValueError):
+    """El archivo no se puede leer (formato, encabezados)"""
+
+
+class TransactionImportService:
+    """
+    Uso:
+        with open("extracto.csv", "rb") as f:
+            result = TransactionImportService.import_file(user, account, f, "csv")
+    """
+
+    @staticmethod
+    def detect_format(filename):
+        """Formato a partir de la extensión del archivo"""
+        extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if extension not in SUPPORTED_FORMATS:
+            msg = f"Formato no soportado: '{extension}'. Use CSV o XLSX."
+            raise ImportFileError(msg)
+        return extension
+
+    @staticmethod
+    def import_file(
+        user,
+        account,
+        fileobj,
+        file_format,
+        *,
+        batch_size=DEFAULT_BATCH_SIZE,
+        on_duplicate=DuplicateDetectionService.SKIP,
+    ):
+        """
+        Importa un extracto en la cuenta indicada.
+
+        Args:
+            user: Usuario propietario
+            account: Cuenta de origen de todos los movimientos
+            fileobj: Archivo binario (subido o abierto en modo 'rb')
+            file_format: 'csv' o 'xlsx'
+            batch_size: Filas por lote
+            on_duplicate: 'skip' omite las filas que ya existen; 'flag' las importa
+                y solo las informa en duplicate_rows
+
+        Returns:
+            dict: imported, failed, duplicates, rules_applied, batches, errors,
+            duplicate_rows
+
+        Raises:
+            ImportFileError: Si el archivo no se puede leer
+        """
+        if account.user_id != user.id:
+            msg = "La cuenta no pertenece al usuario."
+            raise ImportFileError(msg)
+
+        on_duplicate = DuplicateDetectionService.validate_policy(
+            on_duplicate, DuplicateDetectionService.SKIP
+        )
+
+        result = {
+            "imported": 0,
+            "failed": 0,
+            "duplicates": 0,
+            "rules_applied": 0,
+            "batches": 0,
+            "errors": [],
+            "duplicate_rows": [],
+        }
+        context = {
+            "categories": {
+                (category.name.strip().lower(), category.type): category
+                for category in Category.objects.filter(user=user)
+            },
+            "goals": {goal.name.strip().lower(): goal for goal in Goal.objects.filter(user=user)},
+            "matcher": RuleEngineService.get_matcher(user),
+            "on_duplicate": on_duplicate,
+            # Por huella: filas ya emparejadas con una transacción previa y filas
+            # insertadas por esta importación (que los lotes siguientes también ven)
+            "matched": Counter(),
+            "inserted": Counter(),
+        }
+
+        batch = []
+        for row_number, row in TransactionImportService._iter_rows(fileobj, file_format):
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                TransactionImportService._process_batch(user, account, batch, context, result)
+                batch = []
+        if batch:
+            TransactionImportService._process_batch(user, account, batch, context, result)
+
+        logger.info(
+            f"Importación de usuario {user.id} en cuenta {account.id}: "
+            f"{result['imported']} importadas, {result['failed']} con error, "
+            f"{result['duplicates']} duplicadas, "
+            f"{result['batches']} lotes"
+        )
+        return result
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _iter_rows(fileobj, file_format):
+        """Genera (número de fila, dict columna -> valor) sin cargar el archivo completo"""
+        if file_format == "csv":
+            rows = TransactionImportService._iter_csv(fileobj)
+        elif file_format == "xlsx":
+            rows = TransactionImportService._iter_xlsx(fileobj)
+        else:
+            msg = f"Formato no soportado: '{file_format}'. Use CSV o XLSX."
+            raise ImportFileError(msg)
+
+        header = next(rows, None)
+        if header is None:
+            msg = "El archivo está vacío."
+            raise ImportFileError(msg)
+
+        columns = TransactionImportService._map_header(header)
+        # La fila 1 es el encabezado
+        for row_number, values in enumerate(rows, start=2):
+            if not any(value not in (None, "") for value in values):
+                continue
+            yield (
+                row_number,
+                {
+                    field: values[index] if index < len(values) else None
+                    for field, index in columns.items()
+                },
+            )
+
+    @staticmethod
+    def _iter_csv(fileobj):
+        binary = getattr(fileobj, "file", fileobj)
+        text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+        try:
+            sample = text.read(4096)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.reader(text, dialect)
+        except UnicodeDecodeError as e:
+            msg = "El archivo CSV debe estar codificado en UTF-8."
+            raise ImportFileError(msg) from e
+        finally:
+            # No cerrar el archivo del llamador al liberar el wrapper
+            text.detach()
+
+    @staticmethod
+    def _iter_xlsx(fileobj):
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+
+        try:
+            workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        except (InvalidFileException, OSError, KeyError) as e:
+            msg = "El archivo XLSX no es válido."
+            raise ImportFileError(msg) from e
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _map_header(header):
+        columns = {}
+        for index, name in enumerate(header):
+            normalized = str(name or "").strip().lower()
+            for field, aliases in HEADER_ALIASES.items():
+                if normalized in aliases and field not in columns:
+                    columns[field] = index
+        missing = [field for field in REQUIRED_COLUMNS if field not in columns]
+        if missing:
+            msg = f"Faltan columnas obligatorias: {', '.join(missing)}."
+            raise ImportFileError(msg)
+        return columns
+
+    # ------------------------------------------------------------------
+    # Validación de filas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _parse_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        text = str(value or "").strip()
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).date()
+            except ValueError:
+                continue
+        msg = f"Fecha inválida: '{text}'. Use AAAA-MM-DD o DD/MM/AAAA."
+        raise ValueError(msg)
+
+    @staticmethod
+    def _parse_amount(value):
+        """Monto en centavos (con signo)"""
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            amount = Decimal(str(value))
+        else:
+            text = TransactionImportService._normalize_amount_text(value)
+            try:
+                amount = Decimal(text) if text is not None else None
+            except InvalidOperation:
+                amount = None
+        if amount is None or not amount.is_finite():
+            msg = f"Monto inválido: '{value}'."
+            raise ValueError(msg)
+        cents = int((amount * 100).to_integral_value())
+        if cents == 0:
+            msg = "El monto debe ser distinto de cero."
+            raise ValueError(msg)
+        return cents
+
+    @staticmethod
+    def _normalize_amount_text(value):
+        """
+        Texto de monto con punto decimal y sin separadores de miles, o None si
+        es ambiguo o inválido.
+
+        Acepta "1.234,56" (miles con punto), "1,234.56" (miles con coma),
+        "1.500.000" y "-15000,50". Con ambos separadores, el último es el
+        decimal. Un único separador seguido de exactamente tres dígitos
+        ("1.500", "1,500") es ambiguo y se rechaza.
+        """
+        text = str(value or "").strip().replace("$", "").replace(" ", "")
+        sign = ""
+        if text and text[0] in "+-":
+            sign, text = text[0], text[1:]
+
+        separators = {char for char in text if char in ".,"}
+        integer, fraction = text, ""
+        if len(separators) == 2:
+            decimal_mark = "," if text.rfind(",") > text.rfind(".") else "."
+            integer, _, fraction = text.rpartition(decimal_mark)
+            if decimal_mark in integer:
+                return None
+        elif separators:
+            (mark,) = separators
+            parts = text.split(mark)
+            if len(parts) == 2 and len(parts[1]) != 3:
+                integer, fraction = parts
+            elif len(parts) == 2:
+                return None
+
+        groups = integer.replace(",", ".").split(".")
+        valid_groups = groups[0].isdigit() and all(
+            len(group) == 3 and group.isdigit() for group in groups[1:]
+        )
+        if not valid_groups or (len(groups) > 1 and len(groups[0]) > 3):
+            return None
+        if fraction and not fraction.isdigit():
+            return None
+        return f"{sign}{''.join(groups)}.{fraction or 0}"
+
+    @staticmethod
+    def _build_transaction(user, account, row, context):
+        """
+        Construye la transacción de una fila (sin guardarla).
+
+        Returns:
+            tuple: (Transaction | None, dict de errores por campo)
+        """
+        errors = {}
+        try:
+            txn_date = TransactionImportService._parse_date(row.get("date"))
+        except ValueError as e:
+            errors["date"] = str(e)
+            txn_date = None
+        try:
+            amount_cents = TransactionImportService._parse_amount(row.get("amount"))
+        except ValueError as e:
+            errors["amount"] = str(e)
+            amount_cents = None
+
+        raw_type = str(row.get("type") or "").strip().lower()
+        if raw_type:
+            txn_type = TYPE_ALIASES.get(raw_type)
+            if txn_type is None:
+                errors["type"] = f"Tipo inválido: '{row.get('type')}'. Use ingreso, gasto o ahorro."
+        elif amount_cents is not None:
+            txn_type = TransactionService.EXPENSE if amount_cents < 0 else TransactionService.INCOME
+        else:
+            txn_type = None
+
+        category = None
+        category_name = str(row.get("category") or "").strip()
+        if category_name and txn_type is not None:
+            if txn_type == TransactionService.SAVING:
+                errors["category"] = "Los ahorros no llevan categoría."
+            else:
+                category_type = (
+                    Category.INCOME if txn_type == TransactionService.INCOME else Category.EXPENSE
+                )
+                category = context["categories"].get((category_name.lower(), category_type))
+                if category is None:
+                    errors["category"] = (
+                        f"No existe una categoría de tipo '{category_type}' "
+                        f"llamada '{category_name}'."
+                    )
+
+        goal = None
+        goal_name = str(row.get("goal") or "").strip()
+        if goal_name:
+            goal = context["goals"].get(goal_name.lower())
+            if goal is None:
+                errors["goal"] = f"No existe una meta llamada '{goal_name}'."
+            elif txn_type != TransactionService.SAVING:
+                errors["goal"] = "Solo se pueden asignar metas a transacciones de ahorro."
+            elif goal.currency != account.currency:
+                errors["goal"] = (
+                    f"La moneda de la meta ({goal.currency}) debe coincidir con la moneda "
+                    f"de la cuenta ({account.currency})."
+                )
+
+        if errors:
+            return None, errors
+
+        transaction = Transaction(
+            user=user,
+            origin_account=account,
+            category=category,
+            goal=goal,
+            type=txn_type,
+            base_amount=abs(amount_cents),
+            date=txn_date,
+            description=(str(row.get("description") or "").strip()[:255] or None),
+            tag=(str(row.get("tag") or "").strip()[:100] or None),
+            note=(str(row.get("note") or "").strip()[:500] or None),
+            transaction_currency=account.currency,
+        )
+        transaction.calculate_amounts()
+        transaction.update_fingerprint()
+        return transaction, {}
+
+    # ------------------------------------------------------------------
+    # Escritura por lote
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _record_errors(result, entries):
+        result["failed"] += len(entries)
+        room = MAX_REPORTED_ERRORS - len(result["errors"])
+        if room > 0:
+            result["errors"].extend(entries[:room])
+
+    @staticmethod
+    def _split_duplicates(user, transactions, row_numbers, context, result):
+        """
+        Empareja las filas del lote con transacciones que ya existían antes de
+        la importación (una consulta por lote sobre el índice de huellas).
+
+        Cada transacción previa empareja como máximo una fila, así que un
+        extracto con dos movimientos idénticos reimportado sobre uno que solo
+        tenía uno deja pasar el segundo.
+
+        Returns:
+            tuple: (transacciones a guardar, sus números de fila)
+        """
+        matches = DuplicateDetectionService.find_matches(
+            user, (txn.fingerprint for txn in transactions)
+        )
+        if not matches:
+            return transactions, row_numbers
+
+        skip = context["on_duplicate"] == DuplicateDetectionService.SKIP
+        matched = context["matched"]
+        kept, kept_rows, duplicate_rows = [], [], []
+        for txn, row_number in zip(transactions, row_numbers, strict=True):
+            existing = matches.get(txn.fingerprint, [])
+            # Las insertadas por lotes anteriores de este archivo tienen los IDs más altos
+            previous = existing[: max(len(existing) - context["inserted"][txn.fingerprint], 0)]
+            if matched[txn.fingerprint] < len(previous):
+                duplicate_rows.append(
+                    {"row": row_number, "duplicate_of": previous[matched[txn.fingerprint]]}
+                )
+                matched[txn.fingerprint] += 1
+                if skip:
+                    continue
+            kept.append(txn)
+            kept_rows.append(row_number)
+
+        result["duplicates"] += len(duplicate_rows)
+        room = MAX_REPORTED_ERRORS - len(result["duplicate_rows"])
+        if room > 0:
+            result["duplicate_rows"].extend(duplicate_rows[:room])
+        return kept, kept_rows
+
+    @staticmethod
+    def _process_batch(user, account, batch, context, result):
+        result["batches"] += 1
+
+        transactions = []
+        row_numbers = []
+        row_errors = []
+        for row_number, row in batch:
+            transaction, errors = TransactionImportService._build_transaction(
+                user, account, row, context
+            )
+            if errors:
+                row_errors.append({"row": row_number, "errors": errors})
+            else:
+                transactions.append(transaction)
+                row_numbers.append(row_number)
+        TransactionImportService._record_errors(result, row_errors)
+
+        transactions, row_numbers = TransactionImportService._split_duplicates(
+            user, transactions, row_numbers, context, result
+        )
+        if not transactions:
+            return
+
+        rules_applied = RuleEngineService.apply_rules_in_memory(
+            user, transactions, context["matcher"]
+        )
+
+        try:
+            with db_transaction.atomic():
+                TransactionImportService._save_batch(user, account, transactions)
+        except ValueError as e:
+            # El lote completo dejaría la cuenta en un saldo inválido
+            TransactionImportService._record_errors(
+                result,
+                [
+                    {
+                        "row": row_number,
+                        "errors": {"origin_account": str(e)},
+                    }
+                    for row_number in row_numbers
+                ],
+            )
+            return
+
+        context["inserted"].update(txn.fingerprint for txn in transactions)
+        result["imported"] += len(transactions)
+        result["rules_applied"] += rules_applied
+
+    @staticmethod
+    def _save_batch(user, account, transactions):
+        # Delta neto de saldo del lote (los ingresos suman; gastos y ahorros restan)
+        delta_cents = sum(
+            txn.total_amount if txn.type == TransactionService.INCOME else -txn.total_amount
+            for txn in transactions
+        )
+
+        locked_account = Account.objects.select_for_update().get(pk=account.pk)
+        if delta_cents:
+            # Validar el saldo final con las mismas reglas que una transacción individual
+            TransactionService._validate_transaction_limits(
+                Transaction(
+                    type=(
+                        TransactionService.INCOME if delta_cents > 0 else TransactionService.EXPENSE
+                    ),
+                    origin_account=locked_account,
+                    total_amount=abs(delta_cents),
+                )
+            )
+
+        Transaction.objects.bulk_create(transactions, batch_size=500)
+
+        if delta_cents:
+            Account.objects.filter(pk=account.pk).update(
+                current_balance=F("current_balance") + Decimal(delta_cents) / Decimal(100),
+                updated_at=timezone.now(),
+            )
+            AccountSnapshotService.record_changes(
+                (pk, txn.date, delta)
+                for txn in transactions
+                for pk, delta in TransactionService._balance_deltas(txn).items()
+            )
+
+        # bulk_create no dispara señales: aplicar sus efectos una vez por lote
+        MonthlySummaryService.record_changes(
+            [(MonthlySummaryService.state_from_instance(txn), 1) for txn in transactions]
+        )
+
+        changes = BudgetSpendService.record_changes(
+            [(BudgetSpendService.state_from_instance(txn), 1) for txn in transactions]
+        )
+        if changes:
+            budget_spend_changed.send(
+                sender=Transaction,
+                user=user,
+                currency=account.currency,
+                created=True,
+                changes=changes,
+            )
+
+        goal_totals = {}
+        for txn in transactions:
+            if txn.goal is not None:
+                amount, count = goal_totals.get(txn.goal, (0, 0))
+                goal_totals[txn.goal] = (amount + txn.total_amount, count + 1)
+        for goal, (amount, count) in goal_totals.items():
+            GoalService.add_batch_to_goal(goal, amount, count)
+
+        AnalyticsCache.bump_user(user.id)
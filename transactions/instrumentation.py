@@ -0,0 +1,158 @@
+"""
+Instrumentación del flujo de escritura de transacciones
+
+Mide el tiempo de cada etapa al crear, editar o eliminar una transacción:
+- validation: validación del serializer y de límites de saldo
+- rules: resolución de reglas automáticas antes del INSERT
+- save: el INSERT/UPDATE de la fila (se mide con un execute_wrapper de la conexión)
+- signals: receptores de pre_save/post_save (resumen mensual, presupuestos, metas...)
+- balance: actualización de saldos de las cuentas
+
+Las etapas se pueden anidar; cada una acumula solo su tiempo propio (sin el de
+las etapas internas), así que "signals" no incluye la escritura SQL aunque la
+envuelva.
+
+Se activa con TRANSACTION_WRITE_METRICS_ENABLED. El valor se lee una vez y se
+refresca con la señal setting_changed (override_settings en tests). Desactivada,
+stage() devuelve un contexto vacío compartido: no mide tiempos, no toma locks ni
+registra nada.
+
+Los contadores agregados viven en memoria de cada proceso (cada worker reporta
+los suyos) y se exponen en GET /api/transactions/write-metrics/.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("validation", "rules", "save", "signals", "balance")
+
+_DISABLED = nullcontext()
+
+
+class TransactionWriteMetrics:
+    """
+    Uso:
+        with TransactionWriteMetrics.stage("balance"):
+            ...
+    """
+
+    _lock = threading.Lock()
+    # Valor de TRANSACTION_WRITE_METRICS_ENABLED (None: aún no leído)
+    _enabled = None
+    # Etapa -> [ejecuciones, segundos acumulados, máximo en segundos]
+    _totals = {}
+    # Pila de etapas abiertas por hilo (para descontar el tiempo de las internas)
+    _local = threading.local()
+
+    @classmethod
+    def enabled(cls):
+        if cls._enabled is None:
+            cls._enabled = getattr(settings, "TRANSACTION_WRITE_METRICS_ENABLED", False)
+        return cls._enabled
+
+    @classmethod
+    def stage(cls, name):
+        """Contexto que mide una etapa (o no hace nada si la instrumentación está apagada)"""
+        if not (cls._enabled if cls._enabled is not None else cls.enabled()):
+            return _DISABLED
+        return cls._measure(name)
+
+    @classmethod
+    def statement_stage(cls, name, table):
+        """
+        Contexto que mide como etapa ``name`` solo los INSERT/UPDATE sobre ``table``.
+
+        Usa connection.execute_wrapper, así que las consultas de las señales que
+        corren dentro del mismo contexto no cuentan en esta etapa.
+        """
+        if not (cls._enabled if cls._enabled is not None else cls.enabled()):
+            return _DISABLED
+        quoted = connection.ops.quote_name(table)
+        prefixes = (f"INSERT INTO {quoted}", f"UPDATE {quoted}")
+
+        def wrapper(execute, sql, params, many, context):
+            if not sql.startswith(prefixes):
+                return execute(sql, params, many, context)
+            with cls._measure(name):
+                return execute(sql, params, many, context)
+
+        return connection.execute_wrapper(wrapper)
+
+    @classmethod
+    @contextmanager
+    def _measure(cls, name):
+        stack = getattr(cls._local, "stack", None)
+        if stack is None:
+            stack = cls._local.stack = []
+        # [nombre, segundos de etapas internas]
+        frame = [name, 0.0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][1] += elapsed
+            cls._record(name, elapsed - frame[1])
+
+    @classmethod
+    def _record(cls, name, seconds):
+        with cls._lock:
+            totals = cls._totals.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+        logger.debug("Etapa %s de escritura de transacción: %.3f ms", name, seconds * 1000)
+
+    @classmethod
+    def snapshot(cls, reset=False) -> dict:
+        """
+        Contadores agregados de este proceso.
+
+        Args:
+            reset: Reiniciar los contadores en la misma operación (bajo el lock, así
+                que ninguna etapa registrada entre la lectura y el reinicio se pierde)
+
+        Returns:
+            dict: {"enabled", "pid", "stages": {etapa: {count, total_ms, avg_ms, max_ms}}}
+        """
+        with cls._lock:
+            if reset:
+                totals, cls._totals = cls._totals, {}
+            else:
+                totals = {name: list(values) for name, values in cls._totals.items()}
+
+        stages = {}
+        for name in (*STAGES, *sorted(set(totals) - set(STAGES))):
+            count, seconds, slowest = totals.get(name, (0, 0.0, 0.0))
+            stages[name] = {
+                "count": count,
+                "total_ms": round(seconds * 1000, 3),
+                "avg_ms": round(seconds * 1000 / count, 3) if count else None,
+                "max_ms": round(slowest * 1000, 3),
+            }
+        return {"enabled": cls.enabled(), "pid": os.getpid(), "stages": stages}
+
+    @classmethod
+    def reset(cls):
+        """Reinicia los contadores de este proceso"""
+        with cls._lock:
+            cls._totals.clear()
+
+
+@receiver(setting_changed)
+def _reload_enabled(setting, **kwargs):
+    if setting == "TRANSACTION_WRITE_METRICS_ENABLED":
+        TransactionWriteMetrics._enabled = None
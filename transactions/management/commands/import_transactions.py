@@ -0,0 +1,81 @@
+"""
+Management command para importar un extracto bancario (CSV o XLSX)
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account
+from transactions.duplicates import DuplicateDetectionService
+from transactions.importers import DEFAULT_BATCH_SIZE, ImportFileError, TransactionImportService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Importa transacciones desde un extracto bancario CSV o XLSX en una cuenta"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ruta del archivo .csv o .xlsx")
+        parser.add_argument("--user-id", type=int, required=True, help="ID del usuario")
+        parser.add_argument(
+            "--account-id", type=int, required=True, help="ID de la cuenta de origen"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Filas por lote (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--on-duplicate",
+            choices=DuplicateDetectionService.POLICIES,
+            default=DuplicateDetectionService.SKIP,
+            help="Omitir (skip) o importar e informar (flag) las filas que ya existen",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options["user_id"])
+        except User.DoesNotExist as e:
+            msg = f"Usuario con ID {options['user_id']} no existe"
+            raise CommandError(msg) from e
+
+        try:
+            account = Account.objects.get(pk=options["account_id"], user=user)
+        except Account.DoesNotExist as e:
+            msg = f"La cuenta {options['account_id']} no existe o no pertenece al usuario"
+            raise CommandError(msg) from e
+
+        path = options["path"]
+        start = time.perf_counter()
+        try:
+            file_format = TransactionImportService.detect_format(path)
+            with open(path, "rb") as fileobj:
+                result = TransactionImportService.import_file(
+                    user,
+                    account,
+                    fileobj,
+                    file_format,
+                    batch_size=options["batch_size"],
+                    on_duplicate=options["on_duplicate"],
+                )
+        except (ImportFileError, OSError) as e:
+            raise CommandError(str(e)) from e
+        elapsed = time.perf_counter() - start
+
+        for entry in result["errors"]:
+            self.stdout.write(self.style.WARNING(f"  - Fila {entry['row']}: {entry['errors']}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nResumen:\n- Importadas: {result['imported']}\n"
+                f"- Filas con error: {result['failed']}\n"
+                f"- Posibles duplicados: {result['duplicates']}\n"
+                f"- Reglas aplicadas: {result['rules_applied']}\n"
+                f"- Lotes: {result['batches']}\n"
+                f"- Tiempo: {elapsed:.1f} s"
+            )
+        )
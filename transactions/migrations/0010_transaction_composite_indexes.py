@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-17 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0009_add_currency_conversion_fields"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["user", "date"], name="transaction_user_id_8af7f1_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "type", "date"], name="transaction_user_id_feac84_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "category", "type", "date"], name="transaction_user_id_51eb51_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "-created_at"], name="transaction_user_id_386a11_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.16 on 2026-10-17 01:31
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def compute_fingerprint(user_id, origin_account_id, date, total_amount, description):
+    """
+    Copia congelada de transactions.fingerprints.compute_fingerprint al crear
+    esta migración: el historial no debe cambiar si la función cambia después.
+    """
+    text = ""
+    if description:
+        text = unicodedata.normalize("NFKD", str(description))
+        text = "".join(char for char in text if not unicodedata.combining(char))
+        text = _NON_ALPHANUMERIC.sub(" ", text.lower()).strip()
+    key = "|".join((str(user_id), str(origin_account_id), str(date)[:10], str(total_amount), text))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def populate_fingerprints(apps, schema_editor):
+    """Calcula la huella de las transacciones existentes"""
+    Transaction = apps.get_model("transactions", "Transaction")
+
+    batch = []
+    rows = Transaction.objects.only(
+        "id", "user_id", "origin_account_id", "date", "total_amount", "description"
+    ).order_by("id")
+    for transaction in rows.iterator(chunk_size=2000):
+        transaction.fingerprint = compute_fingerprint(
+            transaction.user_id,
+            transaction.origin_account_id,
+            transaction.date,
+            transaction.total_amount,
+            transaction.description,
+        )
+        batch.append(transaction)
+        if len(batch) >= 2000:
+            Transaction.objects.bulk_update(batch, ["fingerprint"])
+            batch = []
+    if batch:
+        Transaction.objects.bulk_update(batch, ["fingerprint"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("transactions", "0010_transaction_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Hash de usuario, cuenta, fecha, monto total y descripción normalizada",
+                max_length=64,
+                null=True,
+                verbose_name="Huella",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "fingerprint"], name="transaction_user_id_3ec235_idx"
+            ),
+        ),
+        migrations.RunPython(populate_fingerprints, migrations.RunPython.noop),
+    ]
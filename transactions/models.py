@@ -5,6 +5,9 @@ from django.db import models
 
 from accounts.models import Account
 
+from .fingerprints import compute_fingerprint
+from .instrumentation import TransactionWriteMetrics
+
 
 class Transaction(models.Model):
     """
@@ -180,6 +183,16 @@ class Transaction(models.Model):
         help_text="Monto original antes de conversión (en centavos de la moneda original)",
     )
 
+    # Huella para detectar duplicados (ver transactions/fingerprints.py)
+    fingerprint = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Huella",
+        help_text="Hash de usuario, cuenta, fecha, monto total y descripción normalizada",
+    )
+
     # Timestamps
     created_at = models.DateTimeField(
         auto_now_add=True, help_text="Fecha de creación de la transacción"
@@ -187,7 +200,47 @@ class Transaction(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True, help_text="Fecha de última actualización")
 
+    class Meta:
+        indexes = [
+            # Rangos de fechas por usuario (dashboard, indicadores, flujo diario)
+            models.Index(fields=["user", "date"]),
+            # Filtros por tipo dentro de un rango (ingresos/gastos por periodo)
+            models.Index(fields=["user", "type", "date"]),
+            # Gasto por categoría (presupuestos, alertas, gráfico por categoría)
+            models.Index(fields=["user", "category", "type", "date"]),
+            # Orden por defecto del listado de transacciones
+            models.Index(fields=["user", "-created_at"]),
+            # Búsqueda y agrupación de posibles duplicados
+            models.Index(fields=["user", "fingerprint"]),
+        ]
+
     def save(self, *args, **kwargs):
+        # HU-12: Aplicar reglas automáticas solo si es una transacción nueva
+        # y no tiene categoría ni regla asignada manualmente. La regla se
+        # resuelve antes del INSERT: una sola escritura y un solo post_save
+        if self.pk is None and not self.category_id and not self.applied_rule_id:
+            with TransactionWriteMetrics.stage("rules"):
+                self._apply_automatic_rules()
+
+        self.calculate_amounts()
+        self.update_fingerprint()
+
+        # La etapa "signals" es todo save() menos el INSERT/UPDATE de la fila,
+        # que se mide como etapa "save". Quien guarda abre la transacción que
+        # confirma la fila junto con las señales (resumen mensual, presupuestos)
+        with (
+            TransactionWriteMetrics.stage("signals"),
+            TransactionWriteMetrics.statement_stage("save", self._meta.db_table),
+        ):
+            super().save(*args, **kwargs)
+
+    def calculate_amounts(self):
+        """
+        Calcula impuestos, GMF, total y capital/intereses a partir del monto base.
+
+        Se ejecuta en cada save() y también antes de bulk_create (importación
+        masiva), que no pasa por save().
+        """
         # HU-15: Calcular impuestos si no están ya calculados
         # Si taxed_amount ya viene calculado desde el serializer (modo total_amount + tax_percentage),
         # respetarlo. Si no, calcular desde base_amount + tax_percentage (modo tradicional)
@@ -259,40 +312,39 @@ class Transaction(models.Model):
                 # Ajustar interest_amount para que sumen el total
                 self.interest_amount = self.total_amount - self.capital_amount
 
-        # HU-12: Aplicar reglas automáticas en transacciones nuevas
-        is_new_transaction = self.pk is None
-
-        super().save(*args, **kwargs)
-
-        # Aplicar reglas automáticas solo si es una transacción nueva
-        # y no tiene categoría ni regla asignada manualmente
-        if is_new_transaction and not self.category and not self.applied_rule:
-            self._apply_automatic_rules()
+    def update_fingerprint(self):
+        """
+        Recalcula la huella de duplicados. Requiere total_amount, así que va
+        después de calculate_amounts() (en save() y antes de bulk_create).
+        """
+        self.fingerprint = compute_fingerprint(
+            self.user_id, self.origin_account_id, self.date, self.total_amount, self.description
+        )
 
     def _apply_automatic_rules(self):
         """
-        Aplica reglas automáticas a esta transacción.
-        Se ejecuta después de save() para evitar problemas de FK.
+        Aplica reglas automáticas a esta transacción, todavía sin guardar.
+        Solo cambia category, tag y applied_rule; save() hace el INSERT.
         """
         try:
             # Importar aquí para evitar dependencias circulares
             from rules.services import RuleEngineService
 
             # Aplicar reglas automáticas
-            result = RuleEngineService.apply_rules_to_transaction(self)
+            result = RuleEngineService.apply_rules_to_transaction(self, save=False)
 
             # Log del resultado para debugging
             import logging
 
             logger = logging.getLogger(__name__)
-            logger.info(f"Reglas automáticas en transacción {self.id}: {result['message']}")
+            logger.info(f"Reglas automáticas en transacción nueva: {result['message']}")
 
         except Exception as e:
             # No fallar si hay error aplicando reglas
             import logging
 
             logger = logging.getLogger(__name__)
-            logger.warning(f"Error aplicando reglas automáticas a transacción {self.id}: {e!s}")
+            logger.warning(f"Error aplicando reglas automáticas a transacción nueva: {e!s}")
 
     def __str__(self):
         return f"Transacción {self.id} - {self.get_type_display()} - {self.total_amount}"
@@ -0,0 +1,202 @@
+"""
+Paginación por cursor (keyset) para el listado de transacciones
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TransactionCursorPagination(BasePagination):
+    """
+    Paginación keyset ordenada por (created_at, id) descendente.
+
+    A diferencia de OFFSET, cada página se obtiene con un predicado
+    ``(created_at, id) < (cursor)`` que usa el índice (user, -created_at), por lo
+    que las páginas profundas cuestan lo mismo que la primera.
+
+    Parámetros de query:
+        cursor: Cursor opaco devuelto en ``next``/``previous``
+        page_size: Tamaño de página (máximo ``max_page_size``)
+        count: ``exact`` | ``estimated`` | ``none``. Por defecto ``exact`` en la
+            primera página y ``none`` en las siguientes.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    max_page_size = 200
+
+    COUNT_EXACT = "exact"
+    COUNT_ESTIMATED = "estimated"
+    COUNT_NONE = "none"
+    COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_NONE)
+
+    # Límite del conteo "estimado" en motores sin estimación del planner
+    estimate_cap = 1000
+
+    invalid_cursor_message = "Cursor inválido"
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE") or 20
+        self.request = None
+        self.count = None
+        self.count_is_estimate = False
+        self.next_position = None
+        self.previous_position = None
+
+    @classmethod
+    def is_requested(cls, request):
+        """Indica si el cliente pidió el listado paginado por cursor"""
+        params = request.query_params
+        return cls.cursor_query_param in params or cls.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        self._compute_count(queryset, self.get_count_mode(request, position))
+
+        if position is None:
+            page_queryset = queryset.order_by("-created_at", "-id")
+            reverse = False
+        else:
+            created_at, pk, reverse = position
+            if reverse:
+                page_queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                ).order_by("created_at", "id")
+            else:
+                page_queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                ).order_by("-created_at", "-id")
+
+        # Traer un elemento extra para saber si hay más páginas en esa dirección
+        results = list(page_queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        self.next_position = results[-1] if has_next and results else None
+        self.previous_position = results[0] if has_previous and results else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.count,
+                "count_is_estimate": self.count_is_estimate,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_count_mode(self, request, position):
+        mode = request.query_params.get(self.count_query_param)
+        if mode in self.COUNT_MODES:
+            return mode
+        return self.COUNT_EXACT if position is None else self.COUNT_NONE
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self._build_link(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self._build_link(self.previous_position, reverse=True)
+
+    def _build_link(self, instance, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(instance, reverse)
+        )
+
+    @staticmethod
+    def encode_cursor(instance, reverse=False):
+        """Codificar la posición (created_at, id) en un cursor opaco"""
+        payload = {"c": instance.created_at.isoformat(), "i": instance.pk}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        """
+        Decodificar el cursor de la request
+
+        Returns:
+            tuple | None: (created_at, id, reverse) o None si no hay cursor
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            created_at = datetime.fromisoformat(payload["c"])
+            pk = int(payload["i"])
+            reverse = bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk, reverse
+
+    def _compute_count(self, queryset, mode):
+        self.count = None
+        self.count_is_estimate = False
+
+        if mode == self.COUNT_EXACT:
+            self.count = queryset.count()
+        elif mode == self.COUNT_ESTIMATED:
+            self.count_is_estimate = True
+            self.count = self._estimate_count(queryset)
+
+    def _estimate_count(self, queryset):
+        """
+        Estimar el total sin recorrer todas las filas.
+
+        En PostgreSQL usa la estimación del planner; en otros motores cuenta
+        como máximo ``estimate_cap`` filas.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor == "postgresql":
+            sql, params = queryset.order_by().query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+
+        capped = queryset.order_by()[: self.estimate_cap + 1].count()
+        if capped <= self.estimate_cap:
+            # El conteo acotado es exacto
+            self.count_is_estimate = False
+        return capped
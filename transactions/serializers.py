@@ -6,11 +6,34 @@ from rest_framework import serializers
 from accounts.models import Account
 from categories.models import Category
 from transactions.models import Transaction
-from utils.currency_converter import FxService
+from utils.currency_converter import FxContext
 
 logger = logging.getLogger(__name__)
 
 
+class TransactionDetailListSerializer(serializers.ListSerializer):
+    """
+    Serializa listados de transacciones precargando las tasas de cambio.
+
+    Todas las tasas necesarias para la página se cargan en una consulta antes
+    de serializar las filas.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, "all") else data
+        items = list(iterable)
+
+        fx = self.child._fx_context()
+        fx.prefetch(
+            {
+                item.transaction_currency
+                or (item.origin_account.currency if item.origin_account else None)
+                for item in items
+            }
+        )
+        return super().to_representation(items)
+
+
 class TransactionDetailSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source="category.name", read_only=True, allow_null=True)
     category_color = serializers.CharField(source="category.color", read_only=True, allow_null=True)
@@ -33,6 +56,7 @@ class TransactionDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Transaction
+        list_serializer_class = TransactionDetailListSerializer
         fields = [
             "id",
             "user",
@@ -78,63 +102,79 @@ class TransactionDetailSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
-    def _resolve_base(self):
-        req = self.context.get("request") if self.context else None
-        user = getattr(req, "user", None)
-        return FxService.get_base_currency(user)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # pk de la transacción -> conversión a moneda base, compartida por los campos base_*
+        self._conversions = {}
 
-    def get_base_currency(self, obj):
-        return self._resolve_base()
+    def _fx_context(self):
+        """
+        Contexto FX compartido por todas las filas de la request.
 
-    def get_base_equivalent_amount(self, obj):
-        base_currency = self._resolve_base()
+        La moneda base se resuelve una sola vez y las tasas se memorizan; en
+        listados, TransactionDetailListSerializer precarga todas las tasas en
+        una única consulta.
+        """
+        context = self.context
+        fx = context.get("fx_context")
+        if fx is None:
+            req = context.get("request")
+            fx = FxContext.for_user(getattr(req, "user", None))
+            context["fx_context"] = fx
+        return fx
+
+    def _base_conversion(self, obj):
+        """
+        Calcula en una sola pasada (monto, tasa, advertencia) en moneda base.
+        El resultado se guarda en el serializer por pk, sin tocar la instancia.
+
+        Returns:
+            dict: base_currency, amount, rate, warning y error (si la conversión falló)
+        """
+        cached = self._conversions.get(obj.pk)
+        if cached is not None:
+            return cached
+
+        fx = self._fx_context()
+        base_currency = fx.base_currency
         txn_currency = obj.transaction_currency or (
             obj.origin_account.currency if obj.origin_account else base_currency
         )
+        result = {
+            "base_currency": base_currency,
+            "amount": None,
+            "rate": None,
+            "warning": None,
+            "error": None,
+        }
         try:
-            logger.info(
-                f"Converting {obj.total_amount} {txn_currency} -> {base_currency} on {obj.date}"
-            )
-            converted, rate, warning = FxService.convert_to_base(
-                obj.total_amount, txn_currency, base_currency, obj.date
-            )
-            logger.info(f"Conversion result: {converted} (rate: {rate}, warning: {warning})")
-            return converted
+            converted, rate, warning = fx.convert(obj.total_amount, txn_currency, obj.date)
+            result.update(amount=converted, rate=rate, warning=warning)
         except Exception as e:
-            logger.exception(f"Conversion failed: {e}")
-            return None
+            logger.exception(
+                f"Conversion failed: {obj.total_amount} {txn_currency} -> {base_currency} "
+                f"on {obj.date}: {e}"
+            )
+            result["error"] = e
+
+        self._conversions[obj.pk] = result
+        return result
+
+    def get_base_currency(self, obj):
+        return self._base_conversion(obj)["base_currency"]
+
+    def get_base_equivalent_amount(self, obj):
+        return self._base_conversion(obj)["amount"]
 
     def get_base_exchange_rate(self, obj):
-        base_currency = self._resolve_base()
-        txn_currency = obj.transaction_currency or (
-            obj.origin_account.currency if obj.origin_account else base_currency
-        )
-        if txn_currency == base_currency:
-            return 1.0
-        try:
-            _, rate, _ = FxService.convert_to_base(
-                obj.total_amount, txn_currency, base_currency, obj.date
-            )
-            return float(rate)
-        except Exception as e:
-            logger.exception(f"Rate lookup failed: {e}")
-            return None
+        rate = self._base_conversion(obj)["rate"]
+        return float(rate) if rate is not None else None
 
     def get_base_exchange_rate_warning(self, obj):
-        base_currency = self._resolve_base()
-        txn_currency = obj.transaction_currency or (
-            obj.origin_account.currency if obj.origin_account else base_currency
-        )
-        if txn_currency == base_currency:
-            return None
-        try:
-            _, _, warning = FxService.convert_to_base(
-                obj.total_amount, txn_currency, base_currency, obj.date
-            )
-            return warning
-        except Exception as e:
-            logger.exception(f"Warning lookup failed: {e}")
-            return f"Error al obtener tipo de cambio: {e!s}"
+        conversion = self._base_conversion(obj)
+        if conversion["error"] is not None:
+            return f"Error al obtener tipo de cambio: {conversion['error']!s}"
+        return conversion["warning"]
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -265,11 +305,10 @@ class TransactionSerializer(serializers.ModelSerializer):
 
         if total_amount is not None:
             # El frontend ahora siempre envía montos en centavos (enteros)
-            print(
-                f"[DEBUG SERIALIZER] total_amount recibido: tipo={type(total_amount).__name__}, valor={total_amount}"
-            )
-            logger.info(
-                f"[DEBUG] total_amount recibido: tipo={type(total_amount).__name__}, valor={total_amount}"
+            logger.debug(
+                "total_amount recibido: tipo=%s, valor=%s",
+                type(total_amount).__name__,
+                total_amount,
             )
             # Si viene como float sin decimales, probablemente ya está en centavos
             if isinstance(total_amount, (float, Decimal)):
@@ -311,19 +350,11 @@ class TransactionSerializer(serializers.ModelSerializer):
                     pass
             elif isinstance(total_amount, int):
                 # Entero: asumimos que ya está en centavos (el frontend siempre envía así)
-                print(
-                    f"[DEBUG SERIALIZER] total_amount recibido como int: {total_amount}, tratando como centavos"
-                )
-                logger.info(
-                    f"[DEBUG] total_amount recibido como int: {total_amount}, tratando como centavos"
+                logger.debug(
+                    "total_amount recibido como int: %s, tratando como centavos", total_amount
                 )
                 data["total_amount"] = total_amount
-            print(
-                f"[DEBUG SERIALIZER] total_amount final después de validación: {data.get('total_amount')}"
-            )
-            logger.info(
-                f"[DEBUG] total_amount final después de validación: {data.get('total_amount')}"
-            )
+            logger.debug("total_amount final después de validación: %s", data.get("total_amount"))
 
         base_amount = data.get("base_amount")
         total_amount = data.get("total_amount")
@@ -1,12 +1,74 @@
+import functools
 import logging
+import random
+import time
 from decimal import Decimal
 
+from django.db import OperationalError, connection
 from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
 
 from accounts.models import Account
 
+from .instrumentation import TransactionWriteMetrics
+
 logger = logging.getLogger(__name__)
 
+# Intentos ante bloqueos mutuos (deadlock) o fallos de serialización
+BALANCE_MAX_ATTEMPTS = 3
+# Espera base entre intentos (segundos); se duplica en cada reintento, con jitter
+BALANCE_RETRY_DELAY = 0.05
+# SQLSTATE de PostgreSQL: serialization_failure y deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+def _is_lock_conflict(error):
+    """Errores tras los que basta con repetir la transacción completa"""
+    cause = error.__cause__
+    code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+    if code in RETRYABLE_SQLSTATES:
+        return True
+    # SQLite: otra conexión tiene el bloqueo de escritura
+    message = str(error).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def retry_on_lock_conflict(func):
+    """
+    Ejecuta ``func`` en una transacción atómica y la repite (hasta
+    BALANCE_MAX_ATTEMPTS) si falla por deadlock, serialización o bloqueo.
+
+    Solo se reintenta cuando esta es la transacción más externa: dentro de un
+    atomic() ajeno la transacción ya quedó abortada y el error se propaga para
+    que la reintente quien la abrió.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        owns_transaction = not connection.in_atomic_block
+        attempt = 1
+        while True:
+            try:
+                with db_transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if (
+                    not owns_transaction
+                    or attempt >= BALANCE_MAX_ATTEMPTS
+                    or not _is_lock_conflict(e)
+                ):
+                    raise
+                delay = BALANCE_RETRY_DELAY * 2 ** (attempt - 1) * (1 + random.random())
+                logger.warning(
+                    f"Conflicto de bloqueo en {func.__name__} (intento {attempt}/"
+                    f"{BALANCE_MAX_ATTEMPTS}): {e!s}. Reintentando en {delay:.3f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    return wrapper
+
 
 class TransactionService:
     INCOME = 1
@@ -18,67 +80,27 @@ class TransactionService:
     @db_transaction.atomic
     def update_account_balance_for_transaction(transaction, is_creation=True):
         transaction_type = transaction.type
-        total_amount_cents = transaction.total_amount
-        amount = Decimal(str(total_amount_cents)) / Decimal(100)
-
-        print(
-            f"[DEBUG SERVICE] Actualizando saldo - Transacción ID: {transaction.id}, "
-            f"total_amount (centavos): {total_amount_cents}, "
-            f"amount (pesos): {amount}, "
-            f"tipo: {transaction_type}, "
-            f"creación: {is_creation}"
-        )
-        logger.info(
-            f"[DEBUG] Actualizando saldo - Transacción ID: {transaction.id}, "
-            f"total_amount (centavos): {total_amount_cents}, "
-            f"amount (pesos): {amount}, "
-            f"tipo: {transaction_type}, "
-            f"creación: {is_creation}"
+        logger.debug(
+            "Actualizando saldo - Transacción ID: %s, total_amount (centavos): %s, "
+            "tipo: %s, creación: %s",
+            transaction.id,
+            transaction.total_amount,
+            transaction_type,
+            is_creation,
         )
 
         multiplier = 1 if is_creation else -1
 
         try:
-            if transaction_type == TransactionService.INCOME:
-                TransactionService._update_account_balance(
-                    transaction.origin_account, amount * multiplier, transaction
-                )
-
-            elif transaction_type == TransactionService.EXPENSE:
-                TransactionService._update_account_balance(
-                    transaction.origin_account, -amount * multiplier, transaction
-                )
-
-            elif transaction_type == TransactionService.TRANSFER:
-                if transaction.origin_account:
-                    TransactionService._update_account_balance(
-                        transaction.origin_account, -amount * multiplier, transaction
-                    )
-                if transaction.destination_account:
-                    if (
-                        transaction.destination_account.category == Account.CREDIT_CARD
-                        and transaction.capital_amount is not None
-                    ):
-                        capital_amount = Decimal(str(transaction.capital_amount)) / Decimal(100)
-                        TransactionService._update_account_balance(
-                            transaction.destination_account,
-                            capital_amount * multiplier,
-                            transaction,
-                        )
-                    else:
-                        TransactionService._update_account_balance(
-                            transaction.destination_account, amount * multiplier, transaction
-                        )
-
-            elif transaction_type == TransactionService.SAVING:
-                # SAVING debe RESTAR de la cuenta (el dinero se mueve a la meta)
-                TransactionService._update_account_balance(
-                    transaction.origin_account, -amount * multiplier, transaction
-                )
-
-            logger.info(
-                f"Saldo actualizado para transacción {transaction.id} "
-                f"(tipo: {transaction_type}, creación: {is_creation})"
+            with TransactionWriteMetrics.stage("balance"):
+                deltas = TransactionService._balance_deltas(transaction, multiplier)
+                TransactionService._update_account_balances(deltas, transaction)
+
+            logger.debug(
+                "Saldo actualizado para transacción %s (tipo: %s, creación: %s)",
+                transaction.id,
+                transaction_type,
+                is_creation,
             )
 
         except Exception as e:
@@ -86,43 +108,153 @@ class TransactionService:
             raise
 
     @staticmethod
-    def _update_account_balance(account, amount_delta, transaction):
-        account = Account.objects.select_for_update().get(pk=account.pk)
-
-        old_balance = account.current_balance
-        account.current_balance += amount_delta
-        account.save(update_fields=["current_balance", "updated_at"])
-
-        print(
-            f"[DEBUG SERVICE] Cuenta {account.id} ({account.name}): "
-            f"Saldo anterior: ${old_balance}, "
-            f"Delta aplicado: ${amount_delta}, "
-            f"Nuevo saldo: ${account.current_balance}, "
-            f"Transacción: {transaction.id}"
+    def _balance_deltas(transaction, multiplier=1):
+        """
+        Cambio de saldo (en pesos) que una transacción produce en cada cuenta.
+
+        Returns:
+            dict: pk de cuenta -> Decimal (las cuentas repetidas se suman)
+        """
+        amount = Decimal(str(transaction.total_amount)) / Decimal(100)
+        deltas = {}
+
+        def add(account, delta):
+            if account is not None:
+                deltas[account.pk] = deltas.get(account.pk, Decimal(0)) + delta * multiplier
+
+        if transaction.type == TransactionService.INCOME:
+            add(transaction.origin_account, amount)
+
+        elif transaction.type in (TransactionService.EXPENSE, TransactionService.SAVING):
+            # SAVING debe RESTAR de la cuenta (el dinero se mueve a la meta)
+            add(transaction.origin_account, -amount)
+
+        elif transaction.type == TransactionService.TRANSFER:
+            add(transaction.origin_account, -amount)
+            destination = transaction.destination_account
+            if (
+                destination is not None
+                and destination.category == Account.CREDIT_CARD
+                and transaction.capital_amount is not None
+            ):
+                add(destination, Decimal(str(transaction.capital_amount)) / Decimal(100))
+            else:
+                add(destination, amount)
+
+        return deltas
+
+    @staticmethod
+    def _lock_accounts(*transactions):
+        """
+        Bloquea (SELECT ... FOR UPDATE) todas las cuentas afectadas en una sola
+        consulta y en orden de pk. Con un orden fijo, dos transferencias
+        opuestas entre las mismas cuentas esperan en vez de bloquearse
+        mutuamente. Volver a bloquear una fila en la misma transacción no
+        tiene efecto, así que se puede llamar antes de validar saldos.
+        """
+        pks = {
+            account.pk
+            for transaction in transactions
+            for account in (transaction.origin_account, transaction.destination_account)
+            if account is not None
+        }
+        if not pks:
+            return
+
+        # SQLite ignora FOR UPDATE, pero bloquea la base entera al escribir
+        TransactionService._take_sqlite_write_lock()
+        accounts = Account.objects.filter(pk__in=pks).order_by("pk").select_for_update()
+        list(accounts.values_list("pk", flat=True))
+
+    @staticmethod
+    def _take_sqlite_write_lock():
+        """
+        En SQLite toma el bloqueo de escritura de la base al empezar la transacción.
+
+        SQLite ignora FOR UPDATE y abre las transacciones en modo diferido: una
+        transacción que lee y luego escribe falla con "database is locked" al
+        promover su bloqueo de lectura, sin esperar el timeout. Un UPDATE que no
+        coincide con ninguna fila toma el bloqueo de escritura (esperando a quien
+        lo tenga) sin escribir nada. En otros motores no hace nada.
+        """
+        if connection.vendor == "sqlite":
+            Account.objects.filter(pk__isnull=True).update(current_balance=F("current_balance"))
+
+    @staticmethod
+    def _update_account_balances(deltas, transaction):
+        """
+        Aplica los deltas en un solo UPDATE con F(): la base de datos suma
+        sobre el saldo vigente, sin leer y reescribir el valor en Python.
+        """
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        TransactionService._lock_accounts(transaction)
+        Account.objects.filter(pk__in=deltas).update(
+            current_balance=F("current_balance")
+            + Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in sorted(deltas.items())],
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            ),
+            updated_at=timezone.now(),
         )
-        logger.info(
-            f"[DEBUG] Cuenta {account.id} ({account.name}): "
-            f"Saldo anterior: ${old_balance}, "
-            f"Delta aplicado: ${amount_delta}, "
-            f"Nuevo saldo: ${account.current_balance}, "
-            f"Transacción: {transaction.id}"
+        # Los saldos diarios desde la fecha de la transacción se desplazan igual
+        from accounts.snapshots import AccountSnapshotService
+
+        AccountSnapshotService.record_changes(
+            (pk, transaction.date, delta) for pk, delta in deltas.items()
         )
 
+        if logger.isEnabledFor(logging.DEBUG):
+            changes = ", ".join(f"cuenta {pk} {delta:+}" for pk, delta in sorted(deltas.items()))
+            logger.debug("Saldos actualizados por transacción %s: %s", transaction.id, changes)
+
+        # QuerySet.update() no envía post_save de Account: invalidar analytics aquí
+        from analytics.cache import AnalyticsCache
+
+        for user_id in {
+            account.user_id
+            for account in (transaction.origin_account, transaction.destination_account)
+            if account is not None
+        }:
+            AnalyticsCache.bump_user(user_id)
+
     @staticmethod
-    @db_transaction.atomic
+    @retry_on_lock_conflict
+    def save_transaction(save):
+        """
+        Ejecuta ``save`` (serializer.save, Transaction.objects.create...) en una
+        transacción: la fila y sus señales post_save (resumen mensual,
+        presupuestos) se confirman juntas. Los saldos se actualizan después, en
+        la transacción de handle_transaction_creation/update.
+
+        Returns:
+            Lo que devuelva ``save``
+        """
+        TransactionService._take_sqlite_write_lock()
+        return save()
+
+    @staticmethod
+    @retry_on_lock_conflict
     def handle_transaction_creation(transaction):
-        TransactionService._validate_transaction_limits(transaction)
+        # Bloquear antes de validar: el saldo validado es el que se modifica
+        TransactionService._lock_accounts(transaction)
+        with TransactionWriteMetrics.stage("validation"):
+            TransactionService._validate_transaction_limits(transaction)
 
         TransactionService.update_account_balance_for_transaction(transaction, is_creation=True)
 
     @staticmethod
-    @db_transaction.atomic
+    @retry_on_lock_conflict
     def handle_transaction_update(old_transaction, new_transaction):
+        TransactionService._lock_accounts(old_transaction, new_transaction)
         TransactionService.update_account_balance_for_transaction(
             old_transaction, is_creation=False
         )
 
-        TransactionService._validate_transaction_limits(new_transaction)
+        with TransactionWriteMetrics.stage("validation"):
+            TransactionService._validate_transaction_limits(new_transaction)
 
         TransactionService.update_account_balance_for_transaction(new_transaction, is_creation=True)
 
@@ -214,6 +346,6 @@ class TransactionService:
                     raise ValueError(msg)
 
     @staticmethod
-    @db_transaction.atomic
+    @retry_on_lock_conflict
     def handle_transaction_deletion(transaction):
         TransactionService.update_account_balance_for_transaction(transaction, is_creation=False)
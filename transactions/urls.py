@@ -10,6 +10,8 @@ router = DefaultRouter()
 router.register(r"", views.TransactionViewSet, basename="transaction")
 
 urlpatterns = [
+    # Antes del router: su ruta de detalle también captura "write-metrics/"
+    path("write-metrics/", views.write_metrics, name="transaction_write_metrics"),
     # Incluir rutas del router
     path("", include(router.urls)),
 ]
@@ -17,6 +19,7 @@ urlpatterns = [
 # URLs disponibles:
 # GET /api/transactions/ - Listar transacciones
 # POST /api/transactions/ - Crear transacción (con aplicación automática de reglas HU-12)
+#   ?on_duplicate=flag|skip - Informar (por defecto) u omitir si ya existe una idéntica
 # GET /api/transactions/{id}/ - Detalle de transacción
 # PUT /api/transactions/{id}/ - Actualizar transacción completa
 # PATCH /api/transactions/{id}/ - Actualizar parcialmente
@@ -33,5 +36,11 @@ urlpatterns = [
 # ?ordering=date,-total_amount - Ordenar por campos
 #
 # Acciones adicionales:
+# GET /api/transactions/write-metrics/ - Tiempos por etapa de escritura (admin)
+# POST /api/transactions/write-metrics/ - Leer y reiniciar los tiempos (admin)
 # POST /api/transactions/bulk_delete/ - Eliminar múltiples transacciones (HU-10)
 # Body: {"ids": [1, 2, 3, ...]}
+# POST /api/transactions/import/ - Importar extracto bancario CSV/XLSX
+# Body (multipart): file=<extracto.csv|.xlsx>, origin_account=<id>, on_duplicate=skip|flag
+# GET /api/transactions/duplicates/ - Reporte de posibles duplicados agrupados por huella
+# ?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
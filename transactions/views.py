@@ -3,15 +3,30 @@ Views para gestión de categorías de ingresos y gastos
 """
 
 import logging
+from datetime import datetime
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import action
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
 from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 
+from accounts.models import Account
+from users.permissions import IsAdminUser
+
+from .duplicates import DuplicateDetectionService
 from .filters import TransactionFilter
+from .importers import ImportFileError, TransactionImportService
+from .instrumentation import TransactionWriteMetrics
 from .models import Transaction
+from .pagination import TransactionCursorPagination
 from .serializers import (
     TransactionDetailSerializer,
     TransactionSerializer,
@@ -48,7 +63,13 @@ class TransactionViewSet(viewsets.ModelViewSet):
         """Filtrar transacciones por usuario autenticado"""
         # Ordenar por fecha y hora de creación (más reciente primero)
         # created_at tiene fecha y hora, así que es más preciso que solo date
-        return Transaction.objects.filter(user=self.request.user).order_by("-created_at")
+        return (
+            Transaction.objects.filter(user=self.request.user)
+            .select_related(
+                "origin_account", "destination_account", "category", "goal", "applied_rule"
+            )
+            .order_by("-created_at")
+        )
 
     def get_serializer_class(self):
         """Seleccionar serializer según la acción"""
@@ -63,6 +84,9 @@ class TransactionViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         """
         Listar transacciones del usuario con filtros opcionales
+
+        Si se envía ``cursor`` o ``page_size`` la respuesta se pagina por cursor
+        (ver TransactionCursorPagination); si no, se devuelve el historial completo.
         """
         queryset = self.filter_queryset(self.get_queryset())
 
@@ -71,6 +95,12 @@ class TransactionViewSet(viewsets.ModelViewSet):
         if transaction_type:
             queryset = queryset.filter(type=transaction_type)
 
+        if TransactionCursorPagination.is_requested(request):
+            paginator = TransactionCursorPagination()
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            serializer = self.get_serializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+
         count = queryset.count()
         logger.info(f"Usuario {request.user.id} listó transacciones: {count} encontradas")
 
@@ -85,10 +115,58 @@ class TransactionViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    def create(self, request, *args, **kwargs):
+        """
+        Crear transacción detectando posibles duplicados por huella.
+
+        ``on_duplicate`` (query param o body): 'flag' (por defecto) la crea e
+        informa los IDs coincidentes en ``duplicate_of``; 'skip' no la crea y
+        devuelve la transacción existente (p. ej. doble clic en "Guardar").
+        """
+        serializer = self.get_serializer(data=request.data)
+        with TransactionWriteMetrics.stage("validation"):
+            serializer.is_valid(raise_exception=True)
+
+        try:
+            on_duplicate = DuplicateDetectionService.validate_policy(
+                request.query_params.get("on_duplicate") or request.data.get("on_duplicate"),
+                DuplicateDetectionService.FLAG,
+            )
+        except ValueError as e:
+            return Response({"on_duplicate": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = DuplicateDetectionService.fingerprint_for(
+            request.user, serializer.validated_data
+        )
+        duplicate_of = DuplicateDetectionService.find_matches(request.user, [fingerprint]).get(
+            fingerprint, []
+        )
+
+        if duplicate_of and on_duplicate == DuplicateDetectionService.SKIP:
+            existing = self.get_queryset().get(pk=duplicate_of[0])
+            logger.info(
+                f"Usuario {request.user.id}: creación omitida, duplicada de transacción {existing.id}"
+            )
+            return Response(
+                {
+                    "message": "Ya existe una transacción idéntica; no se creó una nueva.",
+                    "duplicate_of": duplicate_of,
+                    "transaction": TransactionDetailSerializer(existing).data,
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        self.perform_create(serializer)
+        data = serializer.data
+        if duplicate_of:
+            data = {**data, "duplicate_of": duplicate_of}
+        headers = self.get_success_headers(serializer.data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
+
     def perform_create(self, serializer):
         """Crear transacción asignando el usuario autenticado y actualizar saldos"""
         try:
-            transaction = serializer.save()
+            transaction = TransactionService.save_transaction(serializer.save)
 
             # Actualizar saldos de cuentas automáticamente
             TransactionService.handle_transaction_creation(transaction)
@@ -107,6 +185,20 @@ class TransactionViewSet(viewsets.ModelViewSet):
             )
             raise
 
+    def update(self, request, *args, **kwargs):
+        """Igual que UpdateModelMixin.update, midiendo la validación del serializer"""
+        partial = kwargs.pop("partial", False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        with TransactionWriteMetrics.stage("validation"):
+            serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        if getattr(instance, "_prefetched_objects_cache", None):
+            instance._prefetched_objects_cache = {}
+
+        return Response(serializer.data)
+
     def perform_update(self, serializer):
         """Actualizar transacción y actualizar saldos"""
         try:
@@ -118,9 +210,11 @@ class TransactionViewSet(viewsets.ModelViewSet):
             old_origin_account = old_transaction.origin_account
             old_destination_account = old_transaction.destination_account
             old_total_amount = old_transaction.total_amount
+            old_capital_amount = old_transaction.capital_amount
+            old_date = old_transaction.date
 
             # Guardar la nueva transacción
-            new_transaction = serializer.save()
+            new_transaction = TransactionService.save_transaction(serializer.save)
 
             # Solo actualizar saldos si algo cambió que afecte los saldos
             needs_update = (
@@ -128,6 +222,9 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 or old_origin_account != new_transaction.origin_account
                 or old_destination_account != new_transaction.destination_account
                 or old_total_amount != new_transaction.total_amount
+                or old_capital_amount != new_transaction.capital_amount
+                # La fecha mueve los saldos diarios aunque el saldo actual no cambie
+                or old_date != new_transaction.date
             )
 
             if needs_update:
@@ -139,6 +236,8 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     origin_account=old_origin_account,
                     destination_account=old_destination_account,
                     total_amount=Decimal(str(old_total_amount)),
+                    capital_amount=old_capital_amount,
+                    date=old_date,
                 )
 
                 # Actualizar saldos: revertir el anterior y aplicar el nuevo
@@ -178,7 +277,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
         serializer = TransactionSerializer(data=duplicated_data, context={"request": request})
 
         if serializer.is_valid():
-            duplicated_transaction = serializer.save()
+            duplicated_transaction = TransactionService.save_transaction(serializer.save)
 
             # Actualizar saldos automáticamente (la duplicación es una creación)
             TransactionService.handle_transaction_creation(duplicated_transaction)
@@ -267,6 +366,101 @@ class TransactionViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_statement(self, request):
+        """
+        Importar un extracto bancario (CSV o XLSX) en una cuenta del usuario.
+
+        Body (multipart): file, origin_account, on_duplicate ('skip' por defecto o 'flag')
+        """
+        uploaded = request.FILES.get("file")
+        account_id = request.data.get("origin_account")
+
+        if not uploaded:
+            return Response(
+                {"error": 'Debe adjuntar el archivo del extracto en el campo "file".'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            account = Account.objects.get(pk=account_id, user=request.user)
+        except (Account.DoesNotExist, ValueError, TypeError):
+            return Response(
+                {"error": "La cuenta de origen no existe o no pertenece al usuario."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            on_duplicate = DuplicateDetectionService.validate_policy(
+                request.data.get("on_duplicate"), DuplicateDetectionService.SKIP
+            )
+        except ValueError as e:
+            return Response({"on_duplicate": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            file_format = TransactionImportService.detect_format(uploaded.name)
+            result = TransactionImportService.import_file(
+                request.user, account, uploaded, file_format, on_duplicate=on_duplicate
+            )
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(
+            f"Usuario {request.user.id} importó {result['imported']} transacciones "
+            f"en la cuenta {account.id} ({result['failed']} filas con error)"
+        )
+
+        if result["imported"]:
+            response_status = status.HTTP_201_CREATED
+        elif result["duplicates"] and not result["failed"]:
+            # Extracto ya importado por completo: nada nuevo, pero no es un error
+            response_status = status.HTTP_200_OK
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(
+            {
+                "message": (
+                    f"Se importaron {result['imported']} transacciones; "
+                    f"{result['failed']} filas con error; "
+                    f"{result['duplicates']} posibles duplicados."
+                ),
+                **result,
+            },
+            status=response_status,
+        )
+
+    @action(detail=False, methods=["get"])
+    def duplicates(self, request):
+        """
+        Reporte de posibles duplicados agrupados por huella.
+
+        Query params opcionales: start_date, end_date (AAAA-MM-DD)
+        """
+        try:
+            start_date, end_date = (
+                datetime.strptime(value, "%Y-%m-%d").date() if value else None
+                for value in (
+                    request.query_params.get("start_date"),
+                    request.query_params.get("end_date"),
+                )
+            )
+        except ValueError:
+            return Response(
+                {"error": "Formato de fecha inválido. Use YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        groups = DuplicateDetectionService.find_duplicates(
+            request.user, start_date=start_date, end_date=end_date
+        )
+        return Response({"count": len(groups), "results": groups}, status=status.HTTP_200_OK)
+
     def perform_destroy(self, instance):
         try:
             TransactionService.handle_transaction_deletion(instance)
@@ -277,3 +471,27 @@ class TransactionViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.exception(f"Error al eliminar transacción {instance.id}: {e!s}")
             raise
+
+
+@api_view(["GET", "POST"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAdminUser])
+def write_metrics(request):
+    """
+    Tiempos por etapa de la escritura de transacciones en este proceso (solo administradores)
+
+    Requiere TRANSACTION_WRITE_METRICS_ENABLED; cada worker reporta sus propios contadores.
+
+    - GET: lee los contadores
+    - POST: los lee y los reinicia en una sola operación
+    """
+    metrics = TransactionWriteMetrics.snapshot(reset=request.method == "POST")
+
+    return Response(
+        {
+            "success": True,
+            "data": metrics,
+            "message": "Tiempos de escritura de transacciones",
+        },
+        status=status.HTTP_200_OK,
+    )
@@ -9,3 +9,7 @@ class UtilsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "utils"
     verbose_name = "Utilidades del Sistema"
+
+    def ready(self):
+        # Registrar señales de la app (invalidación del snapshot de tipos de cambio)
+        from . import signals  # noqa: F401
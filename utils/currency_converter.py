@@ -2,7 +2,7 @@ import logging
 from datetime import date
 from decimal import Decimal
 
-from django.db.models import Q
+from utils.rate_snapshot import ExchangeRateSnapshot
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +141,7 @@ class FxService:
         """
         Busca el tipo de cambio para una fecha específica.
         Si no existe para el mes exacto, usa el último disponible anterior.
+        La búsqueda se hace sobre el snapshot en memoria (ExchangeRateSnapshot).
 
         Args:
             currency: Moneda origen
@@ -156,52 +157,64 @@ class FxService:
         if currency == base_currency:
             return Decimal(1), None
 
-        from utils.models import ExchangeRate
-
         year = ref_date.year
         month = ref_date.month
 
-        # Buscar tipo de cambio exacto o anterior
-        record = (
-            ExchangeRate.objects.filter(
-                Q(year__lt=year) | Q(year=year, month__lte=month),
-                currency=currency,
-                base_currency=base_currency,
-            )
-            .order_by("-year", "-month")
-            .first()
+        # Buscar tipo de cambio exacto o anterior (directo o inverso) en el snapshot
+        snapshot = ExchangeRateSnapshot.get()
+        return FxService._rate_from_records(
+            currency,
+            base_currency,
+            year,
+            month,
+            record=snapshot.latest(currency, base_currency, year, month),
+            inverse=snapshot.latest(base_currency, currency, year, month),
         )
 
+    @staticmethod
+    def _rate_from_records(currency, base_currency, year, month, *, record, inverse):
+        """
+        Resuelve la tasa y la advertencia a partir de los registros encontrados.
+
+        Centraliza la semántica de _get_rate_record (tasa directa, inversa o
+        estática) para que cualquier forma de búsqueda produzca el mismo
+        resultado y los mismos mensajes.
+
+        Args:
+            currency: Moneda origen
+            base_currency: Moneda destino
+            year: Año de referencia
+            month: Mes de referencia
+            record: Tupla (year, month, rate) directa más reciente <= mes, o None
+            inverse: Tupla (year, month, rate) inversa más reciente <= mes, o None
+
+        Returns:
+            tuple: (rate, warning_message)
+
+        Raises:
+            ValueError: Si no hay ningún tipo de cambio disponible
+        """
         warning = None
         if record:
+            rec_year, rec_month, rate = record
             # Si no es del mes exacto, generar advertencia
-            if record.year != year or record.month != month:
+            if rec_year != year or rec_month != month:
                 warning = (
                     f"No hay tipo de cambio para {currency}->{base_currency} "
                     f"en {year}-{month:02d}. Usando tasa de "
-                    f"{record.year}-{record.month:02d}: {record.rate}"
+                    f"{rec_year}-{rec_month:02d}: {rate}"
                 )
-            return record.rate, warning
-
-        # Intentar búsqueda inversa
-        inv = (
-            ExchangeRate.objects.filter(
-                Q(year__lt=year) | Q(year=year, month__lte=month),
-                currency=base_currency,
-                base_currency=currency,
-            )
-            .order_by("-year", "-month")
-            .first()
-        )
+            return rate, warning
 
-        if inv:
-            if inv.year != year or inv.month != month:
+        if inverse:
+            inv_year, inv_month, inv_rate = inverse
+            if inv_year != year or inv_month != month:
                 warning = (
                     f"No hay tipo de cambio para {currency}->{base_currency} "
                     f"en {year}-{month:02d}. Usando tasa inversa de "
-                    f"{inv.year}-{inv.month:02d}"
+                    f"{inv_year}-{inv_month:02d}"
                 )
-            return Decimal(1) / inv.rate, warning
+            return Decimal(1) / inv_rate, warning
 
         # Si no hay ninguna tasa, usar tasa estática como fallback y advertir
         try:
@@ -218,6 +231,52 @@ class FxService:
             )
             raise ValueError(msg)
 
+    @staticmethod
+    def select_rate(currency, base_currency, direct_rate=None, inverse_rate=None):
+        """
+        Tasa efectiva a partir de tasas ya resueltas (p. ej. por una subconsulta
+        SQL), con la misma precedencia que _rate_from_records: directa, inversa
+        o estática. No genera advertencias porque no conoce el mes del registro.
+
+        Args:
+            currency: Moneda origen
+            base_currency: Moneda destino
+            direct_rate: Tasa currency->base_currency, o None
+            inverse_rate: Tasa base_currency->currency, o None
+
+        Returns:
+            Decimal: Tasa a aplicar
+
+        Raises:
+            ValueError: Si no hay ningún tipo de cambio disponible
+        """
+        if currency == base_currency:
+            return Decimal(1)
+        if direct_rate is not None:
+            return direct_rate
+        if inverse_rate is not None:
+            return Decimal(1) / inverse_rate
+        try:
+            return CurrencyConverter.get_exchange_rate(currency, base_currency)
+        except ValueError:
+            msg = f"No hay tipo de cambio para {currency}->{base_currency}"
+            raise ValueError(msg)
+
+    @staticmethod
+    def _apply_rate(amount_cents, rate):
+        """
+        Aplica una tasa a un monto en centavos con el redondeo estándar del servicio.
+
+        Returns:
+            int: Monto convertido en centavos
+        """
+        # Convertir de centavos a unidades decimales
+        amount_decimal = Decimal(str(amount_cents)) / Decimal(100)
+        # Multiplicar por la tasa
+        converted_decimal = amount_decimal * rate
+        # Convertir de vuelta a centavos, redondeando apropiadamente
+        return int((converted_decimal * Decimal(100)).quantize(Decimal(1)))
+
     @staticmethod
     def convert_amount(amount_cents: int, from_currency: str, to_currency: str, ref_date: date):
         """
@@ -236,14 +295,53 @@ class FxService:
             return amount_cents, Decimal(1), None
 
         rate, warning = FxService._get_rate_record(from_currency, to_currency, ref_date)
-        # Convertir de centavos a unidades decimales
-        amount_decimal = Decimal(str(amount_cents)) / Decimal(100)
-        # Multiplicar por la tasa
-        converted_decimal = amount_decimal * rate
-        # Convertir de vuelta a centavos, redondeando apropiadamente
-        converted_cents = int((converted_decimal * Decimal(100)).quantize(Decimal(1)))
+        return FxService._apply_rate(amount_cents, rate), rate, warning
+
+    @staticmethod
+    def convert_many(amounts_cents, from_currencies, ref_dates, to_currency, skip_errors=False):
+        """
+        Convierte en lote montos en centavos a una moneda destino.
 
-        return converted_cents, rate, warning
+        Cada tasa distinta (par de monedas y mes) se resuelve una sola vez y el
+        redondeo es idéntico al de convert_amount.
+
+        Args:
+            amounts_cents: Secuencia de montos en centavos
+            from_currencies: Secuencia paralela de monedas origen
+            ref_dates: Secuencia paralela de fechas de referencia
+            to_currency: Moneda destino
+            skip_errors: Si es True, las filas sin tipo de cambio devuelven None como
+                monto y tasa (y el error como advertencia) en lugar de lanzar ValueError
+
+        Returns:
+            tuple: (converted_cents, rates, warnings) - tres listas paralelas a la entrada
+
+        Raises:
+            ValueError: Si las secuencias no tienen el mismo largo o falta un tipo de
+                cambio (y skip_errors es False)
+        """
+        if not len(amounts_cents) == len(from_currencies) == len(ref_dates):
+            msg = "Las secuencias de montos, monedas y fechas deben tener el mismo largo"
+            raise ValueError(msg)
+
+        fx = FxContext(to_currency)
+        converted_list = []
+        rates = []
+        warnings = []
+        for amount_cents, from_currency, ref_date in zip(
+            amounts_cents, from_currencies, ref_dates, strict=True
+        ):
+            try:
+                converted, rate, warning = fx.convert(amount_cents, from_currency, ref_date)
+            except ValueError as e:
+                if not skip_errors:
+                    raise
+                converted, rate, warning = None, None, str(e)
+            converted_list.append(converted)
+            rates.append(rate)
+            warnings.append(warning)
+
+        return converted_list, rates, warnings
 
     @staticmethod
     def convert_to_base(amount_cents: int, txn_currency: str, base_currency: str, ref_date: date):
@@ -283,3 +381,95 @@ class FxService:
             )
             raise ValueError(msg)
         return True
+
+
+class FxContext:
+    """
+    Contexto de conversión con alcance de request.
+
+    Resuelve la moneda base una sola vez, toma un único snapshot de tipos de
+    cambio y memoriza cada (moneda, año, mes) resuelto. Produce exactamente los
+    mismos montos, tasas y advertencias que FxService.convert_amount.
+
+    Uso:
+        fx = FxContext.for_user(request.user)
+        fx.prefetch(["USD", "EUR"])
+        converted, rate, warning = fx.convert(10000, "USD", date(2025, 1, 15))
+    """
+
+    def __init__(self, base_currency):
+        self.base_currency = base_currency
+        self._snapshot = None
+        # (moneda, year, month) -> (rate, warning, error)
+        self._resolved = {}
+
+    @classmethod
+    def for_user(cls, user):
+        """Crear un contexto con la moneda base del usuario"""
+        return cls(FxService.get_base_currency(user))
+
+    def prefetch(self, currencies):
+        """
+        Asegurar que las tasas estén cargadas antes de convertir.
+
+        Todas las monedas se resuelven contra un mismo snapshot, por lo que no
+        hay consultas adicionales por moneda ni por fila.
+
+        Args:
+            currencies: Iterable de códigos de moneda origen
+        """
+        if any(c and c != self.base_currency for c in currencies):
+            self._get_snapshot()
+
+    def get_rate(self, currency, ref_date):
+        """
+        Tasa y advertencia para convertir `currency` a la moneda base en el mes de ref_date.
+
+        Returns:
+            tuple: (rate, warning)
+
+        Raises:
+            ValueError: Si no hay ningún tipo de cambio disponible
+        """
+        if currency == self.base_currency:
+            return Decimal(1), None
+
+        year, month = ref_date.year, ref_date.month
+        key = (currency, year, month)
+        if key not in self._resolved:
+            snapshot = self._get_snapshot()
+            try:
+                rate, warning = FxService._rate_from_records(
+                    currency,
+                    self.base_currency,
+                    year,
+                    month,
+                    record=snapshot.latest(currency, self.base_currency, year, month),
+                    inverse=snapshot.latest(self.base_currency, currency, year, month),
+                )
+                self._resolved[key] = (rate, warning, None)
+            except ValueError as e:
+                self._resolved[key] = (None, None, e)
+
+        rate, warning, error = self._resolved[key]
+        if error is not None:
+            raise error
+        return rate, warning
+
+    def convert(self, amount_cents, currency, ref_date):
+        """
+        Convertir un monto en centavos a la moneda base.
+
+        Returns:
+            tuple: (converted_cents, rate, warning)
+        """
+        if currency == self.base_currency:
+            return amount_cents, Decimal(1), None
+
+        rate, warning = self.get_rate(currency, ref_date)
+        return FxService._apply_rate(amount_cents, rate), rate, warning
+
+    def _get_snapshot(self):
+        if self._snapshot is None:
+            self._snapshot = ExchangeRateSnapshot.get()
+        return self._snapshot
@@ -0,0 +1,126 @@
+"""
+Snapshot en memoria de los tipos de cambio (ExchangeRate)
+
+La tabla de tipos de cambio es pequeña y cambia muy poco, pero se consulta en
+el bucle más interno de analytics, presupuestos y dashboard. Este módulo
+mantiene por proceso una copia de todas las tasas indexadas por par de monedas
+y ordenadas por (year, month), con búsqueda binaria del "último registro en o
+antes del mes".
+
+Consistencia entre workers:
+- En el propio proceso, las señales post_save/post_delete de ExchangeRate
+  invalidan el snapshot inmediatamente (ver utils/signals.py).
+- Entre procesos, cada snapshot guarda una marca de versión calculada en base
+  de datos (conteo, último id y última actualización). Pasados
+  FX_RATES_SNAPSHOT_TTL segundos se vuelve a calcular la marca y, si cambió, se
+  recarga la tabla.
+- Un snapshot cargado dentro de un bloque atómico no se da por confirmado (la
+  transacción podría revertirse), así que se revalida en el siguiente uso.
+"""
+
+import logging
+import time
+from bisect import bisect_right
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_TTL = 5
+
+
+class ExchangeRateSnapshot:
+    """
+    Copia inmutable de todos los tipos de cambio en un instante.
+
+    Uso:
+        snapshot = ExchangeRateSnapshot.get()
+        record = snapshot.latest("USD", "COP", 2025, 3)  # (year, month, rate) o None
+    """
+
+    _current = None
+
+    def __init__(self, stamp, rows):
+        self.stamp = stamp
+        self.checked_at = time.monotonic()
+        self.confirmed = False
+
+        pairs = {}
+        for currency, base_currency, year, month, rate in rows:
+            pairs.setdefault((currency, base_currency), []).append((year, month, rate))
+
+        self._records = {}
+        self._keys = {}
+        for pair, records in pairs.items():
+            records.sort(key=lambda record: (record[0], record[1]))
+            self._records[pair] = records
+            self._keys[pair] = [(year, month) for year, month, _ in records]
+
+    def latest(self, currency, base_currency, year, month):
+        """
+        Último registro del par con (year, month) <= al mes indicado.
+
+        Returns:
+            tuple | None: (year, month, rate) o None si no hay registros
+        """
+        keys = self._keys.get((currency, base_currency))
+        if not keys:
+            return None
+        index = bisect_right(keys, (year, month))
+        return self._records[(currency, base_currency)][index - 1] if index else None
+
+    def pairs(self):
+        """Pares (currency, base_currency) con al menos una tasa"""
+        return list(self._records)
+
+    @classmethod
+    def get(cls):
+        """
+        Devuelve un snapshot vigente, recargándolo si la marca de versión cambió.
+
+        Returns:
+            ExchangeRateSnapshot
+        """
+        snapshot = cls._current
+        now = time.monotonic()
+        ttl = getattr(settings, "FX_RATES_SNAPSHOT_TTL", DEFAULT_SNAPSHOT_TTL)
+
+        if snapshot is not None and snapshot.confirmed and now - snapshot.checked_at < ttl:
+            return snapshot
+
+        stamp = cls._current_stamp()
+        if snapshot is None or snapshot.stamp != stamp:
+            snapshot = cls._load(stamp)
+            cls._current = snapshot
+
+        snapshot.checked_at = now
+        snapshot.confirmed = not connection.in_atomic_block
+        return snapshot
+
+    @classmethod
+    def invalidate(cls):
+        """Descartar el snapshot del proceso actual"""
+        cls._current = None
+
+    @staticmethod
+    def _current_stamp():
+        """Marca de versión de la tabla de tipos de cambio (una consulta agregada)"""
+        from utils.models import ExchangeRate
+
+        stamp = ExchangeRate.objects.order_by().aggregate(
+            count=Count("id"), last_id=Max("id"), last_update=Max("updated_at")
+        )
+        return stamp["count"], stamp["last_id"], stamp["last_update"]
+
+    @classmethod
+    def _load(cls, stamp):
+        from utils.models import ExchangeRate
+
+        rows = ExchangeRate.objects.order_by().values_list(
+            "currency", "base_currency", "year", "month", "rate"
+        )
+        snapshot = cls(stamp, rows)
+        logger.debug(f"Snapshot de tipos de cambio recargado: {len(snapshot._records)} pares")
+        return snapshot
@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.models import ExchangeRate
+from utils.rate_snapshot import ExchangeRateSnapshot
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_exchange_rate_snapshot(sender, instance, **kwargs):
+    """
+    Invalida el snapshot de tipos de cambio del proceso cuando cambia una tasa.
+
+    Se invalida de inmediato (para que la misma transacción vea el cambio) y de
+    nuevo al confirmar, por si otro hilo recargó el snapshot antes del commit.
+    Los demás workers detectan el cambio por la marca de versión.
+    """
+    ExchangeRateSnapshot.invalidate()
+    transaction.on_commit(ExchangeRateSnapshot.invalidate)